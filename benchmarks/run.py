@@ -0,0 +1,225 @@
+"""
+Endpoint benchmarks: drives the real application (`src.main:app`, lifespan included) against
+the in-process storage engine and reports latency percentiles and throughput per endpoint.
+
+    python3 benchmarks/run.py [--concurrency 8] [--requests 100] [--dataset 500]
+    python3 benchmarks/run.py --save-baseline      # record benchmarks/baseline.json
+    python3 benchmarks/run.py --scenarios get_saree,list_expenses
+
+Results are compared with the baseline recorded with the same concurrency and dataset size:
+the run fails (exit code 1) when a scenario's p95 latency grows, or its throughput drops, by
+more than `--threshold` (default 25%), or when any request fails. Baselines depend on the
+machine; record them on the machine that runs the gate.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# The stand-in store: every table, the read model and the job queue live in process.
+os.environ.setdefault("COUTURE_STORAGE_BACKEND", "memory")
+os.environ.setdefault("COUTURE_READ_MODEL_PATH", ":memory:")
+os.environ.setdefault("COUTURE_JOBS_PATH", ":memory:")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.main import app  # noqa: E402
+from src.models import ExpenseCreate, ProcurementCreate, User  # noqa: E402
+from src.services.expense_service import ExpenseService  # noqa: E402
+from src.services.procurement_service import ProcurementService  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PASSWORD = "benchmark-password"
+
+
+class Dataset:
+    """Users, sarees, procurements and expenses seeded before the run, and their auth headers."""
+
+    def __init__(self, client: TestClient, size: int, approvals: int):
+        self.staff = self._register(client, "bench-staff@example.com", "staff")
+        self.manager = self._register(client, "bench-manager@example.com", "manager")
+        self.staff_headers = self._login(client, self.staff)
+        self.manager_headers = self._login(client, self.manager)
+        # Seeded through the services: the dataset is setup, not part of the measurement.
+        procurements, expenses = ProcurementService(), ExpenseService()
+        self.saree_ids = []
+        for n in range(size):
+            procurement = procurements.submit_procurement(
+                ProcurementCreate(saree_name=f"Benchmark saree {n}", procurement_cost_inr=1000.0 + n), self.staff)
+            self.saree_ids.append(procurement["saree_id"])
+            expenses.create_expense(ExpenseCreate(description=f"Benchmark expense {n}", amount=10.0 + n), self.staff)
+        # Each approval request needs a procurement of its own that is still pending.
+        self._pending = [
+            procurements.submit_procurement(
+                ProcurementCreate(saree_name=f"Approval saree {n}", procurement_cost_inr=2000.0), self.staff)["id"]
+            for n in range(approvals)
+        ]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _register(client: TestClient, email: str, role: str) -> User:
+        response = client.post("/users/register", json={"email": email, "password": PASSWORD, "role": role})
+        response.raise_for_status()
+        return User(**response.json())
+
+    @staticmethod
+    def _login(client: TestClient, user: User) -> dict:
+        response = client.post("/token", data={"username": user.email, "password": PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def next_pending(self) -> str:
+        with self._lock:
+            return self._pending.pop()
+
+
+# Each scenario sends one request and returns the response; `n` is the request number.
+SCENARIOS: dict[str, Callable] = {
+    "token": lambda client, data, n: client.post(
+        "/token", data={"username": data.staff.email, "password": PASSWORD}),
+    "list_sarees": lambda client, data, n: client.get("/sarees/"),
+    "get_saree": lambda client, data, n: client.get(f"/sarees/{random.choice(data.saree_ids)}"),
+    "submit_procurement": lambda client, data, n: client.post(
+        "/procurements/", headers=data.staff_headers,
+        json={"saree_name": f"Submitted saree {n}", "procurement_cost_inr": 1500.0}),
+    "pending_procurements": lambda client, data, n: client.get("/procurements/pending", headers=data.manager_headers),
+    "approve_procurement": lambda client, data, n: client.post(
+        f"/procurements/{data.next_pending()}/approve", headers=data.manager_headers,
+        json={"additional_costs_inr": 100.0}),
+    "list_expenses": lambda client, data, n: client.get("/expenses/", headers=data.manager_headers),
+}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(client: TestClient, data: Dataset, scenario: Callable, requests: int, concurrency: int,
+                 warmup: int) -> dict:
+    """Sends `requests` requests from `concurrency` threads; returns latency percentiles and throughput."""
+    for n in range(warmup):
+        scenario(client, data, -n - 1)
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def send(n: int) -> None:
+        started = time.perf_counter()
+        response = scenario(client, data, n)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors.append(f"{response.status_code} {response.text[:200]}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(requests)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "rps": round(requests / wall, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def run(scenarios: list[str], concurrency: int, requests: int, dataset_size: int, warmup: int) -> dict:
+    """Seeds a dataset, runs the scenarios in order and returns the results document."""
+    with TestClient(app) as client:
+        approvals = requests + warmup if "approve_procurement" in scenarios else 0
+        data = Dataset(client, dataset_size, approvals)
+        results = {}
+        for name in scenarios:
+            results[name] = run_scenario(client, data, SCENARIOS[name], requests, concurrency, warmup)
+    return {
+        "config": {"concurrency": concurrency, "requests": requests, "dataset": dataset_size},
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "scenarios": results,
+    }
+
+
+def compare(results: dict, baseline: Optional[dict], threshold: float) -> list[str]:
+    """
+    The regressions of `results` against `baseline`: failed requests, and p95 latency or
+    throughput worse than the baseline by more than `threshold` (a fraction).
+    Scenarios are only compared with a baseline recorded with the same configuration.
+    """
+    problems = [f"{name}: {result['errors']} failed requests (first: {result['first_error']})"
+                for name, result in results["scenarios"].items() if result["errors"]]
+    if baseline is None or baseline.get("config") != results["config"]:
+        return problems
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            problems.append(f"{name}: p95 {result['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if result["rps"] < base["rps"] * (1 - threshold):
+            problems.append(f"{name}: {result['rps']} req/s vs baseline {base['rps']} req/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints against the in-process store.")
+    parser.add_argument('--scenarios', default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client threads")
+    parser.add_argument('--requests', type=int, default=100, help="Measured requests per scenario")
+    parser.add_argument('--dataset', type=int, default=500, help="Sarees, procurements and expenses seeded")
+    parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Tolerated regression (fraction)")
+    parser.add_argument('--save-baseline', action='store_true', help="Record the results as the new baseline")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = run(scenarios, args.concurrency, args.requests, args.dataset, args.warmup)
+    print(f"{'scenario':<22}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results["scenarios"].items():
+        print(f"{name:<22}{result['rps']:>9}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['errors']:>8}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}.")
+        return
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print(f"Baseline was recorded with {baseline.get('config')}; latency and throughput not compared.")
+    else:
+        print(f"No baseline at {args.baseline}; latency and throughput not compared.")
+    problems = compare(results, baseline, args.threshold)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares the fast list serialization (src/responses.py) with FastAPI's default response
+path (validate against `response_model`, then serialize) on generated stored items.
+
+    python3 benchmarks/serialization.py [--items 1000] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from decimal import Decimal
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from src.models import Expense, Saree  # noqa: E402
+from src.responses import encode_json, serialize_items  # noqa: E402
+
+
+def stored_sarees(count: int) -> list[dict]:
+    """Saree items as the table returns them (numbers as Decimal)."""
+    return [{
+        "id": str(uuid.uuid4()), "name": f"Mysore silk saree {n}", "description": "Pure silk, zari border",
+        "procurement_cost_inr": Decimal("12500.50") + n, "markup_percentage": Decimal("20"),
+        "selling_price_usd": Decimal("180.25"), "image_urls": [], "procurement_status": "approved",
+        "procurement_id": str(uuid.uuid4()), "version": Decimal(2),
+    } for n in range(count)]
+
+
+def stored_expenses(count: int) -> list[dict]:
+    """Expense items as the table returns them, including index attributes that are not in the model."""
+    return [{
+        "id": str(uuid.uuid4()), "description": f"Courier {n}", "amount": Decimal("42.10") + n, "currency": "USD",
+        "category": "operational", "submitted_by_user_id": str(uuid.uuid4()),
+        "submission_date": "2025-03-01T10:15:00.250000Z", "status": "pending", "version": Decimal(1),
+        "status_submitted": "pending#2025-03-01T10:15:00.250000Z",
+    } for n in range(count)]
+
+
+def time_per_call(function: Callable, repeat: int) -> float:
+    """Best-of-three mean duration of `function` in milliseconds."""
+    function()
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1000
+
+
+def compare_paths(model, items: list[dict], repeat: int) -> dict:
+    """Milliseconds per response for both paths; fails if they produce different documents."""
+    adapter = TypeAdapter(List[model])
+
+    def default():
+        return adapter.dump_json(adapter.validate_python(items))
+
+    def fast():
+        return encode_json(serialize_items(model, items))
+
+    if json.loads(default()) != json.loads(fast()):
+        raise AssertionError(f"The fast path changes the {model.__name__} response")
+    default_ms, fast_ms = time_per_call(default, repeat), time_per_call(fast, repeat)
+    return {"default_ms": round(default_ms, 3), "fast_ms": round(fast_ms, 3), "speedup": round(default_ms / fast_ms, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization.")
+    parser.add_argument('--items', type=int, default=1000, help="Items per response")
+    parser.add_argument('--repeat', type=int, default=50, help="Responses per measurement")
+    args = parser.parse_args()
+
+    print(f"{'model':<10}{'items':>7}{'default ms':>12}{'fast ms':>10}{'speedup':>9}")
+    for model, items in ((Saree, stored_sarees(args.items)), (Expense, stored_expenses(args.items))):
+        result = compare_paths(model, items, args.repeat)
+        print(f"{model.__name__:<10}{args.items:>7}{result['default_ms']:>12}{result['fast_ms']:>10}"
+              f"{result['speedup']:>8}x")
+
+
+if __name__ == '__main__':
+    main()
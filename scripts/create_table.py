@@ -1,91 +1,194 @@
-import boto3
-from botocore.exceptions import ClientError
+"""
+Creates the DynamoDB tables declared in src/services/schema.py, or brings existing ones up to
+date.
+
+    python3 scripts/create_table.py [--timeout 60] [--drop-unused-indexes]
+
+The script waits for the endpoint to answer (DynamoDB Local may still be starting), then
+provisions every table in parallel: a missing table is created with all its GSIs, an existing
+one gets the GSIs it lacks added with UpdateTable, and TTL is enabled where declared. GSIs an
+existing table has but no longer declares (e.g. `status-id` on procurement_records, replaced by
+`status-procurement_date`) are reported, and only deleted with `--drop-unused-indexes`. It is
+safe to re-run; a bootstrap costs about as much as creating the slowest table.
+"""
+import argparse
+import copy
+import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.config import get_settings  # noqa: E402
+from src.services.schema import TABLES  # noqa: E402
+
+POLL_SECONDS = 0.2
+
 
+def provisioned_throughput() -> dict:
+    settings = get_settings()
+    return {
+        'ReadCapacityUnits': int(settings["dynamodb_read_capacity_units"]),
+        'WriteCapacityUnits': int(settings["dynamodb_write_capacity_units"]),
+    }
 
-def create_table(dynamodb_resource, table_name, key_schema, attr_definitions, gsis=None):
-    """Generic function to create a DynamoDB table."""
-    print(f"Attempting to create table: {table_name}")
+
+def wait_for_endpoint(client, timeout_seconds: float) -> None:
+    """Polls ListTables until the endpoint answers, instead of sleeping a fixed time."""
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        try:
+            client.list_tables(Limit=1)
+            return
+        except (BotoCoreError, ClientError) as e:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"DynamoDB did not answer within {timeout_seconds}s: {e}") from e
+            time.sleep(POLL_SECONDS)
+
+
+def describe(client, table_name: str):
+    """The table description, or None if the table does not exist."""
     try:
-        provisioned_throughput = {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-        
-        table_params = {
-            'TableName': table_name,
-            'KeySchema': key_schema,
-            'AttributeDefinitions': attr_definitions,
-            'ProvisionedThroughput': provisioned_throughput
-        }
-        
-        if gsis:
-            for gsi in gsis:
-                gsi['ProvisionedThroughput'] = provisioned_throughput
-            table_params['GlobalSecondaryIndexes'] = gsis
-
-        table = dynamodb_resource.create_table(**table_params)
-        table.wait_until_exists()
-        print(f"Table '{table_name}' created successfully.")
-        return table
+        return client.describe_table(TableName=table_name)['Table']
     except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceInUseException':
-            print(f"Table '{table_name}' already exists.")
-        else:
-            raise e
+        if e.response['Error']['Code'] == 'ResourceNotFoundException':
+            return None
+        raise
 
 
-def main():
-    """Initializes DynamoDB tables."""
-    # Give DynamoDB Local a moment to start up
-    time.sleep(5)
+def wait_until_active(client, table_name: str) -> dict:
+    """Polls DescribeTable until the table and every one of its GSIs are ACTIVE."""
+    while True:
+        table = describe(client, table_name)
+        if table is not None and table['TableStatus'] == 'ACTIVE' and all(
+            gsi.get('IndexStatus', 'ACTIVE') == 'ACTIVE' for gsi in table.get('GlobalSecondaryIndexes', [])
+        ):
+            return table
+        time.sleep(POLL_SECONDS)
 
-    # When running locally, we need to provide dummy credentials and a region.
-    dynamodb = boto3.resource(
-        'dynamodb',
-        endpoint_url="http://localhost:8000",
-        region_name='us-east-1',
-        aws_access_key_id='dummy',
-        aws_secret_access_key='dummy'
-    )
 
-    # Users table
-    create_table(
-        dynamodb_resource=dynamodb,
-        table_name='users',
-        key_schema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-        attr_definitions=[
-            {'AttributeName': 'id', 'AttributeType': 'S'},
-            {'AttributeName': 'email', 'AttributeType': 'S'}
-        ],
-        gsis=[{
-            'IndexName': 'email-index',
-            'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
-            'Projection': {'ProjectionType': 'ALL'}
-        }]
-    )
+def create_params(table_name: str, definition: dict) -> dict:
+    """The CreateTable request for a table of the schema, GSIs included."""
+    params = {
+        'TableName': table_name,
+        'KeySchema': definition['KeySchema'],
+        'AttributeDefinitions': definition['AttributeDefinitions'],
+        'ProvisionedThroughput': provisioned_throughput(),
+    }
+    if definition.get('GlobalSecondaryIndexes'):
+        gsis = copy.deepcopy(definition['GlobalSecondaryIndexes'])
+        for gsi in gsis:
+            gsi['ProvisionedThroughput'] = provisioned_throughput()
+        params['GlobalSecondaryIndexes'] = gsis
+    return params
+
 
-    # Sarees table
-    create_table(
-        dynamodb_resource=dynamodb,
-        table_name='sarees',
-        key_schema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-        attr_definitions=[{'AttributeName': 'id', 'AttributeType': 'S'}]
+def missing_indexes(definition: dict, table: dict) -> list[dict]:
+    """The GSIs declared for a table that its description does not have yet."""
+    existing = {gsi['IndexName'] for gsi in table.get('GlobalSecondaryIndexes', [])}
+    return [gsi for gsi in definition.get('GlobalSecondaryIndexes', []) if gsi['IndexName'] not in existing]
+
+
+def unused_indexes(definition: dict, table: dict) -> list[str]:
+    """The names of the GSIs a table's description has that are no longer declared for it."""
+    declared = {gsi['IndexName'] for gsi in definition.get('GlobalSecondaryIndexes', [])}
+    return [gsi['IndexName'] for gsi in table.get('GlobalSecondaryIndexes', []) if gsi['IndexName'] not in declared]
+
+
+def add_index(client, table_name: str, definition: dict, gsi: dict) -> None:
+    """Adds one GSI (DynamoDB accepts a single index creation per UpdateTable call)."""
+    names = {key['AttributeName'] for key in gsi['KeySchema']}
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[a for a in definition['AttributeDefinitions'] if a['AttributeName'] in names],
+        GlobalSecondaryIndexUpdates=[{'Create': {**gsi, 'ProvisionedThroughput': provisioned_throughput()}}],
     )
 
-    # Procurement Records table
-    create_table(
-        dynamodb_resource=dynamodb,
-        table_name='procurement_records',
-        key_schema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-        attr_definitions=[{'AttributeName': 'id', 'AttributeType': 'S'}]
+
+def remove_index(client, table_name: str, index_name: str) -> None:
+    """Deletes one GSI (one index update per UpdateTable call, as for creation)."""
+    client.update_table(
+        TableName=table_name,
+        GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': index_name}}],
     )
 
-    # Expenses table
-    create_table(
-        dynamodb_resource=dynamodb,
-        table_name='expenses',
-        key_schema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-        attr_definitions=[{'AttributeName': 'id', 'AttributeType': 'S'}]
+
+def enable_ttl(client, table_name: str, attribute: str) -> bool:
+    """Enables TTL on `attribute` unless it already is; returns whether it changed anything."""
+    current = client.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+    if current.get('AttributeName') == attribute and current.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        return False
+    client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute},
     )
+    return True
+
+
+def provision_table(client, table_name: str, definition: dict, drop_unused: bool = False) -> list[str]:
+    """Creates or updates one table until it matches its definition; returns what was done."""
+    actions = []
+    table = describe(client, table_name)
+    if table is None:
+        try:
+            client.create_table(**create_params(table_name, definition))
+            actions.append("created")
+        except ClientError as e:
+            # Another bootstrap created it in the meantime: diff it like any existing table.
+            if e.response['Error']['Code'] != 'ResourceInUseException':
+                raise
+    table = wait_until_active(client, table_name)
+    for gsi in missing_indexes(definition, table):
+        add_index(client, table_name, definition, gsi)
+        # The next index can only be added once this one is built.
+        table = wait_until_active(client, table_name)
+        actions.append(f"added index {gsi['IndexName']}")
+    for index_name in unused_indexes(definition, table):
+        if not drop_unused:
+            actions.append(f"unused index {index_name} left in place")
+            continue
+        remove_index(client, table_name, index_name)
+        table = wait_until_active(client, table_name)
+        actions.append(f"removed index {index_name}")
+    if definition.get('TimeToLiveAttribute') and enable_ttl(client, table_name, definition['TimeToLiveAttribute']):
+        actions.append(f"enabled TTL on {definition['TimeToLiveAttribute']}")
+    return actions
+
+
+def provision(client, tables: dict, workers: int, drop_unused: bool = False) -> dict:
+    """Provisions every table concurrently; returns the actions taken per table."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {name: pool.submit(provision_table, client, name, definition, drop_unused)
+                   for name, definition in tables.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def main():
+    """Initializes DynamoDB tables."""
+    parser = argparse.ArgumentParser(description="Create or update the DynamoDB tables.")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds to wait for the endpoint to answer")
+    parser.add_argument('--drop-unused-indexes', action='store_true',
+                        help="Delete GSIs that existing tables have but no longer declare")
+    args = parser.parse_args()
+
+    endpoint_url = get_settings()["dynamodb_endpoint_url"]
+    # When running locally, we need to provide dummy credentials and a region.
+    credentials = {'aws_access_key_id': 'dummy', 'aws_secret_access_key': 'dummy'} if endpoint_url else {}
+    # boto3 clients are thread-safe (resources are not), so the workers share one.
+    client = boto3.client('dynamodb', endpoint_url=endpoint_url, region_name='us-east-1', **credentials)
+
+    started = time.monotonic()
+    wait_for_endpoint(client, args.timeout)
+    # Table layouts (keys and GSIs) are declared in src/services/schema.py, which the
+    # in-process storage engine reads too.
+    for table_name, actions in provision(client, TABLES, workers=len(TABLES), drop_unused=args.drop_unused_indexes).items():
+        print(f"Table '{table_name}': {', '.join(actions) if actions else 'up to date'}.")
+    print(f"Tables ready in {time.monotonic() - started:.1f}s.")
 
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,329 @@
+"""
+Generates a realistic synthetic dataset for scale and performance testing.
+
+    python3 scripts/generate_data.py --procurements 1000000 --expenses 2000000 [--users 500]
+    python3 scripts/generate_data.py --procurements 1000000 --dump data/    # write files instead
+    python3 scripts/generate_data.py --load data/                           # reload the files
+
+Users get all four roles (mostly staff). Each procurement comes with its saree and, once
+approved with additional costs, the procurement-related expense the approval books. Standalone
+expenses cover every category. Activity is skewed the way real data is: a few buyers submit
+most procurements, a few managers review most of them, amounts are log-normal, and items are
+spread over `--days` with more of them recent. Recent items are mostly pending, older ones
+mostly approved or rejected. Ids are UUIDv7s back-dated to each item's time, so
+time-ordered indexes and pagination behave as they would on real data.
+
+Generation is split into `--workers` shards, each written with parallel BatchWriteItem calls
+(or to its own gzipped JSON Lines file per table with --dump, for fast reloads). Items are
+stored through the model codecs, in the same format as the application writes them. Every
+generated user's password is `password`. Writes bypass the application, so run
+scripts/rebuild_read_model.py afterwards if reports should include the data. The DynamoDB
+endpoint comes from the usual COUTURE_* settings.
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+from typing import Iterator, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.config import get_settings  # noqa: E402
+from src.models import Expense, ExpenseCategory, ProcurementRecord, Saree, User, UserRole  # noqa: E402
+from src.security import hash_password  # noqa: E402
+from src.services.codec import codec_for  # noqa: E402
+from src.services.dynamodb import DynamoDBService  # noqa: E402
+from src.services.ids import derived_id, new_id  # noqa: E402
+
+ROLE_WEIGHTS = {UserRole.staff: 80, UserRole.manager: 15, UserRole.partner: 4, UserRole.admin: 1}
+CATEGORY_WEIGHTS = {
+    ExpenseCategory.general: 35,
+    ExpenseCategory.operational: 30,
+    ExpenseCategory.marketing: 20,
+    ExpenseCategory.procurement_related: 15,
+}
+FABRICS = ["Kanjivaram silk", "Banarasi silk", "Chanderi", "Tussar", "Mysore silk", "Cotton", "Linen",
+           "Georgette", "Chiffon", "Organza", "Patola", "Paithani", "Kasavu", "Ilkal", "Sambalpuri"]
+STYLES = ["zari border", "temple border", "floral butta", "checked", "plain", "block print",
+          "ikat", "bandhani", "embroidered", "brocade pallu"]
+EXPENSE_DESCRIPTIONS = {
+    ExpenseCategory.general: ["Office supplies", "Courier charges", "Bank charges", "Stationery"],
+    ExpenseCategory.operational: ["Shop rent", "Electricity bill", "Internet", "Packaging material", "Staff travel"],
+    ExpenseCategory.marketing: ["Instagram promotion", "Catalog photoshoot", "Exhibition stall", "Flyers"],
+    ExpenseCategory.procurement_related: ["Weaver visit travel", "Freight to warehouse", "Quality inspection"],
+}
+DEFAULT_PASSWORD = "password"
+FLUSH_SIZE = 1000
+
+
+def zipf_cumulative_weights(count: int, exponent: float = 1.1) -> list[float]:
+    """Cumulative Zipf weights: the first of `count` choices is picked most often."""
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def skewed_time(rng: random.Random, now: datetime, days: int) -> datetime:
+    """A time in the last `days` days, more likely recent (the business grows)."""
+    return now - timedelta(days=days * rng.random() ** 1.6)
+
+
+def review_outcome(rng: random.Random, age: timedelta) -> str:
+    """Pending, approved or rejected: recent items are mostly still pending."""
+    pending_share = 0.7 if age < timedelta(days=7) else 0.2 if age < timedelta(days=30) else 0.02
+    if rng.random() < pending_share:
+        return "pending"
+    return "approved" if rng.random() < 0.85 else "rejected"
+
+
+def generate_users(rng: random.Random, count: int, now: datetime, days: int) -> list[dict]:
+    """Users across every role, weighted towards staff (at least one user per role)."""
+    hashed_password = hash_password(DEFAULT_PASSWORD)  # bcrypt is slow: hash once
+    roles = list(UserRole)[:count] + rng.choices(list(ROLE_WEIGHTS), weights=list(ROLE_WEIGHTS.values()),
+                                                 k=max(0, count - len(UserRole)))
+    users = []
+    for n, role in enumerate(roles):
+        user = User(
+            id=new_id(skewed_time(rng, now, days)),
+            email=f"{role.value}{n}@example.com",
+            full_name=f"{role.value.title()} User {n}",
+            role=role,
+            hashed_password=hashed_password,
+        )
+        users.append(codec_for(User).to_item(user))
+    return users
+
+
+class Shard:
+    """Generates one shard of procurements or expenses with its own random stream."""
+
+    def __init__(self, seed: str, users: list[dict], now: datetime, days: int):
+        self.rng = random.Random(seed)
+        self.now = now
+        self.days = days
+        staff = [u["id"] for u in users if u["role"] == UserRole.staff.value]
+        reviewers = [u["id"] for u in users if u["role"] != UserRole.staff.value]
+        # Shuffled per shard so the heavy submitters differ, but the skew holds.
+        self.submitters = self.rng.sample(staff, len(staff)) or reviewers
+        self.reviewers = self.rng.sample(reviewers, len(reviewers))
+        self.submitter_weights = zipf_cumulative_weights(len(self.submitters))
+        self.reviewer_weights = zipf_cumulative_weights(len(self.reviewers))
+
+    def _submitter(self) -> str:
+        return self.rng.choices(self.submitters, cum_weights=self.submitter_weights)[0]
+
+    def _reviewer(self) -> str:
+        return self.rng.choices(self.reviewers, cum_weights=self.reviewer_weights)[0]
+
+    def _review_time(self, submitted: datetime) -> datetime:
+        return min(self.now, submitted + timedelta(hours=self.rng.expovariate(1 / 30)))
+
+    def procurements(self, count: int) -> Iterator[tuple[str, dict]]:
+        """Yields (table name, item) for each procurement, its saree and any approval expense."""
+        rng = self.rng
+        for _ in range(count):
+            submitted = skewed_time(rng, self.now, self.days)
+            procurement_id, saree_id = new_id(submitted), new_id(submitted)
+            cost_inr = round(max(500.0, rng.lognormvariate(math.log(8000), 0.6)), 2)
+            markup = rng.choice([15.0, 20.0, 20.0, 20.0, 25.0, 30.0])
+            name = f"{rng.choice(FABRICS)} {rng.choice(STYLES)}"
+            outcome = review_outcome(rng, self.now - submitted)
+            saree = {"id": saree_id, "name": name, "description": f"{name} saree", "procurement_cost_inr": cost_inr,
+                     "markup_percentage": markup, "procurement_status": outcome, "procurement_id": procurement_id}
+            procurement = {"id": procurement_id, "saree_id": saree_id, "saree_name": name,
+                           "procured_by_user_id": self._submitter(), "cost_inr": cost_inr,
+                           "inr_to_usd_exchange_rate": 0.0, "procurement_date": submitted, "status": outcome}
+            expense: Optional[dict] = None
+            if outcome != "pending":
+                reviewed = self._review_time(submitted)
+                procurement.update(reviewed_by_user_id=self._reviewer(), review_date=reviewed)
+            if outcome == "approved":
+                additional_costs = round(rng.lognormvariate(math.log(800), 0.7), 2) if rng.random() < 0.6 else 0.0
+                exchange_rate = round(rng.uniform(0.0118, 0.0122), 5)
+                price = (cost_inr + additional_costs) * exchange_rate * (1 + markup / 100)
+                procurement.update(inr_to_usd_exchange_rate=exchange_rate, manager_additional_costs_inr=additional_costs,
+                                   manager_markup_override=markup, final_selling_price_usd=price)
+                saree["selling_price_usd"] = price
+                if additional_costs > 0:
+                    # The expense the approval job books (same id derivation).
+                    expense = self._expense(
+                        ExpenseCategory.procurement_related, reviewed,
+                        description=f"Additional procurement costs for saree: {name} (Procurement ID: {procurement_id})",
+                        amount=round(additional_costs * exchange_rate, 2),
+                        submitted_by=procurement["reviewed_by_user_id"],
+                        expense_id=derived_id("procurement-expense", str(procurement_id)),
+                        procurement_id=procurement_id,
+                    )
+            yield "sarees", codec_for(Saree).to_item(Saree(**saree))
+            yield "procurement_records", codec_for(ProcurementRecord).to_item(ProcurementRecord(**procurement))
+            if expense is not None:
+                yield "expenses", expense
+
+    def expenses(self, count: int) -> Iterator[tuple[str, dict]]:
+        """Yields ("expenses", item) for standalone expenses of every category."""
+        categories, weights = list(CATEGORY_WEIGHTS), list(CATEGORY_WEIGHTS.values())
+        for _ in range(count):
+            category = self.rng.choices(categories, weights=weights)[0]
+            submitted = skewed_time(self.rng, self.now, self.days)
+            yield "expenses", self._expense(
+                category, submitted,
+                description=self.rng.choice(EXPENSE_DESCRIPTIONS[category]),
+                amount=round(max(1.0, self.rng.lognormvariate(math.log(120), 1.0)), 2),
+                submitted_by=self._submitter(),
+            )
+
+    def _expense(self, category: ExpenseCategory, submitted: datetime, description: str, amount: float,
+                 submitted_by: str, expense_id=None, procurement_id=None) -> dict:
+        outcome = review_outcome(self.rng, self.now - submitted)
+        expense = {"id": expense_id or new_id(submitted), "description": description, "amount": amount,
+                   "currency": "USD", "category": category, "submitted_by_user_id": submitted_by,
+                   "submission_date": submitted, "status": outcome, "procurement_id": procurement_id}
+        if outcome != "pending":
+            expense.update(reviewed_by_user_id=self._reviewer(), review_date=self._review_time(submitted))
+        return codec_for(Expense).to_item(Expense(**expense))
+
+
+class TableSink:
+    """Buffers items per table and writes them with BatchWriteItem."""
+
+    def __init__(self):
+        self.endpoint_url = get_settings()["dynamodb_endpoint_url"]
+        self._services: dict[str, DynamoDBService] = {}
+        self._buffers: dict[str, list[dict]] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, table_name: str, item: dict) -> None:
+        buffer = self._buffers.setdefault(table_name, [])
+        buffer.append(item)
+        if len(buffer) >= FLUSH_SIZE:
+            self._flush(table_name)
+
+    def _flush(self, table_name: str) -> None:
+        service = self._services.get(table_name)
+        if service is None:
+            service = self._services[table_name] = DynamoDBService(table_name, endpoint_url=self.endpoint_url)
+        items, self._buffers[table_name] = self._buffers[table_name], []
+        service.batch_write(items)
+        self.counts[table_name] = self.counts.get(table_name, 0) + len(items)
+
+    def close(self) -> None:
+        for table_name in list(self._buffers):
+            if self._buffers[table_name]:
+                self._flush(table_name)
+
+
+def _json_number(value):
+    """Stored numbers (Decimal) as JSON numbers; `batch_write` turns them back into Decimals on load."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FileSink:
+    """Writes items to `<directory>/<table>.<shard>.jsonl.gz`, one JSON document per line."""
+
+    def __init__(self, directory: str, shard: str):
+        self.directory = directory
+        self.shard = shard
+        self._files = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, table_name: str, item: dict) -> None:
+        f = self._files.get(table_name)
+        if f is None:
+            path = os.path.join(self.directory, f"{table_name}.{self.shard}.jsonl.gz")
+            f = self._files[table_name] = gzip.open(path, "wt", compresslevel=1)
+        f.write(json.dumps(item, separators=(",", ":"), default=_json_number) + "\n")
+        self.counts[table_name] = self.counts.get(table_name, 0) + 1
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+def split(total: int, parts: int) -> list[int]:
+    """Splits `total` into `parts` near-equal counts."""
+    return [total // parts + (1 if n < total % parts else 0) for n in range(parts)]
+
+
+def run_shard(items: Iterator[tuple[str, dict]], sink) -> dict:
+    for table_name, item in items:
+        sink.add(table_name, item)
+    sink.close()
+    return sink.counts
+
+
+def generate(users: int, procurements: int, expenses: int, days: int, workers: int, seed: int,
+             dump: Optional[str] = None) -> dict:
+    """Generates and stores (or dumps) the dataset; returns item counts per table."""
+    now = datetime.now(timezone.utc)
+    user_items = generate_users(random.Random(f"{seed}:users"), users, now, days)
+    if dump:
+        os.makedirs(dump, exist_ok=True)
+
+    def sink(shard: str):
+        return FileSink(dump, shard) if dump else TableSink()
+
+    totals = run_shard(iter(("users", user) for user in user_items), sink("users"))
+    jobs = []
+    for kind, count in (("procurements", procurements), ("expenses", expenses)):
+        for shard, shard_count in enumerate(split(count, workers)):
+            if shard_count:
+                name = f"{kind}-{shard}"
+                generator = Shard(f"{seed}:{name}", user_items, now, days)
+                jobs.append((getattr(generator, kind)(shard_count), sink(name)))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for counts in pool.map(lambda job: run_shard(*job), jobs):
+            for table_name, count in counts.items():
+                totals[table_name] = totals.get(table_name, 0) + count
+    return totals
+
+
+def load(directory: str, workers: int) -> dict:
+    """Writes every dump file of `directory` back with parallel batch writes."""
+    def read(path: str) -> Iterator[tuple[str, dict]]:
+        table_name = os.path.basename(path).split(".")[0]
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                yield table_name, json.loads(line)
+
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl.gz"))
+    totals: dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for counts in pool.map(lambda path: run_shard(read(path), TableSink()), paths):
+            for table_name, count in counts.items():
+                totals[table_name] = totals.get(table_name, 0) + count
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for scale testing.")
+    parser.add_argument('--users', type=int, default=200, help="Users (all roles, mostly staff)")
+    parser.add_argument('--procurements', type=int, default=10000, help="Procurements, each with its saree")
+    parser.add_argument('--expenses', type=int, default=20000, help="Standalone expenses")
+    parser.add_argument('--days', type=int, default=730, help="Spread the data over this many days")
+    parser.add_argument('--workers', type=int, default=8, help="Parallel shards")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--dump', metavar='DIR', help="Write gzipped JSON Lines files instead of the tables")
+    parser.add_argument('--load', metavar='DIR', help="Load files written with --dump into the tables")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    if args.load:
+        totals = load(args.load, args.workers)
+    else:
+        totals = generate(args.users, args.procurements, args.expenses, args.days, args.workers, args.seed,
+                          dump=args.dump)
+    for table_name, count in sorted(totals.items()):
+        print(f"{table_name}: {count} items")
+    print(f"Done in {time.monotonic() - started:.1f}s.")
+
+
+if __name__ == '__main__':
+    main()
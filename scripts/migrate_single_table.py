@@ -0,0 +1,111 @@
+"""
+Copies procurements, sarees and procurement-related expenses into the single `aggregates`
+table (see src/services/aggregates.py), scanning each source table in parallel segments.
+
+Cutover:
+  1. Deploy with COUTURE_DATA_LAYOUT=dual: every new write is copied as it happens.
+  2. Run this script to backfill what was written before:
+         python3 scripts/migrate_single_table.py [--segments 8]
+  3. Switch to COUTURE_DATA_LAYOUT=single: aggregate reads use one Query.
+
+The script is safe to re-run and to run next to live traffic: copies are written with a
+condition on their version, so an old snapshot never replaces a newer copy. Sarees and
+expenses written before they carried `procurement_id` get the link backfilled in their table.
+The DynamoDB endpoint comes from the usual COUTURE_* settings (COUTURE_DYNAMODB_ENDPOINT_URL).
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.config import get_settings  # noqa: E402
+from src.services.aggregates import AggregateService, aggregate_item  # noqa: E402
+from src.services.dynamodb import DynamoDBService  # noqa: E402
+
+# Expenses booked at approval before they carried `procurement_id` name it in their description.
+_DESCRIPTION_LINK = re.compile(r"\(Procurement ID: ([0-9a-fA-F-]{36})\)")
+
+
+def scan_segment(table_name: str, segment: int, total_segments: int):
+    """Yields every item of one parallel-scan segment of a table, page by page."""
+    service = DynamoDBService(table_name, endpoint_url=get_settings()["dynamodb_endpoint_url"])
+    params = {"Segment": segment, "TotalSegments": total_segments}
+    while True:
+        response = service.scan(**params)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def link_procurement(table_name: str, item: dict, procurement_id: str) -> dict:
+    """Stores the missing `procurement_id` on a saree or expense and returns the linked item."""
+    DynamoDBService(table_name, endpoint_url=get_settings()["dynamodb_endpoint_url"]).update_item(
+        Key={'id': item['id']},
+        UpdateExpression="SET procurement_id = :procurement_id",
+        ConditionExpression="attribute_exists(id)",
+        ExpressionAttributeValues={":procurement_id": procurement_id},
+    )
+    return {**item, 'procurement_id': procurement_id}
+
+
+def migrate_segment(table_name: str, segment: int, total_segments: int, saree_links: dict) -> dict:
+    """Copies one segment; returns counts of copied, skipped (newer copy kept) and unlinked items."""
+    aggregates = AggregateService(endpoint_url=get_settings()["dynamodb_endpoint_url"])
+    counts = {"copied": 0, "kept_newer": 0, "unlinked": 0}
+    for item in scan_segment(table_name, segment, total_segments):
+        if table_name != "procurement_records" and not item.get('procurement_id'):
+            if table_name == "sarees":
+                procurement_id = saree_links.get(item['id'])
+            else:
+                match = _DESCRIPTION_LINK.search(item.get('description', ''))
+                procurement_id = match.group(1) if match else None
+            if procurement_id:
+                item = link_procurement(table_name, item, procurement_id)
+        copy = aggregate_item(table_name, item)
+        if copy is None:
+            counts["unlinked"] += 1
+        elif aggregates.put_if_newer(copy):
+            counts["copied"] += 1
+        else:
+            counts["kept_newer"] += 1
+        if table_name == "procurement_records":
+            saree_links[item['saree_id']] = item['id']
+    return counts
+
+
+def migrate_table(pool: ThreadPoolExecutor, table_name: str, total_segments: int, saree_links: dict) -> dict:
+    futures = [
+        pool.submit(migrate_segment, table_name, segment, total_segments, saree_links)
+        for segment in range(total_segments)
+    ]
+    totals = {}
+    for future in futures:
+        for name, count in future.result().items():
+            totals[name] = totals.get(name, 0) + count
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy procurement aggregates into the single table.")
+    parser.add_argument('--segments', type=int, default=4, help="Parallel scan segments per table")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    saree_links: dict = {}  # saree id -> procurement id, filled while copying procurements
+    with ThreadPoolExecutor(max_workers=args.segments) as pool:
+        # Procurements first: they tell which procurement each legacy saree belongs to.
+        results = {"procurement_records": migrate_table(pool, "procurement_records", args.segments, saree_links)}
+        for table_name in ("sarees", "expenses"):
+            results[table_name] = migrate_table(pool, table_name, args.segments, saree_links)
+    for table_name, counts in results.items():
+        print(f"{table_name}: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+    print(f"Migration finished in {time.monotonic() - started:.1f}s.")
+
+
+if __name__ == '__main__':
+    main()
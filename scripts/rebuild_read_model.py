@@ -0,0 +1,42 @@
+"""
+Rebuilds the SQL read model (src/services/read_model.py) from full scans of the tables.
+
+Run it after enabling the read model on an existing database, or whenever the copy is
+suspected to have drifted (e.g. writes made while the application was down):
+
+    python3 scripts/rebuild_read_model.py [--tables users sarees ...]
+
+The storage backend, DynamoDB endpoint and read model path come from the usual COUTURE_*
+settings.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.services.dynamodb import DynamoDBService  # noqa: E402
+from src.services.read_model import PROJECTIONS, ReadModel  # noqa: E402
+from src.config import get_settings  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the SQL read model from table scans.")
+    parser.add_argument('--tables', nargs='+', choices=sorted(PROJECTIONS), default=sorted(PROJECTIONS))
+    args = parser.parse_args()
+
+    settings = get_settings()
+    read_model = ReadModel(settings["read_model_path"])
+    started = time.monotonic()
+    counts = read_model.rebuild({
+        table_name: DynamoDBService(table_name, endpoint_url=settings["dynamodb_endpoint_url"]).scan_items()
+        for table_name in args.tables
+    })
+    for table_name, count in counts.items():
+        print(f"{table_name}: {count} rows")
+    print(f"Read model rebuilt in {time.monotonic() - started:.1f}s ({read_model.path}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Replays traffic recorded by the capture middleware (COUTURE_TRAFFIC_CAPTURE_ENABLED=true, see
+src/services/traffic.py) against a running instance, to find how much load one worker takes.
+
+    python3 scripts/replay_traffic.py traffic.log* --base-url http://localhost:8080 --speeds 1,2,4,8
+
+Each speed replays the whole capture with the recorded inter-arrival times divided by the
+speed; `--max-gap` first compresses idle periods (e.g. nights) to at most that many seconds.
+Latency is measured from each request's scheduled time, so queueing in an overloaded worker
+counts. The report gives, per speed, offered and achieved requests per second, p50/p95/p99
+latency and error rates, and names the first speed at which the instance saturated.
+
+Recorded bodies are sanitized, so the replay authenticates with its own users, one per role
+(by default the first users made by scripts/generate_data.py, password `password`), and fills
+masked emails with unique addresses. Replay against a copy of the data (or generated data)
+for realistic hit rates on item ids.
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import httpx
+
+# The first user of each role created by scripts/generate_data.py.
+DEFAULT_LOGINS = {
+    "staff": "staff0@example.com",
+    "manager": "manager1@example.com",
+    "partner": "partner2@example.com",
+    "admin": "admin3@example.com",
+}
+# Saturation: throughput falls this far behind the offered load, errors exceed this rate,
+# or p95 latency grows this many times over the slowest speed's.
+MIN_THROUGHPUT_RATIO = 0.9
+MAX_ERROR_RATE = 0.01
+MAX_P95_GROWTH = 3.0
+
+
+def read_traces(paths: Iterable[str]) -> list[dict]:
+    """Every trace of the given logs (rotated .gz files included), in arrival order."""
+    traces = []
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            traces.extend(json.loads(line) for line in f if line.strip())
+    return sorted(traces, key=lambda trace: trace["ts"])
+
+
+def schedule(traces: list[dict], speed: float, max_gap: Optional[float] = None) -> list[tuple[float, dict]]:
+    """(offset in seconds, trace) pairs: gaps longer than `max_gap` are shortened, then all divided by `speed`."""
+    offsets, offset, previous = [], 0.0, None
+    for trace in traces:
+        if previous is not None:
+            gap = trace["ts"] - previous
+            offset += (min(gap, max_gap) if max_gap is not None else gap) / speed
+        previous = trace["ts"]
+        offsets.append((offset, trace))
+    return offsets
+
+
+class ReplayAuth:
+    """Logs in once per role and hands out the matching Authorization header."""
+
+    def __init__(self, client: httpx.Client, logins: dict, password: str):
+        self.client = client
+        self.logins = logins
+        self.password = password
+        self._headers: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def credentials(self, role: str = "staff") -> dict:
+        return {"username": self.logins[role], "password": self.password}
+
+    def headers(self, role: Optional[str]) -> dict:
+        if role is None or role not in self.logins:
+            return {}
+        with self._lock:
+            if role not in self._headers:
+                response = self.client.post("/token", data=self.credentials(role))
+                response.raise_for_status()
+                self._headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            return self._headers[role]
+
+
+def _restore(body, key: Optional[str] = None):
+    """Gives masked emails unique valid addresses, so registrations replay like the originals."""
+    if isinstance(body, dict):
+        return {k: _restore(v, k) for k, v in body.items()}
+    if isinstance(body, list):
+        return [_restore(v) for v in body]
+    if key in ("email", "username") and isinstance(body, str) and set(body) == {"x"}:
+        return f"replay-{uuid.uuid4().hex[:12]}@example.com"
+    return body
+
+
+def build_request(trace: dict, auth: ReplayAuth) -> dict:
+    """The httpx request arguments for a trace."""
+    request = {"method": trace["method"], "url": trace["path"], "params": trace.get("query") or None,
+               "headers": auth.headers(trace.get("role"))}
+    if trace.get("route") == "/token":
+        request["data"] = auth.credentials()
+    elif trace.get("format") == "json":
+        request["json"] = _restore(trace["body"])
+    elif trace.get("format") == "form":
+        request["data"] = _restore(trace["body"])
+    elif trace.get("body"):
+        request["content"] = b"x" * trace["body"]["bytes"]
+    return request
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def replay(client: httpx.Client, traces: list[dict], speed: float, auth: ReplayAuth,
+           max_gap: Optional[float] = None, concurrency: int = 64) -> dict:
+    """Replays the traces at one speed; returns throughput, latency and error figures."""
+    planned = schedule(traces, speed, max_gap)
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def send(scheduled_at: float, trace: dict) -> None:
+        try:
+            status = str(client.request(**build_request(trace, auth)).status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - scheduled_at
+        with lock:
+            latencies.append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for offset, trace in planned:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, started + offset, trace)
+    wall = time.perf_counter() - started
+    latencies.sort()
+    duration = planned[-1][0] if planned else 0.0
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or status.startswith("5"))
+    return {
+        "speed": speed,
+        "requests": len(planned),
+        "offered_rps": round(len(planned) / duration, 1) if duration > 0 else None,
+        "achieved_rps": round(len(planned) / wall, 1) if wall > 0 else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "error_rate": round(errors / len(planned), 4) if planned else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def saturation_reason(step: dict, first: dict) -> Optional[str]:
+    """Why the instance counts as saturated at this step, or None."""
+    if step["offered_rps"] and step["achieved_rps"] < step["offered_rps"] * MIN_THROUGHPUT_RATIO:
+        return f"throughput {step['achieved_rps']} of {step['offered_rps']} req/s offered"
+    if step["error_rate"] > MAX_ERROR_RATE:
+        return f"error rate {step['error_rate']:.1%}"
+    if first["p95_ms"] and step["p95_ms"] > first["p95_ms"] * MAX_P95_GROWTH:
+        return f"p95 {step['p95_ms']}ms vs {first['p95_ms']}ms at {first['speed']}x"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic and find the saturation point.")
+    parser.add_argument('logs', nargs='+', help="Capture logs (rotated .gz files included)")
+    parser.add_argument('--base-url', default="http://localhost:8080", help="Instance to replay against")
+    parser.add_argument('--speeds', default="1", help="Comma-separated speed multipliers, e.g. 1,2,4,8")
+    parser.add_argument('--max-gap', type=float, help="Compress idle gaps to at most this many seconds")
+    parser.add_argument('--concurrency', type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument('--login', action='append', default=[], metavar='ROLE=EMAIL',
+                        help="User to replay a role's requests as (repeatable)")
+    parser.add_argument('--password', default="password", help="Password of the replay users")
+    args = parser.parse_args()
+
+    logins = dict(DEFAULT_LOGINS)
+    logins.update(dict(login.split("=", 1) for login in args.login))
+    traces = read_traces(args.logs)
+    if not traces:
+        parser.error("the logs contain no traces")
+    speeds = [float(speed) for speed in args.speeds.split(",")]
+
+    steps = []
+    with httpx.Client(base_url=args.base_url, timeout=30.0,
+                      limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        auth = ReplayAuth(client, logins, args.password)
+        print(f"Replaying {len(traces)} requests at {', '.join(f'{s:g}x' for s in speeds)}.")
+        print(f"{'speed':>6}{'offered':>10}{'achieved':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for speed in speeds:
+            step = replay(client, traces, speed, auth, max_gap=args.max_gap, concurrency=args.concurrency)
+            steps.append(step)
+            print(f"{speed:>5g}x{step['offered_rps'] or '-':>10}{step['achieved_rps']:>10}{step['p50_ms']:>10}"
+                  f"{step['p95_ms']:>10}{step['p99_ms']:>10}{step['error_rate']:>8.1%}")
+
+    for step in steps:
+        reason = saturation_reason(step, steps[0])
+        if reason:
+            print(f"Saturated at {step['speed']:g}x ({reason}).")
+            return
+    print(f"Not saturated up to {steps[-1]['speed']:g}x ({steps[-1]['achieved_rps']} req/s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import os
+from functools import lru_cache
+
+# Default settings. Each one can be overridden with an environment variable named
+# COUTURE_<KEY> (upper-cased), e.g. COUTURE_DYNAMODB_MAX_RETRIES=8.
+DEFAULT_SETTINGS = {
+    # Directory of the local files (SQLite databases, feed, profiles, traffic log). Relative
+    # paths in the `LOCAL_PATHS` settings are resolved against it, so nothing is written to the
+    # working directory.
+    "data_dir": os.path.join(os.path.expanduser("~"), ".couture"),
+    # 'dynamodb' talks to DynamoDB (or DynamoDB Local); 'sqlite' stores every table in one
+    # local file (single-node installs); 'memory' keeps them in process (tests, load runs).
+    "storage_backend": "dynamodb",
+    "sqlite_path": "couture.db",
+    "sqlite_pool_size": 4,
+    # SQL read model for reports, fed asynchronously from every write (src/services/read_model.py).
+    "read_model_enabled": True,
+    "read_model_path": "read_model.db",
+    # Procurement aggregates: 'tables' (separate tables only), 'dual' (also copied into the
+    # single `aggregates` table) or 'single' (copied, and aggregate reads use the copy).
+    "data_layout": "tables",
+    # Durable background jobs (src/services/jobs.py). With 0 workers, jobs run on the request thread.
+    "jobs_path": "jobs.db",
+    "job_workers": 2,
+    "job_max_attempts": 5,
+    "job_retry_base_seconds": 1.0,
+    "job_lease_seconds": 300.0,
+    # A job enqueued ahead of the write it follows up (see `JobQueue.release`) runs after this
+    # long even if it was never released, i.e. if the process died around the write.
+    "job_hold_seconds": 120.0,
+    # Responses of POSTs sent with an Idempotency-Key are replayed for this long.
+    "idempotency_ttl_seconds": 86400,
+    # A key whose first request has not finished after this long is considered abandoned.
+    "idempotency_lock_seconds": 60,
+    "dynamodb_endpoint_url": "http://localhost:8000",
+    # HTTP connections kept open to DynamoDB by the shared client (one per concurrent request).
+    "dynamodb_max_pool_connections": 50,
+    # put_model/get_model send typed attribute values to the low-level client (src/services/codec.py)
+    # instead of going through the resource layer's type conversion. DynamoDB backend only.
+    "dynamodb_low_level_codec": True,
+    # In-process caches (0 disables): users by email (authentication) and the saree catalog.
+    # Only this process's writes invalidate them, so a role changed by another process is seen
+    # after the user cache TTL: it is off unless one process serves the API. Logins always read
+    # the password hash from the table.
+    "user_cache_ttl_seconds": 0.0,
+    "catalog_cache_ttl_seconds": 30.0,
+    # Startup warmup of the caches (off by default): up to `cache_preload_max_users` users (when
+    # the user cache is on) and the first catalog page.
+    "cache_preload_enabled": False,
+    "cache_preload_max_users": 1000,
+    # Static catalog feed (JSON and Meta commerce CSV) of the approved sarees, patched from
+    # saree writes (src/services/catalog_feed.py). `{id}` in the link template is the saree id.
+    # One process publishes it; it rescans the catalog every refresh interval (0 never does),
+    # which picks up the saree writes made by the other processes.
+    "catalog_feed_enabled": True,
+    "catalog_feed_path": "catalog_feed",
+    "catalog_feed_refresh_seconds": 300.0,
+    "catalog_feed_link_template": "https://shop.example.com/sarees/{id}",
+    "catalog_feed_brand": "Couture",
+    # Concurrent identical eventually consistent reads share one DynamoDB call
+    # (src/services/singleflight.py); a caller waits at most the timeout for the call in flight.
+    "read_coalescing_enabled": True,
+    "read_coalescing_timeout_seconds": 2.0,
+    # /health/ready probes each table at most once per interval, gives up on a probe after the
+    # timeout and reports unhealthy once its last result is older than the max age.
+    # DescribeTable (rate-limited control plane) runs only once per describe interval.
+    "health_probe_interval_seconds": 2.0,
+    "health_probe_timeout_seconds": 1.0,
+    "health_probe_max_age_seconds": 10.0,
+    "health_describe_interval_seconds": 60.0,
+    # Opt-in capture of sanitized request traces for replay (src/services/traffic.py): the
+    # share of requests recorded, the log's size and number of rotated (gzipped) files, and how
+    # many traces may wait for the writer thread before new ones are dropped.
+    "traffic_capture_enabled": False,
+    "traffic_capture_path": "traffic.log",
+    "traffic_capture_sample_rate": 1.0,
+    "traffic_capture_max_bytes": 50 * 1024 * 1024,
+    "traffic_capture_backups": 10,
+    "traffic_capture_queue_size": 10000,
+    # On-demand profiling of requests sent with an admin-issued X-Profile token
+    # (src/services/profiling.py). When disabled the middleware is not installed.
+    "profiling_enabled": False,
+    "profiles_path": "profiles",
+    "profiles_max_kept": 100,
+    "profile_sample_interval_seconds": 0.001,
+    "profile_token_max_ttl_seconds": 3600,
+    # Structured JSON logs (src/logs.py), written to stderr by a background thread. Records
+    # beyond the queue size are dropped rather than blocking requests; each distinct warning
+    # or error message is logged at most `log_error_samples_per_minute` times a minute.
+    "log_level": "INFO",
+    "log_queue_size": 10000,
+    "log_error_samples_per_minute": 10,
+    # Provisioned throughput of each table (see scripts/create_table.py). The client-side
+    # rate limiter is sized from these values.
+    "dynamodb_read_capacity_units": 5.0,
+    "dynamodb_write_capacity_units": 5.0,
+    "dynamodb_burst_seconds": 30.0,
+    "dynamodb_max_wait_seconds": 2.0,
+    "dynamodb_max_retries": 5,
+    "dynamodb_retry_base_delay_seconds": 0.05,
+    "dynamodb_retry_max_delay_seconds": 2.0,
+    "circuit_breaker_failure_threshold": 5,
+    "circuit_breaker_reset_seconds": 10.0,
+    # Partitions per day of the sales ledger (write sharding for bursts). Fixed once sales are recorded.
+    "sales_write_shards": 8,
+    # 'uuid7' for time-ordered ids (sortable, usable as range keys) or 'uuid4' for random ids.
+    "id_strategy": "uuid7",
+}
+
+
+def _from_env(key: str, default):
+    raw = os.environ.get(f"COUTURE_{key.upper()}")
+    if raw is None:
+        return default
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw or None
+
+
+# Settings naming local files or directories (relative ones live in `data_dir`).
+LOCAL_PATHS = ("sqlite_path", "read_model_path", "jobs_path", "catalog_feed_path", "profiles_path",
+               "traffic_capture_path")
+
+
+@lru_cache()
+def get_settings() -> dict:
+    """Returns the application settings, applying any environment overrides."""
+    settings = {key: _from_env(key, default) for key, default in DEFAULT_SETTINGS.items()}
+    for key in LOCAL_PATHS:
+        path = settings[key]
+        if path and path != ":memory:" and not os.path.isabs(path):
+            settings[key] = os.path.join(settings["data_dir"], path)
+    return settings
+
+
+def ensure_parent_directory(path: str) -> None:
+    """Creates the directory of a local file setting (e.g. `data_dir`) if it does not exist yet."""
+    directory = os.path.dirname(path)
+    if path != ":memory:" and directory:
+        os.makedirs(directory, exist_ok=True)
@@ -1,26 +1,29 @@
-from functools import lru_cache
-from fastapi import Depends, HTTPException, status
-from typing import Annotated
+from fastapi import Depends, Header, HTTPException, Query, status
+from typing import Annotated, Callable, Optional
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
 
 from src.services.user_service import UserService
 from src.services.procurement_service import ProcurementService
 from src.services.saree_service import SareeService
 from src.services.expense_service import ExpenseService
+from src.services.sale_service import SaleService
+from src.services.idempotency_service import IdempotencyService
+from src.services.read_model import ReadModel, get_read_model as get_process_read_model
+from src.services.jobs import JobQueue, get_job_queue as get_process_job_queue
+from src.services.health import DependencyProbe, get_dependency_probe as get_process_dependency_probe
+from src.services.profiling import ProfileStore, get_profile_store as get_process_profile_store
+from src.services.catalog_feed import CatalogFeed, get_catalog_feed as get_process_catalog_feed
+from src.services.codec import from_item
+from src.services.projections import SUMMARY, select_fields
 from src.models import User, UserRole
 from src.security import verify_access_token
+from src.request_context import get_request_context
+from src.config import get_settings
 
 
 # --- Dependency Injection ---
 
-@lru_cache()
-def get_settings():
-    # In the future, this can read from a .env file or other config
-    return {
-        "dynamodb_endpoint_url": "http://localhost:8000"
-    }
-
-
 def get_user_service() -> UserService:
     """
     Dependency function to get a UserService instance.
@@ -45,13 +48,82 @@ def get_saree_service() -> SareeService:
     return SareeService(endpoint_url=settings["dynamodb_endpoint_url"])
 
 
-# In a real app, this would be in a config file
-DYNAMODB_ENDPOINT_URL = "http://localhost:8000"
+def get_sale_service() -> SaleService:
+    """
+    Dependency function to get a SaleService instance.
+    """
+    settings = get_settings()
+    return SaleService(endpoint_url=settings["dynamodb_endpoint_url"])
+
+
+def get_expense_service() -> ExpenseService:
+    """
+    Dependency function to get an ExpenseService instance.
+    """
+    settings = get_settings()
+    return ExpenseService(endpoint_url=settings["dynamodb_endpoint_url"])
+
+
+def get_idempotency_service() -> IdempotencyService:
+    """
+    Dependency function to get an IdempotencyService instance.
+    """
+    settings = get_settings()
+    return IdempotencyService(endpoint_url=settings["dynamodb_endpoint_url"])
+
+
+def get_read_model() -> ReadModel:
+    """Dependency injector for the SQL read model used by the reporting endpoints."""
+    return get_process_read_model()
+
+
+def get_job_queue() -> JobQueue:
+    """Dependency injector for the background job queue."""
+    return get_process_job_queue()
+
+
+def get_dependency_probe() -> DependencyProbe:
+    """Dependency injector for the process-wide dependency probe."""
+    return get_process_dependency_probe()
+
+
+def get_profile_store() -> ProfileStore:
+    """Dependency injector for the store of on-demand request profiles."""
+    return get_process_profile_store()
+
+
+def get_catalog_feed() -> CatalogFeed:
+    """Dependency injector for the static catalog feed."""
+    return get_process_catalog_feed()
+
+
+def get_if_match_version(if_match: Annotated[Optional[str], Header()] = None) -> Optional[int]:
+    """
+    Dependency returning the item version a client sent in `If-Match` (the item's ETag, e.g. "3"),
+    or None when the header is absent or '*'.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="If-Match must be an ETag returned by the API")
+    return int(tag)
+
+
+def field_selection(model: type[BaseModel], summary: Optional[type[BaseModel]] = None) -> Callable:
+    """
+    Dependency factory for the `fields` query parameter of `model`'s endpoints: returns the
+    view (response model) of the selected fields, or None for whole items.
+    """
+    description = "Comma-separated fields to return" + (f", or '{SUMMARY}'" if summary is not None else "")
+
+    def get_view(fields: Annotated[Optional[str], Query(description=description)] = None) -> Optional[type[BaseModel]]:
+        try:
+            return select_fields(model, fields, summary)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-def get_expense_service():
-    """Dependency injector for ExpenseService."""
-    # In a real app, this might pull the endpoint_url from settings
-    return ExpenseService(endpoint_url=DYNAMODB_ENDPOINT_URL)
+    return get_view
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
@@ -72,7 +144,12 @@ def get_current_user(
     user_dict = user_service.get_user_by_email(email=email)
     if user_dict is None:
         raise credentials_exception
-    return User(**user_dict)
+    user = from_item(User, user_dict)
+    context = get_request_context()
+    if context is not None:
+        context.user_id = str(user.id)
+        context.user_role = user.role.value
+    return user
 
 
 def require_manager_role(current_user: Annotated[User, Depends(get_current_user)]):
@@ -0,0 +1,148 @@
+"""
+Application startup and shutdown (FastAPI lifespan).
+
+Everything the first requests would otherwise pay for runs before the server accepts traffic:
+the shared DynamoDB client and its connections, the background components (read model, job
+workers, aggregate mirror, catalog feed), optionally the user and catalog caches, and the
+OpenAPI schema. Each phase is timed; `/health/ready` reports not-ready until warmup has
+finished. The log pipeline (src/logs.py) starts before warmup and stops after everything else
+has shut down.
+"""
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from src.config import get_settings
+from src.logs import get_logger, start_logging, stop_logging
+from src.services.aggregates import aggregate_mirror
+from src.services.catalog_feed import get_catalog_feed
+from src.services.dynamodb import DynamoDBService
+from src.services.jobs import get_job_queue
+from src.services.read_model import get_read_model
+from src.services.saree_service import SareeService
+from src.services.schema import TABLES
+from src.services.traffic import get_traffic_recorder
+from src.services.user_service import UserService
+
+logger = get_logger("startup")
+
+
+class StartupState:
+    """Progress of the warmup: per-phase durations and errors, and whether it has finished."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.ready = False
+            self.started_at: Optional[str] = None
+            self.finished_at: Optional[str] = None
+            self.phases: dict[str, dict] = {}
+
+    def run_phase(self, name: str, phase: Callable[[], object]) -> None:
+        """Runs and times one phase. A failing phase is recorded but does not stop the others."""
+        started = time.perf_counter()
+        try:
+            result = phase()
+            entry = {"seconds": round(time.perf_counter() - started, 4), "ok": True}
+            if result is not None:
+                entry["result"] = result
+        except Exception as e:
+            logger.exception("Startup phase '%s' failed", name)
+            entry = {"seconds": round(time.perf_counter() - started, 4), "ok": False, "error": str(e)}
+        with self._lock:
+            self.phases[name] = entry
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "phases": {name: dict(entry) for name, entry in self.phases.items()},
+            }
+
+
+startup_state = StartupState()
+
+
+def _open_tables() -> dict:
+    """Creates the shared client and opens a connection by describing (loading) every table."""
+    settings = get_settings()
+    counts = {}
+    for table_name in TABLES:
+        table = DynamoDBService(table_name, endpoint_url=settings["dynamodb_endpoint_url"]).table
+        table.load()
+        counts[table_name] = table.item_count
+    return counts
+
+
+def _start_background_components() -> list[str]:
+    settings = get_settings()
+    started = []
+    # The read model and the aggregate mirror must be subscribed to the change feed before the first write.
+    if settings["read_model_enabled"]:
+        get_read_model()
+        started.append("read_model")
+    if settings["catalog_feed_enabled"]:
+        # The feed is built from a full scan on its writer thread; until then it answers 503.
+        get_catalog_feed().start()
+        started.append("catalog_feed")
+    if settings["data_layout"] != "tables":
+        aggregate_mirror.install()
+        started.append("aggregate_mirror")
+    # Resume the jobs a previous run left queued (or running when it stopped).
+    get_job_queue().start()
+    started.append("job_queue")
+    return started
+
+
+def _preload_caches() -> dict:
+    """Preloads the caches when `cache_preload_enabled` is set: a bounded number of users, one catalog page."""
+    settings = get_settings()
+    if not settings["cache_preload_enabled"]:
+        return {}
+    endpoint_url = settings["dynamodb_endpoint_url"]
+    return {
+        "users": UserService(endpoint_url=endpoint_url).preload_cache(limit=settings["cache_preload_max_users"]),
+        "sarees": len(SareeService(endpoint_url=endpoint_url).list_sarees()),
+    }
+
+
+def warm_up(app: FastAPI) -> None:
+    """Runs every startup phase in order, then marks the application ready."""
+    startup_state.reset()
+    startup_state.started_at = datetime.now(timezone.utc).isoformat()
+    startup_state.run_phase("storage", _open_tables)
+    startup_state.run_phase("background", _start_background_components)
+    startup_state.run_phase("caches", _preload_caches)
+    # Route response models are compiled when routes are registered; the OpenAPI schema is not.
+    startup_state.run_phase("openapi", lambda: len(app.openapi()["paths"]))
+    startup_state.finished_at = datetime.now(timezone.utc).isoformat()
+    startup_state.ready = True
+    logger.info("Startup finished", extra={
+        "phases": {name: entry["seconds"] for name, entry in startup_state.phases.items()}
+    })
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_logging()
+    # Blocking I/O: keep it off the event loop.
+    await run_in_threadpool(warm_up, app)
+    yield
+    startup_state.ready = False
+    get_job_queue().stop()
+    # Copies still queued would be lost with the process (the migration script would backfill them).
+    aggregate_mirror.flush(timeout=10)
+    if get_settings()["traffic_capture_enabled"]:
+        get_traffic_recorder().flush(timeout=10)
+    # Last, so the shutdown of the other components is logged too.
+    stop_logging()
@@ -0,0 +1,222 @@
+"""
+Structured, non-blocking application logging.
+
+Loggers under `couture.` hand their records to a bounded in-memory queue; a background thread
+(`logging.handlers.QueueListener`) formats them as one JSON object per line and writes them
+to stderr. A request thread therefore never waits for I/O or JSON encoding: it only stamps
+the record with the current request (id, route, user) and enqueues it. When the queue is
+full (the writer cannot keep up) records are dropped and counted instead of blocking; the
+count is reported by a warning once a minute while records are being dropped, and by
+`GET /admin/logs`.
+
+Warnings and errors are sampled: each distinct message (logger and format string) is logged
+at most `log_error_samples_per_minute` times a minute, and the next record let through
+carries how many were suppressed meanwhile, so an error storm costs a few lines a minute.
+"""
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from src.config import get_settings
+from src.request_context import get_request_context
+
+LOGGER_NAME = "couture"
+# Attributes every LogRecord has; anything else was passed with `extra=` and is logged as a field.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """The logger of a component, e.g. get_logger('dynamodb') -> 'couture.dynamodb'."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request fields and `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and value is not None:
+                document[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, separators=(",", ":"), default=str)
+
+
+class ErrorSampler(logging.Filter):
+    """Lets through at most `per_minute` warnings and errors per distinct message each minute."""
+
+    def __init__(self, per_minute: int, clock=time.monotonic):
+        super().__init__()
+        self.per_minute = per_minute
+        self.clock = clock
+        self._lock = threading.Lock()
+        # (logger, format string) -> [window start, records let through, records suppressed]
+        self._windows: dict[tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.per_minute <= 0:
+            return True
+        key = (record.name, str(record.msg))
+        now = self.clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 60.0:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.per_minute:
+                window[2] += 1
+                return False
+            window[1] += 1
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Enqueues records without blocking, stamped with the current request. The message and any
+    traceback are rendered here (their arguments may change once the call returns); the JSON
+    encoding and the write happen on the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0  # records dropped because the queue was full, since the handler was created
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        context = get_request_context()
+        if context is not None:
+            record.request_id = context.request_id
+            record.route = context.route
+            record.user_id = context.user_id
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class LogPipeline:
+    """The queue, its handler on the `couture` logger, the writer thread and the drop reporter."""
+
+    def __init__(self, level: str, queue_size: int, error_samples_per_minute: int, stream=None,
+                 drop_report_seconds: float = 60.0):
+        self.handler = ContextQueueHandler(queue.Queue(maxsize=queue_size))
+        self.handler.addFilter(ErrorSampler(error_samples_per_minute))
+        self._writer = logging.StreamHandler(stream or sys.stderr)
+        self._writer.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.handler.queue, self._writer)
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.level = level
+        self.drop_report_seconds = drop_report_seconds
+        self._reported_drops = 0
+        self._stopped = threading.Event()
+        self._reporter: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.logger.setLevel(self.level.upper())
+        self.logger.addHandler(self.handler)
+        self.logger.propagate = False
+        self.listener.start()
+        self._stopped.clear()
+        self._reporter = threading.Thread(target=self._report_drops_periodically, name="log-drop-reporter", daemon=True)
+        self._reporter.start()
+
+    def stop(self) -> None:
+        """Writes out the queued records, reports the last drops and detaches the handler."""
+        self._stopped.set()
+        if self._reporter is not None:
+            self._reporter.join()
+            self._reporter = None
+        self.logger.removeHandler(self.handler)
+        self.logger.propagate = True
+        self.listener.stop()
+        self.report_drops()
+
+    def _report_drops_periodically(self) -> None:
+        while not self._stopped.wait(self.drop_report_seconds):
+            self.report_drops()
+
+    def report_drops(self) -> int:
+        """
+        Logs a warning with the number of records dropped since the last report, if any. It is
+        written directly, not queued: the queue may still be full.
+        :return: The number of records reported.
+        """
+        dropped = self.handler.dropped
+        newly_dropped = dropped - self._reported_drops
+        if newly_dropped <= 0:
+            return 0
+        self._reported_drops = dropped
+        record = logging.getLogger(f"{LOGGER_NAME}.logs").makeRecord(
+            f"{LOGGER_NAME}.logs", logging.WARNING, __file__, 0,
+            "%d log records were dropped because the log queue was full", (newly_dropped,), None,
+            extra={"dropped_total": dropped},
+        )
+        self._writer.handle(record)
+        return newly_dropped
+
+    def status(self) -> dict:
+        return {
+            "level": self.level, "queued": self.handler.queue.qsize(), "queue_size": self.handler.queue.maxsize,
+            "dropped": self.handler.dropped,
+        }
+
+
+_pipeline: Optional[LogPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def start_logging(stream=None) -> LogPipeline:
+    """Installs the process-wide pipeline from the settings (once; later calls return it)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            settings = get_settings()
+            _pipeline = LogPipeline(
+                settings["log_level"], settings["log_queue_size"], settings["log_error_samples_per_minute"], stream
+            )
+            _pipeline.start()
+        return _pipeline
+
+
+def logging_status() -> dict:
+    """The queue depth and dropped-record count of the process-wide pipeline."""
+    with _pipeline_lock:
+        if _pipeline is None:
+            return {"running": False}
+        return {"running": True, **_pipeline.status()}
+
+
+def stop_logging() -> None:
+    """Flushes and removes the process-wide pipeline."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+            _pipeline = None
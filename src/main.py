@@ -1,30 +1,96 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
-from src.routers import users, procurement, sarees, expenses
+from src.routers import users, procurement, sarees, catalog, sales, expenses, admin, reports, health
 from src.routers import auth
 from src.dependencies import get_user_service
+from src.config import get_settings
+from src.middleware import ProfilingMiddleware, RequestContextMiddleware, TrafficCaptureMiddleware
 from src.security import create_access_token, verify_password
 from src.services.user_service import UserService
+from src.lifespan import lifespan
+from src.services.dynamodb import VersionConflictError, version_etag
+from src.services.idempotency_service import IdempotencyKeyConflictError
+from src.services.resilience import TableUnavailableError, retry_after_header
+from src.services.profiling import get_profile_store
+from src.services.traffic import get_traffic_recorder
 
 app = FastAPI(
     title="Couture Bookkeeping API",
     description="API for managing bookkeeping for a Mysore silk saree business.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+settings = get_settings()
+# Both are added before RequestContextMiddleware so they run inside it (the last added is outermost).
+if settings["profiling_enabled"]:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=get_profile_store(),
+        sample_interval_seconds=settings["profile_sample_interval_seconds"],
+    )
+if settings["traffic_capture_enabled"]:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        recorder=get_traffic_recorder(),
+        sample_rate=settings["traffic_capture_sample_rate"],
+    )
+app.add_middleware(RequestContextMiddleware)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(procurement.router)
 app.include_router(sarees.router)
+app.include_router(catalog.router)
+app.include_router(sales.router)
 app.include_router(expenses.router)
+app.include_router(admin.router)
+app.include_router(reports.router)
+app.include_router(health.router)
+
+
+@app.exception_handler(TableUnavailableError)
+async def table_unavailable_handler(request: Request, exc: TableUnavailableError):
+    """Sheds load with 503 + Retry-After while a DynamoDB table is saturated."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service temporarily unavailable, please retry", "table": exc.table_name},
+        headers={"Retry-After": retry_after_header(exc.retry_after)},
+    )
+
+
+@app.exception_handler(VersionConflictError)
+async def version_conflict_handler(request: Request, exc: VersionConflictError):
+    """409 with the current item (and its ETag) when an update lost an optimistic-concurrency race."""
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "The item was modified by another request", "current": jsonable_encoder(exc.current)},
+        headers={"ETag": version_etag(exc.current)},
+    )
+
+
+@app.exception_handler(IdempotencyKeyConflictError)
+async def idempotency_conflict_handler(request: Request, exc: IdempotencyKeyConflictError):
+    """409 + Retry-After while the first request with a key runs; 422 when a key is reused for another body."""
+    if exc.in_progress:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "1"},
+        )
+    return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, content={"detail": str(exc)})
+
 
 @app.post("/token")
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: Annotated[UserService, Depends(get_user_service)],
 ):
-    user = user_service.get_user_by_email(email=form_data.username)
+    # Never a cached user: the password may have been changed through another process.
+    user = user_service.get_user_by_email(email=form_data.username, use_cache=False)
     if not user or not verify_password(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,189 @@
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl
+
+import anyio.to_thread
+from starlette.responses import JSONResponse
+
+from src.logs import get_logger
+from src.request_context import RequestContext, get_request_context, set_request_context, reset_request_context
+from src.services.profiling import ProfileStore, run_profiled, verify_profile_token
+from src.services.traffic import MAX_BODY_BYTES, TrafficRecorder, sanitize, sanitize_body
+
+access_logger = get_logger("access")
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware that binds a `RequestContext` for the lifetime of each HTTP request,
+    and logs each request with its status, duration and DynamoDB calls (logger `couture.access`).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(method=scope["method"], path=scope["path"], scope=scope)
+        token = set_request_context(context)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def recording_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            access_logger.info("%s %d", context.route, status_code, extra={
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "db_calls": context.db_calls,
+                "db_ms": round(context.db_seconds * 1000, 2),
+            })
+            reset_request_context(token)
+
+
+class TrafficCaptureMiddleware:
+    """
+    Pure ASGI middleware that records a sanitized trace of each HTTP request (see
+    src/services/traffic.py). Installed inside `RequestContextMiddleware`, so the matched
+    route and the caller's role are known once the request completes.
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder, sample_rate: float = 1.0):
+        self.app = app
+        self.recorder = recorder
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        size = 0
+        status_code = 500  # if the application fails before responding
+
+        async def capturing_receive():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= MAX_BODY_BYTES:
+                    chunks.append(body)
+            return message
+
+        async def capturing_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        arrived = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, capturing_receive, capturing_send)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            headers = dict(scope.get("headers") or [])
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            route = scope.get("route")
+            body_format, body = sanitize_body(content_type, b"".join(chunks), getattr(route, "path", None)) \
+                if size <= MAX_BODY_BYTES else (None, {"bytes": size})
+            context = get_request_context()
+            self.recorder.record({
+                "ts": round(arrived, 3),
+                "method": scope["method"],
+                "route": getattr(route, "path", None),
+                "path": scope["path"],
+                "query": sanitize(dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))),
+                "format": body_format,
+                "body": body,
+                "role": context.user_role if context else None,
+                "status": status_code,
+                "ms": round(duration_ms, 2),
+            })
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles requests carrying a valid `X-Profile` token (see
+    src/services/profiling.py) and stores the profile under the `X-Profile-Id` it returns.
+    Installed inside `RequestContextMiddleware`; other requests pass straight through.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_interval_seconds: float):
+        self.app = app
+        self.store = store
+        self.sample_interval_seconds = sample_interval_seconds
+
+    async def __call__(self, scope, receive, send):
+        token = None
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    token = value.decode("latin-1")
+                    break
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        claims = verify_profile_token(token)
+        if claims is None:
+            await JSONResponse({"detail": "Invalid or expired profiling token"}, status_code=403)(scope, receive, send)
+            return
+
+        # The request runs on another event loop: hand it the whole body and buffer the response.
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # client disconnected
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        delivered = False
+
+        async def isolated_receive():
+            nonlocal delivered
+            if delivered:
+                return {"type": "http.disconnect"}
+            delivered = True
+            return {"type": "http.request", "body": bytes(body), "more_body": False}
+
+        messages = []
+
+        async def isolated_send(message):
+            messages.append(message)
+
+        profile_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        result = await anyio.to_thread.run_sync(
+            run_profiled, self.app, scope, isolated_receive, isolated_send, claims["mode"], self.sample_interval_seconds,
+        )
+        duration_ms = (time.perf_counter() - started) * 1000
+        status_code = next((m["status"] for m in messages if m["type"] == "http.response.start"), None)
+        route = scope.get("route")
+        await anyio.to_thread.run_sync(self.store.save, profile_id, claims["mode"], result, {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "method": scope["method"],
+            "route": getattr(route, "path", None) or scope["path"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "issued_by": claims.get("issued_by"),
+        })
+        for message in messages:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict, Field
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, model_validator
 from typing import Optional, List
 import uuid
 from datetime import datetime
@@ -54,6 +54,8 @@ class Expense(ExpenseBase):
     status: ExpenseStatus = ExpenseStatus.pending
     reviewed_by_user_id: Optional[uuid.UUID] = None
     review_date: Optional[datetime] = None
+    procurement_id: Optional[uuid.UUID] = None  # Set on procurement-related expenses booked at approval
+    version: int = 1  # Incremented by every update (optimistic concurrency, see If-Match)
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -76,10 +78,20 @@ class Saree(SareeBase):
     selling_price_usd: Optional[float] = None  # Only set after procurement approval
     image_urls: List[str] = []
     procurement_status: ProcurementStatus = ProcurementStatus.pending
+    procurement_id: Optional[uuid.UUID] = None  # The procurement that bought this saree
+    version: int = 1
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class SareeSummary(BaseModel):
+    """The catalog view of a saree (`fields=summary`)."""
+    id: uuid.UUID
+    name: str
+    selling_price_usd: Optional[float] = None
+    procurement_status: ProcurementStatus = ProcurementStatus.pending
+
+
 class ProcurementRecordBase(BaseModel):
     saree_id: uuid.UUID
     procured_by_user_id: uuid.UUID
@@ -88,6 +100,7 @@ class ProcurementRecordBase(BaseModel):
 
 class ProcurementRecord(ProcurementRecordBase):
     id: uuid.UUID
+    saree_name: Optional[str] = None  # Copied from the saree, so list views need no second read
     procurement_date: datetime
     status: ProcurementStatus = ProcurementStatus.pending
     reviewed_by_user_id: Optional[uuid.UUID] = None
@@ -95,10 +108,21 @@ class ProcurementRecord(ProcurementRecordBase):
     manager_additional_costs_inr: Optional[float] = None
     manager_markup_override: Optional[float] = None
     final_selling_price_usd: Optional[float] = None
+    version: int = 1
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProcurementSummary(BaseModel):
+    """The approval board view of a procurement (`fields=summary`)."""
+    id: uuid.UUID
+    saree_id: uuid.UUID
+    saree_name: Optional[str] = None
+    cost_inr: float
+    procurement_date: datetime
+    status: ProcurementStatus = ProcurementStatus.pending
+
+
 class ProcurementCreate(BaseModel):
     saree_name: str
     saree_description: Optional[str] = None
@@ -116,4 +140,45 @@ class ProcurementApproval(BaseModel):
 
 class ProcurementStatusUpdate(BaseModel):
     status: ProcurementStatus
-    approval_details: Optional[ProcurementApproval] = None 
\ No newline at end of file
+    approval_details: Optional[ProcurementApproval] = None 
+
+
+# --- Sales Models ---
+
+class SaleChannel(str, Enum):
+    whatsapp = "whatsapp"
+    instagram = "instagram"
+    website = "website"
+    in_store = "in_store"
+
+class SaleBase(BaseModel):
+    saree_id: uuid.UUID
+    sale_price_usd: float = Field(..., gt=0)
+    discount_usd: float = Field(default=0.0, ge=0)
+    channel: SaleChannel = SaleChannel.whatsapp
+    order_reference: Optional[str] = Field(None, max_length=200)  # e.g. the WhatsApp order id
+
+    @model_validator(mode="after")
+    def discount_within_price(self):
+        if self.discount_usd > self.sale_price_usd:
+            raise ValueError("discount_usd cannot exceed sale_price_usd")
+        return self
+
+class SaleCreate(SaleBase):
+    sold_at: Optional[datetime] = None  # Defaults to now; set when importing past orders
+
+class SaleImport(SaleCreate):
+    """A row of an imported order export: its order reference and time identify it on re-imports."""
+    order_reference: str = Field(..., min_length=1, max_length=200)
+    sold_at: datetime
+
+class SaleBulkCreate(BaseModel):
+    sales: List[SaleImport] = Field(..., min_length=1, max_length=1000)
+
+class Sale(SaleBase):
+    id: uuid.UUID  # UUIDv7 of sold_at, so sales sort by time
+    sold_at: datetime
+    net_amount_usd: float  # sale_price_usd - discount_usd
+    recorded_by_user_id: uuid.UUID
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,58 @@
+import contextvars
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class RequestContext:
+    """
+    Mutable per-request state shared by the middleware, the dependencies and the data layer.
+
+    The middleware creates one context per HTTP request. Because it is a mutable object held
+    in a context variable, updates made from threadpool workers (sync endpoints and
+    dependencies) are visible to the middleware once the request completes.
+    """
+    method: str
+    path: str
+    scope: dict = field(default_factory=dict, repr=False)
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    user_id: Optional[str] = None
+    user_role: Optional[str] = None
+    # DynamoDB calls made for the request and their total duration (logged with the request).
+    db_calls: int = 0
+    db_seconds: float = 0.0
+    _db_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_db_call(self, seconds: float) -> None:
+        with self._db_lock:
+            self.db_calls += 1
+            self.db_seconds += seconds
+
+    @property
+    def route(self) -> str:
+        """The matched route template (e.g. 'GET /sarees/{saree_id}'), or the raw path before routing."""
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.path
+        return f"{self.method} {path}"
+
+
+_request_context: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar(
+    "request_context", default=None
+)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Returns the context of the request being served, or None outside of a request."""
+    return _request_context.get()
+
+
+def set_request_context(context: Optional[RequestContext]) -> contextvars.Token:
+    """Binds a request context to the current execution context."""
+    return _request_context.set(context)
+
+
+def reset_request_context(token: contextvars.Token) -> None:
+    """Restores the request context that was active before `set_request_context`."""
+    _request_context.reset(token)
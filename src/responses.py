@@ -0,0 +1,168 @@
+"""
+Fast serialization of large list responses.
+
+By default FastAPI validates every element an endpoint returns against its `response_model`,
+building a model instance per item, and then serializes the instances back. Items read from
+our own tables were valid models when they were written, so `model_list_response` converts
+them to the response shape in one pass instead, following a field plan compiled once per model: only the model's fields, stored
+`Decimal`s as the field's `float` or `int`, dates reformatted the way Pydantic writes them (no
+fraction when it is zero, UTC as 'Z'), defaults for absent fields, and everything else (ids,
+enum values, strings) as stored. The result is encoded by orjson when it is
+installed and returned as a ready `Response`, so FastAPI skips its own validation.
+
+An item the plan cannot handle (a required field missing, a value of the wrong type) goes
+through the precompiled `TypeAdapter` instead, which raises like the default path would.
+Endpoints keep their `response_model` for the OpenAPI schema.
+"""
+import json
+import types
+import typing
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import PydanticUndefined
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt; the stdlib encoder is the fallback.
+    orjson = None
+
+_MISSING = object()
+
+
+class _FallBack(Exception):
+    """The item does not fit the field plan; validate it instead."""
+
+
+def _to_float(value):
+    kind = type(value)
+    if kind is Decimal or kind is int:
+        return float(value)
+    if kind is float:
+        return value
+    raise _FallBack
+
+
+def _to_int(value):
+    kind = type(value)
+    if kind is Decimal and value == value.to_integral_value():
+        return int(value)
+    if kind is int:
+        return value
+    raise _FallBack
+
+
+def _to_datetime(value):
+    # Stored dates carry microseconds (see `date_key`); Pydantic omits a zero fraction.
+    if type(value) is not str:
+        raise _FallBack
+    try:
+        text = datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise _FallBack
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _converter(annotation) -> Optional[Callable]:
+    """How to convert a stored value of a field: None to keep it as is; raises TypeError if unsupported."""
+    optional = False
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            raise TypeError(annotation)
+        annotation, optional = args[0], True
+    if annotation is float:
+        convert = _to_float
+    elif annotation is int:
+        convert = _to_int
+    elif annotation is datetime:
+        convert = _to_datetime
+    elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        raise TypeError(annotation)  # Nested models need validation.
+    else:
+        return None
+    if optional:
+        return lambda value: None if value is None else convert(value)
+    return convert
+
+
+class _Plan:
+    """The fields of a response model: (name, converter, serialized default or _MISSING if required)."""
+
+    def __init__(self, model: type[BaseModel]):
+        self.adapter = TypeAdapter(model)
+        self.fields = []
+        try:
+            for name, field in model.model_fields.items():
+                if field.default is not PydanticUndefined:
+                    default = TypeAdapter(field.annotation).dump_python(field.default, mode="json")
+                elif field.default_factory is not None:
+                    default = TypeAdapter(field.annotation).dump_python(field.default_factory(), mode="json")
+                else:
+                    default = _MISSING
+                self.fields.append((field.alias or name, _converter(field.annotation), default))
+            self.supported = True
+        except TypeError:
+            self.supported = False
+
+    def _validated(self, item: dict) -> dict:
+        return self.adapter.dump_python(self.adapter.validate_python(item), mode="json", by_alias=True)
+
+    def convert(self, item: dict) -> dict:
+        """The response form of a stored item."""
+        if not self.supported:
+            return self._validated(item)
+        result = {}
+        get = item.get
+        try:
+            for name, convert, default in self.fields:
+                value = get(name, _MISSING)
+                if value is _MISSING:
+                    if default is _MISSING:
+                        raise _FallBack
+                    # Defaults are shared: copy mutable ones.
+                    value = list(default) if isinstance(default, list) else default
+                elif convert is not None:
+                    value = convert(value)
+                result[name] = value
+        except _FallBack:
+            return self._validated(item)
+        return result
+
+
+@lru_cache()
+def _plan(model: type[BaseModel]) -> _Plan:
+    return _Plan(model)
+
+
+def serialize_items(model: type[BaseModel], items: Iterable[dict]) -> list[dict]:
+    """Stored items in the JSON-ready shape `model` gives them in responses."""
+    convert = _plan(model).convert
+    return [convert(item) for item in items]
+
+
+def encode_json(content) -> bytes:
+    """Compact JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_response(content, headers: Optional[dict] = None, status_code: int = 200) -> Response:
+    """A response with already JSON-ready `content`."""
+    return Response(encode_json(content), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def model_list_response(model: type[BaseModel], items: Iterable[dict], headers: Optional[dict] = None,
+                        status_code: int = 200) -> Response:
+    """A JSON response with the stored `items` as a list of `model`, skipping FastAPI's response validation."""
+    return json_response(serialize_items(model, items), headers=headers, status_code=status_code)
+
+
+def model_response(model: type[BaseModel], item: dict, headers: Optional[dict] = None) -> Response:
+    """A JSON response with one stored item as `model`."""
+    return json_response(_plan(model).convert(item), headers=headers)
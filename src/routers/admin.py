@@ -0,0 +1,190 @@
+import os
+from typing import Annotated, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from src.config import get_settings
+from src.dependencies import require_admin_role, get_read_model, get_job_queue, get_profile_store, get_catalog_feed
+from src.logs import logging_status
+from src.models import User
+from src.services.aggregates import aggregate_mirror
+from src.services.capacity import capacity_tracker
+from src.services.catalog_feed import CatalogFeed
+from src.services.jobs import JobQueue
+from src.services.profiling import PROFILE_HEADER, ProfileStore, create_profile_token
+from src.services.read_model import ReadModel
+from src.services.resilience import resilience_registry
+from src.services.singleflight import read_coalescer
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_role)],
+)
+
+
+@router.get("/capacity")
+def get_capacity_report(limit: int = 20):
+    """
+    Report the DynamoDB read/write capacity units consumed since the last reset,
+    broken down by route, operation, table, index and user (heaviest first).
+    Admin only endpoint.
+    """
+    return capacity_tracker.report(limit=limit)
+
+
+@router.delete("/capacity", status_code=status.HTTP_204_NO_CONTENT)
+def reset_capacity_report():
+    """
+    Reset the capacity accounting window.
+    Admin only endpoint.
+    """
+    capacity_tracker.reset()
+
+
+@router.get("/resilience")
+def get_resilience_state():
+    """
+    Report retry counters, client-side rate limiter and circuit breaker state per table.
+    Admin only endpoint.
+    """
+    return resilience_registry.snapshot()
+
+
+@router.get("/read-coalescing")
+def get_read_coalescing_stats():
+    """
+    Report how many DynamoDB reads were answered by an identical read already in flight
+    (coalescing ratio), per operation and table, and the reads currently in flight.
+    Admin only endpoint.
+    """
+    return read_coalescer.stats()
+
+
+@router.get("/logs")
+def get_logging_status():
+    """
+    Report the log queue depth and how many log records were dropped because it was full.
+    Admin only endpoint.
+    """
+    return logging_status()
+
+
+@router.get("/read-model")
+def get_read_model_status(read_model: Annotated[ReadModel, Depends(get_read_model)]):
+    """
+    Report the read model's queued changes, replication lag and row counts.
+    Admin only endpoint.
+    """
+    return read_model.status()
+
+
+@router.get("/aggregate-mirror")
+def get_aggregate_mirror_status():
+    """
+    Report the single-table mirror's queued changes, copies, retries and recent failures.
+    Admin only endpoint.
+    """
+    return aggregate_mirror.status()
+
+
+@router.get("/catalog-feed")
+def get_catalog_feed_status(feed: Annotated[CatalogFeed, Depends(get_catalog_feed)]):
+    """
+    Report the catalog feed's published version, entry count, ETags and pending saree changes.
+    Admin only endpoint.
+    """
+    return feed.status()
+
+
+@router.get("/jobs")
+def get_job_metrics(job_queue: Annotated[JobQueue, Depends(get_job_queue)]):
+    """
+    Report the background job queue: depth per status, lag of the oldest due job and
+    success/retry/dead-letter counters.
+    Admin only endpoint.
+    """
+    return job_queue.metrics()
+
+
+@router.get("/jobs/dead")
+def list_dead_jobs(job_queue: Annotated[JobQueue, Depends(get_job_queue)], limit: int = 50):
+    """
+    List dead-lettered jobs with their last error.
+    Admin only endpoint.
+    """
+    return {"jobs": job_queue.dead_jobs(limit=limit)}
+
+
+@router.post("/jobs/{job_id}/retry")
+def retry_dead_job(job_id: str, job_queue: Annotated[JobQueue, Depends(get_job_queue)]):
+    """
+    Put a dead-lettered job back in the queue.
+    Admin only endpoint.
+    """
+    if not job_queue.retry(job_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered job not found")
+    return job_queue.get_job(job_id)
+
+
+@router.post("/profiles/token")
+def issue_profile_token(
+    admin: Annotated[User, Depends(require_admin_role)],
+    mode: Literal["deterministic", "sampling"] = "sampling",
+    ttl_seconds: Annotated[int, Query(ge=1)] = 600,
+):
+    """
+    Issue a short-lived token that profiles every request sent with it in the `X-Profile`
+    header; the response of a profiled request carries the profile's id in `X-Profile-Id`.
+    'sampling' stores a speedscope JSON file, 'deterministic' a cProfile pstats file.
+    Admin only endpoint. Requires the `profiling_enabled` setting.
+    """
+    settings = get_settings()
+    if not settings["profiling_enabled"]:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Profiling is disabled (profiling_enabled)")
+    ttl_seconds = min(ttl_seconds, settings["profile_token_max_ttl_seconds"])
+    return {
+        "header": PROFILE_HEADER,
+        "token": create_profile_token(mode, issued_by=str(admin.id), ttl_seconds=ttl_seconds),
+        "mode": mode,
+        "expires_in": ttl_seconds,
+    }
+
+
+@router.get("/profiles")
+def list_profiles(store: Annotated[ProfileStore, Depends(get_profile_store)]):
+    """
+    List the stored request profiles, newest first.
+    Admin only endpoint.
+    """
+    return {"profiles": store.list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, store: Annotated[ProfileStore, Depends(get_profile_store)]):
+    """
+    Download a profile: a pstats file (`python -m pstats`, snakeviz) or a speedscope JSON file.
+    Admin only endpoint.
+    """
+    found = store.get(profile_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    metadata, path = found
+    media_type = "application/json" if metadata["mode"] == "sampling" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+
+@router.get("/profiles/{profile_id}/summary")
+def summarize_profile(
+    profile_id: str,
+    store: Annotated[ProfileStore, Depends(get_profile_store)],
+    limit: Annotated[int, Query(ge=1, le=500)] = 30,
+):
+    """
+    Report the functions that took the most time in a profile (inclusive time, descending).
+    Admin only endpoint.
+    """
+    summary = store.summary(profile_id, limit=limit)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
@@ -12,7 +12,8 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: Annotated[UserService, Depends(get_user_service)],
 ):
-    user = user_service.get_user_by_email(email=form_data.username)
+    # Never a cached user: the password may have been changed through another process.
+    user = user_service.get_user_by_email(email=form_data.username, use_cache=False)
     if not user or not verify_password(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,47 @@
+import os
+from typing import Annotated, BinaryIO, Iterator, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+
+from src.dependencies import get_catalog_feed
+from src.services.catalog_feed import FEED_NAME, FORMATS, CatalogFeed
+
+router = APIRouter(
+    prefix="/catalog",
+    tags=["catalog"],
+)
+
+# Feed readers poll; let them and any CDN in front reuse a copy for a minute.
+CACHE_CONTROL = "public, max-age=60"
+CHUNK_SIZE = 64 * 1024
+
+
+def _read_chunks(file: BinaryIO) -> Iterator[bytes]:
+    with file:
+        while chunk := file.read(CHUNK_SIZE):
+            yield chunk
+
+
+@router.get("/feed.{extension}")
+def get_catalog_feed_file(
+    extension: Literal["json", "csv"],
+    feed: Annotated[CatalogFeed, Depends(get_catalog_feed)],
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    The catalog feed of approved sarees with price and image: JSON, or CSV in the Meta commerce
+    catalog format (WhatsApp store). Served from a pregenerated file; `If-None-Match` with the
+    ETag of the current version answers 304 Not Modified.
+    """
+    opened = feed.open(extension)
+    if opened is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Catalog feed not generated yet")
+    file, etag = opened
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        file.close()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # The file is streamed from the handle opened above: a newer publication may remove it meanwhile.
+    headers["Content-Length"] = str(os.fstat(file.fileno()).st_size)
+    headers["Content-Disposition"] = f'inline; filename="{FEED_NAME}.{extension}"'
+    return StreamingResponse(_read_chunks(file), media_type=FORMATS[extension], headers=headers)
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from typing import List, Annotated, Optional
+from datetime import datetime
 import uuid
 
-from src.models import Expense, ExpenseCreate, User, ExpenseStatus
+from src.models import Expense, ExpenseCreate, User, ExpenseStatus, ExpenseCategory
 from src.services.expense_service import ExpenseService
-from src.dependencies import get_expense_service, require_manager_role, get_current_user
+from src.services.idempotency_service import IdempotencyService
+from src.dependencies import (
+    get_expense_service, require_manager_role, get_current_user, get_idempotency_service, get_if_match_version,
+)
+from src.services.dynamodb import version_etag
+from src.responses import model_list_response
 
 router = APIRouter(
     prefix="/expenses",
@@ -16,26 +22,97 @@ router = APIRouter(
 def submit_expense(
     expense_in: ExpenseCreate,
     expense_service: Annotated[ExpenseService, Depends(get_expense_service)],
+    idempotency_service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    idempotency_key: Annotated[Optional[str], Header(alias="Idempotency-Key", max_length=255)] = None,
 ):
     """
     Submit a new expense.
     Any authenticated user can submit an expense.
+    Retries sent with the same `Idempotency-Key` return the first response.
     """
-    created_expense = expense_service.create_expense(expense_in, current_user)
+    created_expense, replayed = idempotency_service.run(
+        str(current_user.id), "POST /expenses/", idempotency_key, expense_in.model_dump(mode='json'),
+        lambda: expense_service.create_expense(expense_in, current_user),
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
     return created_expense
 
+class ExpenseQueryParams:
+    """Filters and pagination shared by the expense listing endpoints."""
+
+    def __init__(
+        self,
+        status_filter: Annotated[Optional[ExpenseStatus], Query(alias="status")] = None,
+        category: Optional[ExpenseCategory] = None,
+        submitted_from: Optional[datetime] = None,
+        submitted_to: Optional[datetime] = None,
+        limit: Annotated[int, Query(ge=1, le=500)] = 50,
+        cursor: Optional[str] = None,
+    ):
+        self.status = status_filter
+        self.category = category
+        self.submitted_from = submitted_from
+        self.submitted_to = submitted_to
+        self.limit = limit
+        self.cursor = cursor
+
+
+def _query_expenses(
+    expense_service: ExpenseService,
+    params: ExpenseQueryParams,
+    submitted_by_user_id: Optional[str] = None,
+) -> Response:
+    """Runs an indexed expense query; the response carries the next page cursor in the `X-Next-Cursor` header."""
+    try:
+        expenses, next_cursor = expense_service.query_expenses(
+            status=params.status,
+            category=params.category,
+            submitted_by_user_id=submitted_by_user_id,
+            submitted_from=params.submitted_from,
+            submitted_to=params.submitted_to,
+            limit=params.limit,
+            cursor=params.cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return model_list_response(Expense, expenses, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
 @router.get("/", response_model=List[Expense])
 def list_all_expenses(
+    params: Annotated[ExpenseQueryParams, Depends()],
     expense_service: Annotated[ExpenseService, Depends(get_expense_service)],
     manager: Annotated[User, Depends(require_manager_role)],
+    submitted_by_user_id: Optional[uuid.UUID] = None,
 ):
     """
-    Retrieve all expenses.
+    Retrieve expenses, newest first, optionally filtered by status, category, submitter
+    and submission date range (e.g. pending expenses this week).
+    Results are paginated: pass the `X-Next-Cursor` response header back as `cursor`.
+    Without a status, category or submitter filter the table is scanned: each page is sorted
+    newest first, but pages are not in date order.
     Only users with the 'manager' role can access this.
     """
-    expenses = expense_service.list_expenses()
-    return expenses
+    return _query_expenses(
+        expense_service, params,
+        submitted_by_user_id=str(submitted_by_user_id) if submitted_by_user_id else None,
+    )
+
+
+@router.get("/mine", response_model=List[Expense])
+def list_my_expenses(
+    params: Annotated[ExpenseQueryParams, Depends()],
+    expense_service: Annotated[ExpenseService, Depends(get_expense_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Retrieve the expenses submitted by the current user, newest first.
+    Accepts the same filters and pagination as `GET /expenses/`.
+    """
+    return _query_expenses(expense_service, params, submitted_by_user_id=str(current_user.id))
 
 @router.patch("/{expense_id}/status", response_model=Expense)
 def update_expense_status(
@@ -43,16 +120,21 @@ def update_expense_status(
     status_update: ExpenseStatus,
     expense_service: Annotated[ExpenseService, Depends(get_expense_service)],
     manager: Annotated[User, Depends(require_manager_role)],
+    expected_version: Annotated[Optional[int], Depends(get_if_match_version)],
+    response: Response,
 ):
     """
     Update the status of an expense (e.g., approve or reject).
     Only users with the 'manager' role can access this.
+    With `If-Match: "<version>"` the update only applies if nobody changed the expense since;
+    otherwise 409 is returned with the current expense.
     """
     updated_expense = expense_service.update_expense_status(
-        expense_id=str(expense_id), new_status=status_update, manager=manager
+        expense_id=str(expense_id), new_status=status_update, manager=manager, expected_version=expected_version
     )
     if not updated_expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found"
         )
+    response.headers["ETag"] = version_etag(updated_expense)
     return updated_expense 
\ No newline at end of file
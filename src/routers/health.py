@@ -0,0 +1,43 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, Response, status
+
+from src.dependencies import get_dependency_probe
+from src.lifespan import startup_state
+from src.services.health import DependencyProbe
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+# Probe answers must never be served from an intermediate cache.
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+@router.get("/live")
+def liveness(response: Response):
+    """
+    Report that the process is up and serving requests. Checks no dependency, so a DynamoDB
+    outage does not get every instance restarted. Public endpoint for load balancers.
+    """
+    response.headers.update(NO_STORE)
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+def readiness(response: Response, probe: Annotated[DependencyProbe, Depends(get_dependency_probe)]):
+    """
+    Report whether this instance should receive traffic: 503 until the startup warmup has
+    finished, and whenever a table probe fails, times out or its last result is stale.
+    Includes each warmup phase and the latency of each table probe.
+    Public endpoint for load balancers.
+    """
+    response.headers.update(NO_STORE)
+    snapshot = startup_state.snapshot()
+    if not snapshot["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting", "startup": snapshot}
+    dependencies = probe.check()
+    if not dependencies["healthy"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if dependencies["healthy"] else "unavailable", "startup": snapshot, **dependencies}
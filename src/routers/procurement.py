@@ -1,10 +1,25 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, status, HTTPException
-
-from src.dependencies import get_procurement_service, get_current_user, require_manager_role
-from src.models import User, ProcurementCreate, ProcurementApproval, ProcurementStatus
+from datetime import datetime
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Header, Query, Response, status, HTTPException
+from pydantic import BaseModel
+
+from src.dependencies import (
+    get_procurement_service, get_current_user, require_manager_role, get_idempotency_service, get_if_match_version,
+    field_selection,
+)
+from src.models import (
+    User, ProcurementCreate, ProcurementApproval, ProcurementRecord, ProcurementStatus, ProcurementSummary,
+)
+from src.responses import json_response, serialize_items
+from src.services.dynamodb import version_etag
+from src.services.idempotency_service import IdempotencyService
 from src.services.procurement_service import ProcurementService
 
+# Optional client-chosen key that makes a POST safe to retry (see IdempotencyService).
+IdempotencyKey = Annotated[Optional[str], Header(alias="Idempotency-Key", max_length=255)]
+# The view of the selected fields (`?fields=saree_name,cost_inr` or `?fields=summary`), or None.
+ProcurementView = Annotated[Optional[type[BaseModel]], Depends(field_selection(ProcurementRecord, ProcurementSummary))]
+
 router = APIRouter(
     prefix="/procurements",
     tags=["procurements"],
@@ -24,16 +39,23 @@ def test_procurement_auth():
 def submit_procurement(
     procurement_in: ProcurementCreate,
     procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
+    idempotency_service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    idempotency_key: IdempotencyKey = None,
 ):
     """
     Submits a new saree procurement for manager approval.
     Staff can submit procurements with images and details.
     The procurement will be in pending status until approved by a manager.
+    Retries sent with the same `Idempotency-Key` return the first response.
     """
-    created_procurement = procurement_service.submit_procurement(
-        procurement_data=procurement_in, user=current_user
+    created_procurement, replayed = idempotency_service.run(
+        str(current_user.id), "POST /procurements/", idempotency_key, procurement_in.model_dump(mode='json'),
+        lambda: procurement_service.submit_procurement(procurement_data=procurement_in, user=current_user),
     )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
     return created_procurement
 
 
@@ -41,12 +63,20 @@ def submit_procurement(
 def get_pending_procurements(
     procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    view: ProcurementView,
+    since: Optional[datetime] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=500)] = None,
 ):
     """
-    Get all procurement records that are pending approval.
+    Get procurement records that are pending approval, newest first.
+    Use `since` to only get requests submitted after a point in time and `limit` for the latest N.
+    `fields=summary` returns the approval board view (id, saree, cost, date, status).
     Manager+ only endpoint. Partners can see across all managers.
     """
-    pending_procurements = procurement_service.get_pending_procurements(current_user)
+    pending_procurements = procurement_service.get_pending_procurements(current_user, since=since, limit=limit,
+                                                                        view=view)
+    if view is not None:
+        return json_response({"pending_procurements": serialize_items(view, pending_procurements)})
     return {"pending_procurements": pending_procurements}
 
 
@@ -56,6 +86,8 @@ def approve_procurement(
     approval_details: ProcurementApproval,
     procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    expected_version: Annotated[Optional[int], Depends(get_if_match_version)],
+    response: Response,
 ):
     """
     Approve a procurement with optional additional costs and markup adjustments.
@@ -66,14 +98,19 @@ def approve_procurement(
     - Override the markup percentage
     - Override the exchange rate if needed
     - Add approval notes
+
+    Send the procurement's ETag in `If-Match` to only approve the version that was reviewed;
+    a concurrent change returns 409 with the current record.
     """
     result = procurement_service.approve_procurement(
         procurement_id=procurement_id,
         approval=approval_details,
-        manager=current_user
+        manager=current_user,
+        expected_version=expected_version
     )
     if result is None:
         raise HTTPException(status_code=404, detail="Procurement not found")
+    response.headers["ETag"] = version_etag(result)
     return result
 
 
@@ -83,18 +120,22 @@ def reject_procurement(
     rejection_reason: str,
     procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    expected_version: Annotated[Optional[int], Depends(get_if_match_version)],
+    response: Response,
 ):
     """
     Reject a procurement with a reason.
-    Manager+ only endpoint.
+    Manager+ only endpoint. Honours `If-Match` like the approve endpoint.
     """
     result = procurement_service.reject_procurement(
         procurement_id=procurement_id,
         manager=current_user,
-        reason=rejection_reason
+        reason=rejection_reason,
+        expected_version=expected_version
     )
     if result is None:
         raise HTTPException(status_code=404, detail="Procurement not found")
+    response.headers["ETag"] = version_etag(result)
     return result
 
 
@@ -102,27 +143,55 @@ def reject_procurement(
 def list_all_procurements(
     procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    view: ProcurementView,
 ):
     """
     List all procurement records.
+    `fields` returns only the listed fields, or the approval board summary.
     Available to all authenticated users.
     """
-    procurements = procurement_service.list_procurements()
+    procurements = procurement_service.list_procurements(view)
+    if view is not None:
+        return json_response({"procurements": serialize_items(view, procurements)})
     return {"procurements": procurements}
 
 
+@router.get("/{procurement_id}")
+def get_procurement(
+    procurement_id: str,
+    procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+):
+    """
+    Get a procurement together with its saree and the expenses booked for it.
+    Available to all authenticated users. The ETag header carries the procurement's version.
+    """
+    aggregate = procurement_service.get_procurement_aggregate(procurement_id)
+    if aggregate is None:
+        raise HTTPException(status_code=404, detail="Procurement not found")
+    response.headers["ETag"] = version_etag(aggregate["procurement"])
+    return aggregate
+
+
 # Legacy endpoint for backward compatibility
 @router.post("/legacy", status_code=status.HTTP_201_CREATED)
 def create_procurement_legacy(
     procurement_in: ProcurementCreate,
     procurement_service: Annotated[ProcurementService, Depends(get_procurement_service)],
+    idempotency_service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    idempotency_key: IdempotencyKey = None,
 ):
     """
     Legacy endpoint for backward compatibility.
     Use /procurements/ (submit_procurement) for new implementations.
     """
-    created_procurement = procurement_service.process_procurement(
-        procurement_data=procurement_in, user=current_user
+    created_procurement, replayed = idempotency_service.run(
+        str(current_user.id), "POST /procurements/legacy", idempotency_key, procurement_in.model_dump(mode='json'),
+        lambda: procurement_service.process_procurement(procurement_data=procurement_in, user=current_user),
     )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
     return created_procurement 
\ No newline at end of file
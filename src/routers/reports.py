@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Query
+
+from src.dependencies import get_read_model, require_manager_role
+from src.models import ProcurementStatus
+from src.services.read_model import ReadModel
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["reports"],
+    dependencies=[Depends(require_manager_role)],
+)
+
+
+@router.get("/procurements")
+def get_procurement_report(
+    read_model: Annotated[ReadModel, Depends(get_read_model)],
+    buyer_id: Optional[str] = None,
+    status_filter: Annotated[Optional[ProcurementStatus], Query(alias="status")] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> List[dict]:
+    """
+    Procurements joined with their buyer and saree, including the USD cost and margin of
+    each sale, newest first. Served from the SQL read model (eventually consistent).
+    Manager+ only endpoint.
+    """
+    return read_model.procurement_report(
+        buyer_id=buyer_id,
+        status=status_filter.value if status_filter else None,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+    )
+
+
+@router.get("/procurements/by-buyer")
+def get_procurements_by_buyer(
+    read_model: Annotated[ReadModel, Depends(get_read_model)],
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Procurement counts, total INR cost and sale margins per buyer.
+    Manager+ only endpoint.
+    """
+    return read_model.procurements_by_buyer(date_from=date_from, date_to=date_to)
+
+
+@router.get("/expenses/summary")
+def get_expense_summary(
+    read_model: Annotated[ReadModel, Depends(get_read_model)],
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Expense counts and totals per category, status and currency.
+    Manager+ only endpoint.
+    """
+    return read_model.expense_summary(date_from=date_from, date_to=date_to)
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timezone
+from typing import Annotated, List, Optional
+import uuid
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+
+from src.dependencies import get_current_user, get_idempotency_service, get_sale_service, require_manager_role
+from src.models import Sale, SaleBulkCreate, SaleCreate, User
+from src.responses import model_list_response
+from src.services.idempotency_service import IdempotencyService
+from src.services.sale_service import SaleService
+
+router = APIRouter(
+    prefix="/sales",
+    tags=["sales"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.post("/", response_model=Sale, status_code=status.HTTP_201_CREATED)
+def record_sale(
+    sale_in: SaleCreate,
+    sale_service: Annotated[SaleService, Depends(get_sale_service)],
+    idempotency_service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    idempotency_key: Annotated[Optional[str], Header(alias="Idempotency-Key", max_length=255)] = None,
+):
+    """
+    Record a sale of a saree.
+    Any authenticated user can record a sale. A sale with an `order_reference` that was already
+    recorded (same channel and time) is returned instead of being recorded twice.
+    Retries sent with the same `Idempotency-Key` return the first response.
+    """
+    try:
+        sale, replayed = idempotency_service.run(
+            str(current_user.id), "POST /sales/", idempotency_key, sale_in.model_dump(mode='json'),
+            lambda: sale_service.record_sale(sale_in, current_user),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return sale
+
+
+@router.post("/bulk", response_model=List[Sale], status_code=status.HTTP_201_CREATED)
+def import_sales(
+    sales_in: SaleBulkCreate,
+    sale_service: Annotated[SaleService, Depends(get_sale_service)],
+    manager: Annotated[User, Depends(require_manager_role)],
+):
+    """
+    Record up to 1000 sales at once, e.g. a WhatsApp order export.
+    Every row needs its `order_reference` and `sold_at`, which identify it: importing an export
+    again records nothing new, and the response lists the sales as first recorded.
+    Nothing is recorded if a saree id is unknown (400).
+    Only users with the 'manager' role can access this.
+    """
+    try:
+        sales = sale_service.record_sales(sales_in.sales, manager)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return model_list_response(Sale, sales, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/", response_model=List[Sale])
+def list_sales(
+    sale_service: Annotated[SaleService, Depends(get_sale_service)],
+    manager: Annotated[User, Depends(require_manager_role)],
+    day: Optional[date] = None,
+    saree_id: Optional[uuid.UUID] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+):
+    """
+    Retrieve the sales of a day (UTC, default today), or of one saree, newest first.
+    Only users with the 'manager' role can access this.
+    """
+    if saree_id is not None:
+        sales = sale_service.list_sales_for_saree(str(saree_id), limit=limit)
+    else:
+        sales = sale_service.list_sales(day or datetime.now(timezone.utc).date(), limit=limit)
+    return model_list_response(Sale, sales)
+
+
+@router.get("/{sale_id}", response_model=Sale)
+def get_sale(
+    sale_id: uuid.UUID,
+    sale_service: Annotated[SaleService, Depends(get_sale_service)],
+    manager: Annotated[User, Depends(require_manager_role)],
+):
+    """
+    Retrieve a sale by its ID.
+    Only users with the 'manager' role can access this.
+    """
+    sale = sale_service.get_sale(str(sale_id))
+    if sale is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sale not found")
+    return sale
@@ -1,8 +1,11 @@
-from typing import List
+from typing import Annotated, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
 
-from src.dependencies import get_saree_service
-from src.models import Saree
+from src.dependencies import field_selection, get_saree_service
+from src.models import Saree, SareeSummary
+from src.responses import model_list_response, model_response
+from src.services.dynamodb import version_etag
 from src.services.saree_service import SareeService
 
 router = APIRouter(
@@ -11,20 +14,26 @@ router = APIRouter(
 )
 
 
+# The view of the selected fields (`?fields=name,selling_price_usd` or `?fields=summary`), or None.
+SareeView = Annotated[Optional[type[BaseModel]], Depends(field_selection(Saree, SareeSummary))]
+
+
 @router.get("/", response_model=List[Saree])
-def list_sarees(saree_service: SareeService = Depends(get_saree_service)):
+def list_sarees(view: SareeView, saree_service: SareeService = Depends(get_saree_service)):
     """
     Retrieve a list of all available sarees.
+    `fields` returns only the listed fields, or the catalog summary (id, name, price, status).
     """
-    return saree_service.list_sarees()
+    return model_list_response(view or Saree, saree_service.list_sarees(view))
 
 
 @router.get("/{saree_id}", response_model=Saree)
-def get_saree(saree_id: str, saree_service: SareeService = Depends(get_saree_service)):
+def get_saree(saree_id: str, view: SareeView, saree_service: SareeService = Depends(get_saree_service)):
     """
-    Retrieve details for a single saree by its ID.
+    Retrieve details for a single saree by its ID. The ETag header carries its version.
+    `fields` selects the returned fields as for the list.
     """
-    saree = saree_service.get_saree_by_id(saree_id)
+    saree = saree_service.get_saree_by_id(saree_id, view)
     if not saree:
         raise HTTPException(status_code=404, detail="Saree not found")
-    return saree 
\ No newline at end of file
+    return model_response(view or Saree, saree, headers={"ETag": version_etag(saree)}) 
\ No newline at end of file
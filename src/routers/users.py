@@ -1,4 +1,3 @@
-import uuid
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -8,6 +7,8 @@ from src.dependencies import get_user_service, get_current_user
 from src.models import User, UserCreate
 from src.security import create_access_token, hash_password, verify_password, verify_access_token
 from src.services.user_service import UserService
+from src.services.ids import new_id
+from src.services.codec import from_item
 
 router = APIRouter(
     prefix="/users",
@@ -34,7 +35,7 @@ def get_current_user(
     user_dict = user_service.get_user_by_email(email=email)
     if user_dict is None:
         raise credentials_exception
-    return User(**user_dict)
+    return from_item(User, user_dict)
 
 
 @router.post("/register", response_model=User)
@@ -49,7 +50,7 @@ def register_user(
         raise HTTPException(status_code=400, detail="Email already registered")
 
     hashed_pass = hash_password(user_in.password)
-    new_user_id = str(uuid.uuid4())
+    new_user_id = str(new_id())
     
     user_data = user_in.model_dump()
     user_data.pop("password")
@@ -59,7 +60,7 @@ def register_user(
     user_data["role"] = user_in.role.value
 
     created_user = user_service.create_user(user_data=user_data)
-    return User(**created_user)
+    return from_item(User, created_user)
 
 
 @router.get("/users/me/", response_model=User)
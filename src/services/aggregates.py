@@ -0,0 +1,229 @@
+"""
+Optional single-table layout for procurement aggregates.
+
+A procurement, its saree and the expenses booked for it are copied into the `aggregates`
+table under one partition key, `PROCUREMENT#<procurement id>`, with sort keys `PROCUREMENT`,
+`SAREE` and `EXPENSE#<expense id>`. One Query then returns the whole aggregate.
+
+The separate tables stay the system of record (their GSIs serve the listings), and conditional
+updates always take their expected version from them. The copy is kept current by
+`AggregateMirror`, a change feed listener whose writer thread copies each change in the
+background, and backfilled by scripts/migrate_single_table.py. The `data_layout` setting drives the cutover:
+'tables' (no copy), 'dual' (copy written, reads from the tables), 'single' (copy written,
+aggregate reads from it).
+"""
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from botocore.exceptions import ClientError
+
+from src.config import get_settings
+from src.logs import get_logger
+from src.services.changes import change_feed
+from src.services.dynamodb import DynamoDBService, item_version
+
+AGGREGATE_TABLE = "aggregates"
+PROCUREMENT_SK = "PROCUREMENT"
+SAREE_SK = "SAREE"
+EXPENSE_SK_PREFIX = "EXPENSE#"
+# Tables copied into the aggregates, and the `entity` attribute of their copies.
+ENTITIES = {"procurement_records": "procurement", "sarees": "saree", "expenses": "expense"}
+_LAYOUT_ATTRIBUTES = ("pk", "sk", "entity")
+# Attempts per change before the mirror gives up on it, and the first retry delay (doubled per attempt).
+MIRROR_MAX_ATTEMPTS = 5
+MIRROR_RETRY_DELAY_SECONDS = 0.1
+logger = get_logger("aggregates")
+
+
+def aggregate_partition(procurement_id: str) -> str:
+    return f"PROCUREMENT#{procurement_id}"
+
+
+def aggregate_item(table_name: str, item: dict) -> Optional[dict]:
+    """
+    The single-table copy of an item of `procurement_records`, `sarees` or `expenses`, or None
+    if the item is not linked to a procurement (general expenses, sarees not yet migrated).
+    """
+    if table_name == "procurement_records":
+        procurement_id, sort_key = item["id"], PROCUREMENT_SK
+    elif table_name == "sarees":
+        procurement_id, sort_key = item.get("procurement_id"), SAREE_SK
+    else:
+        procurement_id, sort_key = item.get("procurement_id"), f"{EXPENSE_SK_PREFIX}{item['id']}"
+    if not procurement_id:
+        return None
+    return {**item, "pk": aggregate_partition(procurement_id), "sk": sort_key, "entity": ENTITIES[table_name]}
+
+
+def split_aggregate(items: Iterable[dict]) -> Optional[dict]:
+    """Groups the items of one partition into `{"procurement", "saree", "expenses"}`; None without a procurement."""
+    aggregate = {"procurement": None, "saree": None, "expenses": []}
+    for item in items:
+        entity = {name: value for name, value in item.items() if name not in _LAYOUT_ATTRIBUTES}
+        if item["sk"] == PROCUREMENT_SK:
+            aggregate["procurement"] = entity
+        elif item["sk"] == SAREE_SK:
+            aggregate["saree"] = entity
+        else:
+            aggregate["expenses"].append(entity)
+    return aggregate if aggregate["procurement"] is not None else None
+
+
+class AggregateService(DynamoDBService):
+    def __init__(self, endpoint_url: Optional[str] = None):
+        super().__init__(table_name=AGGREGATE_TABLE, endpoint_url=endpoint_url)
+
+    def get_aggregate(self, procurement_id: str) -> Optional[dict]:
+        """
+        Reads a procurement with its saree and expenses in one (strongly consistent) Query.
+        :return: The aggregate (see `split_aggregate`), or None if the procurement was not copied.
+        """
+        params = {
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": aggregate_partition(procurement_id)},
+            "ConsistentRead": True,
+        }
+        items = []
+        while True:
+            response = self.query(**params)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return split_aggregate(items)
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def put_if_newer(self, item: dict) -> bool:
+        """
+        Writes a copy unless the stored one has a higher version, so a late or replayed copy
+        (e.g. the migration racing live writes) never overwrites a newer one.
+        :return: False if a newer copy was kept.
+        """
+        try:
+            self._execute(
+                "PutItem", self.table.put_item,
+                Item=item,
+                ConditionExpression="attribute_not_exists(pk) OR attribute_not_exists(#version) OR #version <= :version",
+                ExpressionAttributeNames={"#version": "version"},
+                ExpressionAttributeValues={":version": item_version(item)},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+
+class AggregateMirror:
+    """
+    Change feed listener that copies every write of the aggregate's tables into the single table.
+    Changes are queued and written by one background thread, so requests never wait for (or fail
+    on) the copy; a failed copy is retried with backoff, then logged and counted (see `status()`).
+    """
+
+    def __init__(self):
+        self._service: Optional[AggregateService] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"copied": 0, "kept_newer": 0, "retried": 0, "failed": 0, "lag_seconds": 0.0}
+        # The most recent changes that could not be copied (the migration script backfills them).
+        self._failures: deque = deque(maxlen=100)
+
+    def install(self) -> None:
+        for table_name in ENTITIES:
+            change_feed.subscribe(table_name, self.on_change)
+
+    def uninstall(self) -> None:
+        for table_name in ENTITIES:
+            change_feed.unsubscribe(table_name, self.on_change)
+
+    def on_change(self, table_name: str, key: dict, item: Optional[dict]) -> None:
+        """Change feed listener: queues the change for the writer thread."""
+        self._queue.put((table_name, key, item, time.monotonic()))
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="aggregate-mirror-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            change = self._queue.get()
+            try:
+                self._copy_with_retries(change)
+            finally:
+                self._queue.task_done()
+
+    def _copy_with_retries(self, change: tuple) -> None:
+        table_name, key, item, queued_at = change
+        for attempt in range(MIRROR_MAX_ATTEMPTS):
+            try:
+                copied = self._copy(table_name, key, item)
+                break
+            except Exception:
+                if attempt == MIRROR_MAX_ATTEMPTS - 1:
+                    self._record_failure(change)
+                    return
+                with self._stats_lock:
+                    self._stats["retried"] += 1
+                time.sleep(MIRROR_RETRY_DELAY_SECONDS * 2 ** attempt)
+        with self._stats_lock:
+            self._stats["copied" if copied else "kept_newer"] += 1
+            self._stats["lag_seconds"] = round(time.monotonic() - queued_at, 6)
+
+    def _copy(self, table_name: str, key: dict, item: Optional[dict]) -> bool:
+        if self._service is None:
+            self._service = AggregateService(endpoint_url=get_settings()["dynamodb_endpoint_url"])
+        if item is None:
+            # Only procurement deletes can be located from the key; nothing deletes sarees or expenses.
+            if table_name == "procurement_records":
+                self._service.delete_item(Key={"pk": aggregate_partition(key["id"]), "sk": PROCUREMENT_SK})
+            return True
+        copy = aggregate_item(table_name, item)
+        return copy is None or self._service.put_if_newer(copy)
+
+    def _record_failure(self, change: tuple) -> None:
+        table_name, key, item, _ = change
+        key = key or {"id": (item or {}).get("id")}
+        logger.exception("Error copying a change into the aggregates table",
+                         extra={"table": table_name, "key": str(key.get("id"))})
+        with self._stats_lock:
+            self._stats["failed"] += 1
+            self._failures.append({"table": table_name, "id": str(key.get("id")),
+                                   "at": datetime.now(timezone.utc).isoformat()})
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued change is copied. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["recent_failures"] = list(self._failures)
+        return {"pending": self._queue.unfinished_tasks, **stats}
+
+    def reset(self) -> None:
+        """Waits for queued changes and clears the counters (test isolation)."""
+        self.flush()
+        self._service = None
+        with self._stats_lock:
+            self._stats = {"copied": 0, "kept_newer": 0, "retried": 0, "failed": 0, "lag_seconds": 0.0}
+            self._failures.clear()
+
+
+# Process-wide mirror, installed at startup (src/lifespan.py) unless `data_layout` is 'tables'.
+aggregate_mirror = AggregateMirror()
@@ -0,0 +1,647 @@
+"""
+Storage-independent part of the embedded engines that mimic the DynamoDB resource API.
+
+`StorageDatabase` stands in for `boto3.resource('dynamodb')` and `StorageTable` for a boto3
+`Table`; subclasses only provide item storage (see memory.py and sqlite.py). Everything the
+application can observe follows DynamoDB: numbers are stored and returned as `Decimal` (floats
+are rejected like boto3 does), `update_item` creates missing items, conditional failures raise
+`ConditionalCheckFailedException`, `Limit` counts evaluated items before the filter, a Query or
+Scan page stops at 1 MB of evaluated items, paginated reads return `LastEvaluatedKey`, and consumed
+capacity is estimated from item sizes. Only string
+expressions are supported (not boto3 condition objects).
+"""
+import copy
+import math
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any, ContextManager, Iterable, Iterator, Optional
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from src.services.backends.expressions import (
+    ExpressionError, apply_update, check_placeholders, condition_matches, dynamodb_type,
+    hash_value, key_condition_parts, parse_condition, parse_projection, parse_update, project,
+)
+from src.services.schema import TABLES, key_attributes
+
+_serializer = TypeSerializer()
+# DynamoDB stops a Query or Scan page once it has read 1 MB of items.
+MAX_PAGE_BYTES = 1024 * 1024
+
+
+def client_error(code: str, message: str, operation: str, **extra) -> ClientError:
+    """Builds the same exception botocore raises for a DynamoDB error response."""
+    return ClientError({"Error": {"Code": code, "Message": message}, **extra}, operation)
+
+
+def normalize(value: Any) -> Any:
+    """Converts a Python value to its stored form (ints become `Decimal`); rejects floats like boto3."""
+    if isinstance(value, bool) or value is None or isinstance(value, (str, Decimal)):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, (list, tuple)):
+        return [normalize(element) for element in value]
+    if isinstance(value, dict):
+        return {str(key): normalize(element) for key, element in value.items()}
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            raise ExpressionError("One or more parameter values were invalid: An number set  may not be empty")
+        return {normalize(element) for element in value}
+    raise TypeError(f"Unsupported type \"{type(value)}\" for value \"{value}\"")
+
+
+def item_size(value: Any) -> int:
+    """Approximates the DynamoDB size of a value in bytes (names + values)."""
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, Decimal):
+        return len(value.as_tuple().digits) // 2 + 2
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(len(key.encode()) + item_size(element) for key, element in value.items())
+    if isinstance(value, (list, set, frozenset)):
+        return 3 + sum(item_size(element) + 1 for element in value)
+    return 1
+
+
+def _read_units(size: int, consistent: bool) -> float:
+    units = max(1, math.ceil(size / 4096))
+    return float(units) if consistent else units / 2
+
+
+def _write_units(size: int) -> float:
+    return float(max(1, math.ceil(size / 1024)))
+
+
+def range_bounds(range_part: Optional[tuple], values: dict) -> list[tuple[str, Any]]:
+    """
+    Translates the range key condition of a query into (operator, value) bounds that a
+    storage engine may use to narrow its lookup. The full condition is still evaluated on
+    every item, so the bounds only need to be a superset.
+    """
+    if range_part is None:
+        return []
+    kind = range_part[0]
+    if kind == "compare":
+        _, op, left, right = range_part
+        if left[0] != "path":
+            op, right = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}.get(op, op), left
+        return [(op, values[right[1]])] if right[0] == "value" else []
+    if kind == "between":
+        _, _, low, high = range_part
+        return [(">=", values[low[1]]), ("<=", values[high[1]])]
+    # begins_with: everything starting with the prefix sorts at or after it
+    prefix = range_part[2][1]
+    return [(">=", values[prefix[1]])] if prefix[0] == "value" else []
+
+
+class TableIndex:
+    """A key schema: the table's own or one of its GSIs."""
+
+    def __init__(self, name: Optional[str], key_schema: list[dict], projection: Optional[dict] = None):
+        self.name = name
+        self.hash_key, self.range_key = key_attributes(key_schema)
+        self.projection = projection or {"ProjectionType": "ALL"}
+
+    def keys_of(self, item: dict) -> Optional[tuple]:
+        """The index key of `item`, or None if the item is not in this (sparse) index."""
+        if self.hash_key not in item or (self.range_key and self.range_key not in item):
+            return None
+        return (item[self.hash_key], item[self.range_key]) if self.range_key else (item[self.hash_key],)
+
+
+class StorageTable(ABC):
+    """
+    A single table exposing the boto3 `Table` methods. Subclasses implement `_load`, `_store`,
+    `_ordered`, `_count` and `_clear`; each receives the session opened by the database's
+    `read()` or `write()` context.
+    """
+
+    def __init__(self, database: "StorageDatabase", name: str, definition: dict):
+        self._database = database
+        self.name = self.table_name = name
+        self.key_schema = definition["KeySchema"]
+        self.attribute_definitions = definition.get("AttributeDefinitions", [])
+        self.global_secondary_indexes = definition.get("GlobalSecondaryIndexes") or None
+        self.table_status = "ACTIVE"
+        self._attribute_types = {a["AttributeName"]: a["AttributeType"] for a in self.attribute_definitions}
+        self._primary = TableIndex(None, self.key_schema)
+        self._indexes = {
+            gsi["IndexName"]: TableIndex(gsi["IndexName"], gsi["KeySchema"], gsi.get("Projection"))
+            for gsi in definition.get("GlobalSecondaryIndexes", [])
+        }
+
+    # --- storage primitives ---
+
+    @abstractmethod
+    def _load(self, session, primary_key: tuple) -> Optional[dict]:
+        """Returns the stored item (callers must not modify it), or None."""
+
+    @abstractmethod
+    def _store(self, session, primary_key: tuple, old: Optional[dict], new: Optional[dict]) -> None:
+        """Replaces `old` with `new` (None deletes) and maintains the indexes."""
+
+    @abstractmethod
+    def _ordered(self, session, index: TableIndex, hash_key_value: Any, bounds: list, reverse: bool,
+                 start: Optional[dict]) -> Iterable[dict]:
+        """
+        Yields the items of `index` in index order, optionally limited to one hash key value
+        (None scans the whole index) and resuming after the `start` item (ExclusiveStartKey).
+        """
+
+    @abstractmethod
+    def _count(self, session) -> int:
+        """The number of stored items."""
+
+    @abstractmethod
+    def _clear(self, session) -> None:
+        """Deletes every item."""
+
+    def _copy(self, item: dict) -> dict:
+        """A copy of a loaded item that is safe to hand to the caller."""
+        return copy.deepcopy(item)
+
+    # --- boto3 Table compatibility ---
+
+    @property
+    def item_count(self) -> int:
+        with self._database.read() as session:
+            return self._count(session)
+
+    def load(self) -> None:
+        """No-op; the table description is always current."""
+
+    reload = load
+
+    def batch_writer(self, overwrite_by_pkeys: Optional[list] = None) -> "_BatchWriter":
+        return _BatchWriter(self)
+
+    # --- helpers ---
+
+    def _primary_key(self, key: dict, operation: str) -> tuple:
+        expected = {self._primary.hash_key} | ({self._primary.range_key} if self._primary.range_key else set())
+        if set(key) != expected:
+            raise client_error("ValidationException", "The provided key element does not match the schema", operation)
+        normalized = {name: normalize(value) for name, value in key.items()}
+        self._check_key_types(normalized, expected, operation)
+        return self._primary.keys_of(normalized)
+
+    def _check_key_types(self, item: dict, attributes, operation: str) -> None:
+        for attribute in attributes:
+            if attribute in item:
+                value = item[attribute]
+                expected_type = self._attribute_types.get(attribute, "S")
+                if dynamodb_type(value) != expected_type or value == "":
+                    raise client_error(
+                        "ValidationException",
+                        f"One or more parameter values were invalid: Type mismatch for key {attribute} expected: {expected_type}",
+                        operation,
+                    )
+
+    def _validate_item(self, item: dict, operation: str) -> None:
+        primary_attributes = [a for a in (self._primary.hash_key, self._primary.range_key) if a]
+        for attribute in primary_attributes:
+            if attribute not in item:
+                raise client_error(
+                    "ValidationException",
+                    f"One or more parameter values were invalid: Missing the key {attribute} in the item",
+                    operation,
+                )
+        index_attributes = {a for index in self._indexes.values() for a in (index.hash_key, index.range_key) if a}
+        self._check_key_types(item, set(primary_attributes) | index_attributes, operation)
+
+    def _write_capacity(self, old: Optional[dict], new: Optional[dict], mode: Optional[str]) -> Optional[dict]:
+        if mode not in ("TOTAL", "INDEXES"):
+            return None
+        units = _write_units(max(item_size(old or {}), item_size(new or {})))
+        indexes = {
+            name: {"CapacityUnits": units}
+            for name, index in self._indexes.items()
+            if (old and index.keys_of(old)) or (new and index.keys_of(new))
+        }
+        consumed = {"TableName": self.name, "CapacityUnits": units + sum(i["CapacityUnits"] for i in indexes.values())}
+        if mode == "INDEXES":
+            consumed["Table"] = {"CapacityUnits": units}
+            if indexes:
+                consumed["GlobalSecondaryIndexes"] = indexes
+        return consumed
+
+    def _read_capacity(self, size: int, consistent: bool, index_name: Optional[str], mode: Optional[str]) -> Optional[dict]:
+        if mode not in ("TOTAL", "INDEXES"):
+            return None
+        units = _read_units(size, consistent)
+        consumed = {"TableName": self.name, "CapacityUnits": units}
+        if mode == "INDEXES":
+            if index_name:
+                consumed["Table"] = {"CapacityUnits": 0.0}
+                consumed["GlobalSecondaryIndexes"] = {index_name: {"CapacityUnits": units}}
+            else:
+                consumed["Table"] = {"CapacityUnits": units}
+        return consumed
+
+    def _condition_failed(self, old: Optional[dict], return_on_failure: Optional[str], operation: str) -> ClientError:
+        extra = {}
+        if return_on_failure == "ALL_OLD" and old is not None:
+            extra["Item"] = {name: _serializer.serialize(value) for name, value in old.items()}
+        return client_error("ConditionalCheckFailedException", "The conditional request failed", operation, **extra)
+
+    @staticmethod
+    def _values(values: Optional[dict]) -> dict:
+        return {name: normalize(value) for name, value in (values or {}).items()}
+
+    @staticmethod
+    def _return_values(mode: Optional[str], old: Optional[dict], new: Optional[dict], touched: set) -> Optional[dict]:
+        if mode in (None, "NONE"):
+            return None
+        source = old if mode in ("ALL_OLD", "UPDATED_OLD") else new
+        if source is None:
+            return None
+        if mode.startswith("UPDATED"):
+            source = {name: value for name, value in source.items() if name in touched}
+        return copy.deepcopy(source)
+
+    # --- write preparation (shared by single-item calls, batches and transactions) ---
+
+    def _prepare_put(self, session, operation: str, Item: dict, ConditionExpression: Optional[str] = None,
+                     ExpressionAttributeNames: Optional[dict] = None, ExpressionAttributeValues: Optional[dict] = None,
+                     ReturnValuesOnConditionCheckFailure: Optional[str] = None):
+        item = normalize(Item)
+        self._validate_item(item, operation)
+        primary_key = self._primary.keys_of(item)
+        condition = parse_condition(ConditionExpression, ExpressionAttributeNames) if ConditionExpression else None
+        check_placeholders([condition], ExpressionAttributeNames, ExpressionAttributeValues)
+        values = self._values(ExpressionAttributeValues)
+        old = self._load(session, primary_key)
+        if condition and not condition_matches(condition, old, values):
+            raise self._condition_failed(old, ReturnValuesOnConditionCheckFailure, operation)
+        return primary_key, old, item, set(item)
+
+    def _prepare_update(self, session, operation: str, Key: dict, UpdateExpression: Optional[str] = None,
+                        ConditionExpression: Optional[str] = None, ExpressionAttributeNames: Optional[dict] = None,
+                        ExpressionAttributeValues: Optional[dict] = None,
+                        ReturnValuesOnConditionCheckFailure: Optional[str] = None):
+        primary_key = self._primary_key(Key, operation)
+        update = parse_update(UpdateExpression, ExpressionAttributeNames) if UpdateExpression else None
+        condition = parse_condition(ConditionExpression, ExpressionAttributeNames) if ConditionExpression else None
+        check_placeholders([update, condition], ExpressionAttributeNames, ExpressionAttributeValues)
+        values = self._values(ExpressionAttributeValues)
+        old = self._load(session, primary_key)
+        if condition and not condition_matches(condition, old, values):
+            raise self._condition_failed(old, ReturnValuesOnConditionCheckFailure, operation)
+        new = copy.deepcopy(old) if old is not None else normalize(Key)
+        touched = apply_update(update, new, values) if update else set()
+        for attribute in (self._primary.hash_key, self._primary.range_key):
+            if attribute and attribute in touched:
+                raise client_error(
+                    "ValidationException",
+                    f"One or more parameter values were invalid: Cannot update attribute {attribute}. This attribute is part of the key",
+                    operation,
+                )
+        self._validate_item(new, operation)
+        return primary_key, old, new, touched
+
+    def _prepare_delete(self, session, operation: str, Key: dict, ConditionExpression: Optional[str] = None,
+                        ExpressionAttributeNames: Optional[dict] = None, ExpressionAttributeValues: Optional[dict] = None,
+                        ReturnValuesOnConditionCheckFailure: Optional[str] = None):
+        primary_key = self._primary_key(Key, operation)
+        condition = parse_condition(ConditionExpression, ExpressionAttributeNames) if ConditionExpression else None
+        check_placeholders([condition], ExpressionAttributeNames, ExpressionAttributeValues)
+        values = self._values(ExpressionAttributeValues)
+        old = self._load(session, primary_key)
+        if condition and not condition_matches(condition, old, values):
+            raise self._condition_failed(old, ReturnValuesOnConditionCheckFailure, operation)
+        return primary_key, old, None, set()
+
+    def _run_write(self, operation: str, prepare, return_values: Optional[str], consumed_mode: Optional[str], **kwargs) -> dict:
+        with self._database.write() as session:
+            try:
+                primary_key, old, new, touched = prepare(session, operation, **kwargs)
+            except ExpressionError as e:
+                raise client_error("ValidationException", str(e), operation) from e
+            self._store(session, primary_key, old, new)
+            response: dict = {}
+            attributes = self._return_values(return_values, old, new, touched)
+            if attributes is not None:
+                response["Attributes"] = attributes
+            consumed = self._write_capacity(old, new, consumed_mode)
+            if consumed:
+                response["ConsumedCapacity"] = consumed
+            return response
+
+    # --- single-item operations ---
+
+    def put_item(self, Item: dict, ReturnValues: Optional[str] = None, ReturnConsumedCapacity: Optional[str] = None, **kwargs) -> dict:
+        if ReturnValues not in (None, "NONE", "ALL_OLD"):
+            raise client_error("ValidationException", "Return values set to invalid value", "PutItem")
+        return self._run_write("PutItem", self._prepare_put, ReturnValues, ReturnConsumedCapacity, Item=Item, **kwargs)
+
+    def update_item(self, Key: dict, ReturnValues: Optional[str] = None, ReturnConsumedCapacity: Optional[str] = None, **kwargs) -> dict:
+        return self._run_write("UpdateItem", self._prepare_update, ReturnValues, ReturnConsumedCapacity, Key=Key, **kwargs)
+
+    def delete_item(self, Key: dict, ReturnValues: Optional[str] = None, ReturnConsumedCapacity: Optional[str] = None, **kwargs) -> dict:
+        if ReturnValues not in (None, "NONE", "ALL_OLD"):
+            raise client_error("ValidationException", "Return values set to invalid value", "DeleteItem")
+        return self._run_write("DeleteItem", self._prepare_delete, ReturnValues, ReturnConsumedCapacity, Key=Key, **kwargs)
+
+    def get_item(self, Key: dict, ProjectionExpression: Optional[str] = None, ExpressionAttributeNames: Optional[dict] = None,
+                 ConsistentRead: bool = False, ReturnConsumedCapacity: Optional[str] = None) -> dict:
+        try:
+            primary_key = self._primary_key(Key, "GetItem")
+            projection = parse_projection(ProjectionExpression, ExpressionAttributeNames) if ProjectionExpression else None
+            check_placeholders([projection], ExpressionAttributeNames, None)
+        except ExpressionError as e:
+            raise client_error("ValidationException", str(e), "GetItem") from e
+        with self._database.read() as session:
+            item = self._load(session, primary_key)
+            response: dict = {}
+            if item is not None:
+                response["Item"] = project(projection, item) if projection else self._copy(item)
+        consumed = self._read_capacity(item_size(item or {}), ConsistentRead, None, ReturnConsumedCapacity)
+        if consumed:
+            response["ConsumedCapacity"] = consumed
+        return response
+
+    # --- reads over many items ---
+
+    def _last_evaluated_key(self, index: TableIndex, item: dict) -> dict:
+        attributes = {a for a in (self._primary.hash_key, self._primary.range_key, index.hash_key, index.range_key) if a}
+        return {attribute: copy.deepcopy(item[attribute]) for attribute in attributes}
+
+    def _project_index(self, index: TableIndex, item: dict) -> dict:
+        projection_type = index.projection.get("ProjectionType", "ALL")
+        if projection_type == "ALL" or index is self._primary:
+            return self._copy(item)
+        keep = {a for a in (self._primary.hash_key, self._primary.range_key, index.hash_key, index.range_key) if a}
+        if projection_type == "INCLUDE":
+            keep |= set(index.projection.get("NonKeyAttributes", []))
+        return {name: copy.deepcopy(value) for name, value in item.items() if name in keep}
+
+    def _page(self, index: TableIndex, candidates: Iterator[dict], Limit: Optional[int], filter_expression, projection,
+              values: dict, Select: Optional[str], ConsistentRead: bool, ReturnConsumedCapacity: Optional[str]) -> dict:
+        evaluated = []
+        size = 0
+        more = False
+        for item in candidates:
+            item_bytes = item_size(item)
+            if (Limit and len(evaluated) == Limit) or (evaluated and size + item_bytes > MAX_PAGE_BYTES):
+                more = True
+                break
+            evaluated.append(item)
+            size += item_bytes
+        matches = [item for item in evaluated if not filter_expression or condition_matches(filter_expression, item, values)]
+
+        response: dict = {"Count": len(matches), "ScannedCount": len(evaluated)}
+        if Select != "COUNT":
+            response["Items"] = [project(projection, item) if projection else self._project_index(index, item) for item in matches]
+        if more:
+            response["LastEvaluatedKey"] = self._last_evaluated_key(index, evaluated[-1])
+        consumed = self._read_capacity(size, ConsistentRead, index.name, ReturnConsumedCapacity)
+        if consumed:
+            response["ConsumedCapacity"] = consumed
+        return response
+
+    def _index(self, index_name: Optional[str], operation: str) -> TableIndex:
+        if index_name is None:
+            return self._primary
+        if index_name not in self._indexes:
+            raise client_error("ValidationException", "The table does not have the specified index: " + index_name, operation)
+        return self._indexes[index_name]
+
+    def query(self, KeyConditionExpression: str, IndexName: Optional[str] = None, FilterExpression: Optional[str] = None,
+              ProjectionExpression: Optional[str] = None, ExpressionAttributeNames: Optional[dict] = None,
+              ExpressionAttributeValues: Optional[dict] = None, Limit: Optional[int] = None,
+              ExclusiveStartKey: Optional[dict] = None, ScanIndexForward: bool = True, Select: Optional[str] = None,
+              ConsistentRead: bool = False, ReturnConsumedCapacity: Optional[str] = None) -> dict:
+        index = self._index(IndexName, "Query")
+        try:
+            key_condition = parse_condition(KeyConditionExpression, ExpressionAttributeNames)
+            filter_expression = parse_condition(FilterExpression, ExpressionAttributeNames) if FilterExpression else None
+            projection = parse_projection(ProjectionExpression, ExpressionAttributeNames) if ProjectionExpression else None
+            check_placeholders([key_condition, filter_expression, projection], ExpressionAttributeNames, ExpressionAttributeValues)
+            values = self._values(ExpressionAttributeValues)
+            hash_part, range_part = key_condition_parts(key_condition, index.hash_key, index.range_key)
+            with self._database.read() as session:
+                ordered = self._ordered(
+                    session, index, hash_value(hash_part, values), range_bounds(range_part, values),
+                    not ScanIndexForward, normalize(ExclusiveStartKey) if ExclusiveStartKey else None,
+                )
+                candidates = (item for item in ordered if condition_matches(key_condition, item, values))
+                return self._page(index, candidates, Limit, filter_expression, projection, values, Select,
+                                  ConsistentRead, ReturnConsumedCapacity)
+        except ExpressionError as e:
+            raise client_error("ValidationException", str(e), "Query") from e
+
+    def scan(self, IndexName: Optional[str] = None, FilterExpression: Optional[str] = None,
+             ProjectionExpression: Optional[str] = None, ExpressionAttributeNames: Optional[dict] = None,
+             ExpressionAttributeValues: Optional[dict] = None, Limit: Optional[int] = None,
+             ExclusiveStartKey: Optional[dict] = None, Select: Optional[str] = None, Segment: Optional[int] = None,
+             TotalSegments: Optional[int] = None, ConsistentRead: bool = False,
+             ReturnConsumedCapacity: Optional[str] = None) -> dict:
+        index = self._index(IndexName, "Scan")
+        try:
+            filter_expression = parse_condition(FilterExpression, ExpressionAttributeNames) if FilterExpression else None
+            projection = parse_projection(ProjectionExpression, ExpressionAttributeNames) if ProjectionExpression else None
+            check_placeholders([filter_expression, projection], ExpressionAttributeNames, ExpressionAttributeValues)
+            values = self._values(ExpressionAttributeValues)
+            with self._database.read() as session:
+                candidates = iter(self._ordered(
+                    session, index, None, [], False, normalize(ExclusiveStartKey) if ExclusiveStartKey else None,
+                ))
+                if TotalSegments:
+                    candidates = (
+                        item for item in candidates
+                        if zlib.crc32(repr(self._primary.keys_of(item)).encode()) % TotalSegments == Segment
+                    )
+                return self._page(index, candidates, Limit, filter_expression, projection, values, Select,
+                                  ConsistentRead, ReturnConsumedCapacity)
+        except ExpressionError as e:
+            raise client_error("ValidationException", str(e), "Scan") from e
+
+
+class _BatchWriter:
+    """Mirror of boto3's `Table.batch_writer()`: buffers puts/deletes and writes them on exit."""
+
+    def __init__(self, table: StorageTable):
+        self._table = table
+        self._requests: list[tuple[str, dict]] = []
+
+    def put_item(self, Item: dict) -> None:
+        self._requests.append(("put", Item))
+
+    def delete_item(self, Key: dict) -> None:
+        self._requests.append(("delete", Key))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            for kind, payload in self._requests:
+                if kind == "put":
+                    self._table.put_item(Item=payload)
+                else:
+                    self._table.delete_item(Key=payload)
+        self._requests.clear()
+        return False
+
+
+class StorageDatabase(ABC):
+    """
+    Stand-in for the DynamoDB service resource (`boto3.resource('dynamodb')`). Subclasses
+    provide the table class and the `read()` / `write()` sessions; a write session is
+    exclusive, so batches and transactions are atomic across tables.
+    """
+
+    table_class: type[StorageTable]
+
+    def __init__(self, tables: Optional[dict] = None):
+        self._tables_lock = threading.Lock()
+        self._tables = {name: self.table_class(self, name, definition) for name, definition in (tables or TABLES).items()}
+
+    @abstractmethod
+    def read(self) -> ContextManager:
+        """A read session: a context manager yielding what the table primitives take as `session`."""
+
+    @abstractmethod
+    def write(self) -> ContextManager:
+        """An exclusive write session, like `read()`."""
+
+    def Table(self, name: str) -> StorageTable:
+        table = self._tables.get(name)
+        if table is None:
+            raise client_error("ResourceNotFoundException", f"Requested resource not found: Table: {name} not found", "DescribeTable")
+        return table
+
+    def create_table(self, TableName: str, **definition) -> StorageTable:
+        with self._tables_lock:
+            if TableName in self._tables:
+                raise client_error("ResourceInUseException", f"Table already exists: {TableName}", "CreateTable")
+            table = self._tables[TableName] = self.table_class(self, TableName, definition)
+            return table
+
+    def reset(self) -> None:
+        """Empties every table (test isolation)."""
+        with self.write() as session:
+            for table in self._tables.values():
+                table._clear(session)
+
+    def batch_write_item(self, RequestItems: dict, ReturnConsumedCapacity: Optional[str] = None) -> dict:
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise client_error("ValidationException", "Too many items requested for the BatchWriteItem call", "BatchWriteItem")
+        with self.write() as session:
+            # Every request is validated before anything is stored: a rejected batch writes nothing.
+            prepared = []
+            seen = set()
+            for table_name, requests in RequestItems.items():
+                table = self.Table(table_name)
+                for request in requests:
+                    if "PutRequest" in request:
+                        primary_key, old, new, _ = table._prepare_put(session, "BatchWriteItem", Item=request["PutRequest"]["Item"])
+                    else:
+                        primary_key, old, new, _ = table._prepare_delete(session, "BatchWriteItem", Key=request["DeleteRequest"]["Key"])
+                    if (table_name, primary_key) in seen:
+                        raise client_error("ValidationException", "Provided list of item keys contains duplicates",
+                                           "BatchWriteItem")
+                    seen.add((table_name, primary_key))
+                    prepared.append((table, primary_key, old, new))
+            units: dict[str, float] = {table_name: 0.0 for table_name in RequestItems}
+            for table, primary_key, old, new in prepared:
+                table._store(session, primary_key, old, new)
+                units[table.name] += table._write_capacity(old, new, "TOTAL")["CapacityUnits"]
+            consumed = [{"TableName": table_name, "CapacityUnits": total} for table_name, total in units.items()]
+        response = {"UnprocessedItems": {}}
+        if ReturnConsumedCapacity in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = consumed
+        return response
+
+    def batch_get_item(self, RequestItems: dict, ReturnConsumedCapacity: Optional[str] = None) -> dict:
+        if sum(len(request["Keys"]) for request in RequestItems.values()) > 100:
+            raise client_error("ValidationException", "Too many items requested for the BatchGetItem call", "BatchGetItem")
+        responses: dict = {}
+        consumed = []
+        for table_name, request in RequestItems.items():
+            table = self.Table(table_name)
+            items = []
+            units = 0.0
+            for key in request["Keys"]:
+                response = table.get_item(
+                    Key=key,
+                    ProjectionExpression=request.get("ProjectionExpression"),
+                    ExpressionAttributeNames=request.get("ExpressionAttributeNames"),
+                    ConsistentRead=request.get("ConsistentRead", False),
+                    ReturnConsumedCapacity="TOTAL",
+                )
+                units += response["ConsumedCapacity"]["CapacityUnits"]
+                if "Item" in response:
+                    items.append(response["Item"])
+            responses[table_name] = items
+            consumed.append({"TableName": table_name, "CapacityUnits": units})
+        response = {"Responses": responses, "UnprocessedKeys": {}}
+        if ReturnConsumedCapacity in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = consumed
+        return response
+
+    def transact_write_items(self, TransactItems: list, ReturnConsumedCapacity: Optional[str] = None,
+                             ClientRequestToken: Optional[str] = None) -> dict:
+        """
+        Applies Put/Update/Delete/ConditionCheck actions atomically. Takes the same
+        (resource-level) Python values as the single-item calls.
+        """
+        if len(TransactItems) > 100:
+            raise client_error("ValidationException", "Member must have length less than or equal to 100", "TransactWriteItems")
+        consumed: dict[str, float] = {}
+        with self.write() as session:
+            prepared = []
+            reasons = []
+            failed = False
+            seen = set()
+            for action in TransactItems:
+                (kind, params), = action.items()
+                params = dict(params)
+                table = self.Table(params.pop("TableName"))
+                prepare = {
+                    "Put": table._prepare_put,
+                    "Update": table._prepare_update,
+                    "Delete": table._prepare_delete,
+                    "ConditionCheck": table._prepare_delete,
+                }[kind]
+                try:
+                    primary_key, old, new, _ = prepare(session, "TransactWriteItems", **params)
+                except ExpressionError as e:
+                    raise client_error("ValidationException", str(e), "TransactWriteItems") from e
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+                    failed = True
+                    reasons.append({"Code": "ConditionalCheckFailed", "Message": "The conditional request failed",
+                                    **({"Item": e.response["Item"]} if "Item" in e.response else {})})
+                    continue
+                if (table.name, primary_key) in seen:
+                    raise client_error("ValidationException",
+                                       "Transaction request cannot include multiple operations on one item", "TransactWriteItems")
+                seen.add((table.name, primary_key))
+                reasons.append({"Code": "None"})
+                if kind != "ConditionCheck":
+                    prepared.append((table, primary_key, old, new))
+            if failed:
+                codes = ", ".join(reason["Code"] for reason in reasons)
+                raise client_error("TransactionCanceledException",
+                                   f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]",
+                                   "TransactWriteItems", CancellationReasons=reasons)
+            for table, primary_key, old, new in prepared:
+                table._store(session, primary_key, old, new)
+                units = table._write_capacity(old, new, "TOTAL")["CapacityUnits"] * 2  # transactions cost double
+                consumed[table.name] = consumed.get(table.name, 0.0) + units
+        response: dict = {}
+        if ReturnConsumedCapacity in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = [{"TableName": name, "CapacityUnits": units} for name, units in consumed.items()]
+        return response
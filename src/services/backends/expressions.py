@@ -0,0 +1,576 @@
+"""
+Parser and evaluator for DynamoDB expressions, used by the in-process storage engines.
+
+Supports condition/filter/key-condition expressions (comparisons, BETWEEN, IN, AND/OR/NOT,
+attribute_exists, attribute_not_exists, attribute_type, begins_with, contains, size),
+update expressions (SET with +, -, if_not_exists and list_append; REMOVE; ADD; DELETE) and
+projection expressions, with `#name` and `:value` placeholders and nested document paths.
+Parsed expressions are cached, so evaluating the same expression repeatedly is cheap.
+"""
+import copy
+import re
+from decimal import Decimal, Context
+from functools import lru_cache
+from typing import Any, Optional
+
+DYNAMODB_CONTEXT = Context(prec=38)
+
+
+class ExpressionError(ValueError):
+    """An invalid expression or value; surfaced by the engines as a `ValidationException`."""
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<op><>|<=|>=|[=<>(),.\[\]+-])|(?P<name>#[A-Za-z0-9_]+)|(?P<value>:[A-Za-z0-9_]+)"
+    r"|(?P<number>\d+)|(?P<word>[A-Za-z_][A-Za-z0-9_]*))"
+)
+
+
+def _tokenize(expression: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match or match.end() == position:
+            raise ExpressionError(f"Invalid expression: syntax error near '{expression[position:position + 10]}'")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression: str, names: dict):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.names = names
+        self.used_names: set[str] = set()
+        self.used_values: set[str] = set()
+
+    # --- token helpers ---
+
+    def peek(self, offset: int = 0) -> Optional[tuple[str, str]]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def next(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Invalid expression: unexpected end of expression")
+        self.position += 1
+        return token
+
+    def accept_op(self, op: str) -> bool:
+        token = self.peek()
+        if token and token[0] == "op" and token[1] == op:
+            self.position += 1
+            return True
+        return False
+
+    def expect_op(self, op: str) -> None:
+        if not self.accept_op(op):
+            token = self.peek()
+            raise ExpressionError(f"Invalid expression: expected '{op}', found '{token[1] if token else 'end'}'")
+
+    def accept_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        if token and token[0] == "word" and token[1].upper() == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def at_end(self) -> bool:
+        return self.position >= len(self.tokens)
+
+    # --- paths and operands ---
+
+    def path_segment(self, token: tuple[str, str]) -> str:
+        kind, text = token
+        if kind == "name":
+            if text not in self.names:
+                raise ExpressionError(
+                    f"An expression attribute name used in the document path is not defined; attribute name: {text}"
+                )
+            self.used_names.add(text)
+            return self.names[text]
+        if kind == "word":
+            return text
+        raise ExpressionError(f"Invalid expression: expected an attribute name, found '{text}'")
+
+    def path(self) -> tuple:
+        segments: list = [self.path_segment(self.next())]
+        while True:
+            if self.accept_op("."):
+                segments.append(self.path_segment(self.next()))
+            elif self.accept_op("["):
+                kind, text = self.next()
+                if kind != "number":
+                    raise ExpressionError("Invalid expression: list index must be a number")
+                segments.append(int(text))
+                self.expect_op("]")
+            else:
+                return ("path", tuple(segments))
+
+    def operand(self) -> tuple:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Invalid expression: unexpected end of expression")
+        kind, text = token
+        if kind == "value":
+            self.position += 1
+            self.used_values.add(text)
+            return ("value", text)
+        if kind == "word" and self.peek(1) == ("op", "("):
+            function = text.lower()
+            self.position += 2
+            if function == "size":
+                node = ("size", self.path())
+            elif function == "if_not_exists":
+                path = self.path()
+                self.expect_op(",")
+                node = ("if_not_exists", path, self.update_value())
+            elif function == "list_append":
+                first = self.operand()
+                self.expect_op(",")
+                node = ("list_append", first, self.operand())
+            else:
+                raise ExpressionError(f"Invalid function name; function: {text}")
+            self.expect_op(")")
+            return node
+        return self.path()
+
+    # --- conditions ---
+
+    def condition(self) -> tuple:
+        node = self.and_condition()
+        while self.accept_keyword("OR"):
+            node = ("or", node, self.and_condition())
+        return node
+
+    def and_condition(self) -> tuple:
+        node = self.not_condition()
+        while self.accept_keyword("AND"):
+            node = ("and", node, self.not_condition())
+        return node
+
+    def not_condition(self) -> tuple:
+        if self.accept_keyword("NOT"):
+            return ("not", self.not_condition())
+        return self.primary_condition()
+
+    def primary_condition(self) -> tuple:
+        if self.accept_op("("):
+            node = self.condition()
+            self.expect_op(")")
+            return node
+        token = self.peek()
+        if token and token[0] == "word" and self.peek(1) == ("op", "(") and token[1].lower() in CONDITION_FUNCTIONS:
+            function = token[1].lower()
+            self.position += 2
+            args = [self.operand()]
+            while self.accept_op(","):
+                args.append(self.operand())
+            self.expect_op(")")
+            if len(args) != CONDITION_FUNCTIONS[function]:
+                raise ExpressionError(f"Incorrect number of operands for function: {function}")
+            return ("function", function, tuple(args))
+
+        left = self.operand()
+        if self.accept_keyword("BETWEEN"):
+            low = self.operand()
+            if not self.accept_keyword("AND"):
+                raise ExpressionError("Invalid expression: BETWEEN requires AND")
+            return ("between", left, low, self.operand())
+        if self.accept_keyword("IN"):
+            self.expect_op("(")
+            options = [self.operand()]
+            while self.accept_op(","):
+                options.append(self.operand())
+            self.expect_op(")")
+            return ("in", left, tuple(options))
+        kind, text = self.next()
+        if kind != "op" or text not in COMPARATORS:
+            raise ExpressionError(f"Invalid expression: expected a comparator, found '{text}'")
+        return ("compare", text, left, self.operand())
+
+    # --- updates ---
+
+    def update_value(self) -> tuple:
+        node = self.operand()
+        if self.accept_op("+"):
+            return ("plus", node, self.operand())
+        if self.accept_op("-"):
+            return ("minus", node, self.operand())
+        return node
+
+    def update(self) -> tuple:
+        actions = []
+        seen_clauses = set()
+        while not self.at_end():
+            kind, text = self.next()
+            clause = text.upper() if kind == "word" else None
+            if clause not in ("SET", "REMOVE", "ADD", "DELETE") or clause in seen_clauses:
+                raise ExpressionError(f"Invalid UpdateExpression: syntax error; token: '{text}'")
+            seen_clauses.add(clause)
+            while True:
+                path = self.path()
+                if clause == "SET":
+                    self.expect_op("=")
+                    actions.append(("set", path, self.update_value()))
+                elif clause == "REMOVE":
+                    actions.append(("remove", path))
+                else:
+                    actions.append((clause.lower(), path, self.operand()))
+                if not self.accept_op(","):
+                    break
+        if not actions:
+            raise ExpressionError("Invalid UpdateExpression: the expression can not be empty")
+        return ("update", tuple(actions))
+
+    def projection(self) -> tuple:
+        paths = [self.path()]
+        while self.accept_op(","):
+            paths.append(self.path())
+        return ("projection", tuple(paths))
+
+
+CONDITION_FUNCTIONS = {
+    "attribute_exists": 1,
+    "attribute_not_exists": 1,
+    "attribute_type": 2,
+    "begins_with": 2,
+    "contains": 2,
+}
+COMPARATORS = {"=", "<>", "<", "<=", ">", ">="}
+
+
+class Expression:
+    """A parsed expression plus the placeholders it references."""
+
+    def __init__(self, tree: tuple, used_names: set, used_values: set):
+        self.tree = tree
+        self.used_names = frozenset(used_names)
+        self.used_values = frozenset(used_values)
+
+
+@lru_cache(maxsize=1024)
+def _parse(kind: str, expression: str, names: tuple) -> Expression:
+    parser = _Parser(expression, dict(names))
+    if kind == "condition":
+        tree = parser.condition()
+    elif kind == "update":
+        tree = parser.update()
+    else:
+        tree = parser.projection()
+    if not parser.at_end():
+        raise ExpressionError(f"Invalid {kind} expression: syntax error near '{parser.peek()[1]}'")
+    return Expression(tree, parser.used_names, parser.used_values)
+
+
+def parse_condition(expression: str, names: Optional[dict]) -> Expression:
+    return _parse("condition", expression, tuple(sorted((names or {}).items())))
+
+
+def parse_update(expression: str, names: Optional[dict]) -> Expression:
+    return _parse("update", expression, tuple(sorted((names or {}).items())))
+
+
+def parse_projection(expression: str, names: Optional[dict]) -> Expression:
+    return _parse("projection", expression, tuple(sorted((names or {}).items())))
+
+
+def check_placeholders(expressions: list[Optional[Expression]], names: Optional[dict], values: Optional[dict]) -> None:
+    """Rejects placeholders that are defined but not used, as DynamoDB does."""
+    used_names = set().union(*(e.used_names for e in expressions if e)) if expressions else set()
+    used_values = set().union(*(e.used_values for e in expressions if e)) if expressions else set()
+    unused_names = set(names or {}) - used_names
+    if unused_names:
+        raise ExpressionError(f"Value provided in ExpressionAttributeNames unused in expressions: keys: {{{', '.join(sorted(unused_names))}}}")
+    unused_values = set(values or {}) - used_values
+    if unused_values:
+        raise ExpressionError(f"Value provided in ExpressionAttributeValues unused in expressions: keys: {{{', '.join(sorted(unused_values))}}}")
+    missing_values = used_values - set(values or {})
+    if missing_values:
+        raise ExpressionError(f"An expression attribute value used in expression is not defined; attribute value: {sorted(missing_values)[0]}")
+
+
+# --- evaluation ---
+
+def resolve_path(item: Any, segments: tuple) -> Any:
+    value = item
+    for segment in segments:
+        if isinstance(segment, int):
+            if not isinstance(value, list) or segment >= len(value):
+                return MISSING
+        elif not isinstance(value, dict) or segment not in value:
+            return MISSING
+        value = value[segment]
+    return value
+
+
+def dynamodb_type(value: Any) -> str:
+    """The DynamoDB type descriptor ('S', 'N', 'M', ...) of a stored value."""
+    if isinstance(value, bool):
+        return "BOOL"
+    if isinstance(value, str):
+        return "S"
+    if isinstance(value, Decimal):
+        return "N"
+    if isinstance(value, bytes):
+        return "B"
+    if value is None:
+        return "NULL"
+    if isinstance(value, list):
+        return "L"
+    if isinstance(value, dict):
+        return "M"
+    if isinstance(value, (set, frozenset)):
+        sample = next(iter(value))
+        return {"S": "SS", "N": "NS", "B": "BS"}[dynamodb_type(sample)]
+    raise ExpressionError(f"Unsupported type: {type(value).__name__}")
+
+
+def _operand_value(node: tuple, item: dict, values: dict) -> Any:
+    kind = node[0]
+    if kind == "path":
+        return resolve_path(item, node[1])
+    if kind == "value":
+        return values[node[1]]
+    if kind == "size":
+        value = resolve_path(item, node[1][1])
+        if isinstance(value, (str, bytes, list, dict, set, frozenset)):
+            return Decimal(len(value.encode() if isinstance(value, str) else value))
+        return MISSING
+    if kind == "if_not_exists":
+        value = resolve_path(item, node[1][1])
+        return _operand_value(node[2], item, values) if value is MISSING else value
+    if kind == "list_append":
+        first, second = _operand_value(node[1], item, values), _operand_value(node[2], item, values)
+        if not isinstance(first, list) or not isinstance(second, list):
+            raise ExpressionError("An operand in the update expression has an incorrect data type")
+        return first + second
+    if kind in ("plus", "minus"):
+        first, second = _operand_value(node[1], item, values), _operand_value(node[2], item, values)
+        if not isinstance(first, Decimal) or not isinstance(second, Decimal) or isinstance(first, bool):
+            raise ExpressionError("An operand in the update expression has an incorrect data type")
+        return DYNAMODB_CONTEXT.add(first, second) if kind == "plus" else DYNAMODB_CONTEXT.subtract(first, second)
+    raise ExpressionError(f"Invalid operand: {kind}")
+
+
+def _comparable(left: Any, right: Any) -> bool:
+    if left is MISSING or right is MISSING:
+        return False
+    left_type, right_type = dynamodb_type(left), dynamodb_type(right)
+    return left_type == right_type and left_type in ("S", "N", "B")
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    if op == "=":
+        return left is not MISSING and right is not MISSING and left == right and type(left) is type(right)
+    if op == "<>":
+        return not (left is not MISSING and right is not MISSING and left == right and type(left) is type(right))
+    if not _comparable(left, right):
+        return False
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    return left >= right
+
+
+def evaluate_condition(tree: tuple, item: dict, values: dict) -> bool:
+    kind = tree[0]
+    if kind == "and":
+        return evaluate_condition(tree[1], item, values) and evaluate_condition(tree[2], item, values)
+    if kind == "or":
+        return evaluate_condition(tree[1], item, values) or evaluate_condition(tree[2], item, values)
+    if kind == "not":
+        return not evaluate_condition(tree[1], item, values)
+    if kind == "compare":
+        return _compare(tree[1], _operand_value(tree[2], item, values), _operand_value(tree[3], item, values))
+    if kind == "between":
+        value = _operand_value(tree[1], item, values)
+        low, high = _operand_value(tree[2], item, values), _operand_value(tree[3], item, values)
+        return _comparable(value, low) and _comparable(value, high) and low <= value <= high
+    if kind == "in":
+        value = _operand_value(tree[1], item, values)
+        return any(_compare("=", value, _operand_value(option, item, values)) for option in tree[2])
+    if kind == "function":
+        return _evaluate_function(tree[1], tree[2], item, values)
+    raise ExpressionError(f"Invalid condition: {kind}")
+
+
+def _evaluate_function(function: str, args: tuple, item: dict, values: dict) -> bool:
+    if function in ("attribute_exists", "attribute_not_exists"):
+        if args[0][0] != "path":
+            raise ExpressionError(f"Invalid operand for function {function}: expected a document path")
+        exists = resolve_path(item, args[0][1]) is not MISSING
+        return exists if function == "attribute_exists" else not exists
+    first = _operand_value(args[0], item, values)
+    second = _operand_value(args[1], item, values)
+    if first is MISSING or second is MISSING:
+        return False
+    if function == "attribute_type":
+        return dynamodb_type(first) == second
+    if function == "begins_with":
+        return isinstance(first, (str, bytes)) and type(first) is type(second) and first.startswith(second)
+    # contains
+    if isinstance(first, str):
+        return isinstance(second, str) and second in first
+    if isinstance(first, (set, frozenset, list)):
+        return any(_compare("=", element, second) for element in first)
+    return False
+
+
+def condition_matches(expression: Expression, item: Optional[dict], values: Optional[dict]) -> bool:
+    return evaluate_condition(expression.tree, item or {}, values or {})
+
+
+def _set_path(item: dict, segments: tuple, value: Any) -> None:
+    parent = resolve_path(item, segments[:-1]) if len(segments) > 1 else item
+    last = segments[-1]
+    if isinstance(last, int):
+        if not isinstance(parent, list):
+            raise ExpressionError("The document path provided in the update expression is invalid for update")
+        if last >= len(parent):
+            parent.append(value)
+        else:
+            parent[last] = value
+    else:
+        if not isinstance(parent, dict):
+            raise ExpressionError("The document path provided in the update expression is invalid for update")
+        parent[last] = value
+
+
+def _remove_path(item: dict, segments: tuple) -> None:
+    parent = resolve_path(item, segments[:-1]) if len(segments) > 1 else item
+    last = segments[-1]
+    if isinstance(last, int):
+        if isinstance(parent, list) and last < len(parent):
+            del parent[last]
+    elif isinstance(parent, dict):
+        parent.pop(last, None)
+
+
+def apply_update(expression: Expression, item: dict, values: Optional[dict]) -> set:
+    """
+    Applies an update expression to `item` in place.
+    :return: The top-level attribute names that were modified.
+    """
+    values = values or {}
+    original = copy.deepcopy(item)  # every operand reads the item as it was before the update
+    touched = set()
+    for action in expression.tree[1]:
+        kind, path = action[0], action[1][1]
+        touched.add(path[0])
+        if kind == "set":
+            _set_path(item, path, copy.deepcopy(_operand_value(action[2], original, values)))
+        elif kind == "remove":
+            _remove_path(item, path)
+        elif kind == "add":
+            current = resolve_path(item, path)
+            operand = _operand_value(action[2], original, values)
+            if current is MISSING:
+                _set_path(item, path, copy.deepcopy(operand))
+            elif isinstance(current, Decimal) and isinstance(operand, Decimal):
+                _set_path(item, path, DYNAMODB_CONTEXT.add(current, operand))
+            elif isinstance(current, set) and isinstance(operand, set):
+                current |= operand
+            else:
+                raise ExpressionError("An operand in the update expression has an incorrect data type")
+        else:  # delete from set
+            current = resolve_path(item, path)
+            operand = _operand_value(action[2], original, values)
+            if isinstance(current, set) and isinstance(operand, set):
+                current -= operand
+                if not current:
+                    _remove_path(item, path)
+            elif current is not MISSING:
+                raise ExpressionError("An operand in the update expression has an incorrect data type")
+    return touched
+
+
+def project(expression: Expression, item: dict) -> dict:
+    """Returns a copy of `item` restricted to the attributes named by a projection expression."""
+    result: dict = {}
+    for _, segments in expression.tree[1]:
+        value = resolve_path(item, segments)
+        if value is MISSING:
+            continue
+        target: Any = result
+        for index, segment in enumerate(segments[:-1]):
+            following_is_index = isinstance(segments[index + 1], int)
+            if isinstance(target, dict):
+                target = target.setdefault(segment, [] if following_is_index else {})
+            else:
+                target.append([] if following_is_index else {})
+                target = target[-1]
+        if isinstance(target, dict):
+            target[segments[-1]] = copy.deepcopy(value)
+        else:
+            target.append(copy.deepcopy(value))
+    return result
+
+
+def key_condition_parts(expression: Expression, hash_key: str, range_key: Optional[str]) -> tuple[tuple, Optional[tuple]]:
+    """
+    Validates a key condition and splits it into the hash key equality and the optional
+    range key condition.
+    """
+    parts = []
+
+    def flatten(node):
+        if node[0] == "and":
+            flatten(node[1])
+            flatten(node[2])
+        else:
+            parts.append(node)
+
+    flatten(expression.tree)
+    hash_part = None
+    range_part = None
+    for part in parts:
+        attribute = _key_condition_attribute(part)
+        if attribute == hash_key and part[0] == "compare" and part[1] == "=" and hash_part is None:
+            hash_part = part
+        elif attribute == range_key and range_part is None and part[0] in ("compare", "between", "function"):
+            if part[0] == "compare" and part[1] == "<>":
+                raise ExpressionError("Unsupported operator in KeyConditionExpression: <>")
+            if part[0] == "function" and part[1] != "begins_with":
+                raise ExpressionError(f"Invalid operator used in KeyConditionExpression: {part[1]}")
+            range_part = part
+        else:
+            raise ExpressionError("Query key condition not supported")
+    if hash_part is None:
+        raise ExpressionError("Query condition missed key schema element: " + hash_key)
+    return hash_part, range_part
+
+
+def _key_condition_attribute(part: tuple) -> Optional[str]:
+    if part[0] == "compare" or part[0] == "between":
+        operand = part[2] if part[0] == "compare" else part[1]
+        if part[0] == "compare" and operand[0] != "path":
+            operand = part[3]
+    elif part[0] == "function":
+        operand = part[2][0]
+    else:
+        return None
+    if operand[0] != "path" or len(operand[1]) != 1:
+        return None
+    return operand[1][0]
+
+
+def hash_value(hash_part: tuple, values: dict) -> Any:
+    """The value the hash key is compared to in a key condition."""
+    _, _, left, right = hash_part
+    return _operand_value(right if left[0] == "path" else left, {}, values)
@@ -0,0 +1,118 @@
+"""
+In-process, thread-safe storage engine that mimics the DynamoDB resource API.
+
+`MemoryDatabase` stands in for `boto3.resource('dynamodb')` so `DynamoDBService` and the
+services built on it run unchanged at memory speed in tests and load runs. The DynamoDB
+semantics live in base.py; this module only keeps the items in dictionaries.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Any, Iterable, Optional
+
+from src.services.backends.base import StorageDatabase, StorageTable, TableIndex
+
+
+class MemoryTable(StorageTable):
+    """
+    A table held in a dict, with one hash-key lookup per index (the table's own and each GSI).
+    The index order of a hash key (or of a whole index, for scans) is sorted once and cached until
+    a write touches it, so the pages of a query or scan resume with a binary search.
+    """
+
+    def __init__(self, database: "MemoryDatabase", name: str, definition: dict):
+        super().__init__(database, name, definition)
+        self._items: dict[tuple, dict] = {}
+        self._buckets: dict[Optional[str], dict[Any, set]] = {None: {}, **{name: {} for name in self._indexes}}
+        # (index name, hash key value or None) -> (sort keys, primary keys), in index order.
+        self._orders: dict[tuple, tuple[list, list]] = {}
+
+    def _all_indexes(self) -> list[TableIndex]:
+        return [self._primary, *self._indexes.values()]
+
+    def _load(self, session, primary_key: tuple) -> Optional[dict]:
+        return self._items.get(primary_key)
+
+    def _store(self, session, primary_key: tuple, old: Optional[dict], new: Optional[dict]) -> None:
+        for item in (old, new):
+            for index in self._all_indexes():
+                keys = index.keys_of(item) if item is not None else None
+                if keys is not None:
+                    self._orders.pop((index.name, keys[0]), None)
+                    self._orders.pop((index.name, None), None)
+        if old is not None:
+            del self._items[primary_key]
+            for index in self._all_indexes():
+                keys = index.keys_of(old)
+                if keys is not None:
+                    bucket = self._buckets[index.name][keys[0]]
+                    bucket.discard(primary_key)
+                    if not bucket:
+                        del self._buckets[index.name][keys[0]]
+        if new is not None:
+            self._items[primary_key] = new
+            for index in self._all_indexes():
+                keys = index.keys_of(new)
+                if keys is not None:
+                    self._buckets[index.name].setdefault(keys[0], set()).add(primary_key)
+
+    def _sort_key(self, index: TableIndex, item: dict) -> tuple:
+        primary_key = self._primary.keys_of(item)
+        if index.range_key and index is not self._primary:
+            return (item[index.range_key],) + primary_key
+        return primary_key
+
+    def _order(self, index: TableIndex, hash_key_value: Any) -> tuple[list, list]:
+        order = self._orders.get((index.name, hash_key_value))
+        if order is None:
+            if hash_key_value is None:
+                candidates = [item for item in self._items.values() if index.keys_of(item) is not None]
+            else:
+                candidates = [self._items[primary_key] for primary_key in self._buckets[index.name].get(hash_key_value, ())]
+            entries = sorted((self._sort_key(index, item), self._primary.keys_of(item)) for item in candidates)
+            order = self._orders[(index.name, hash_key_value)] = ([e[0] for e in entries], [e[1] for e in entries])
+        return order
+
+    def _ordered(self, session, index: TableIndex, hash_key_value: Any, bounds: list, reverse: bool,
+                 start: Optional[dict]) -> Iterable[dict]:
+        sort_keys, primary_keys = self._order(index, hash_key_value)
+        if reverse:
+            end = bisect_left(sort_keys, self._sort_key(index, start)) if start else len(sort_keys)
+            positions = range(end - 1, -1, -1)
+        else:
+            positions = range(bisect_right(sort_keys, self._sort_key(index, start)) if start else 0, len(sort_keys))
+        # Consumed by the caller within the session, so no write can change the order meanwhile.
+        return (self._items[primary_keys[position]] for position in positions)
+
+    def _count(self, session) -> int:
+        return len(self._items)
+
+    def _clear(self, session) -> None:
+        self._items.clear()
+        self._orders.clear()
+        for buckets in self._buckets.values():
+            buckets.clear()
+
+
+class MemoryDatabase(StorageDatabase):
+    """One re-entrant lock guards every table, for reads and writes alike."""
+
+    table_class = MemoryTable
+
+    def __init__(self, tables: Optional[dict] = None):
+        self.lock = threading.RLock()
+        super().__init__(tables)
+
+    @contextmanager
+    def read(self):
+        with self.lock:
+            yield None
+
+    @contextmanager
+    def write(self):
+        with self.lock:
+            yield None
+
+
+# Process-wide database used when the `storage_backend` setting is 'memory'.
+memory_database = MemoryDatabase()
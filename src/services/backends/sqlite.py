@@ -0,0 +1,296 @@
+"""
+Embedded SQLite storage engine that mimics the DynamoDB resource API, for single-node installs.
+
+Each DynamoDB table becomes one SQL table holding the item as typed JSON (the DynamoDB wire
+format: `{"S": ...}`, `{"N": "1.5"}`, ...) next to one column per key attribute of the table
+and of every GSI. Those columns carry real SQL indexes, so `email-index` lookups and the
+status/date GSI queries are index range scans instead of full table reads. The database runs
+in WAL mode (readers never block the writer) behind a small connection pool; writes are
+serialized and each batch or transaction commits atomically. The DynamoDB semantics live in
+base.py.
+"""
+import base64
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+from src.config import ensure_parent_directory, get_settings
+from src.services.backends.base import StorageDatabase, StorageTable, TableIndex, client_error
+from src.services.backends.expressions import dynamodb_type
+
+_BUSY_TIMEOUT_MS = 5000
+_FETCH_SIZE = 64
+
+
+def _encode(value: Any) -> dict:
+    kind = dynamodb_type(value)
+    if kind == "N":
+        return {"N": str(value)}
+    if kind == "B":
+        return {"B": base64.b64encode(value).decode()}
+    if kind in ("SS", "NS", "BS"):
+        return {kind: sorted(_encode(element)[kind[0]] for element in value)}
+    if kind == "L":
+        return {"L": [_encode(element) for element in value]}
+    if kind == "M":
+        return {"M": {name: _encode(element) for name, element in value.items()}}
+    if kind == "NULL":
+        return {"NULL": True}
+    return {kind: value}
+
+
+def _decode(value: dict) -> Any:
+    (kind, data), = value.items()
+    if kind == "N":
+        return Decimal(data)
+    if kind == "B":
+        return base64.b64decode(data)
+    if kind == "SS":
+        return set(data)
+    if kind == "NS":
+        return {Decimal(element) for element in data}
+    if kind == "BS":
+        return {base64.b64decode(element) for element in data}
+    if kind == "L":
+        return [_decode(element) for element in data]
+    if kind == "M":
+        return {name: _decode(element) for name, element in data.items()}
+    if kind == "NULL":
+        return None
+    return data
+
+
+def encode_item(item: dict) -> str:
+    return json.dumps({name: _encode(value) for name, value in item.items()}, separators=(",", ":"))
+
+
+def decode_item(text: str) -> dict:
+    return {name: _decode(value) for name, value in json.loads(text).items()}
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _column_value(value: Any) -> Any:
+    """SQLite value of a key attribute. Numbers become REAL so they sort numerically."""
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class SQLiteTable(StorageTable):
+    """A DynamoDB table stored as one SQL table: `key` (primary key), `item` and the key columns."""
+
+    def __init__(self, database: "SQLiteDatabase", name: str, definition: dict):
+        super().__init__(database, name, definition)
+        self._sql_table = _quote(name)
+        # (hash column, range column) of the table's own key and of each GSI
+        self._columns = {None: ('"pk"', '"sk"')}
+        for index_name in self._indexes:
+            self._columns[index_name] = (_quote(f"{index_name}#hash"), _quote(f"{index_name}#range"))
+        database.create_schema(self)
+
+    def _all_indexes(self) -> list[TableIndex]:
+        return [self._primary, *self._indexes.values()]
+
+    def schema_statements(self, existing_columns: set[str]) -> tuple[list[str], bool]:
+        """
+        The DDL that brings the SQL table up to date with the definition, and whether
+        existing rows need their key columns backfilled (a GSI was added).
+        """
+        gsi_columns = [column for name in self._indexes for column in self._columns[name]]
+        if not existing_columns:
+            columns = ['"key" TEXT PRIMARY KEY', '"pk" NOT NULL', '"sk"', '"item" TEXT NOT NULL', *gsi_columns]
+            statements = [f"CREATE TABLE {self._sql_table} ({', '.join(columns)})"]
+            backfill = False
+        else:
+            missing = [column for column in gsi_columns if column.strip('"') not in existing_columns]
+            statements = [f"ALTER TABLE {self._sql_table} ADD COLUMN {column}" for column in missing]
+            backfill = bool(missing)
+        for index in self._all_indexes():
+            hash_column, range_column = self._columns[index.name]
+            key_columns = [hash_column, range_column, '"key"'] if index.range_key else [hash_column, '"key"']
+            index_name = _quote(f"{self.name}:{index.name or 'primary'}")
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON {self._sql_table} ({', '.join(key_columns)}) "
+                f"WHERE {hash_column} IS NOT NULL"
+            )
+        return statements, backfill
+
+    def _key_text(self, primary_key: tuple) -> str:
+        return json.dumps([_encode(value) for value in primary_key], separators=(",", ":"))
+
+    def _row(self, primary_key: tuple, item: dict) -> dict:
+        row = {'"key"': self._key_text(primary_key), '"item"': encode_item(item)}
+        for index in self._all_indexes():
+            hash_column, range_column = self._columns[index.name]
+            keys = index.keys_of(item)
+            row[hash_column] = _column_value(keys[0]) if keys else None
+            row[range_column] = _column_value(keys[1]) if keys and index.range_key else None
+        return row
+
+    def write_row(self, session: sqlite3.Connection, primary_key: tuple, item: dict) -> None:
+        row = self._row(primary_key, item)
+        session.execute(
+            f"INSERT OR REPLACE INTO {self._sql_table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+            list(row.values()),
+        )
+
+    def _load(self, session, primary_key: tuple) -> Optional[dict]:
+        row = session.execute(
+            f'SELECT "item" FROM {self._sql_table} WHERE "key" = ?', (self._key_text(primary_key),)
+        ).fetchone()
+        return decode_item(row[0]) if row else None
+
+    def _store(self, session, primary_key: tuple, old: Optional[dict], new: Optional[dict]) -> None:
+        if new is None:
+            session.execute(f'DELETE FROM {self._sql_table} WHERE "key" = ?', (self._key_text(primary_key),))
+        else:
+            self.write_row(session, primary_key, new)
+
+    def _ordered(self, session, index: TableIndex, hash_key_value: Any, bounds: list, reverse: bool,
+                 start: Optional[dict]) -> Iterable[dict]:
+        hash_column, range_column = self._columns[index.name]
+        conditions = [f"{hash_column} IS NOT NULL"]
+        params: list = []
+        if index.range_key:
+            conditions.append(f"{range_column} IS NOT NULL")
+        if hash_key_value is not None:
+            conditions.append(f"{hash_column} = ?")
+            params.append(_column_value(hash_key_value))
+        if index.range_key:
+            for op, value in bounds:
+                if op in ("=", "<", "<=", ">", ">="):
+                    conditions.append(f"{range_column} {op} ?")
+                    params.append(_column_value(value))
+
+        # Same order as the in-memory engine: range key then primary key within a hash key,
+        # and GSI scans in (range key, primary key) order.
+        by_range = index.range_key is not None and (hash_key_value is not None or index.name is not None)
+        order_columns = [range_column, '"key"'] if by_range else ['"key"']
+        if start:
+            start_values = [self._key_text(self._primary.keys_of(start))]
+            if by_range:
+                start_values.insert(0, _column_value(start[index.range_key]))
+            conditions.append(
+                f"({', '.join(order_columns)}) {'<' if reverse else '>'} ({', '.join('?' * len(start_values))})"
+            )
+            params.extend(start_values)
+        direction = " DESC" if reverse else ""
+        cursor = session.execute(
+            f'SELECT "item" FROM {self._sql_table} WHERE {" AND ".join(conditions)} '
+            f'ORDER BY {", ".join(column + direction for column in order_columns)}',
+            params,
+        )
+        try:
+            while rows := cursor.fetchmany(_FETCH_SIZE):
+                for (text,) in rows:
+                    yield decode_item(text)
+        finally:
+            cursor.close()
+
+    def _count(self, session) -> int:
+        return session.execute(f"SELECT COUNT(*) FROM {self._sql_table}").fetchone()[0]
+
+    def _clear(self, session) -> None:
+        session.execute(f"DELETE FROM {self._sql_table}")
+
+    def _copy(self, item: dict) -> dict:
+        return item  # freshly decoded for every read
+
+
+class SQLiteDatabase(StorageDatabase):
+    """
+    All tables in one SQLite file. Up to `pool_size` connections are opened on demand and
+    shared by reads; writes additionally take a process-wide lock and run in an IMMEDIATE
+    transaction, so another process holding the file surfaces as a retryable throttle.
+    """
+
+    table_class = SQLiteTable
+
+    def __init__(self, path: str, pool_size: int = 4, tables: Optional[dict] = None):
+        self.path = path
+        ensure_parent_directory(path)
+        self.pool_size = max(1, pool_size)
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        super().__init__(tables)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path, timeout=_BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe with WAL
+        connection.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}")
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            connection = self._connect() if can_open else self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    @contextmanager
+    def read(self):
+        with self._connection() as connection:
+            yield connection
+
+    @contextmanager
+    def write(self):
+        with self._write_lock, self._connection() as connection:
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                raise client_error("ThrottlingException", f"Database is busy: {e}", "BeginTransaction") from e
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def create_schema(self, table: SQLiteTable) -> None:
+        """Creates the SQL table and indexes of `table`, adding key columns for new GSIs."""
+        with self.write() as session:
+            existing = {row[1] for row in session.execute(f"PRAGMA table_info({_quote(table.name)})")}
+            statements, backfill = table.schema_statements(existing)
+            for statement in statements:
+                session.execute(statement)
+            if backfill:
+                rows = session.execute(f'SELECT "item" FROM {_quote(table.name)}').fetchall()
+                for (text,) in rows:
+                    item = decode_item(text)
+                    table.write_row(session, table._primary.keys_of(item), item)
+
+    def close(self) -> None:
+        """Closes the pooled connections (idle ones; call when no request is in flight)."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._pool_lock:
+            self._opened = 0
+
+
+@lru_cache()
+def get_sqlite_database() -> SQLiteDatabase:
+    """The database used when the `storage_backend` setting is 'sqlite', opened on first use."""
+    settings = get_settings()
+    return SQLiteDatabase(settings["sqlite_path"], pool_size=settings["sqlite_pool_size"])
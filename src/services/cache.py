@@ -0,0 +1,70 @@
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache whose entries expire `ttl_seconds` after they were stored.
+    Writes made through this process invalidate entries via the change feed; the TTL bounds how
+    stale an entry can get when another process changed the item. A TTL of 0 disables the cache.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._hits = 0
+        self._misses = 0
+        self.generation = 0  # incremented by every invalidation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Stores a value. Pass the `generation` read before loading the value: if an invalidation
+        happened while it was loading, the (possibly stale) value is not stored.
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Evict the entry closest to expiry (the oldest one, as all share one TTL).
+                del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drops one entry, or every entry when `key` is None."""
+        with self._lock:
+            self.generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def reset(self) -> None:
+        """Drops every entry and zeroes the hit/miss counters (test isolation)."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses,
+                    "ttl_seconds": self.ttl_seconds}
@@ -0,0 +1,91 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+
+READ_OPERATIONS = {"GetItem", "BatchGetItem", "Query", "Scan", "TransactGetItems"}
+
+DIMENSIONS = ("route", "operation", "table", "index", "user")
+
+
+class CapacityTracker:
+    """
+    Aggregates the read and write capacity units reported by DynamoDB (`ReturnConsumedCapacity`)
+    by route, operation, table, index and authenticated user.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards every aggregate and starts a new accounting window."""
+        with self._lock:
+            self._since = datetime.now(timezone.utc)
+            self._totals = {"calls": 0, "rcu": 0.0, "wcu": 0.0}
+            self._buckets = {dimension: defaultdict(lambda: {"calls": 0, "rcu": 0.0, "wcu": 0.0}) for dimension in DIMENSIONS}
+
+    def record(
+        self,
+        operation: str,
+        table_name: str,
+        consumed: Optional[dict],
+        route: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """
+        Records the `ConsumedCapacity` entry of a single DynamoDB call.
+        :param operation: The DynamoDB API name, e.g. 'Scan'.
+        :param consumed: The `ConsumedCapacity` element of the response (None if not returned).
+        """
+        if not consumed:
+            return
+        is_read = operation in READ_OPERATIONS
+        rcu, wcu = _split_units(consumed, is_read)
+        indexes = {}
+        for index_type in ("GlobalSecondaryIndexes", "LocalSecondaryIndexes"):
+            for index_name, units in (consumed.get(index_type) or {}).items():
+                indexes[f"{table_name}/{index_name}"] = _split_units(units, is_read)
+
+        with self._lock:
+            self._add(self._totals, rcu, wcu)
+            self._add(self._buckets["route"][route or "(no request)"], rcu, wcu)
+            self._add(self._buckets["operation"][f"{operation} {table_name}"], rcu, wcu)
+            self._add(self._buckets["table"][table_name], rcu, wcu)
+            self._add(self._buckets["user"][user_id or "(anonymous)"], rcu, wcu)
+            for index_key, (index_rcu, index_wcu) in indexes.items():
+                self._add(self._buckets["index"][index_key], index_rcu, index_wcu)
+
+    def report(self, limit: int = 20) -> dict:
+        """
+        Returns the aggregates of every dimension, heaviest consumers first.
+        :param limit: Maximum number of entries to return per dimension.
+        """
+        with self._lock:
+            report = {
+                "since": self._since.isoformat(),
+                "totals": dict(self._totals),
+            }
+            for dimension, buckets in self._buckets.items():
+                entries = [{"key": key, **values} for key, values in buckets.items()]
+                entries.sort(key=lambda entry: entry["rcu"] + entry["wcu"], reverse=True)
+                report[f"by_{dimension}"] = entries[:limit]
+        return report
+
+    @staticmethod
+    def _add(bucket: dict, rcu: float, wcu: float) -> None:
+        bucket["calls"] += 1
+        bucket["rcu"] += rcu
+        bucket["wcu"] += wcu
+
+
+def _split_units(units: dict, is_read: bool) -> tuple[float, float]:
+    """Returns (rcu, wcu), falling back to `CapacityUnits` when DynamoDB does not split them."""
+    if "ReadCapacityUnits" in units or "WriteCapacityUnits" in units:
+        return float(units.get("ReadCapacityUnits", 0)), float(units.get("WriteCapacityUnits", 0))
+    total = float(units.get("CapacityUnits", 0))
+    return (total, 0.0) if is_read else (0.0, total)
+
+
+# Process-wide tracker shared by every DynamoDBService instance.
+capacity_tracker = CapacityTracker()
@@ -0,0 +1,406 @@
+"""
+Static catalog feed for the WhatsApp store and social posts: the approved sarees with their
+price and image, as JSON and as CSV in the Meta commerce catalog format.
+
+The feed is built from a full (paginated) catalog scan and then kept up to date from the
+`change_feed` of the sarees table: approving or rejecting a procurement and repricing a saree are
+saree writes, and each one re-renders only the entry of that saree. A writer thread applies the
+changes in batches (the writing request never waits for it) and publishes the feed as files:
+
+- `catalog-feed.<version>.json` / `.csv`: one pair per published version, written to a temporary
+  file and renamed into place, so a file is never seen half written and a file being served is
+  never replaced. Versions are publication times in milliseconds, so they keep increasing across
+  restarts. The last `KEPT_VERSIONS` versions are kept; a request opens its file before serving
+  it (see `CatalogFeed.open`), so a version removed meanwhile is still served whole.
+- `catalog-feed.json` / `.csv`: the latest version, atomically replaced, for a web server or CDN
+  serving the directory directly.
+- `catalog-feed.manifest.json`: the latest version's files and ETags, written last.
+
+Several processes share the directory, so only one of them publishes: the first to lock
+`.writer.lock` in it, for as long as it runs. The others serve the files of the manifest and try
+to take over at every refresh. The change feed only carries the writes of its own process, so the
+writer also rebuilds the feed from a scan every `catalog_feed_refresh_seconds`, which picks up the
+writes of the other processes.
+
+`GET /catalog/feed.json` and `/catalog/feed.csv` serve the latest version as a file with a
+content-hash ETag (`304 Not Modified` on a matching `If-None-Match`): fetching the feed reads
+no table and renders nothing. The feed is eventually consistent with the sarees table.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on Windows, where every process publishes its own feed.
+    fcntl = None
+
+from src.config import get_settings
+from src.logs import get_logger
+from src.models import ProcurementStatus
+from src.responses import encode_json
+from src.services.changes import change_feed
+from src.services.dynamodb import item_version
+from src.services.saree_service import SareeService
+
+logger = get_logger("catalog_feed")
+
+FEED_NAME = "catalog-feed"
+FORMATS = {"json": "application/json", "csv": "text/csv; charset=utf-8"}
+# Columns of the Meta (Facebook/WhatsApp) commerce catalog data feed.
+CSV_COLUMNS = ("id", "title", "description", "availability", "condition", "price", "link", "image_link", "brand")
+KEPT_VERSIONS = 3
+MANIFEST_NAME = f"{FEED_NAME}.manifest.json"
+WRITER_LOCK_NAME = ".writer.lock"
+_REFRESH = object()  # queued by `start()`: rebuild the feed from a scan
+_VERSIONED_FILE = re.compile(rf"^{re.escape(FEED_NAME)}\.(\d+)\.({'|'.join(FORMATS)})$")
+
+
+def _csv_line(values: Iterable) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+def feed_entry(item: dict, link_template: str, brand: str) -> Optional[dict]:
+    """The feed entry of a stored saree, or None if it is not for sale (not approved, or not priced)."""
+    price = item.get("selling_price_usd")
+    if item.get("procurement_status") != ProcurementStatus.approved.value or price is None:
+        return None
+    image_urls = item.get("image_urls") or []
+    return {
+        "id": str(item["id"]),
+        "title": item.get("name") or "",
+        "description": item.get("description") or item.get("name") or "",
+        "availability": "in stock",
+        "condition": "new",
+        "price": f"{Decimal(str(price)).quantize(Decimal('0.01'))} USD",
+        "link": link_template.format(id=item["id"]),
+        "image_link": image_urls[0] if image_urls else "",
+        "brand": brand,
+    }
+
+
+class CatalogFeed:
+    """The feed files of one process (see `get_catalog_feed`)."""
+
+    def __init__(self, directory: str, link_template: str, brand: str,
+                 load: Optional[Callable[[], Iterable[dict]]] = None, refresh_seconds: float = 0.0,
+                 batch_size: int = 500):
+        """
+        :param load: Returns every stored saree (a paginated scan); used by `rebuild()` and the refreshes.
+        :param refresh_seconds: How often the writer rebuilds the feed from `load` (0 never does).
+        """
+        self.directory = directory
+        self.link_template = link_template
+        self.brand = brand
+        self.batch_size = batch_size
+        self._load = load
+        self.refresh_seconds = refresh_seconds
+        # saree id -> (JSON bytes, CSV line) of its entry, rendered when the saree changes.
+        self._entries: dict[str, tuple[bytes, str]] = {}
+        # saree id -> version of the item the feed follows, so an older change never undoes a newer scan.
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._writer_lock_file = None
+        self.writer = self._claim_writer()
+        self.version = 0
+        self._published: dict[str, tuple[str, str]] = {}  # format -> (path, ETag)
+        self._manifest: tuple[Optional[tuple], dict] = (None, {})  # (file signature, contents), read by the other processes
+        self._stats = {"patched": 0, "refreshed": 0, "failed": 0, "last_published_at": None, "lag_seconds": 0.0}
+
+    def _claim_writer(self) -> bool:
+        """Whether this process publishes the feed: the first to lock the directory does, while it runs."""
+        if fcntl is None:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, WRITER_LOCK_NAME), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._writer_lock_file = lock_file
+        return True
+
+    # --- feeding ---
+
+    def install(self) -> None:
+        change_feed.subscribe("sarees", self.on_change)
+
+    def start(self) -> None:
+        """Starts the writer thread with a rebuild from a scan (startup); then it refreshes periodically."""
+        self._queue.put(_REFRESH)
+        self._start()
+
+    def uninstall(self) -> None:
+        change_feed.unsubscribe("sarees", self.on_change)
+
+    def on_change(self, table_name: str, key: dict, item: Optional[dict]) -> None:
+        """Change feed listener: queues the change for the writer thread."""
+        if not self.writer:
+            return
+        self._queue.put((str(key["id"]), item, time.monotonic()))
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="catalog-feed-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        next_refresh = time.monotonic() + self.refresh_seconds
+        while True:
+            try:
+                timeout = max(next_refresh - time.monotonic(), 0) if self.refresh_seconds > 0 else None
+                changes = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                self._refresh()
+                next_refresh = time.monotonic() + self.refresh_seconds
+                continue
+            # A refresh request ends the batch, so the changes queued before it are applied first.
+            while len(changes) < self.batch_size and changes[-1] is not _REFRESH:
+                try:
+                    changes.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            refresh = changes[-1] is _REFRESH
+            try:
+                if len(changes) > refresh:
+                    self._apply(changes[:-1] if refresh else changes)
+            except Exception:
+                logger.exception("Error applying %d saree changes to the catalog feed", len(changes) - refresh)
+                with self._lock:
+                    self._stats["failed"] += len(changes) - refresh
+            finally:
+                if refresh:
+                    self._refresh()
+                    next_refresh = time.monotonic() + self.refresh_seconds
+                for _ in changes:
+                    self._queue.task_done()
+
+    def _refresh(self) -> None:
+        """Rebuilds the feed from a scan, taking over the publishing first if its writer stopped."""
+        try:
+            if not self.writer:
+                self.writer = self._claim_writer()
+                if self.writer:
+                    logger.info("Publishing the catalog feed", extra={"directory": self.directory})
+            if self.writer:
+                self.rebuild()
+                with self._lock:
+                    self._stats["refreshed"] += 1
+        except Exception:
+            logger.exception("Error refreshing the catalog feed")
+
+    def _render(self, item: Optional[dict]) -> Optional[tuple[bytes, str]]:
+        entry = None if item is None else feed_entry(item, self.link_template, self.brand)
+        if entry is None:
+            return None
+        return encode_json(entry), _csv_line(entry[column] for column in CSV_COLUMNS)
+
+    def _apply(self, changes: list[tuple]) -> None:
+        with self._lock:
+            changed = False
+            for saree_id, item, _ in changes:
+                if item is not None:
+                    if item_version(item) < self._versions.get(saree_id, 0):
+                        continue
+                    self._versions[saree_id] = item_version(item)
+                rendered = self._render(item)
+                if rendered == self._entries.get(saree_id):
+                    continue
+                if rendered is None:
+                    del self._entries[saree_id]
+                else:
+                    self._entries[saree_id] = rendered
+                changed = True
+            self._stats["patched"] += len(changes)
+            self._stats["lag_seconds"] = round(time.monotonic() - changes[-1][2], 6)
+            # Writes that do not change the feed (e.g. a pending saree) publish nothing.
+            if changed or not self._published:
+                self._publish()
+
+    def rebuild(self, items: Optional[Iterable[dict]] = None) -> int:
+        """
+        Replaces the feed with the given sarees, by default every stored saree (see `load`).
+        A process that is not the writer publishes nothing.
+        :return: The number of entries of the feed.
+        """
+        if not self.writer:
+            return self._read_manifest().get("count", 0)
+        if items is None:
+            items = self._load() if self._load is not None else []
+        entries, versions = {}, {}
+        for item in items:
+            saree_id = str(item["id"])
+            versions[saree_id] = item_version(item)
+            rendered = self._render(item)
+            if rendered is not None:
+                entries[saree_id] = rendered
+        with self._lock:
+            self._entries = entries
+            self._versions = versions
+            self._publish()
+            return len(entries)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued change is published. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def reset(self) -> None:
+        """Publishes an empty feed (test isolation)."""
+        self.flush()
+        self.rebuild([])
+
+    # --- publishing ---
+
+    def _publish(self) -> None:
+        """Writes the current entries as the next version. Called with the lock held."""
+        ids = sorted(self._entries)
+        version = max(self.version + 1, time.time_ns() // 1_000_000)
+        generated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        header = encode_json({"version": version, "generated_at": generated_at, "count": len(ids)})
+        documents = {
+            # The entries are spliced into the rendered header instead of encoding the whole feed again.
+            "json": header[:-1] + b',"items":[' + b",".join(self._entries[i][0] for i in ids) + b"]}",
+            "csv": (_csv_line(CSV_COLUMNS) + "".join(self._entries[i][1] for i in ids)).encode("utf-8"),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        published = {}
+        for extension, content in documents.items():
+            path = os.path.join(self.directory, f"{FEED_NAME}.{version}.{extension}")
+            self._write_atomically(path, content)
+            self._write_atomically(os.path.join(self.directory, f"{FEED_NAME}.{extension}"), content)
+            # The CSV has no version field: its ETag only changes when its content does.
+            published[extension] = (path, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        manifest = {
+            "version": version, "generated_at": generated_at, "count": len(ids),
+            "files": {extension: {"name": os.path.basename(path), "etag": etag}
+                      for extension, (path, etag) in published.items()},
+        }
+        self._write_atomically(os.path.join(self.directory, MANIFEST_NAME), json.dumps(manifest).encode("utf-8"))
+        self.version = version
+        self._published = published
+        self._stats["last_published_at"] = generated_at
+        self._remove_old_versions()
+
+    def _write_atomically(self, path: str, content: bytes) -> None:
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=".feed-")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def _remove_old_versions(self) -> None:
+        """Removes all but the newest `KEPT_VERSIONS` versions, including those of earlier writers."""
+        versions = {}
+        for name in os.listdir(self.directory):
+            match = _VERSIONED_FILE.match(name)
+            if match:
+                versions.setdefault(int(match.group(1)), []).append(name)
+        for version in sorted(versions, reverse=True)[KEPT_VERSIONS:]:
+            for name in versions[version]:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    # --- reading ---
+
+    def _read_manifest(self) -> dict:
+        """The manifest published by the writer process, re-read when it changes."""
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {}
+        # Every publication renames a new file into place: a new inode, even within one mtime tick.
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if self._manifest[0] != signature:
+                try:
+                    with open(path, "rb") as file:
+                        self._manifest = (signature, json.load(file))
+                except (OSError, ValueError):
+                    return self._manifest[1]
+            return self._manifest[1]
+
+    def current(self, extension: str) -> Optional[tuple[str, str]]:
+        """(path, ETag) of the latest published file of a format, or None before the first publication."""
+        if not self.writer:
+            published = self._read_manifest().get("files", {}).get(extension)
+            if published is None:
+                return None
+            return os.path.join(self.directory, published["name"]), published["etag"]
+        with self._lock:
+            return self._published.get(extension)
+
+    def open(self, extension: str) -> Optional[tuple[BinaryIO, str]]:
+        """
+        The latest published file of a format opened for reading, with its ETag, or None before the
+        first publication. The open file stays readable after newer publications remove it.
+        """
+        for _ in range(KEPT_VERSIONS):
+            current = self.current(extension)
+            if current is None:
+                return None
+            path, etag = current
+            try:
+                return open(path, "rb"), etag
+            except FileNotFoundError:
+                continue  # Removed since `current` was read: a newer version is published.
+        return None
+
+    def status(self) -> dict:
+        if not self.writer:
+            manifest = self._read_manifest()
+            return {
+                "directory": self.directory, "writer": False, "version": manifest.get("version", 0),
+                "entries": manifest.get("count", 0), "last_published_at": manifest.get("generated_at"),
+                "etags": {extension: published["etag"] for extension, published in manifest.get("files", {}).items()},
+            }
+        with self._lock:
+            return {
+                "directory": self.directory, "writer": True, "version": self.version, "entries": len(self._entries),
+                "pending": self._queue.unfinished_tasks, **self._stats,
+                "etags": {extension: etag for extension, (_, etag) in self._published.items()},
+            }
+
+
+@lru_cache()
+def get_catalog_feed() -> CatalogFeed:
+    """The process-wide catalog feed, subscribed to the sarees change feed on first use."""
+    settings = get_settings()
+    sarees = SareeService(endpoint_url=settings["dynamodb_endpoint_url"])
+    feed = CatalogFeed(settings["catalog_feed_path"], settings["catalog_feed_link_template"],
+                       settings["catalog_feed_brand"], load=sarees.scan_items,
+                       refresh_seconds=settings["catalog_feed_refresh_seconds"])
+    feed.install()
+    return feed
@@ -0,0 +1,44 @@
+import threading
+from typing import Callable, Optional
+
+from src.logs import get_logger
+
+logger = get_logger("changes")
+
+# listener(table_name, key, item): `item` is the full item after the write, or None if it was deleted.
+ChangeListener = Callable[[str, dict, Optional[dict]], None]
+
+
+class ChangeFeed:
+    """
+    Publishes every item written through `DynamoDBService` (put, update, delete, batch and
+    transactional writes) to the listeners subscribed to its table, after the write succeeded.
+    Listeners run on the writing thread, so they should only hand the change off (e.g. to a queue).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: dict[str, tuple[ChangeListener, ...]] = {}
+
+    def subscribe(self, table_name: str, listener: ChangeListener) -> None:
+        with self._lock:
+            self._listeners[table_name] = self._listeners.get(table_name, ()) + (listener,)
+
+    def unsubscribe(self, table_name: str, listener: ChangeListener) -> None:
+        with self._lock:
+            self._listeners[table_name] = tuple(l for l in self._listeners.get(table_name, ()) if l is not listener)
+
+    def has_listeners(self, table_name: str) -> bool:
+        return bool(self._listeners.get(table_name))
+
+    def publish(self, table_name: str, key: dict, item: Optional[dict]) -> None:
+        """Calls the table's listeners. A failing listener never fails the write that triggered it."""
+        for listener in self._listeners.get(table_name, ()):
+            try:
+                listener(table_name, key, item)
+            except Exception:
+                logger.exception("Error in change listener for %s", table_name)
+
+
+# Process-wide feed shared by every DynamoDBService instance.
+change_feed = ChangeFeed()
@@ -0,0 +1,161 @@
+"""
+Typed conversion between the Pydantic models and DynamoDB items.
+
+`codec_for(model)` compiles a field plan once per model (each field's kind: string, UUID,
+datetime, float, int, enum, ...) and converts in one pass with it:
+- `to_item` / `from_item`: the resource-level shape (plain values, numbers as `Decimal`) the
+  `Table` API and the embedded backends use;
+- `to_attributes` / `from_attributes`: the low-level client's typed attribute values
+  (`{"S": ...}`, `{"N": ...}`). `DynamoDBService.put_model` and `get_model` send these to the
+  client directly, skipping the resource layer's generic type conversion of every value.
+
+Decoding builds the model with `model_construct`: items in our tables were valid models when
+they were written, so they are not validated again (e.g. `EmailStr` on every authenticated
+request). Absent fields get the model defaults; attributes that are not fields are ignored.
+Dates are stored the way `date_key` writes them (ISO 8601 with microseconds, UTC as 'Z'), so
+they compare as strings in key conditions.
+"""
+import types
+import typing
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Optional, TypeVar
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _format_datetime(value: datetime) -> str:
+    text = value.isoformat(timespec="microseconds")
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _number(value) -> Decimal:
+    # Through `str`, so 0.1 is stored as it prints (see `to_dynamodb`).
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class _Kind:
+    """How one field type is stored: plain value <-> stored value, and its attribute-value type."""
+
+    def __init__(self, dump: Callable, load: Callable, attribute_type: Optional[str]):
+        self.dump = dump                      # model value -> plain item value
+        self.load = load                      # plain item value -> model value
+        self.attribute_type = attribute_type  # 'S' or 'N', or None for generic (de)serialization
+
+
+_IDENTITY = _Kind(lambda value: value, lambda value: value, None)
+_KINDS = {
+    str: _Kind(lambda value: value, lambda value: value, "S"),
+    uuid.UUID: _Kind(str, lambda value: value if isinstance(value, uuid.UUID) else uuid.UUID(value), "S"),
+    datetime: _Kind(_format_datetime,
+                    lambda value: value if isinstance(value, datetime) else datetime.fromisoformat(value), "S"),
+    float: _Kind(_number, float, "N"),
+    int: _Kind(_number, int, "N"),
+}
+
+
+def _kind(annotation) -> _Kind:
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else Any
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        enum = annotation
+        return _Kind(lambda value: value.value if isinstance(value, Enum) else value, enum, "S")
+    if annotation in _KINDS:
+        return _KINDS[annotation]
+    # Strings carrying validation (e.g. EmailStr) are stored as strings.
+    if isinstance(annotation, type) and issubclass(annotation, str):
+        return _KINDS[str]
+    return _IDENTITY
+
+
+def _plain(value):
+    """Generic plain form of a value (lists, maps, booleans) for the resource layer."""
+    if isinstance(value, float):
+        return _number(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_plain(element) for element in value]
+    if isinstance(value, dict):
+        return {key: _plain(element) for key, element in value.items()}
+    return value
+
+
+class ItemCodec:
+    """Converts one model to and from DynamoDB items. Get instances with `codec_for`."""
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+        self.fields = [(name, _kind(field.annotation)) for name, field in model.model_fields.items()]
+        self._kinds = dict(self.fields)
+
+    def to_item(self, instance: BaseModel) -> dict:
+        """The item to store (resource level): numbers as Decimal, ids and dates as strings, enums as values."""
+        item = {}
+        for name, kind in self.fields:
+            value = getattr(instance, name)
+            if value is None:
+                item[name] = None
+            elif kind is _IDENTITY:
+                item[name] = _plain(value)
+            else:
+                item[name] = kind.dump(value)
+        return item
+
+    def from_item(self, item: dict):
+        """The model for a stored item (resource level), without validation."""
+        values = {}
+        for name, kind in self.fields:
+            if name in item:
+                value = item[name]
+                values[name] = None if value is None else kind.load(value)
+        return self.model.model_construct(**values)
+
+    def to_attributes(self, item: dict) -> dict:
+        """An item from `to_item` in the low-level client's attribute-value format."""
+        attributes = {}
+        for name, value in item.items():
+            kind = self._kinds.get(name)
+            if value is None:
+                attributes[name] = {"NULL": True}
+            elif kind is not None and kind.attribute_type is not None:
+                attributes[name] = {kind.attribute_type: str(value)}
+            else:
+                attributes[name] = _serializer.serialize(value)
+        return attributes
+
+    def from_attributes(self, attributes: dict):
+        """The model for an item returned by the low-level client, without validation."""
+        values = {}
+        for name, kind in self.fields:
+            attribute = attributes.get(name)
+            if attribute is None:
+                continue
+            if "NULL" in attribute:
+                values[name] = None
+            elif kind.attribute_type is not None and kind.attribute_type in attribute:
+                values[name] = kind.load(attribute[kind.attribute_type])
+            else:
+                values[name] = kind.load(_deserializer.deserialize(attribute))
+        return self.model.model_construct(**values)
+
+
+@lru_cache(maxsize=None)
+def codec_for(model: type[M]) -> ItemCodec:
+    """The (cached) codec of a model."""
+    return ItemCodec(model)
+
+
+def from_item(model: type[M], item: dict) -> M:
+    """Shorthand for `codec_for(model).from_item(item)`."""
+    return codec_for(model).from_item(item)
@@ -1,5 +1,110 @@
+import copy
+import random
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
+
 import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.logs import get_logger
+from src.request_context import get_request_context
+from src.services.capacity import capacity_tracker
+from src.services.changes import change_feed
+from src.services.codec import M, codec_for
+from src.services.resilience import resilience_registry
+from src.services.schema import TABLES, key_attributes
+from src.services.singleflight import read_coalescer, request_key
+
+# Throttling, server errors and lost connections are retried by the resilience layer (see
+# resilience.py) so that retries, the rate limiter and the circuit breaker share one view of
+# each table's health.
+BOTO_CONFIG = Config(
+    retries={"total_max_attempts": 1},
+    max_pool_connections=get_settings()["dynamodb_max_pool_connections"],
+)
+
+# Request parameters that carry attribute values (and therefore need DynamoDB number types).
+VALUE_PARAMETERS = ("Item", "Key", "ExpressionAttributeValues", "ExclusiveStartKey")
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+BATCH_MAX_ATTEMPTS = 8
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+logger = get_logger("dynamodb")
+
+
+class VersionConflictError(Exception):
+    """Raised when a versioned update finds the item at another version (HTTP 409)."""
+
+    def __init__(self, table_name: str, current: dict):
+        super().__init__(f"Item in '{table_name}' was modified concurrently (now at version {item_version(current)})")
+        self.table_name = table_name
+        self.current = current
+
+
+def to_dynamodb(value: Any) -> Any:
+    """
+    Converts floats (e.g. from `model_dump(mode='json')`) to `Decimal`, recursively.
+    boto3 rejects Python floats; going through `str` keeps the value as it prints (0.1, not 0.1000000000000000055...).
+    """
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: to_dynamodb(element) for key, element in value.items()}
+    if isinstance(value, list):
+        return [to_dynamodb(element) for element in value]
+    return value
+
+
+@lru_cache()
+def get_dynamodb_resource(region_name: str, endpoint_url: str | None):
+    """
+    The boto3 resource shared by every service for a region and endpoint. Creating a client
+    (endpoint resolution, credential lookup, model loading) costs milliseconds, and a new one
+    starts without open connections; sharing it keeps its connection pool warm. Services only
+    call `Table` actions, which delegate to the thread-safe client.
+    """
+    return boto3.resource('dynamodb', region_name=region_name, endpoint_url=endpoint_url, config=BOTO_CONFIG)
+
+
+def item_key(table_name: str, item: dict) -> dict:
+    """The primary key attributes of `item` in `table_name`."""
+    return {name: item[name] for name in key_attributes(TABLES[table_name]["KeySchema"]) if name}
+
+
+def item_version(item: dict) -> int:
+    """The optimistic-locking version of an item; items written before versioning count as version 1."""
+    return int(item.get("version", 1))
+
+
+def version_etag(item: dict) -> str:
+    """The HTTP ETag of an item, derived from its version."""
+    return f'"{item_version(item)}"'
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def date_key(value: datetime) -> str:
+    """
+    Formats a datetime the way dates are stored in items (UTC, ISO 8601 with microseconds, 'Z'
+    suffix). The fixed width keeps string order equal to time order: without the fraction,
+    '10:00:00Z' would sort after '10:00:00.5Z'.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds").replace("+00:00", "Z")
 
 
 class DynamoDBService:
@@ -13,21 +118,311 @@ class DynamoDBService:
                              For local development, this should be 'http://localhost:8000'.
         """
         self.table_name = table_name
-        self.dynamodb = boto3.resource(
-            'dynamodb',
-            region_name=region_name,
-            endpoint_url=endpoint_url
-        )
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.backend = get_settings()["storage_backend"]
+        # The embedded engines are imported lazily so a DynamoDB deployment never loads them.
+        if self.backend == "memory":
+            from src.services.backends.memory import memory_database
+            self.dynamodb = memory_database
+        elif self.backend == "sqlite":
+            from src.services.backends.sqlite import get_sqlite_database
+            self.dynamodb = get_sqlite_database()
+        else:
+            self.dynamodb = get_dynamodb_resource(region_name, endpoint_url)
         self.table = self.dynamodb.Table(self.table_name)
+        self._low_level_codec = self.backend == "dynamodb" and get_settings()["dynamodb_low_level_codec"]
+        self._coalesce_reads = get_settings()["read_coalescing_enabled"]
+        self._coalescing_timeout = get_settings()["read_coalescing_timeout_seconds"]
+
+    def _execute(self, operation: str, method, **kwargs) -> dict:
+        """
+        Runs a table operation under the table's resilience policy (rate limiting, retries with
+        backoff, circuit breaking), asking DynamoDB for the consumed capacity and recording it
+        against the current route, table, index and user, and its duration against the request.
+        :param operation: The DynamoDB API name, e.g. 'GetItem'.
+        :param method: The bound table method to call.
+        :raises TableUnavailableError: When the table is saturated.
+        """
+        kwargs.setdefault("ReturnConsumedCapacity", "INDEXES")
+        for parameter in VALUE_PARAMETERS:
+            if parameter in kwargs:
+                kwargs[parameter] = to_dynamodb(kwargs[parameter])
+        guard = resilience_registry.guard(self.table_name)
+        started = time.perf_counter()
+        response = guard.call(operation, lambda: method(**kwargs))
+        context = get_request_context()
+        if context is not None:
+            context.record_db_call(time.perf_counter() - started)
+        consumed = response.get("ConsumedCapacity")
+        # Batch and transactional calls report one entry per table.
+        for entry in consumed if isinstance(consumed, list) else [consumed]:
+            capacity_tracker.record(
+                operation,
+                (entry or {}).get("TableName", self.table_name),
+                entry,
+                route=context.route if context else None,
+                user_id=context.user_id if context else None,
+            )
+        return response
+
+    def _coalesced(self, key: tuple, fn, label: str, share=copy.deepcopy):
+        """
+        `fn()`, shared with the concurrent callers of the same `key` when read coalescing is
+        enabled (see src/services/singleflight.py).
+        """
+        if not self._coalesce_reads:
+            return fn()
+        return read_coalescer.do(key, fn, timeout=self._coalescing_timeout, label=label, share=share)
+
+    def _read(self, operation: str, method, **kwargs) -> dict:
+        """
+        Runs a read through `_execute`, sharing the call with identical eventually consistent
+        reads of the table already in flight. Strongly consistent reads always make their own call.
+        """
+        if kwargs.get("ConsistentRead"):
+            return self._execute(operation, method, **kwargs)
+        return self._coalesced((self.table_name, operation, request_key(kwargs)),
+                               lambda: self._execute(operation, method, **kwargs),
+                               label=f"{operation} {self.table_name}")
 
-    def put_item(self, Item: dict):
+    def _log_client_error(self, message: str, error: ClientError) -> None:
+        details = error.response.get("Error", {})
+        logger.error(message, details.get("Message", "Unknown error"),
+                     extra={"table": self.table_name, "error_code": details.get("Code")})
+
+    def put_item(self, Item: dict, **kwargs) -> dict:
         """Puts an item into the DynamoDB table."""
         try:
-            self.table.put_item(Item=Item)
+            response = self._execute("PutItem", self.table.put_item, Item=Item, **kwargs)
+        except ClientError as e:
+            self._log_client_error("Error putting item: %s", e)
+            raise
+        if change_feed.has_listeners(self.table_name):
+            item = to_dynamodb(Item)
+            change_feed.publish(self.table_name, item_key(self.table_name, item), item)
+        return response
+
+    def put_model(self, instance: BaseModel, **kwargs) -> dict:
+        """
+        Stores a model instance, converted by its codec (src/services/codec.py). On DynamoDB the
+        item goes to the low-level client as typed attribute values (see `dynamodb_low_level_codec`).
+        Accepts the other `put_item` arguments.
+        :return: The stored item.
+        """
+        codec = codec_for(type(instance))
+        item = codec.to_item(instance)
+        if not self._low_level_codec:
+            self.put_item(Item=item, **kwargs)
+            return item
+        try:
+            self._execute("PutItem", self.dynamodb.meta.client.put_item, TableName=self.table_name,
+                          Item=codec.to_attributes(item), **self._serialize_action(to_dynamodb(kwargs)))
         except ClientError as e:
-            error_message = e.response.get("Error", {}).get("Message", "Unknown error")
-            print(f"Error putting item: {error_message}")
+            self._log_client_error("Error putting item: %s", e)
             raise
+        if change_feed.has_listeners(self.table_name):
+            change_feed.publish(self.table_name, item_key(self.table_name, item), item)
+        return item
+
+    def get_model(self, model: type[M], key: dict, **kwargs) -> M | None:
+        """
+        Reads an item by its primary key as a `model` instance, or None if there is none.
+        Accepts the other `get_item` arguments.
+        """
+        codec = codec_for(model)
+        if not self._low_level_codec:
+            item = self.get_item(Key=key, **kwargs).get("Item")
+            return None if item is None else codec.from_item(item)
+        response = self._execute("GetItem", self.dynamodb.meta.client.get_item, TableName=self.table_name,
+                                 **self._serialize_action(to_dynamodb({"Key": key, **kwargs})))
+        attributes = response.get("Item")
+        return None if attributes is None else codec.from_attributes(attributes)
+
+    def get_item(self, **kwargs) -> dict:
+        """Gets a single item by its primary key. Accepts the boto3 `Table.get_item` arguments."""
+        return self._read("GetItem", self.table.get_item, **kwargs)
+
+    def update_item(self, **kwargs) -> dict:
+        """Updates a single item. Accepts the boto3 `Table.update_item` arguments."""
+        if not change_feed.has_listeners(self.table_name):
+            return self._execute("UpdateItem", self.table.update_item, **kwargs)
+        # Listeners need the whole item: ask for it with the write instead of reading it back.
+        requested = kwargs.get("ReturnValues", "NONE")
+        if requested == "NONE":
+            kwargs["ReturnValues"] = "ALL_NEW"
+        response = self._execute("UpdateItem", self.table.update_item, **kwargs)
+        key = to_dynamodb(kwargs["Key"])
+        if kwargs["ReturnValues"] == "ALL_NEW":
+            item = response["Attributes"]
+        else:
+            item = self.get_item(Key=key, ConsistentRead=True).get("Item")
+        change_feed.publish(self.table_name, key, item)
+        if requested == "NONE":
+            response.pop("Attributes", None)
+        return response
+
+    def update_versioned(self, Key: dict, UpdateExpression: str, expected_version: int | None = None,
+                         **kwargs) -> dict | None:
+        """
+        Updates an existing item and increments its `version` (optimistic concurrency).
+        :param UpdateExpression: A SET expression; the version increment is added to it.
+        :param expected_version: Only update the item if it is still at this version (see `item_version`).
+                                 None updates whatever the version is, but still bumps it.
+        :param ConditionExpression: An extra condition the item must meet, e.g. on its status.
+        :return: The updated item, or None if there is no item with this key.
+        :raises VersionConflictError: If the item is at another version or fails the extra condition;
+                                      carries the current item.
+        """
+        names = {**kwargs.pop("ExpressionAttributeNames", {}), "#version": "version"}
+        values = {**kwargs.pop("ExpressionAttributeValues", {}), ":version_step": 1}
+        conditions = [f"attribute_exists({name})" for name in Key]
+        if "ConditionExpression" in kwargs:
+            conditions.append(f"({kwargs.pop('ConditionExpression')})")
+        if expected_version is not None:
+            values[":expected_version"] = expected_version
+            if expected_version == 1:
+                conditions.append("(attribute_not_exists(#version) OR #version = :expected_version)")
+            else:
+                conditions.append("#version = :expected_version")
+        try:
+            response = self.update_item(
+                Key=Key,
+                UpdateExpression=(
+                    f"{UpdateExpression}, #version = if_not_exists(#version, :version_step) + :version_step"
+                ),
+                ConditionExpression=" AND ".join(conditions),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+                **kwargs,
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            current = e.response.get("Item")
+            if current is None:
+                return None
+            raise VersionConflictError(
+                self.table_name, {name: _deserializer.deserialize(value) for name, value in current.items()}
+            ) from e
+        return response["Attributes"]
+
+    def delete_item(self, **kwargs) -> dict:
+        """Deletes a single item. Accepts the boto3 `Table.delete_item` arguments."""
+        response = self._execute("DeleteItem", self.table.delete_item, **kwargs)
+        if change_feed.has_listeners(self.table_name):
+            change_feed.publish(self.table_name, to_dynamodb(kwargs["Key"]), None)
+        return response
+
+    def query(self, **kwargs) -> dict:
+        """Queries the table or one of its indexes. Accepts the boto3 `Table.query` arguments."""
+        return self._read("Query", self.table.query, **kwargs)
+
+    def scan(self, **kwargs) -> dict:
+        """Scans the table or one of its indexes. Accepts the boto3 `Table.scan` arguments."""
+        return self._read("Scan", self.table.scan, **kwargs)
+
+    def scan_items(self, **kwargs) -> Iterator[dict]:
+        """Yields every item of a Scan, page by page (a single Scan call stops at 1 MB)."""
+        while True:
+            response = self.scan(**kwargs)
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def batch_write(self, items: list[dict] = (), delete_keys: list[dict] = ()) -> None:
+        """
+        Puts and deletes many items of this table with BatchWriteItem, 25 requests per call.
+        Unprocessed requests (returned when the table is throttled) are retried with backoff.
+        :param items: Items to put.
+        :param delete_keys: Primary keys of the items to delete.
+        """
+        requests = [{"PutRequest": {"Item": to_dynamodb(item)}} for item in items]
+        requests += [{"DeleteRequest": {"Key": to_dynamodb(key)}} for key in delete_keys]
+        for chunk in _chunks(requests, BATCH_WRITE_SIZE):
+            pending = {self.table_name: chunk}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                response = self._execute("BatchWriteItem", self.dynamodb.batch_write_item, RequestItems=pending)
+                pending = response.get("UnprocessedItems") or {}
+                if not pending:
+                    break
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+            else:
+                raise RuntimeError(f"BatchWriteItem left {len(pending[self.table_name])} unprocessed items in {self.table_name}")
+            if change_feed.has_listeners(self.table_name):
+                for request in chunk:
+                    if "PutRequest" in request:
+                        item = request["PutRequest"]["Item"]
+                        change_feed.publish(self.table_name, item_key(self.table_name, item), item)
+                    else:
+                        change_feed.publish(self.table_name, request["DeleteRequest"]["Key"], None)
+
+    def batch_get(self, keys: list[dict], **kwargs) -> list[dict]:
+        """
+        Gets many items of this table by primary key with BatchGetItem, 100 keys per call.
+        Missing items are left out and the order of the result is not guaranteed.
+        :param keys: Primary keys of the items.
+        :param kwargs: Extra per-table request options, e.g. ProjectionExpression.
+        """
+        found = []
+        for chunk in _chunks(list(keys), BATCH_GET_SIZE):
+            pending = {self.table_name: {"Keys": [to_dynamodb(key) for key in chunk], **kwargs}}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                response = self._execute("BatchGetItem", self.dynamodb.batch_get_item, RequestItems=pending)
+                found.extend(response.get("Responses", {}).get(self.table_name, []))
+                pending = response.get("UnprocessedKeys") or {}
+                if not pending:
+                    break
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+            else:
+                raise RuntimeError(f"BatchGetItem left unprocessed keys in {self.table_name}")
+        return found
+
+    def transact_write(self, actions: list[dict]) -> dict:
+        """
+        Applies Put, Update, Delete and ConditionCheck actions atomically with TransactWriteItems.
+        Actions use the resource-level shape with plain Python values, e.g.
+        `{"Put": {"TableName": "sarees", "Item": {...}, "ConditionExpression": "..."}}`.
+        :raises ClientError: `TransactionCanceledException` if any condition fails; nothing is written.
+        """
+        actions = [{kind: to_dynamodb(params) for kind, params in action.items()} for action in actions]
+        if self.backend != "dynamodb":
+            response = self._execute("TransactWriteItems", self.dynamodb.transact_write_items, TransactItems=actions)
+        else:
+            response = self._execute(
+                "TransactWriteItems",
+                self.dynamodb.meta.client.transact_write_items,
+                TransactItems=[{kind: self._serialize_action(params)} for action in actions for kind, params in action.items()],
+            )
+        self._publish_transaction(actions)
+        return response
+
+    def _publish_transaction(self, actions: list[dict]) -> None:
+        """Publishes the items written by a committed transaction to the change feed."""
+        for action in actions:
+            (kind, params), = action.items()
+            table_name = params["TableName"]
+            if kind == "ConditionCheck" or not change_feed.has_listeners(table_name):
+                continue
+            if kind == "Put":
+                change_feed.publish(table_name, item_key(table_name, params["Item"]), params["Item"])
+            elif kind == "Delete":
+                change_feed.publish(table_name, params["Key"], None)
+            else:
+                item = self.dynamodb.Table(table_name).get_item(Key=params["Key"], ConsistentRead=True).get("Item")
+                change_feed.publish(table_name, params["Key"], item)
+
+    @staticmethod
+    def _serialize_action(params: dict) -> dict:
+        """Converts an action's values to the low-level client's typed attribute-value format."""
+        serialized = dict(params)
+        for parameter in ("Item", "Key", "ExpressionAttributeValues"):
+            if parameter in serialized:
+                serialized[parameter] = {name: _serializer.serialize(value) for name, value in serialized[parameter].items()}
+        return serialized
 
     def get_table(self):
         """Returns the DynamoDB table object."""
@@ -40,9 +435,8 @@ class DynamoDBService:
         :return: True if the item exists, False otherwise.
         """
         try:
-            response = self.table.get_item(Key=key)
+            response = self.get_item(Key=key)
             return 'Item' in response
         except ClientError as e:
-            error_message = e.response.get("Error", {}).get("Message", "Unknown error")
-            print(f"Error checking item existence: {error_message}")
-            return False 
\ No newline at end of file
+            self._log_client_error("Error checking item existence: %s", e)
+            return False
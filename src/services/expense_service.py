@@ -1,9 +1,22 @@
-import uuid
 from datetime import datetime, timezone
 from typing import Optional, List
 
-from src.models import Expense, ExpenseCreate, ExpenseStatus, User
-from src.services.dynamodb import DynamoDBService
+from botocore.exceptions import ClientError
+
+from src.models import Expense, ExpenseCreate, ExpenseStatus, ExpenseCategory, User
+from src.services.dynamodb import DynamoDBService, date_key
+from src.services.ids import new_id
+from src.services.pagination import encode_cursor, decode_cursor
+
+# GSIs on the expenses table (see scripts/create_table.py), all sorted by submission_date.
+# When several filters are given, the first matching index in this order is queried and the
+# remaining filters are applied server-side as a FilterExpression.
+EXPENSE_INDEXES = {
+    "submitted_by_user_id": "submitted_by_user_id-submission_date",
+    "category": "category-submission_date",
+    "status": "status-submission_date",
+}
+
 
 class ExpenseService(DynamoDBService):
     def __init__(self, endpoint_url: Optional[str] = None):
@@ -11,33 +24,136 @@ class ExpenseService(DynamoDBService):
 
     def create_expense(self, expense_data: ExpenseCreate, user: User) -> dict:
         """Creates a new expense record in the database."""
-        expense_id = uuid.uuid4()
+        return self.record_expense(expense_data, submitted_by_user_id=str(user.id))
+
+    def record_expense(self, expense_data: ExpenseCreate, submitted_by_user_id: str,
+                       expense_id: Optional[str] = None, procurement_id: Optional[str] = None) -> dict:
+        """
+        Creates an expense submitted by the given user.
+        :param expense_id: A deterministic id makes the call idempotent: the put is conditional on
+                           the id being new, and a repeated call returns the expense already stored.
+        :param procurement_id: The procurement the expense was booked for, if any.
+        """
         new_expense = Expense(
-            id=expense_id,
-            submitted_by_user_id=user.id,
+            id=expense_id or new_id(),
+            submitted_by_user_id=submitted_by_user_id,
             submission_date=datetime.now(timezone.utc),
+            procurement_id=procurement_id,
             **expense_data.model_dump()
         )
-        item = new_expense.model_dump(mode='json')
-        self.put_item(Item=item)
+        if expense_id is None:
+            return self.put_model(new_expense)
+        try:
+            item = self.put_model(new_expense, ConditionExpression="attribute_not_exists(id)")
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return self.get_item(Key={"id": expense_id}, ConsistentRead=True)["Item"]
         return item
 
     def list_expenses(self) -> List[dict]:
-        """Lists all expenses. In a real app, this would have pagination."""
-        response = self.table.scan()
+        """Lists all expenses with a full table scan. Prefer `query_expenses`."""
+        response = self.scan()
         return response.get('Items', [])
 
-    def update_expense_status(self, expense_id: str, new_status: ExpenseStatus, manager: User) -> Optional[dict]:
-        """Updates the status of an expense."""
-        response = self.table.update_item(
+    def query_expenses(
+        self,
+        status: Optional[ExpenseStatus] = None,
+        category: Optional[ExpenseCategory] = None,
+        submitted_by_user_id: Optional[str] = None,
+        submitted_from: Optional[datetime] = None,
+        submitted_to: Optional[datetime] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[dict], Optional[str]]:
+        """
+        Lists expenses matching the given filters, newest first, one page at a time.
+        Reads go through the most selective GSI; a scan is only used when no equality
+        filter is given. A scan returns the pages in table order: each page is sorted newest
+        first, but a later page may hold newer expenses.
+        The date bounds are inclusive and compared in the stored format, to the microsecond.
+        :param limit: Maximum number of items evaluated for this page.
+        :param cursor: The cursor returned with the previous page.
+        :return: The page of expenses and the cursor of the next page (None on the last page).
+        :raises ValueError: If the cursor is malformed.
+        """
+        equality_filters = {
+            "submitted_by_user_id": submitted_by_user_id,
+            "category": category.value if category else None,
+            "status": status.value if status else None,
+        }
+        equality_filters = {name: value for name, value in equality_filters.items() if value is not None}
+
+        names = {"#submission_date": "submission_date"}
+        values = {}
+        date_condition = None
+        if submitted_from and submitted_to:
+            date_condition = "#submission_date BETWEEN :submitted_from AND :submitted_to"
+        elif submitted_from:
+            date_condition = "#submission_date >= :submitted_from"
+        elif submitted_to:
+            date_condition = "#submission_date <= :submitted_to"
+        if submitted_from:
+            values[":submitted_from"] = date_key(submitted_from)
+        if submitted_to:
+            values[":submitted_to"] = date_key(submitted_to)
+
+        params = {"Limit": limit}
+        exclusive_start_key = decode_cursor(cursor)
+        if exclusive_start_key:
+            params["ExclusiveStartKey"] = exclusive_start_key
+
+        index_attribute = next((name for name in EXPENSE_INDEXES if name in equality_filters), None)
+        filters = []
+        for name, value in equality_filters.items():
+            names[f"#{name}"] = name
+            values[f":{name}"] = value
+            if name != index_attribute:
+                filters.append(f"#{name} = :{name}")
+
+        if index_attribute:
+            key_condition = f"#{index_attribute} = :{index_attribute}"
+            if date_condition:
+                key_condition += f" AND {date_condition}"
+            params.update(
+                IndexName=EXPENSE_INDEXES[index_attribute],
+                KeyConditionExpression=key_condition,
+                ScanIndexForward=False,
+            )
+        elif date_condition:
+            filters.append(date_condition)
+
+        if filters:
+            params["FilterExpression"] = " AND ".join(filters)
+        used_names = " ".join([params.get("KeyConditionExpression", ""), params.get("FilterExpression", "")])
+        names = {placeholder: name for placeholder, name in names.items() if placeholder in used_names}
+        if names:
+            params["ExpressionAttributeNames"] = names
+        if values:
+            params["ExpressionAttributeValues"] = values
+
+        response = self.query(**params) if index_attribute else self.scan(**params)
+        items = response.get('Items', [])
+        if not index_attribute:
+            items.sort(key=lambda item: item.get("submission_date", ""), reverse=True)
+        return items, encode_cursor(response.get('LastEvaluatedKey'))
+
+    def update_expense_status(self, expense_id: str, new_status: ExpenseStatus, manager: User,
+                              expected_version: Optional[int] = None) -> Optional[dict]:
+        """
+        Updates the status of an expense.
+        :param expected_version: The version the manager reviewed (If-Match); None updates any version.
+        :return: The updated expense, or None if it does not exist.
+        :raises VersionConflictError: If the expense changed since `expected_version`.
+        """
+        return self.update_versioned(
             Key={'id': expense_id},
             UpdateExpression="SET #s = :status, reviewed_by_user_id = :manager_id, review_date = :review_date",
+            expected_version=expected_version,
             ExpressionAttributeNames={"#s": "status"},
             ExpressionAttributeValues={
                 ":status": new_status.value,
                 ":manager_id": str(manager.id),
-                ":review_date": datetime.now(timezone.utc).isoformat()
+                ":review_date": date_key(datetime.now(timezone.utc))
             },
-            ReturnValues="ALL_NEW"
         )
-        return response.get('Attributes') 
\ No newline at end of file
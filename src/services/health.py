@@ -0,0 +1,136 @@
+"""
+Dependency probes behind `GET /health/ready`.
+
+Each table the application uses is probed with a `GetItem` of a key that never exists (half a
+read unit) and, far less often, a `DescribeTable` (a control-plane call with a low rate limit)
+that checks the table is ACTIVE. Probes run in parallel under one deadline and their results
+are cached for `health_probe_interval_seconds`, so a load balancer polling every instance
+costs almost nothing. A result older than `health_probe_max_age_seconds` (the probes keep
+timing out or a refresh is stuck) reports the instance unhealthy instead of waiting on it.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+from src.config import get_settings
+from src.services.dynamodb import DynamoDBService
+from src.services.schema import TABLES, key_attributes
+
+# Key value probed with GetItem; no item is ever stored under it.
+PROBE_KEY_VALUE = "__health_probe__"
+
+
+def probed_tables() -> list[str]:
+    """The tables this deployment reads and writes (the aggregates table only once it is used)."""
+    settings = get_settings()
+    return [name for name in TABLES if name != "aggregates" or settings["data_layout"] != "tables"]
+
+
+class DependencyProbe:
+    """Cached, deadline-bounded probes of the DynamoDB tables."""
+
+    def __init__(self, tables: Iterable[str], interval_seconds: float, timeout_seconds: float,
+                 max_age_seconds: float, describe_interval_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tables = list(tables)
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_age_seconds = max_age_seconds
+        self.describe_interval_seconds = describe_interval_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.tables)), thread_name_prefix="health-probe")
+        self._services: dict[str, DynamoDBService] = {}
+        self._in_flight: dict[str, Future] = {}
+        self._described_at: dict[str, float] = {}
+        self._results: dict[str, dict] = {}
+        self._checked_at: Optional[float] = None
+
+    def check(self) -> dict:
+        """
+        Returns the latest probe results, refreshing them first if they are older than the
+        interval. Concurrent callers never queue behind a refresh: they get the cached results.
+        :return: `healthy`, `stale`, `age_seconds` and per-table `dependencies`
+                 (`ok`, `latency_ms` and, on failure, `error`).
+        """
+        if self._checked_at is None or self._clock() - self._checked_at >= self.interval_seconds:
+            if self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                finally:
+                    self._refresh_lock.release()
+        with self._lock:
+            results = {name: dict(result) for name, result in self._results.items()}
+            checked_at = self._checked_at
+        age = None if checked_at is None else self._clock() - checked_at
+        stale = age is None or age > self.max_age_seconds
+        return {
+            "healthy": not stale and all(result["ok"] for result in results.values()),
+            "stale": stale,
+            "age_seconds": None if age is None else round(age, 3),
+            "dependencies": results,
+        }
+
+    def _refresh(self) -> None:
+        futures = {}
+        results = {}
+        for table_name in self.tables:
+            previous = self._in_flight.get(table_name)
+            if previous is not None and not previous.done():
+                # A hung probe keeps its thread; do not pile more onto the same dependency.
+                results[table_name] = {"ok": False, "latency_ms": None, "error": "previous probe still running"}
+                continue
+            futures[table_name] = self._in_flight[table_name] = self._executor.submit(self._probe_table, table_name)
+        wait(futures.values(), timeout=self.timeout_seconds)
+        for table_name, future in futures.items():
+            if not future.done():
+                results[table_name] = {"ok": False, "latency_ms": None,
+                                       "error": f"no answer within {self.timeout_seconds}s"}
+            else:
+                results[table_name] = future.result()
+        with self._lock:
+            self._results = {name: results[name] for name in self.tables}
+            self._checked_at = self._clock()
+
+    def _probe_table(self, table_name: str) -> dict:
+        started = time.perf_counter()
+        try:
+            service = self._services.get(table_name)
+            if service is None:
+                service = self._services[table_name] = DynamoDBService(
+                    table_name, endpoint_url=get_settings()["dynamodb_endpoint_url"])
+            # Straight to the table: retries and backoff would only delay the answer.
+            if self._clock() - self._described_at.get(table_name, float("-inf")) >= self.describe_interval_seconds:
+                service.table.reload()
+                if service.table.table_status != "ACTIVE":
+                    raise RuntimeError(f"table is {service.table.table_status}")
+                self._described_at[table_name] = self._clock()
+            key = {name: PROBE_KEY_VALUE for name in key_attributes(TABLES[table_name]["KeySchema"]) if name}
+            service.table.get_item(Key=key)
+        except Exception as e:
+            self._described_at.pop(table_name, None)
+            return {"ok": False, "latency_ms": round((time.perf_counter() - started) * 1000, 2), "error": str(e)}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def reset(self) -> None:
+        """Forgets every result, so the next check probes again (test isolation)."""
+        with self._lock:
+            self._results = {}
+            self._checked_at = None
+            self._described_at.clear()
+
+
+@lru_cache()
+def get_dependency_probe() -> DependencyProbe:
+    """The process-wide dependency probe."""
+    settings = get_settings()
+    return DependencyProbe(
+        probed_tables(),
+        interval_seconds=settings["health_probe_interval_seconds"],
+        timeout_seconds=settings["health_probe_timeout_seconds"],
+        max_age_seconds=settings["health_probe_max_age_seconds"],
+        describe_interval_seconds=settings["health_describe_interval_seconds"],
+    )
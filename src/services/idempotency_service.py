@@ -0,0 +1,120 @@
+import hashlib
+import json
+import time
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+from botocore.exceptions import ClientError
+
+from src.config import get_settings
+from src.services.dynamodb import DynamoDBService
+
+IN_PROGRESS, COMPLETED = "in_progress", "completed"
+
+
+class IdempotencyKeyConflictError(Exception):
+    """
+    Raised when an Idempotency-Key cannot be honoured (HTTP 409 or 422): the first request
+    with the key is still running, or the key was used with a different request body.
+    """
+
+    def __init__(self, key: str, reason: str, in_progress: bool = False):
+        super().__init__(f"Idempotency-Key '{key}' {reason}")
+        self.key = key
+        self.reason = reason
+        self.in_progress = in_progress
+
+
+def _response_default(value):
+    # Stored items carry Decimals: encode them as FastAPI would (int without a fractional part, else float).
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    return str(value)
+
+
+def request_fingerprint(request: Any) -> str:
+    """A stable hash of a request body, to detect a key reused for a different request."""
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyService(DynamoDBService):
+    """
+    Stores the response of each POST made with an `Idempotency-Key` header, so a client retrying
+    after a timeout gets the original response instead of creating a duplicate.
+    Records expire after `idempotency_ttl_seconds` (DynamoDB TTL on `expires_at`).
+    """
+
+    def __init__(self, endpoint_url: Optional[str] = None):
+        super().__init__(table_name="idempotency_keys", endpoint_url=endpoint_url)
+        settings = get_settings()
+        self.ttl_seconds = settings["idempotency_ttl_seconds"]
+        self.lock_seconds = settings["idempotency_lock_seconds"]
+
+    def run(self, user_id: str, endpoint: str, key: Optional[str], request: Any,
+            operation: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Runs `operation` at most once per (user, endpoint, key).
+        :param endpoint: The route the key is scoped to, e.g. 'POST /expenses/'.
+        :param key: The Idempotency-Key header; without one, `operation` simply runs.
+        :param request: The request body (JSON-compatible), fingerprinted to detect key reuse.
+        :return: The operation's result (or the stored result of the first call) and whether it was a replay.
+        :raises IdempotencyKeyConflictError: If the first call is still running or had another body.
+        """
+        if not key:
+            return operation(), False
+        record_key = f"{user_id}#{endpoint}#{key}"
+        fingerprint = request_fingerprint(request)
+        existing = self._claim(record_key, fingerprint)
+        if existing is not None:
+            if existing["request_hash"] != fingerprint:
+                raise IdempotencyKeyConflictError(key, "was already used with a different request body")
+            if existing["status"] != COMPLETED:
+                raise IdempotencyKeyConflictError(key, "is still being processed", in_progress=True)
+            return json.loads(existing["response_body"]), True
+
+        try:
+            result = operation()
+        except BaseException:
+            # Nothing was stored for the client to replay: let a retry run the operation again.
+            self.delete_item(Key={"idempotency_key": record_key})
+            raise
+        self.update_item(
+            Key={"idempotency_key": record_key},
+            UpdateExpression="SET #status = :completed, response_body = :body REMOVE locked_until",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":completed": COMPLETED, ":body": json.dumps(result, default=_response_default)},
+        )
+        return result, False
+
+    def _claim(self, record_key: str, fingerprint: str) -> Optional[dict]:
+        """
+        Records the key as in progress, unless a live record exists (returned instead).
+        Expired records (TTL deletion lags) and in-progress records whose lock ran out (the
+        process died mid-request) are taken over.
+        """
+        now = int(time.time())
+        try:
+            self.put_item(
+                Item={
+                    "idempotency_key": record_key,
+                    "status": IN_PROGRESS,
+                    "request_hash": fingerprint,
+                    "created_at": now,
+                    "locked_until": now + self.lock_seconds,
+                    "expires_at": now + self.ttl_seconds,
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(idempotency_key) OR expires_at < :now "
+                    "OR (#status = :in_progress AND locked_until < :now)"
+                ),
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={":now": now, ":in_progress": IN_PROGRESS},
+            )
+            return None
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+        existing = self.get_item(Key={"idempotency_key": record_key}, ConsistentRead=True).get("Item")
+        if existing is None:  # deleted by a failed first attempt in the meantime
+            return self._claim(record_key, fingerprint)
+        return existing
@@ -0,0 +1,320 @@
+"""
+Durable background jobs: a queue stored in a local SQLite file, a pool of worker threads,
+retries with exponential backoff and a dead-letter state for jobs that keep failing.
+
+Requests enqueue the follow-up work of a state change (e.g. the saree update and expense of an
+approval) held back for `job_hold_seconds`, commit the change, then release the job so that it
+runs right away. A process that dies between the two leaves a held job that runs when the hold
+expires, so the follow-up is never lost; its handler checks whether the change was committed.
+A job is claimed with a lease, so a job whose worker died (or whose process was restarted) is
+picked up again once the lease expires. Jobs can therefore run more than once: handlers must
+be idempotent (conditional puts, deterministic ids).
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+import traceback
+from functools import lru_cache
+from typing import Callable, Optional
+
+from src.config import ensure_parent_directory, get_settings
+from src.logs import get_logger
+from src.services.ids import new_id
+
+_BUSY_TIMEOUT_MS = 30000
+logger = get_logger("jobs")
+
+# Job kind -> handler(payload). Handlers register with `@job_handler(kind)` when their module is imported.
+JOB_HANDLERS: dict[str, Callable[[dict], None]] = {}
+
+QUEUED, RUNNING, DONE, DEAD = "queued", "running", "done", "dead"
+
+
+def job_handler(kind: str):
+    """Registers the decorated function as the handler of jobs of `kind`."""
+    def register(function: Callable[[dict], None]):
+        JOB_HANDLERS[kind] = function
+        return function
+    return register
+
+
+class JobQueue:
+    """The job queue and its workers; one instance per process (see `get_job_queue`)."""
+
+    def __init__(self, path: str, workers: int = 2, max_attempts: int = 5, retry_base_seconds: float = 1.0,
+                 retry_max_seconds: float = 300.0, lease_seconds: float = 300.0, poll_seconds: float = 1.0,
+                 retention_seconds: float = 86400.0, hold_seconds: float = 120.0):
+        """
+        :param path: The SQLite file of the queue (':memory:' for a non-durable queue).
+        :param workers: Number of worker threads. With 0, jobs run on the thread that enqueues them.
+        :param max_attempts: Attempts before a failing job is dead-lettered.
+        :param lease_seconds: How long a claimed job may run before another worker may take it over.
+        :param retention_seconds: How long finished jobs are kept (they make re-enqueueing a no-op).
+        :param hold_seconds: How long a job enqueued with `hold` waits for `release`.
+        """
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.hold_seconds = hold_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._stats = {"succeeded": 0, "retried": 0, "dead_lettered": 0}
+        ensure_parent_directory(path)
+        self._connection = sqlite3.connect(
+            path, timeout=_BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, run_at REAL NOT NULL,
+                leased_until REAL, finished_at REAL, last_error TEXT
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_run_at ON jobs (status, run_at)")
+
+    # --- producing ---
+
+    def enqueue(self, kind: str, payload: dict, job_id: Optional[str] = None, delay_seconds: float = 0.0) -> str:
+        """
+        Adds a job to the queue. Enqueueing a `job_id` that is already known (queued, running or
+        finished within the retention period) is a no-op, so callers can retry safely.
+        :return: The job id.
+        """
+        job_id = job_id or str(new_id())
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO jobs (id, kind, payload, status, created_at, run_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, now, now + delay_seconds),
+            )
+        if self.workers <= 0:
+            self.run_pending()
+        else:
+            self.start()
+            self._wakeup.set()
+        return job_id
+
+    def hold(self, kind: str, payload: dict, job_id: str) -> str:
+        """
+        Enqueues a job ahead of the write it follows up: it runs once `release`d, or after
+        `hold_seconds` if it never is (the process died before releasing it).
+        """
+        return self.enqueue(kind, payload, job_id=job_id, delay_seconds=self.hold_seconds)
+
+    def release(self, job_id: str) -> bool:
+        """Makes a held (delayed) job due now. :return: False if the job is not queued."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET run_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, QUEUED)
+            )
+        if cursor.rowcount:
+            if self.workers <= 0:
+                self.run_pending()
+            else:
+                self._wakeup.set()
+        return bool(cursor.rowcount)
+
+    def cancel(self, job_id: str) -> bool:
+        """Removes a queued job that is no longer needed. :return: False if the job is not queued."""
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED))
+        return bool(cursor.rowcount)
+
+    # --- consuming ---
+
+    def start(self) -> None:
+        """Starts the worker threads (once)."""
+        if self._threads or self.workers <= 0:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Asks the workers to exit after their current job and waits for them."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self) -> None:
+        last_pruned = 0.0
+        while not self._stopping.is_set():
+            job = self._claim()
+            if job is not None:
+                self._execute(job)
+                continue
+            if time.monotonic() - last_pruned > 60:
+                self._prune()
+                last_pruned = time.monotonic()
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+    def run_pending(self, limit: Optional[int] = None) -> int:
+        """Runs due jobs on the calling thread until none is left (or `limit` ran). Returns how many ran."""
+        ran = 0
+        while limit is None or ran < limit:
+            job = self._claim()
+            if job is None:
+                break
+            self._execute(job)
+            ran += 1
+        return ran
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Leases the next due job: the oldest queued one, or a running one whose lease expired."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._connection.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND run_at <= ? ORDER BY run_at LIMIT 1", (QUEUED, now)
+                ).fetchone() or self._connection.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND leased_until < ? ORDER BY run_at LIMIT 1", (RUNNING, now)
+                ).fetchone()
+                if job is not None:
+                    self._connection.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, leased_until = ? WHERE id = ?",
+                        (RUNNING, now + self.lease_seconds, job["id"]),
+                    )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return job
+
+    def _execute(self, job: sqlite3.Row) -> None:
+        attempt = job["attempts"] + 1
+        handler = JOB_HANDLERS.get(job["kind"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            handler(json.loads(job["payload"]))
+        except Exception:
+            error = traceback.format_exc()
+            if handler is None or attempt >= self.max_attempts:
+                logger.error("Job %s (%s) failed %d times, dead-lettering it", job["id"], job["kind"], attempt,
+                             extra={"job_id": job["id"], "job_kind": job["kind"]}, exc_info=True)
+                self._finish(job["id"], DEAD, error=error)
+                self._count("dead_lettered")
+            else:
+                delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1))
+                logger.warning("Job %s (%s) failed (attempt %d), retrying in %.1fs", job["id"], job["kind"], attempt,
+                               delay, extra={"job_id": job["id"], "job_kind": job["kind"]}, exc_info=True)
+                self._finish(job["id"], QUEUED, error=error, run_at=time.time() + random.uniform(delay / 2, delay))
+                self._count("retried")
+            return
+        self._finish(job["id"], DONE)
+        self._count("succeeded")
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None, run_at: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, leased_until = NULL, last_error = ?, run_at = COALESCE(?, run_at), "
+                "finished_at = ? WHERE id = ?",
+                (status, error, run_at, now if status in (DONE, DEAD) else None, job_id),
+            )
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _prune(self) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM jobs WHERE status = ? AND finished_at < ?", (DONE, time.time() - self.retention_seconds)
+            )
+
+    # --- operating ---
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_view(row) if row else None
+
+    def dead_jobs(self, limit: int = 50) -> list[dict]:
+        """The most recently dead-lettered jobs."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY finished_at DESC LIMIT ?", (DEAD, limit)
+            ).fetchall()
+        return [self._job_view(row) for row in rows]
+
+    def retry(self, job_id: str) -> bool:
+        """Puts a dead-lettered job back in the queue with a fresh attempt budget."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, run_at = ?, finished_at = NULL WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, DEAD),
+            )
+        if cursor.rowcount and self.workers > 0:
+            self._wakeup.set()
+        return bool(cursor.rowcount)
+
+    def metrics(self) -> dict:
+        """Queue depth per status, how late the oldest due job is, and outcome counters."""
+        now = time.time()
+        with self._lock:
+            depth = {status: 0 for status in (QUEUED, RUNNING, DONE, DEAD)}
+            for row in self._connection.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status"):
+                depth[row["status"]] = row["count"]
+            due = self._connection.execute(
+                "SELECT COUNT(*) AS count, MIN(run_at) AS oldest FROM jobs WHERE status = ? AND run_at <= ?", (QUEUED, now)
+            ).fetchone()
+            stats = dict(self._stats)
+        return {
+            "path": self.path,
+            "workers": len(self._threads),
+            "depth": depth,
+            "due": due["count"],
+            "lag_seconds": round(now - due["oldest"], 3) if due["oldest"] is not None else 0.0,
+            **stats,
+        }
+
+    def reset(self) -> None:
+        """Deletes every job and zeroes the counters (test isolation)."""
+        with self._lock:
+            self._connection.execute("DELETE FROM jobs")
+            self._stats = {counter: 0 for counter in self._stats}
+
+    @staticmethod
+    def _job_view(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    """The process-wide job queue, opened on first use."""
+    settings = get_settings()
+    return JobQueue(
+        settings["jobs_path"],
+        workers=settings["job_workers"],
+        max_attempts=settings["job_max_attempts"],
+        retry_base_seconds=settings["job_retry_base_seconds"],
+        lease_seconds=settings["job_lease_seconds"],
+        hold_seconds=settings["job_hold_seconds"],
+    )
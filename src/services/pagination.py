@@ -0,0 +1,28 @@
+import base64
+import json
+from typing import Optional
+
+
+def encode_cursor(last_evaluated_key: Optional[dict]) -> Optional[str]:
+    """Turns a DynamoDB `LastEvaluatedKey` into an opaque, URL-safe pagination cursor."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """
+    Turns a cursor produced by `encode_cursor` back into an `ExclusiveStartKey`.
+    :raises ValueError: If the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if not isinstance(key, dict):
+        raise ValueError("Invalid pagination cursor")
+    return key
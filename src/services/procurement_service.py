@@ -1,21 +1,26 @@
-import uuid
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Callable, Optional, List
+
+from pydantic import BaseModel
 
 from src.models import (
     Saree, ProcurementRecord, ProcurementCreate, ProcurementApproval, 
     ProcurementStatus, User, UserRole, ExpenseCreate, ExpenseCategory
 )
-from src.services.dynamodb import DynamoDBService
+from src.config import get_settings
+from src.services.codec import from_item
+from src.logs import get_logger
+from src.services.dynamodb import DynamoDBService, VersionConflictError, date_key
+from src.services.ids import new_id, derived_id
+from src.services.jobs import get_job_queue, job_handler
+from src.services.projections import projection
+
+logger = get_logger("procurement")
 
 
 class ProcurementService(DynamoDBService):
     def __init__(self, endpoint_url: Optional[str] = None):
         super().__init__(table_name="procurement_records", endpoint_url=endpoint_url)
-        # Initialize expense service for creating procurement-related expenses
-        # Import here to avoid circular imports
-        from src.services.expense_service import ExpenseService
-        self.expense_service = ExpenseService(endpoint_url=endpoint_url)
 
     def _get_inr_to_usd_exchange_rate(self) -> float:
         """
@@ -27,8 +32,9 @@ class ProcurementService(DynamoDBService):
 
     def submit_procurement(self, procurement_data: ProcurementCreate, user: User) -> dict:
         """Submit a procurement request for manager approval."""
-        # Create saree record
-        saree_id = uuid.uuid4()
+        # Create saree record, linked to the procurement that buys it
+        saree_id = new_id()
+        procurement_id = new_id()
         saree = Saree(
             id=saree_id,
             name=procurement_data.saree_name,
@@ -36,38 +42,60 @@ class ProcurementService(DynamoDBService):
             procurement_cost_inr=procurement_data.procurement_cost_inr,
             markup_percentage=procurement_data.markup_percentage or 20.0,
             image_urls=procurement_data.image_urls or [],
-            procurement_status=ProcurementStatus.pending
+            procurement_status=ProcurementStatus.pending,
+            procurement_id=procurement_id
         )
         
         # Store saree in sarees table
         saree_service = SareeService(endpoint_url=self.endpoint_url)
-        saree_service.put_item(Item=saree.model_dump(mode='json'))
+        saree_service.put_model(saree)
         
         # Create procurement record
-        procurement_id = uuid.uuid4()
         procurement_record = ProcurementRecord(
             id=procurement_id,
             saree_id=saree_id,
             procured_by_user_id=user.id,
             cost_inr=procurement_data.procurement_cost_inr,
             inr_to_usd_exchange_rate=0.0,  # Will be set during approval
+            saree_name=saree.name,
             procurement_date=datetime.now(timezone.utc),
             status=ProcurementStatus.pending
         )
         
-        item = procurement_record.model_dump(mode='json')
-        self.put_item(Item=item)
-        return item
+        return self.put_model(procurement_record)
 
-    def get_pending_procurements(self, user: User) -> List[dict]:
-        """Get pending procurement requests. Partners can see all, managers see only their own."""
-        response = self.table.scan(
-            FilterExpression="attribute_exists(#status) AND #status = :status",
-            ExpressionAttributeNames={"#status": "status"},
-            ExpressionAttributeValues={":status": ProcurementStatus.pending.value}
-        )
-        
-        procurements = response.get('Items', [])
+    def get_pending_procurements(self, user: User, since: Optional[datetime] = None, limit: Optional[int] = None,
+                                 view: Optional[type[BaseModel]] = None) -> List[dict]:
+        """
+        Get pending procurement requests, newest first. Partners can see all, managers see only their own.
+        Reads the `status-procurement_date` GSI, sorted by submission time whatever the id strategy
+        (UUIDv7 or legacy uuid4 ids), so `since` becomes a key range instead of a scan.
+        :param view: Only read the attributes of this model (see src/services/projections.py).
+        """
+        params = {
+            "IndexName": "status-procurement_date",
+            "KeyConditionExpression": "#status = :status",
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": {":status": ProcurementStatus.pending.value},
+            "ScanIndexForward": False,
+        }
+        if since is not None:
+            params["KeyConditionExpression"] += " AND procurement_date >= :since_date"
+            params["ExpressionAttributeValues"][":since_date"] = date_key(since)
+        if view is not None:
+            selected = projection(view)
+            params["ProjectionExpression"] = selected["ProjectionExpression"]
+            params["ExpressionAttributeNames"].update(selected["ExpressionAttributeNames"])
+
+        procurements = []
+        while True:
+            if limit is not None:
+                params["Limit"] = limit - len(procurements)
+            response = self.query(**params)
+            procurements.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response or (limit is not None and len(procurements) >= limit):
+                break
+            params["ExclusiveStartKey"] = response['LastEvaluatedKey']
         
         # Partners and admins can see all pending procurements
         if user.role in [UserRole.partner, UserRole.admin]:
@@ -76,25 +104,57 @@ class ProcurementService(DynamoDBService):
         # Managers can see all pending procurements (for now - can be restricted later)
         return procurements
 
-    def approve_procurement(self, procurement_id: str, approval: ProcurementApproval, manager: User) -> Optional[dict]:
-        """Approve a procurement request with optional additional costs and markup."""
-        # Get the procurement record
-        response = self.table.get_item(Key={'id': procurement_id})
-        if 'Item' not in response:
+    def get_procurement_aggregate(self, procurement_id: str, with_expenses: bool = True) -> Optional[dict]:
+        """
+        A procurement with its saree and the expenses booked for it: `{"procurement", "saree", "expenses"}`.
+        With the 'single' data layout this is one Query on the aggregates table; otherwise (or for a
+        procurement not migrated yet) the items are read from their own tables.
+        :param with_expenses: Whether the table reads should include the expenses (one more GetItem).
+        :return: The aggregate, or None if the procurement does not exist.
+        """
+        if get_settings()["data_layout"] == "single":
+            aggregate = AggregateService(endpoint_url=self.endpoint_url).get_aggregate(procurement_id)
+            if aggregate is not None and aggregate["saree"] is not None:
+                return aggregate
+        return self._aggregate_from_tables(procurement_id, with_expenses)
+
+    def _aggregate_from_tables(self, procurement_id: str, with_expenses: bool) -> Optional[dict]:
+        """The aggregate read from the separate tables, the system of record."""
+        procurement = self.get_item(Key={'id': procurement_id}).get('Item')
+        if procurement is None:
             return None
-        
-        procurement_item = response['Item']
-        
-        # Get the associated saree
-        saree_service = SareeService(endpoint_url=self.endpoint_url)
-        saree_response = saree_service.table.get_item(Key={'id': procurement_item['saree_id']})
-        if 'Item' not in saree_response:
+        saree = SareeService(endpoint_url=self.endpoint_url).get_item(Key={'id': procurement['saree_id']}).get('Item')
+        expenses = []
+        if with_expenses:
+            # The only expense linked to a procurement is the one booked at approval, under a derived id.
+            expense = ExpenseService(endpoint_url=self.endpoint_url).get_item(
+                Key={'id': str(derived_id("procurement-expense", procurement_id))}
+            ).get('Item')
+            expenses = [expense] if expense else []
+        return {"procurement": procurement, "saree": saree, "expenses": expenses}
+
+    def approve_procurement(self, procurement_id: str, approval: ProcurementApproval, manager: User,
+                            expected_version: Optional[int] = None) -> Optional[dict]:
+        """
+        Approve a procurement request with optional additional costs and markup.
+        The update only applies to the version that was read (or `expected_version`, from If-Match)
+        of a procurement that is still pending, so of two managers reviewing at once, the second gets
+        a VersionConflictError, and so does a review of a procurement that was already reviewed.
+        """
+        # Get the procurement record and the associated saree. They come from their own tables
+        # even with the 'single' layout: the single-table copy lags behind, and a stale version
+        # or markup would make the conditional update conflict or price the saree wrongly.
+        aggregate = self._aggregate_from_tables(procurement_id, with_expenses=False)
+        if aggregate is None or aggregate['saree'] is None:
             return None
         
-        saree_item = saree_response['Item']
+        procurement = from_item(ProcurementRecord, aggregate['procurement'])
+        saree = from_item(Saree, aggregate['saree'])
+        if expected_version is None:
+            expected_version = procurement.version
         
         # Calculate final costs
-        base_cost_inr = float(procurement_item['cost_inr'])
+        base_cost_inr = procurement.cost_inr
         additional_costs = approval.additional_costs_inr or 0.0
         total_cost_inr = base_cost_inr + additional_costs
         
@@ -102,22 +162,26 @@ class ProcurementService(DynamoDBService):
         exchange_rate = approval.exchange_rate_override or 0.012  # Default INR to USD rate
         
         # Calculate markup
-        markup_percentage = approval.markup_override or float(saree_item.get('markup_percentage', 20.0))
+        markup_percentage = approval.markup_override or saree.markup_percentage
         cost_usd = total_cost_inr * exchange_rate
         final_price_usd = cost_usd * (1 + markup_percentage / 100)
         
-        # Create procurement-related expense for additional costs if any
-        if additional_costs > 0:
-            expense_data = ExpenseCreate(
-                description=f"Additional procurement costs for saree: {saree_item['name']} (Procurement ID: {procurement_id})",
-                amount=additional_costs * exchange_rate,  # Convert to USD
-                currency="USD",
-                category=ExpenseCategory.procurement_related
-            )
-            self.expense_service.create_expense(expense_data, manager)
+        # The saree price and the expense for additional costs are applied by a background job
+        # (see `apply_procurement_approval`), keyed by the review so a retried request enqueues it once.
+        review_date = date_key(datetime.now(timezone.utc))
+        job = {
+            "procurement_id": procurement_id,
+            "saree_id": str(procurement.saree_id),
+            "saree_name": saree.name,
+            "final_price_usd": final_price_usd,
+            "additional_costs_usd": additional_costs * exchange_rate,  # Convert to USD
+            "manager_id": str(manager.id),
+            "procurement_version": expected_version + 1,
+            "review_date": review_date,
+        }
         
         # Update procurement record
-        update_response = self.table.update_item(
+        return self._commit_review("procurement.approved", job, lambda: self.update_versioned(
             Key={'id': procurement_id},
             UpdateExpression="""
                 SET #status = :status, 
@@ -128,70 +192,74 @@ class ProcurementService(DynamoDBService):
                     final_selling_price_usd = :final_price,
                     inr_to_usd_exchange_rate = :exchange_rate
             """,
+            expected_version=expected_version,
+            ConditionExpression="#status = :pending",
             ExpressionAttributeNames={"#status": "status"},
             ExpressionAttributeValues={
+                ":pending": ProcurementStatus.pending.value,
                 ":status": ProcurementStatus.approved.value,
                 ":manager_id": str(manager.id),
-                ":review_date": datetime.now(timezone.utc).isoformat(),
+                ":review_date": review_date,
                 ":additional_costs": additional_costs,
                 ":markup_override": markup_percentage,
                 ":final_price": final_price_usd,
                 ":exchange_rate": exchange_rate
             },
-            ReturnValues="ALL_NEW"
-        )
-        
-        # Update saree record
-        saree_service.table.update_item(
-            Key={'id': procurement_item['saree_id']},
-            UpdateExpression="SET procurement_status = :status, selling_price_usd = :price",
-            ExpressionAttributeValues={
-                ":status": ProcurementStatus.approved.value,
-                ":price": final_price_usd
-            }
-        )
-        
-        return update_response.get('Attributes')
+        ))
 
-    def reject_procurement(self, procurement_id: str, manager: User, reason: Optional[str] = None) -> Optional[dict]:
-        """Reject a procurement request."""
+    def reject_procurement(self, procurement_id: str, manager: User, reason: Optional[str] = None,
+                           expected_version: Optional[int] = None) -> Optional[dict]:
+        """Reject a procurement request. Concurrent reviews conflict as in `approve_procurement`."""
         # Get the procurement record
-        response = self.table.get_item(Key={'id': procurement_id})
-        if 'Item' not in response:
+        procurement = self.get_model(ProcurementRecord, {'id': procurement_id})
+        if procurement is None:
             return None
+        if expected_version is None:
+            expected_version = procurement.version
         
-        procurement_item = response['Item']
+        review_date = date_key(datetime.now(timezone.utc))
+        job = {"procurement_id": procurement_id, "saree_id": str(procurement.saree_id),
+               "procurement_version": expected_version + 1, "review_date": review_date}
         
         # Update procurement record
-        update_response = self.table.update_item(
+        return self._commit_review("procurement.rejected", job, lambda: self.update_versioned(
             Key={'id': procurement_id},
             UpdateExpression="SET #status = :status, reviewed_by_user_id = :manager_id, review_date = :review_date",
+            expected_version=expected_version,
+            ConditionExpression="#status = :pending",
             ExpressionAttributeNames={"#status": "status"},
             ExpressionAttributeValues={
+                ":pending": ProcurementStatus.pending.value,
                 ":status": ProcurementStatus.rejected.value,
                 ":manager_id": str(manager.id),
-                ":review_date": datetime.now(timezone.utc).isoformat()
+                ":review_date": review_date
             },
-            ReturnValues="ALL_NEW"
-        )
-        
-        # Update saree record
-        saree_service = SareeService(endpoint_url=self.endpoint_url)
-        saree_service.table.update_item(
-            Key={'id': procurement_item['saree_id']},
-            UpdateExpression="SET procurement_status = :status",
-            ExpressionAttributeValues={
-                ":status": ProcurementStatus.rejected.value
-            }
-        )
-        
-        return update_response.get('Attributes')
+        ))
+
+    @staticmethod
+    def _commit_review(kind: str, job: dict, update: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """
+        Runs the review `update` with its follow-up job held in the queue beforehand (see
+        `JobQueue.hold`) and releases the job once the update is committed. If the update fails,
+        or the process dies before the release, the job still runs when the hold expires and
+        first checks that the review was committed (see `_review_committed`).
+        :return: The result of `update`.
+        """
+        jobs = get_job_queue()
+        job_id = jobs.hold(kind, job, job_id=f"{kind}:{job['procurement_id']}:{job['review_date']}")
+        reviewed = update()
+        if reviewed is None:
+            jobs.cancel(job_id)  # No such procurement: nothing was written.
+        else:
+            jobs.release(job_id)
+        return reviewed
 
     # Legacy method for backward compatibility
     def process_procurement(self, procurement_data: ProcurementCreate, user: User) -> dict:
         """Legacy method - directly processes procurement without approval workflow."""
-        # Create saree record
-        saree_id = uuid.uuid4()
+        # Create saree record, linked to the procurement that buys it
+        saree_id = new_id()
+        procurement_id = new_id()
         saree = Saree(
             id=saree_id,
             name=procurement_data.saree_name,
@@ -199,7 +267,8 @@ class ProcurementService(DynamoDBService):
             procurement_cost_inr=procurement_data.procurement_cost_inr,
             markup_percentage=procurement_data.markup_percentage or 20.0,
             image_urls=procurement_data.image_urls or [],
-            procurement_status=ProcurementStatus.approved  # Auto-approved in legacy mode
+            procurement_status=ProcurementStatus.approved,  # Auto-approved in legacy mode
+            procurement_id=procurement_id
         )
         
         # Calculate selling price
@@ -210,30 +279,120 @@ class ProcurementService(DynamoDBService):
         
         # Store saree in sarees table
         saree_service = SareeService(endpoint_url=self.endpoint_url)
-        saree_service.put_item(Item=saree.model_dump(mode='json'))
+        saree_service.put_model(saree)
         
         # Create procurement record
-        procurement_id = uuid.uuid4()
         procurement_record = ProcurementRecord(
             id=procurement_id,
             saree_id=saree_id,
             procured_by_user_id=user.id,
             cost_inr=procurement_data.procurement_cost_inr,
             inr_to_usd_exchange_rate=inr_to_usd_rate,
+            saree_name=saree.name,
             procurement_date=datetime.now(timezone.utc),
             status=ProcurementStatus.approved,
             final_selling_price_usd=selling_price_usd
         )
         
-        item = procurement_record.model_dump(mode='json')
-        self.put_item(Item=item)
-        return item
+        return self.put_model(procurement_record)
 
-    def list_procurements(self) -> List[dict]:
-        """Lists all procurement records."""
-        response = self.table.scan()
+    def list_procurements(self, view: Optional[type[BaseModel]] = None) -> List[dict]:
+        """Lists all procurement records, or only the attributes of `view`."""
+        response = self.scan(**(projection(view) if view is not None else {}))
         return response.get('Items', [])
 
 
+# --- Background jobs (see src/services/jobs.py); both handlers are safe to run more than once ---
+# The workers run jobs in any order, so a saree records the version of the procurement review it
+# follows (`procurement_version`), and a job carrying an older review than that leaves it alone.
+
+def _endpoint_url() -> Optional[str]:
+    return get_settings()["dynamodb_endpoint_url"]
+
+
+def _review_committed(payload: dict) -> bool:
+    """Whether the review a job follows up was written to the procurement (jobs are enqueued before it)."""
+    procurement = ProcurementService(endpoint_url=_endpoint_url()).get_item(
+        Key={'id': payload['procurement_id']}, ConsistentRead=True
+    ).get('Item')
+    return procurement is not None and procurement.get('review_date') == payload['review_date']
+
+
+def _apply_review_to_saree(payload: dict, update_expression: str, values: dict) -> bool:
+    """
+    Updates the saree of a reviewed procurement unless the review was never committed or a newer
+    review was applied to it already. Jobs enqueued without `review_date` or `procurement_version`
+    skip these checks.
+    :return: False if the review is not committed or out of date, and nothing was changed.
+    """
+    if payload.get('review_date') is not None and not _review_committed(payload):
+        logger.info("Skipping a procurement review that was not committed", extra={
+            "procurement_id": payload['procurement_id'], "review_date": payload['review_date'],
+        })
+        return False
+    review = {}
+    if payload.get('procurement_version') is not None:
+        update_expression = f"{update_expression}, procurement_version = :procurement_version"
+        values = {**values, ":procurement_version": payload['procurement_version']}
+        review["ConditionExpression"] = (
+            "attribute_not_exists(procurement_version) OR procurement_version <= :procurement_version"
+        )
+    try:
+        SareeService(endpoint_url=_endpoint_url()).update_versioned(
+            Key={'id': payload['saree_id']},
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=values,
+            **review,
+        )
+    except VersionConflictError as e:
+        logger.info("Skipping an out-of-date procurement review", extra={
+            "procurement_id": payload['procurement_id'], "procurement_version": payload['procurement_version'],
+            "applied_version": e.current.get('procurement_version'),
+        })
+        return False
+    return True
+
+
+@job_handler("procurement.approved")
+def apply_procurement_approval(payload: dict) -> None:
+    """Prices the approved saree and books the additional costs as a procurement-related expense."""
+    applied = _apply_review_to_saree(
+        payload,
+        "SET procurement_status = :status, selling_price_usd = :price",
+        {
+            ":status": ProcurementStatus.approved.value,
+            ":price": payload['final_price_usd']
+        },
+    )
+    if applied and payload['additional_costs_usd'] > 0:
+        expense_data = ExpenseCreate(
+            description=f"Additional procurement costs for saree: {payload['saree_name']} (Procurement ID: {payload['procurement_id']})",
+            amount=payload['additional_costs_usd'],
+            currency="USD",
+            category=ExpenseCategory.procurement_related
+        )
+        # One expense per procurement, however often the job runs.
+        ExpenseService(endpoint_url=_endpoint_url()).record_expense(
+            expense_data,
+            submitted_by_user_id=payload['manager_id'],
+            expense_id=str(derived_id("procurement-expense", payload['procurement_id'])),
+            procurement_id=payload['procurement_id'],
+        )
+
+
+@job_handler("procurement.rejected")
+def apply_procurement_rejection(payload: dict) -> None:
+    """Marks the rejected saree."""
+    _apply_review_to_saree(
+        payload,
+        "SET procurement_status = :status",
+        {
+            ":status": ProcurementStatus.rejected.value
+        },
+    )
+
+
 # Import here to avoid circular imports
-from src.services.saree_service import SareeService 
\ No newline at end of file
+from src.services.saree_service import SareeService
+from src.services.expense_service import ExpenseService
+from src.services.aggregates import AggregateService 
\ No newline at end of file
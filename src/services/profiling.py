@@ -0,0 +1,261 @@
+"""
+On-demand profiling of single requests.
+
+An admin asks `POST /admin/profiles/token` for a short-lived signed token; any request sent
+with it in the `X-Profile` header is profiled by `ProfilingMiddleware` and its profile stored
+under the id returned in the `X-Profile-Id` response header. Requests without the header only
+pay for one header lookup, and the middleware is not installed at all unless
+`profiling_enabled` is set.
+
+The profiled request runs on an event loop of its own with a single worker thread, so the
+profile holds that request's work only, not whatever else the instance serves meanwhile:
+- 'deterministic' runs cProfile in both threads and stores a pstats file;
+- 'sampling' records both threads' stacks every `profile_sample_interval_seconds` and stores
+  a speedscope (https://www.speedscope.app) JSON file. Lower overhead, wall-clock time.
+"""
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+import anyio.to_thread
+from jose import JWTError, jwt
+
+from src.config import get_settings
+from src.security import ALGORITHM, SECRET_KEY
+
+PROFILE_MODES = ("deterministic", "sampling")
+PROFILE_HEADER = "X-Profile"
+_TOKEN_PURPOSE = "profile"
+_EXTENSIONS = {"deterministic": "pstats", "sampling": "speedscope.json"}
+
+
+def create_profile_token(mode: str, issued_by: str, ttl_seconds: int) -> str:
+    """
+    A signed token that gets requests profiled until it expires. It carries no `sub`, so it
+    cannot be used as an access token.
+    """
+    claims = {
+        "purpose": _TOKEN_PURPOSE,
+        "mode": mode,
+        "issued_by": issued_by,
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def verify_profile_token(token: str) -> Optional[dict]:
+    """The claims of a valid, unexpired profiling token, or None."""
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if claims.get("purpose") != _TOKEN_PURPOSE or claims.get("mode") not in PROFILE_MODES:
+        return None
+    return claims
+
+
+class StackSampler:
+    """Samples the stacks of a set of threads at a fixed interval from a background thread."""
+
+    def __init__(self, thread_ids: set[int], interval_seconds: float):
+        self.thread_ids = thread_ids
+        self.interval_seconds = interval_seconds
+        self.frames: list[tuple[str, str, int]] = []
+        self._frame_index: dict[tuple[str, str, int], int] = {}
+        self.samples: dict[int, list[tuple[list[int], float]]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _index(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_seconds):
+            now = time.perf_counter()
+            weight, last = (now - last) * 1000, now
+            current = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = current.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._index(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.samples.setdefault(thread_id, []).append((stack[::-1], weight))
+
+    def to_speedscope(self, name: str) -> dict:
+        profiles = []
+        for number, (thread_id, samples) in enumerate(self.samples.items()):
+            total = sum(weight for _, weight in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name} (thread {number + 1})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [stack for stack, _ in samples],
+                "weights": [round(weight, 4) for _, weight in samples],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "couture-bookkeeping",
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames]},
+            "profiles": profiles,
+        }
+
+
+async def _run_profiled(app, scope, receive, send, mode: str, interval_seconds: float):
+    # One worker thread: every sync dependency and endpoint of the request runs on it.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 1
+    worker_id = await anyio.to_thread.run_sync(threading.get_ident)
+    if mode == "deterministic":
+        loop_profiler, worker_profiler = cProfile.Profile(), cProfile.Profile()
+        await anyio.to_thread.run_sync(worker_profiler.enable)
+        loop_profiler.enable()
+        try:
+            await app(scope, receive, send)
+        finally:
+            loop_profiler.disable()
+            await anyio.to_thread.run_sync(worker_profiler.disable)
+        stats = pstats.Stats(loop_profiler)
+        stats.add(worker_profiler)
+        return stats
+    sampler = StackSampler({threading.get_ident(), worker_id}, interval_seconds)
+    sampler.start()
+    try:
+        await app(scope, receive, send)
+    finally:
+        sampler.stop()
+    return sampler
+
+
+def run_profiled(app, scope, receive, send, mode: str, interval_seconds: float):
+    """
+    Runs an ASGI request to completion on a new event loop in the calling thread, under the
+    profiler of `mode`. `receive` and `send` must not depend on the caller's loop.
+    :return: pstats.Stats ('deterministic') or a StackSampler ('sampling').
+    """
+    return asyncio.run(_run_profiled(app, scope, receive, send, mode, interval_seconds))
+
+
+def _summarize_stats(stats: pstats.Stats, limit: int) -> list[dict]:
+    rows = [
+        {"function": f"{name} ({file}:{line})", "calls": calls,
+         "self_ms": round(self_time * 1000, 3), "cumulative_ms": round(cumulative * 1000, 3)}
+        for (file, line, name), (_, calls, self_time, cumulative, _) in stats.stats.items()
+    ]
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:limit]
+
+
+def _summarize_speedscope(document: dict, limit: int) -> list[dict]:
+    frames = document["shared"]["frames"]
+    self_ms, cumulative_ms, samples = {}, {}, {}
+    for profile in document["profiles"]:
+        for stack, weight in zip(profile["samples"], profile["weights"]):
+            self_ms[stack[-1]] = self_ms.get(stack[-1], 0.0) + weight
+            for index in set(stack):
+                cumulative_ms[index] = cumulative_ms.get(index, 0.0) + weight
+                samples[index] = samples.get(index, 0) + 1
+    rows = [
+        {"function": f"{frames[i]['name']} ({frames[i]['file']}:{frames[i]['line']})", "samples": samples[i],
+         "self_ms": round(self_ms.get(i, 0.0), 3), "cumulative_ms": round(cumulative_ms[i], 3)}
+        for i in cumulative_ms
+    ]
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:limit]
+
+
+class ProfileStore:
+    """Profiles on disk: `<id>.pstats` or `<id>.speedscope.json`, with `<id>.json` metadata."""
+
+    def __init__(self, directory: str, max_kept: int):
+        self.directory = directory
+        self.max_kept = max_kept
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{uuid.UUID(profile_id)}.{suffix}")
+
+    def save(self, profile_id: str, mode: str, result, metadata: dict) -> None:
+        """Stores a profile returned by `run_profiled`, dropping the oldest beyond `max_kept`."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(profile_id, _EXTENSIONS[mode])
+        if mode == "deterministic":
+            result.dump_stats(path)
+        else:
+            with open(path, "w") as f:
+                json.dump(result.to_speedscope(f"{metadata['method']} {metadata['route']}"), f)
+        with open(self._path(profile_id, "json"), "w") as f:
+            json.dump({"id": profile_id, "mode": mode, **metadata}, f)
+        with self._lock:
+            for stale in self.list_profiles()[self.max_kept:]:
+                for suffix in (_EXTENSIONS[stale["mode"]], "json"):
+                    try:
+                        os.remove(self._path(stale["id"], suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def list_profiles(self) -> list[dict]:
+        """Metadata of the stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.count(".") == 1 and name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        entries.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(entries, key=lambda entry: entry["created_at"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[tuple[dict, str]]:
+        """(metadata, profile file path), or None if there is no such profile."""
+        try:
+            with open(self._path(profile_id, "json")) as f:
+                metadata = json.load(f)
+        except (ValueError, FileNotFoundError):  # ValueError: not a UUID
+            return None
+        return metadata, self._path(profile_id, _EXTENSIONS[metadata["mode"]])
+
+    def summary(self, profile_id: str, limit: int = 30) -> Optional[dict]:
+        """The functions that took the most time (inclusive), or None if there is no such profile."""
+        found = self.get(profile_id)
+        if found is None:
+            return None
+        metadata, path = found
+        if metadata["mode"] == "deterministic":
+            top = _summarize_stats(pstats.Stats(path), limit)
+        else:
+            with open(path) as f:
+                top = _summarize_speedscope(json.load(f), limit)
+        return {**metadata, "top": top}
+
+
+@lru_cache()
+def get_profile_store() -> ProfileStore:
+    """The process-wide profile store."""
+    settings = get_settings()
+    return ProfileStore(settings["profiles_path"], settings["profiles_max_kept"])
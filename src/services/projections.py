@@ -0,0 +1,61 @@
+"""
+Field selection for list and detail endpoints (the `fields=` query parameter).
+
+`select_fields` turns the parameter into the response model of the selection, its "view":
+None for whole items, the predefined summary model for `fields=summary`, or a partial model
+with just the listed fields (built once per selection). `projection` gives the DynamoDB
+`ProjectionExpression` that reads only a view's attributes, so the read, the payload and the
+serialization all shrink with the selection.
+"""
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseModel, Field, create_model
+
+SUMMARY = "summary"
+
+
+@lru_cache(maxsize=256)
+def _partial_model(model: type[BaseModel], names: tuple[str, ...]) -> type[BaseModel]:
+    definitions = {}
+    for name in names:
+        field = model.model_fields[name]
+        if field.is_required():
+            # A selected attribute can still be absent from an item.
+            definitions[name] = (Optional[field.annotation], Field(default=None))
+        else:
+            definitions[name] = (field.annotation, field)
+    return create_model(f"{model.__name__}Fields", **definitions)
+
+
+def select_fields(model: type[BaseModel], fields: Optional[str],
+                  summary: Optional[type[BaseModel]] = None) -> Optional[type[BaseModel]]:
+    """
+    The view of `model` selected by a `fields` parameter: a comma-separated list of field names
+    (`id` is always included) or 'summary'. None when no fields are selected.
+    :raises ValueError: For unknown field names.
+    """
+    if fields is None or not fields.strip():
+        return None
+    if fields.strip() == SUMMARY and summary is not None:
+        return summary
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(model.model_fields))
+    if unknown:
+        allowed = ", ".join(list(model.model_fields) + ([SUMMARY] if summary is not None else []))
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {allowed}")
+    names.add("id")
+    return _partial_model(model, tuple(name for name in model.model_fields if name in names))
+
+
+def projection(view: type[BaseModel], *extra: str) -> dict:
+    """
+    `ProjectionExpression` and `ExpressionAttributeNames` reading the attributes of `view`
+    (plus `extra` ones, e.g. `version` for the ETag). Every name goes through a placeholder:
+    several field names (`name`, `status`) are DynamoDB reserved words.
+    """
+    names = list(view.model_fields) + [name for name in extra if name not in view.model_fields]
+    return {
+        "ProjectionExpression": ", ".join(f"#p{i}" for i in range(len(names))),
+        "ExpressionAttributeNames": {f"#p{i}": name for i, name in enumerate(names)},
+    }
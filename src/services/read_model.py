@@ -0,0 +1,385 @@
+"""
+SQL read model (CQRS): a local SQLite copy of users, sarees, procurements, expenses and sales with
+indexed, joinable tables, kept up to date from the `change_feed` of every write.
+
+Writes are applied asynchronously by one writer thread, in batches, so the request that
+changed DynamoDB never waits for the read model. Reporting endpoints query it with SQL instead
+of scanning tables, which costs no DynamoDB read capacity. The copy is eventually consistent
+(see `status()` for the lag); `scripts/rebuild_read_model.py` rebuilds it from table scans.
+"""
+import itertools
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from src.config import ensure_parent_directory, get_settings
+from src.logs import get_logger
+from src.services.changes import change_feed
+from src.services.dynamodb import date_key
+
+_BUSY_TIMEOUT_MS = 30000
+_memory_ids = itertools.count()
+logger = get_logger("read_model")
+
+# DynamoDB table -> (SQL table, [(column, SQL type)]). Columns are read from the item attribute
+# of the same name; users never carry their password hash into the read model.
+PROJECTIONS = {
+    "users": ("users", [
+        ("email", "TEXT"), ("full_name", "TEXT"), ("role", "TEXT"),
+    ]),
+    "sarees": ("sarees", [
+        ("name", "TEXT"), ("description", "TEXT"), ("procurement_cost_inr", "REAL"), ("markup_percentage", "REAL"),
+        ("selling_price_usd", "REAL"), ("procurement_status", "TEXT"),
+    ]),
+    "procurement_records": ("procurements", [
+        ("saree_id", "TEXT"), ("procured_by_user_id", "TEXT"), ("cost_inr", "REAL"),
+        ("inr_to_usd_exchange_rate", "REAL"), ("procurement_date", "DATE"), ("status", "TEXT"),
+        ("reviewed_by_user_id", "TEXT"), ("review_date", "DATE"), ("manager_additional_costs_inr", "REAL"),
+        ("manager_markup_override", "REAL"), ("final_selling_price_usd", "REAL"),
+    ]),
+    "expenses": ("expenses", [
+        ("description", "TEXT"), ("amount", "REAL"), ("currency", "TEXT"), ("category", "TEXT"),
+        ("submitted_by_user_id", "TEXT"), ("submission_date", "DATE"), ("status", "TEXT"),
+        ("reviewed_by_user_id", "TEXT"), ("review_date", "DATE"),
+    ]),
+    "sales": ("sales", [
+        ("saree_id", "TEXT"), ("sale_price_usd", "REAL"), ("discount_usd", "REAL"), ("net_amount_usd", "REAL"),
+        ("channel", "TEXT"), ("sold_at", "DATE"), ("recorded_by_user_id", "TEXT"),
+    ]),
+}
+EXCLUDED_ATTRIBUTES = {"users": {"hashed_password"}}
+
+INDEXES = [
+    ("users", ["email"]),
+    ("users", ["role"]),
+    ("sarees", ["procurement_status"]),
+    ("procurements", ["procured_by_user_id", "procurement_date"]),
+    ("procurements", ["status", "procurement_date"]),
+    ("procurements", ["saree_id"]),
+    ("procurements", ["procurement_date"]),
+    ("expenses", ["submitted_by_user_id", "submission_date"]),
+    ("expenses", ["category", "submission_date"]),
+    ("expenses", ["status", "submission_date"]),
+    ("expenses", ["submission_date"]),
+    ("sales", ["saree_id", "sold_at"]),
+    ("sales", ["sold_at"]),
+]
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _column_value(value, sql_type: str):
+    if value is None:
+        return None
+    if sql_type == "REAL":
+        return float(value)
+    if sql_type == "DATE":
+        # Stored dates mix 'Z' and '+00:00' suffixes; normalize so they compare as text.
+        try:
+            return date_key(datetime.fromisoformat(str(value)))
+        except ValueError:
+            return str(value)
+    return str(value)
+
+
+class ReadModel:
+    """The SQLite read model; one instance per process (see `get_read_model`)."""
+
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        if path == ":memory:":
+            # A named shared-cache database, so the writer and readers see the same data.
+            self._database = f"file:read_model_{next(_memory_ids)}?mode=memory&cache=shared"
+        else:
+            ensure_parent_directory(path)
+            self._database = path
+        self._queue: queue.Queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"applied": 0, "failed": 0, "last_applied_at": None, "lag_seconds": 0.0}
+        # The most recent changes that could not be applied (the read model lacks them until a rebuild).
+        self._failures: deque = deque(maxlen=100)
+        self._writer = self._connect()
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._database, uri=self._database.startswith("file:"), timeout=_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None, check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        if self.path == ":memory:":
+            connection.execute("PRAGMA read_uncommitted=1")
+        else:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _create_schema(self) -> None:
+        with self._write_lock:
+            for sql_table, columns in PROJECTIONS.values():
+                definitions = ", ".join(f"{column} {sql_type}" for column, sql_type in columns)
+                self._writer.execute(
+                    f"CREATE TABLE IF NOT EXISTS {sql_table} (id TEXT PRIMARY KEY, {definitions}, item TEXT NOT NULL)"
+                )
+            for sql_table, columns in INDEXES:
+                self._writer.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_{sql_table}_{'_'.join(columns)} ON {sql_table} ({', '.join(columns)})"
+                )
+
+    # --- feeding ---
+
+    def install(self) -> None:
+        """Subscribes to the change feed of every projected table."""
+        for table_name in PROJECTIONS:
+            change_feed.subscribe(table_name, self.on_change)
+
+    def uninstall(self) -> None:
+        for table_name in PROJECTIONS:
+            change_feed.unsubscribe(table_name, self.on_change)
+
+    def on_change(self, table_name: str, key: dict, item: Optional[dict]) -> None:
+        """Change feed listener: queues the change for the writer thread."""
+        self._queue.put((table_name, key, item, time.monotonic()))
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="read-model-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            changes = [self._queue.get()]
+            while len(changes) < self.batch_size:
+                try:
+                    changes.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(changes)
+            except Exception:
+                if len(changes) == 1:
+                    self._record_failure(changes[0])
+                else:
+                    # One bad change rolls back its whole batch: apply the changes one at a
+                    # time, so only the change that fails is lost.
+                    logger.warning("A batch of %d changes failed; applying them one at a time", len(changes))
+                    self._apply_each(changes)
+            finally:
+                for _ in changes:
+                    self._queue.task_done()
+
+    def _apply_each(self, changes: list[tuple]) -> None:
+        for change in changes:
+            try:
+                self._apply([change])
+            except Exception:
+                self._record_failure(change)
+
+    def _record_failure(self, change: tuple) -> None:
+        table_name, key, item, _ = change
+        key = key or {"id": (item or {}).get("id")}
+        logger.exception("Error applying a change to the read model",
+                         extra={"table": table_name, "key": str(key.get("id"))})
+        with self._stats_lock:
+            self._stats["failed"] += 1
+            self._failures.append({"table": table_name, "id": str(key.get("id")),
+                                   "at": datetime.now(timezone.utc).isoformat()})
+
+    def _apply(self, changes: list[tuple]) -> None:
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                for table_name, key, item, _ in changes:
+                    self._write(table_name, key, item)
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+        with self._stats_lock:
+            self._stats["applied"] += len(changes)
+            self._stats["last_applied_at"] = datetime.now(timezone.utc).isoformat()
+            self._stats["lag_seconds"] = round(time.monotonic() - changes[-1][3], 6)
+
+    def _write(self, table_name: str, key: dict, item: Optional[dict]) -> None:
+        sql_table, columns = PROJECTIONS[table_name]
+        if item is None:
+            self._writer.execute(f"DELETE FROM {sql_table} WHERE id = ?", (str(key["id"]),))
+            return
+        excluded = EXCLUDED_ATTRIBUTES.get(table_name, set())
+        document = {name: value for name, value in item.items() if name not in excluded}
+        values = [str(item["id"])] + [_column_value(item.get(column), sql_type) for column, sql_type in columns]
+        values.append(json.dumps(document, default=_json_default))
+        names = ["id"] + [column for column, _ in columns] + ["item"]
+        self._writer.execute(
+            f"INSERT OR REPLACE INTO {sql_table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", values
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued change is applied. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def rebuild(self, items_by_table: dict[str, Iterable[dict]], chunk_size: int = 1000) -> dict[str, int]:
+        """
+        Replaces the contents of the given tables with the given items (e.g. full table scans).
+        Rows are committed in chunks so live readers and writers are never blocked for long.
+        :return: The number of rows written per table.
+        """
+        counts = {}
+        for table_name, items in items_by_table.items():
+            sql_table, _ = PROJECTIONS[table_name]
+            with self._write_lock:
+                self._writer.execute(f"DELETE FROM {sql_table}")
+            counts[table_name] = 0
+            iterator = iter(items)
+            while chunk := list(itertools.islice(iterator, chunk_size)):
+                self._apply([(table_name, None, item, time.monotonic()) for item in chunk])
+                counts[table_name] += len(chunk)
+        return counts
+
+    def reset(self) -> None:
+        """Empties every table (test isolation)."""
+        self.flush()
+        with self._write_lock:
+            for sql_table, _ in PROJECTIONS.values():
+                self._writer.execute(f"DELETE FROM {sql_table}")
+
+    # --- reading ---
+
+    def query(self, sql: str, params: Iterable = ()) -> list[dict]:
+        """Runs a read-only SQL query on a per-thread connection and returns the rows as dicts."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return [dict(row) for row in connection.execute(sql, tuple(params))]
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["recent_failures"] = list(self._failures)
+        rows = {
+            sql_table: self.query(f"SELECT COUNT(*) AS count FROM {sql_table}")[0]["count"]
+            for sql_table, _ in PROJECTIONS.values()
+        }
+        return {"path": self.path, "pending": self._queue.unfinished_tasks, **stats, "rows": rows}
+
+    # --- reports ---
+
+    def procurement_report(self, buyer_id: Optional[str] = None, status: Optional[str] = None,
+                           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                           limit: int = 100) -> list[dict]:
+        """Procurements joined with their buyer and saree, with the margin of each sale price."""
+        conditions, params = self._date_filter("p.procurement_date", date_from, date_to)
+        if buyer_id:
+            conditions.append("p.procured_by_user_id = ?")
+            params.append(buyer_id)
+        if status:
+            conditions.append("p.status = ?")
+            params.append(status)
+        return self.query(
+            f"""
+            SELECT p.id, p.procurement_date, p.status, p.procured_by_user_id AS buyer_id, u.email AS buyer_email,
+                   p.saree_id, s.name AS saree_name, p.cost_inr, p.manager_additional_costs_inr,
+                   {_COST_USD} AS cost_usd, s.selling_price_usd,
+                   s.selling_price_usd - {_COST_USD} AS margin_usd
+            FROM procurements p
+            LEFT JOIN users u ON u.id = p.procured_by_user_id
+            LEFT JOIN sarees s ON s.id = p.saree_id
+            {_where(conditions)}
+            ORDER BY p.procurement_date DESC
+            LIMIT ?
+            """,
+            params + [limit],
+        )
+
+    def procurements_by_buyer(self, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> list[dict]:
+        """Per-buyer procurement counts, costs and margins (approved sales only for margins)."""
+        conditions, params = self._date_filter("p.procurement_date", date_from, date_to)
+        return self.query(
+            f"""
+            SELECT p.procured_by_user_id AS buyer_id, u.email AS buyer_email,
+                   COUNT(*) AS procurements,
+                   SUM(p.status = 'approved') AS approved,
+                   SUM(p.cost_inr + COALESCE(p.manager_additional_costs_inr, 0)) AS total_cost_inr,
+                   SUM(CASE WHEN p.status = 'approved' THEN s.selling_price_usd - {_COST_USD} END) AS total_margin_usd,
+                   AVG(CASE WHEN p.status = 'approved' AND s.selling_price_usd > 0
+                            THEN (s.selling_price_usd - {_COST_USD}) / s.selling_price_usd END) AS average_margin_ratio
+            FROM procurements p
+            LEFT JOIN users u ON u.id = p.procured_by_user_id
+            LEFT JOIN sarees s ON s.id = p.saree_id
+            {_where(conditions)}
+            GROUP BY p.procured_by_user_id, u.email
+            ORDER BY total_cost_inr DESC
+            """,
+            params,
+        )
+
+    def expense_summary(self, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> list[dict]:
+        """Expense counts and totals per category, status and currency."""
+        conditions, params = self._date_filter("submission_date", date_from, date_to)
+        return self.query(
+            f"""
+            SELECT category, status, currency, COUNT(*) AS expenses, SUM(amount) AS total_amount
+            FROM expenses
+            {_where(conditions)}
+            GROUP BY category, status, currency
+            ORDER BY total_amount DESC
+            """,
+            params,
+        )
+
+    @staticmethod
+    def _date_filter(column: str, date_from: Optional[datetime], date_to: Optional[datetime]) -> tuple[list, list]:
+        conditions, params = [], []
+        if date_from is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(date_key(date_from))
+        if date_to is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(date_key(date_to))
+        return conditions, params
+
+
+# USD cost of a procurement: base and additional INR costs at the approval exchange rate.
+_COST_USD = "(p.cost_inr + COALESCE(p.manager_additional_costs_inr, 0)) * p.inr_to_usd_exchange_rate"
+
+
+def _where(conditions: list[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+@lru_cache()
+def get_read_model() -> ReadModel:
+    """The process-wide read model, subscribed to the change feed on first use."""
+    read_model = ReadModel(get_settings()["read_model_path"])
+    read_model.install()
+    return read_model
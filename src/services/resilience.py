@@ -0,0 +1,357 @@
+import math
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+
+from src.config import get_settings
+from src.services.capacity import READ_OPERATIONS
+
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+# Server-side failures and lost connections: retried with the same backoff, but they say nothing
+# about the table's throughput, so the rate limiter is left alone.
+TRANSIENT_ERROR_CODES = {
+    "InternalServerError",
+    "InternalFailure",
+    "ServiceUnavailable",
+}
+TRANSIENT_EXCEPTIONS = (BotoConnectionError, HTTPClientError)
+
+
+class TableUnavailableError(Exception):
+    """Raised when a table is saturated and the request should be retried later (HTTP 503)."""
+
+    def __init__(self, table_name: str, retry_after: float, reason: str):
+        super().__init__(f"Table '{table_name}' is temporarily unavailable: {reason}")
+        self.table_name = table_name
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose refill rate adapts to throttling.
+
+    The rate starts at the provisioned capacity, is halved whenever DynamoDB throttles and
+    recovers additively on success. Callers take one token up front and pay for the rest of
+    the consumed capacity afterwards with `consume`, which may drive the balance negative so
+    that the next callers wait.
+    """
+
+    def __init__(self, rate: float, burst_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_rate = rate
+        self.min_rate = rate * 0.1
+        self.rate = rate
+        self.capacity = max(rate * burst_seconds, 1.0)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` and returns how many seconds the caller must wait before proceeding."""
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, tokens: float = 1.0) -> None:
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def consume(self, tokens: float) -> None:
+        """Charges capacity that was consumed beyond the token reserved up front."""
+        if tokens <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refill()
+            return {"rate": round(self.rate, 3), "tokens": round(self.tokens, 3), "capacity": self.capacity}
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive throttling failures and fails fast for
+    `reset_seconds`. Then a single trial call is let through (half-open); its outcome
+    closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_seconds - self._clock())
+
+    def allow(self) -> bool:
+        """Returns True if a call may proceed."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.retry_after() > 0:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Gives back an allowed call that never reached DynamoDB."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "retry_after_seconds": round(self.retry_after(), 3) if self.state == self.OPEN else 0.0,
+            }
+
+
+def consumed_units(consumed) -> Optional[float]:
+    """Total `CapacityUnits` of a `ConsumedCapacity` element (a list for batch and transactional calls)."""
+    if not consumed:
+        return None
+    entries = consumed if isinstance(consumed, list) else [consumed]
+    return sum(float(entry.get("CapacityUnits", 0)) for entry in entries)
+
+
+class TableGuard:
+    """
+    Wraps every call against one table with the circuit breaker, the client-side rate
+    limiter and jittered exponential backoff on throttling errors, server errors and lost
+    connections (botocore's own retries are off, see dynamodb.py).
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        read_capacity_units: float,
+        write_capacity_units: float,
+        burst_seconds: float,
+        max_wait_seconds: float,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        failure_threshold: int,
+        reset_seconds: float,
+        sleep: Callable[[float], None] = time.sleep,
+        rate_limited: bool = True,
+    ):
+        self.table_name = table_name
+        self.read_bucket = TokenBucket(read_capacity_units, burst_seconds)
+        self.write_bucket = TokenBucket(write_capacity_units, burst_seconds)
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.sleep = sleep
+        self.rate_limited = rate_limited
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "throttles": 0, "transient_errors": 0, "rejected": 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _reject(self, retry_after: float, reason: str) -> TableUnavailableError:
+        self._count("rejected")
+        return TableUnavailableError(self.table_name, retry_after, reason)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (zero-based) retry attempt."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+    def call(self, operation: str, fn: Callable[[], dict]) -> dict:
+        """
+        Runs `fn` under the table's resilience policy.
+        :param operation: The DynamoDB API name, used to pick the read or write bucket.
+        :raises TableUnavailableError: When the breaker is open, the limiter would make the
+                                       caller wait too long, or throttling, server errors or
+                                       lost connections outlast the retries.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            raise self._reject(self.breaker.retry_after() or self.breaker.reset_seconds, "circuit breaker open")
+
+        bucket = self.read_bucket if operation in READ_OPERATIONS else self.write_bucket
+        wait = bucket.reserve() if self.rate_limited else 0.0
+        if wait > self.max_wait_seconds:
+            bucket.refund()
+            self.breaker.release()
+            raise self._reject(wait, "client-side rate limit exceeded")
+        if wait > 0:
+            self.sleep(wait)
+
+        try:
+            return self._call_with_retries(fn, bucket)
+        except (ClientError, TableUnavailableError):
+            raise  # The outcome was recorded on the breaker.
+        except BaseException:
+            # Not an answer from DynamoDB (e.g. a bug in `fn`): give back a half-open trial so
+            # that the next call can try again.
+            self.breaker.release()
+            raise
+
+    def _call_with_retries(self, fn: Callable[[], dict], bucket: TokenBucket) -> dict:
+        attempt = 0
+        while True:
+            try:
+                response = fn()
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code in THROTTLING_ERROR_CODES:
+                    self._count("throttles")
+                    bucket.on_throttle()
+                    reason = "throttled by DynamoDB"
+                elif code in TRANSIENT_ERROR_CODES:
+                    self._count("transient_errors")
+                    reason = "DynamoDB unavailable"
+                else:
+                    # The table answered, so it is not saturated.
+                    self.breaker.record_success()
+                    raise
+                self._retry_or_reject(attempt, reason, e)
+                attempt += 1
+                continue
+            except TRANSIENT_EXCEPTIONS as e:
+                self._count("transient_errors")
+                self._retry_or_reject(attempt, "DynamoDB unavailable", e)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            bucket.on_success()
+            consumed = consumed_units(response.get("ConsumedCapacity"))
+            if consumed is not None and self.rate_limited:
+                bucket.consume(consumed - 1.0)
+            return response
+
+    def _retry_or_reject(self, attempt: int, reason: str, error: Exception) -> None:
+        """Sleeps before the next attempt, or records the failure and raises once retries are exhausted."""
+        if attempt >= self.max_retries:
+            self.breaker.record_failure()
+            raise self._reject(self.breaker.retry_after() or self.retry_max_delay, reason) from error
+        self._count("retries")
+        self.sleep(self.backoff_delay(attempt))
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "breaker": self.breaker.snapshot(),
+            "read_limiter": self.read_bucket.snapshot(),
+            "write_limiter": self.write_bucket.snapshot(),
+        }
+
+
+class ResilienceRegistry:
+    """Holds one `TableGuard` per table, created on first use from the application settings."""
+
+    def __init__(self):
+        self._guards: dict[str, TableGuard] = {}
+        self._lock = threading.Lock()
+
+    def guard(self, table_name: str) -> TableGuard:
+        guard = self._guards.get(table_name)
+        if guard is None:
+            with self._lock:
+                guard = self._guards.get(table_name)
+                if guard is None:
+                    guard = self._guards[table_name] = self._build(table_name)
+        return guard
+
+    @staticmethod
+    def _build(table_name: str) -> TableGuard:
+        settings = get_settings()
+        return TableGuard(
+            table_name,
+            read_capacity_units=settings["dynamodb_read_capacity_units"],
+            write_capacity_units=settings["dynamodb_write_capacity_units"],
+            burst_seconds=settings["dynamodb_burst_seconds"],
+            max_wait_seconds=settings["dynamodb_max_wait_seconds"],
+            max_retries=settings["dynamodb_max_retries"],
+            retry_base_delay=settings["dynamodb_retry_base_delay_seconds"],
+            retry_max_delay=settings["dynamodb_retry_max_delay_seconds"],
+            failure_threshold=settings["circuit_breaker_failure_threshold"],
+            reset_seconds=settings["circuit_breaker_reset_seconds"],
+            # The in-process backends have no provisioned throughput to protect.
+            rate_limited=settings["storage_backend"] == "dynamodb",
+        )
+
+    def reset(self, table_name: Optional[str] = None) -> None:
+        with self._lock:
+            if table_name is None:
+                self._guards.clear()
+            else:
+                self._guards.pop(table_name, None)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            guards = dict(self._guards)
+        return {table_name: guard.snapshot() for table_name, guard in sorted(guards.items())}
+
+
+def retry_after_header(seconds: float) -> str:
+    """Formats a delay for the HTTP `Retry-After` header (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(seconds)))
+
+
+# Process-wide registry shared by every DynamoDBService instance.
+resilience_registry = ResilienceRegistry()
@@ -0,0 +1,155 @@
+"""
+Sales ledger: an append-only record of the sarees sold, with sale price, discount and channel.
+
+Sales arrive in bursts (a flash sale, a WhatsApp broadcast, an imported order export). With the
+day as partition key, every sale of a burst would hit one DynamoDB partition and be throttled at
+its write limit, so the key is write-sharded: a sale is stored under `<day>#<shard>`, the shard
+computed from its id, which spreads each day over `sales_write_shards` partitions. The id is the
+UUIDv7 of the sale time and the sort key, so every shard keeps its sales in time order:
+- a day's sales are one Query per shard, merged newest first;
+- a sale is read by id with one GetItem, since its day and shard both follow from the id.
+The shard count must not change once sales are recorded (stored sales keep their shard).
+
+Sales are never updated. A single sale is put on condition that its key is new. A sale with an
+`order_reference` gets an id derived from its channel, reference and time, so recording or
+importing the same order again finds the stored item instead of adding another one; bulk
+imports only write the ids that are not stored yet (every imported row has a reference and time).
+"""
+import heapq
+import itertools
+import uuid
+from datetime import date, timezone
+from typing import Iterable, List, Optional, Union
+
+from botocore.exceptions import ClientError
+
+from src.config import get_settings
+from src.models import Sale, SaleCreate, SaleImport, User
+from src.services.codec import codec_for
+from src.services.dynamodb import DynamoDBService
+from src.services.ids import id_timestamp, uuid7, uuid7_for
+from src.services.saree_service import SareeService
+
+SALES_BY_SAREE_INDEX = "saree_id-id"
+
+
+class SaleService(DynamoDBService):
+    def __init__(self, endpoint_url: Optional[str] = None):
+        super().__init__(table_name="sales", endpoint_url=endpoint_url)
+        self.shards = get_settings()["sales_write_shards"]
+
+    def partition_key(self, sale_id: Union[str, uuid.UUID]) -> Optional[str]:
+        """The `day_shard` of a sale id, or None if the id is not a sale id (not a UUIDv7)."""
+        parsed = sale_id if isinstance(sale_id, uuid.UUID) else uuid.UUID(str(sale_id))
+        sold_at = id_timestamp(parsed)
+        if sold_at is None:
+            return None
+        return self._day_shard(sold_at.date(), parsed.int % self.shards)
+
+    @staticmethod
+    def _day_shard(day: date, shard: int) -> str:
+        return f"{day.isoformat()}#{shard:02d}"
+
+    def _new_sale(self, sale_data: SaleCreate, user: User) -> Sale:
+        sold_at = sale_data.sold_at
+        if sold_at is None:
+            sale_id = uuid7()
+            sold_at = id_timestamp(sale_id)
+        else:
+            sold_at = sold_at.astimezone(timezone.utc) if sold_at.tzinfo else sold_at.replace(tzinfo=timezone.utc)
+            if sale_data.order_reference:
+                sale_id = uuid7_for(sold_at, f"{sale_data.channel.value}#{sale_data.order_reference}")
+            else:
+                sale_id = uuid7(sold_at)
+        return Sale(
+            id=sale_id,
+            sold_at=sold_at,
+            net_amount_usd=round(sale_data.sale_price_usd - sale_data.discount_usd, 2),
+            recorded_by_user_id=user.id,
+            **sale_data.model_dump(exclude={"sold_at"}),
+        )
+
+    def _item(self, sale: Sale) -> dict:
+        item = codec_for(Sale).to_item(sale)
+        item["day_shard"] = self.partition_key(sale.id)
+        return item
+
+    def _check_sarees(self, saree_ids: Iterable[uuid.UUID]) -> None:
+        wanted = {str(saree_id) for saree_id in saree_ids}
+        found = SareeService(endpoint_url=self.endpoint_url).batch_get(
+            [{"id": saree_id} for saree_id in wanted], ProjectionExpression="id"
+        )
+        unknown = sorted(wanted - {item["id"] for item in found})
+        if unknown:
+            raise ValueError(f"Unknown saree ids: {', '.join(unknown)}")
+
+    def record_sale(self, sale_data: SaleCreate, user: User) -> dict:
+        """
+        Records one sale. A sale whose order reference (and time) was already recorded is
+        returned as stored instead of being recorded twice.
+        :raises ValueError: If the saree does not exist.
+        """
+        self._check_sarees([sale_data.saree_id])
+        item = self._item(self._new_sale(sale_data, user))
+        try:
+            self.put_item(Item=item, ConditionExpression="attribute_not_exists(id)")
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return self.get_item(Key={"day_shard": item["day_shard"], "id": item["id"]}, ConsistentRead=True)["Item"]
+        return item
+
+    def record_sales(self, sales_data: List[SaleImport], user: User) -> List[dict]:
+        """
+        Records many sales (e.g. a WhatsApp order export) with BatchWriteItem, 25 per call.
+        Sales already recorded (same channel, order reference and time) are read with BatchGetItem
+        first and left as stored, so importing an export again writes nothing.
+        BatchWriteItem cannot be conditional: two imports of one export running at the same time
+        may both write a new sale, with the same values.
+        :return: The sales of the export as stored, one per order.
+        :raises ValueError: If a saree does not exist; nothing is recorded then.
+        """
+        self._check_sarees(sale.saree_id for sale in sales_data)
+        items = {}
+        for sale_data in sales_data:
+            item = self._item(self._new_sale(sale_data, user))
+            items.setdefault(item["id"], item)
+        stored = {
+            item["id"]: item
+            for item in self.batch_get([{"day_shard": item["day_shard"], "id": item["id"]} for item in items.values()],
+                                       ConsistentRead=True)
+        }
+        self.batch_write([item for sale_id, item in items.items() if sale_id not in stored])
+        return [stored.get(sale_id, item) for sale_id, item in items.items()]
+
+    def get_sale(self, sale_id: str) -> Optional[dict]:
+        """A sale by its id, or None."""
+        day_shard = self.partition_key(sale_id)
+        if day_shard is None:
+            return None
+        return self.get_item(Key={"day_shard": day_shard, "id": str(sale_id)}).get("Item")
+
+    def list_sales(self, day: date, limit: int = 100) -> List[dict]:
+        """The newest `limit` sales of a day (UTC), newest first: one Query per shard, merged."""
+        shards = []
+        for shard in range(self.shards):
+            response = self.query(
+                KeyConditionExpression="#day_shard = :day_shard",
+                ExpressionAttributeNames={"#day_shard": "day_shard"},
+                ExpressionAttributeValues={":day_shard": self._day_shard(day, shard)},
+                ScanIndexForward=False,
+                Limit=limit,
+            )
+            shards.append(response.get("Items", []))
+        return list(itertools.islice(heapq.merge(*shards, key=lambda item: item["id"], reverse=True), limit))
+
+    def list_sales_for_saree(self, saree_id: str, limit: int = 100) -> List[dict]:
+        """The newest `limit` sales of a saree, newest first."""
+        response = self.query(
+            IndexName=SALES_BY_SAREE_INDEX,
+            KeyConditionExpression="saree_id = :saree_id",
+            ExpressionAttributeValues={":saree_id": saree_id},
+            ScanIndexForward=False,
+            Limit=limit,
+        )
+        return response.get("Items", [])
@@ -1,23 +1,52 @@
 from typing import Optional
+
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.services.cache import TTLCache
+from src.services.changes import change_feed
 from src.services.dynamodb import DynamoDBService
+from src.services.projections import projection
+
+# The catalog returned by `list_sarees`, one entry per view (field selection). Any saree write drops them all.
+catalog_cache = TTLCache("catalog", get_settings()["catalog_cache_ttl_seconds"])
+_CATALOG_KEY = "all"
+
+change_feed.subscribe("sarees", lambda table_name, key, item: catalog_cache.invalidate())
 
 
 class SareeService(DynamoDBService):
     def __init__(self, endpoint_url: Optional[str] = None):
         super().__init__(table_name="sarees", endpoint_url=endpoint_url)
 
-    def list_sarees(self) -> list[dict]:
+    def list_sarees(self, view: Optional[type[BaseModel]] = None) -> list[dict]:
         """
         Scans and retrieves all sarees from the DynamoDB table.
         NOTE: A scan operation can be inefficient on large tables. For a production
         system, this would be replaced with a more sophisticated query pattern.
+        The result is cached (see `catalog_cache`), so repeated listings do not rescan.
+        :param view: Only read the attributes of this model (see src/services/projections.py).
         """
-        response = self.table.scan()
-        return response.get('Items', [])
+        cache_key = _CATALOG_KEY if view is None else tuple(view.model_fields)
+        cached = catalog_cache.get(cache_key)
+        if cached is None:
+            # Concurrent misses (e.g. a burst of visitors after the cache expired) share one
+            # scan. The list is copied below, so followers can take it as is.
+            cached = self._coalesced(("sarees", "catalog", cache_key), lambda: self._load_catalog(cache_key, view),
+                                     label="catalog sarees", share=None)
+        return [dict(saree) for saree in cached]
+
+    def _load_catalog(self, cache_key, view: Optional[type[BaseModel]]) -> list[dict]:
+        generation = catalog_cache.generation
+        response = self.scan(**(projection(view) if view is not None else {}))
+        items = response.get('Items', [])
+        catalog_cache.set(cache_key, items, generation=generation)
+        return items
 
-    def get_saree_by_id(self, saree_id: str) -> Optional[dict]:
+    def get_saree_by_id(self, saree_id: str, view: Optional[type[BaseModel]] = None) -> Optional[dict]:
         """
         Retrieves a single saree from the DynamoDB table by its ID.
+        :param view: Only read the attributes of this model; `version` (the ETag) is always read.
         """
-        response = self.table.get_item(Key={'id': saree_id})
-        return response.get('Item') 
\ No newline at end of file
+        response = self.get_item(Key={'id': saree_id}, **(projection(view, "version") if view is not None else {}))
+        return response.get('Item')
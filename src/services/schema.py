@@ -0,0 +1,84 @@
+"""
+Declarative definition of every DynamoDB table used by the application.
+
+Each entry uses the shape of the `CreateTable` API (`KeySchema`, `AttributeDefinitions`,
+`GlobalSecondaryIndexes`) so it can be handed to DynamoDB as-is by scripts/create_table.py,
+and it tells the in-process storage engines which keys and indexes to maintain. The optional
+`TimeToLiveAttribute` names the attribute DynamoDB TTL expires items by.
+"""
+from typing import Optional
+
+
+def _key(hash_key: str, range_key: Optional[str] = None) -> list[dict]:
+    key_schema = [{'AttributeName': hash_key, 'KeyType': 'HASH'}]
+    if range_key:
+        key_schema.append({'AttributeName': range_key, 'KeyType': 'RANGE'})
+    return key_schema
+
+
+def _gsi(index_name: str, hash_key: str, range_key: Optional[str] = None) -> dict:
+    return {
+        'IndexName': index_name,
+        'KeySchema': _key(hash_key, range_key),
+        'Projection': {'ProjectionType': 'ALL'},
+    }
+
+
+def _attributes(*names: str) -> list[dict]:
+    return [{'AttributeName': name, 'AttributeType': 'S'} for name in names]
+
+
+TABLES: dict[str, dict] = {
+    'users': {
+        'KeySchema': _key('id'),
+        'AttributeDefinitions': _attributes('id', 'email'),
+        'GlobalSecondaryIndexes': [_gsi('email-index', 'email')],
+    },
+    'sarees': {
+        'KeySchema': _key('id'),
+        'AttributeDefinitions': _attributes('id'),
+    },
+    # The status-procurement_date GSI lists procurements of a given status in submission order.
+    # It sorts on the date, not the id: legacy and `id_strategy=uuid4` ids carry no time.
+    'procurement_records': {
+        'KeySchema': _key('id'),
+        'AttributeDefinitions': _attributes('id', 'status', 'procurement_date'),
+        'GlobalSecondaryIndexes': [_gsi('status-procurement_date', 'status', 'procurement_date')],
+    },
+    # GSIs for the filtered expense listings, all newest-first by submission date.
+    'expenses': {
+        'KeySchema': _key('id'),
+        'AttributeDefinitions': _attributes('id', 'submitted_by_user_id', 'category', 'status', 'submission_date'),
+        'GlobalSecondaryIndexes': [
+            _gsi('submitted_by_user_id-submission_date', 'submitted_by_user_id', 'submission_date'),
+            _gsi('category-submission_date', 'category', 'submission_date'),
+            _gsi('status-submission_date', 'status', 'submission_date'),
+        ],
+    },
+    # Append-only sales ledger (see src/services/sale_service.py). The partition key spreads each
+    # day's sales over `sales_write_shards` partitions ("<day>#<shard>"); UUIDv7 ids sort them by time.
+    'sales': {
+        'KeySchema': _key('day_shard', 'id'),
+        'AttributeDefinitions': _attributes('day_shard', 'id', 'saree_id'),
+        'GlobalSecondaryIndexes': [_gsi('saree_id-id', 'saree_id', 'id')],
+    },
+    # Single-table copy of procurement aggregates (see src/services/aggregates.py): a procurement,
+    # its saree and its expenses share the partition key PROCUREMENT#<id>.
+    'aggregates': {
+        'KeySchema': _key('pk', 'sk'),
+        'AttributeDefinitions': _attributes('pk', 'sk'),
+    },
+    # Stored responses of POSTs made with an Idempotency-Key; DynamoDB expires them via TTL.
+    'idempotency_keys': {
+        'KeySchema': _key('idempotency_key'),
+        'AttributeDefinitions': _attributes('idempotency_key'),
+        'TimeToLiveAttribute': 'expires_at',
+    },
+}
+
+
+def key_attributes(key_schema: list[dict]) -> tuple[str, Optional[str]]:
+    """Returns the (hash, range) attribute names of a key schema; range is None if absent."""
+    hash_key = next(k['AttributeName'] for k in key_schema if k['KeyType'] == 'HASH')
+    range_key = next((k['AttributeName'] for k in key_schema if k['KeyType'] == 'RANGE'), None)
+    return hash_key, range_key
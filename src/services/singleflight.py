@@ -0,0 +1,113 @@
+"""
+Coalescing of concurrent identical reads ("single flight").
+
+When a catalog link is shared, hundreds of clients ask for the same sarees within the same
+second. `SingleFlight.do` lets the first caller for a key run the read while every caller that
+arrives before it finishes waits for it and gets its result (or its exception) instead of
+issuing the same call again: one backend read per burst instead of one per request.
+
+Followers receive a deep copy of the result by default, so one request changing what it read
+cannot change what another one sees. A follower waits at most `timeout` seconds for the call
+in flight; then it stops waiting and makes the call itself (counted as a timeout), so a stuck
+call holds back its followers no longer than a bounded wait.
+
+`DynamoDBService` sends its eventually consistent `GetItem`, `Query` and `Scan` calls through
+the process-wide `read_coalescer`, keyed by table, operation and request parameters (see
+`read_coalescing_*` in src/config.py). Strongly consistent reads are never shared: they must
+see every write that completed before they started, which a call already in flight may not.
+"""
+import copy
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, Optional
+
+
+def request_key(parameters: dict) -> str:
+    """A canonical form of request parameters, equal for equal requests."""
+    return json.dumps(parameters, sort_keys=True, default=str)
+
+
+class _Call:
+    """A call in flight and, once `done` is set, its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers of the same key share its outcome.
+    Counts, per label (e.g. 'GetItem sarees'), the calls asked for, the calls actually made,
+    the calls answered by another caller's call and the waits that timed out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards the statistics (calls in flight are not affected)."""
+        with self._lock:
+            self._since = datetime.now(timezone.utc)
+            self._stats = defaultdict(lambda: {"calls": 0, "executions": 0, "coalesced": 0, "timeouts": 0})
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None,
+           label: str = "(unlabelled)", share: Optional[Callable[[Any], Any]] = copy.deepcopy) -> Any:
+        """
+        Returns `fn()`, or the result of the identical call already in flight for `key`.
+        :param timeout: Longest wait for a call in flight, in seconds (None waits until it finishes).
+        :param label: The statistics bucket of the call.
+        :param share: How followers get the shared result; None hands out the result itself.
+        :raises: Whatever the call raised, in the caller that made it and in all its followers.
+        """
+        with self._lock:
+            stats = self._stats[label]
+            stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                stats["executions"] += 1
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as error:
+                call.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                stats["timeouts"] += 1
+                stats["executions"] += 1
+            return fn()
+        with self._lock:
+            stats["coalesced"] += 1
+        if call.error is not None:
+            raise call.error
+        return call.result if share is None else share(call.result)
+
+    def stats(self) -> dict:
+        """The statistics since the last reset, with the share of calls answered by another call."""
+        with self._lock:
+            by_label = [{"key": label, **values} for label, values in self._stats.items()]
+            in_flight = len(self._calls)
+        totals = {name: sum(entry[name] for entry in by_label)
+                  for name in ("calls", "executions", "coalesced", "timeouts")}
+        for entry in [totals, *by_label]:
+            entry["coalescing_ratio"] = round(entry["coalesced"] / entry["calls"], 4) if entry["calls"] else 0.0
+        by_label.sort(key=lambda entry: entry["coalesced"], reverse=True)
+        return {"since": self._since.isoformat(), "in_flight": in_flight, "totals": totals, "by_operation": by_label}
+
+
+# Process-wide coalescer of DynamoDB reads, shared by every DynamoDBService instance.
+read_coalescer = SingleFlight()
@@ -0,0 +1,183 @@
+"""
+Opt-in capture of sanitized request traces, replayed by scripts/replay_traffic.py.
+
+Each request becomes one JSON line: when it arrived, the method, route template and path,
+the query and body with personal data masked, the content type, the caller's role, the
+response status and the duration. Strings are kept only when they carry no personal data
+(numbers, enum values, timestamps, ids); any other string is replaced by `x`s of the same
+length, so the traffic keeps its shape (and payload sizes) without names, emails, passwords
+or free text. Credential and personal fields (`SENSITIVE_FIELDS`) are masked whatever their
+value looks like, and login bodies are recorded by size only. The log rotates at
+`traffic_capture_max_bytes` and rotated files are gzipped.
+
+The middleware records from the event loop, so recording only queues the trace: a writer
+thread encodes, writes and rotates (the gzip of a full log takes a while). Traces arriving
+while `traffic_capture_queue_size` traces are waiting are dropped and counted.
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+from enum import Enum
+from functools import lru_cache
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Optional
+from urllib.parse import parse_qsl
+
+from src import models
+from src.config import ensure_parent_directory, get_settings
+
+# Values of the application's enums (roles, statuses, categories) are not personal data.
+ENUM_VALUES = frozenset(
+    member.value for value in vars(models).values()
+    if isinstance(value, type) and issubclass(value, Enum) and value is not Enum
+    for member in value
+)
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}([T ][\d:.]+(Z|[+-]\d{2}:?\d{2})?)?$")
+# Bodies larger than this are recorded by size only.
+MAX_BODY_BYTES = 64 * 1024
+# Fields masked whatever their value looks like: credentials, contact details and free text.
+SENSITIVE_FIELDS = frozenset({
+    "password", "hashed_password", "username", "email", "full_name", "phone", "description", "notes",
+    "rejection_reason", "saree_name", "saree_description", "order_reference",
+})
+# Routes whose bodies are credentials: recorded by size only (the replay logs in by itself).
+SIZE_ONLY_ROUTES = frozenset({"/token"})
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _mask(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _mask(element) for key, element in value.items()}
+    if isinstance(value, list):
+        return [_mask(element) for element in value]
+    return None if value is None else "x" * len(str(value))
+
+
+def sanitize(value: Any, key: Optional[str] = None) -> Any:
+    """
+    Masks every string that could hold personal data, recursively; numbers and booleans are kept.
+    Values of `SENSITIVE_FIELDS` are always masked, whatever they look like (a numeric password,
+    a phone number as username).
+    """
+    if key in SENSITIVE_FIELDS:
+        return _mask(value)
+    if isinstance(value, str):
+        if value in ENUM_VALUES or _NUMBER.match(value) or _TIMESTAMP.match(value) or _is_uuid(value):
+            return value
+        return "x" * len(value)
+    if isinstance(value, dict):
+        return {name: sanitize(element, name) for name, element in value.items()}
+    if isinstance(value, list):
+        return [sanitize(element) for element in value]
+    return value
+
+
+def sanitize_body(content_type: Optional[str], body: bytes, route: Optional[str] = None) -> tuple[Optional[str], Any]:
+    """
+    The recorded form of a request body: ('json' | 'form', sanitized document), or
+    (None, {"bytes": n}) for other or oversized bodies and for `SIZE_ONLY_ROUTES`.
+    """
+    if not body:
+        return None, None
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if len(body) <= MAX_BODY_BYTES and route not in SIZE_ONLY_ROUTES:
+        try:
+            if content_type == "application/json":
+                return "json", sanitize(json.loads(body))
+            if content_type == "application/x-www-form-urlencoded":
+                return "form", sanitize(dict(parse_qsl(body.decode(), keep_blank_values=True)))
+        except (ValueError, UnicodeDecodeError):
+            pass
+    return None, {"bytes": len(body)}
+
+
+def _gzip_rotator(source: str, destination: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(destination, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class _TraceFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+class TrafficRecorder:
+    """
+    Appends trace records as JSON lines to a size-rotated, gzip-compressed log, from a writer
+    thread started on the first record.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int, queue_size: int = 10000):
+        self.path = path
+        ensure_parent_directory(path)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.namer = lambda name: f"{name}.gz"
+        handler.rotator = _gzip_rotator
+        handler.setFormatter(_TraceFormatter())
+        self._handler = handler
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._listener = QueueListener(self._queue, handler)
+        self._lock = threading.Lock()
+        self._started = False
+        self.dropped = 0  # traces dropped because the queue was full
+
+    def record(self, trace: dict) -> None:
+        """Queues a trace for the writer thread; never blocks."""
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    self._listener.start()
+                    self._started = True
+        try:
+            self._queue.put_nowait(logging.makeLogRecord({"msg": trace}))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued trace is written. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Writes out the queued traces, stops the writer thread and closes the log."""
+        with self._lock:
+            if self._started:
+                self.flush()
+                self._listener.stop()
+                self._started = False
+        self._handler.close()
+
+
+@lru_cache()
+def get_traffic_recorder() -> TrafficRecorder:
+    """The process-wide recorder of the `traffic_capture_*` settings."""
+    settings = get_settings()
+    return TrafficRecorder(
+        settings["traffic_capture_path"],
+        max_bytes=settings["traffic_capture_max_bytes"],
+        backups=settings["traffic_capture_backups"],
+        queue_size=settings["traffic_capture_queue_size"],
+    )
@@ -1,7 +1,22 @@
 from typing import Optional
 
+from src.config import get_settings
+from src.services.cache import TTLCache
+from src.services.changes import change_feed
 from src.services.dynamodb import DynamoDBService
 
+# Users by email. Every authenticated request resolves its user by email, so this saves an
+# email-index Query per request. Kept in sync with writes through the change feed.
+user_cache = TTLCache("users", get_settings()["user_cache_ttl_seconds"])
+
+
+def _invalidate_user(table_name: str, key: dict, item: Optional[dict]) -> None:
+    # A deleted user's email is unknown from its key alone: drop everything.
+    user_cache.invalidate(item.get("email") if item else None)
+
+
+change_feed.subscribe("users", _invalidate_user)
+
 
 class UserService(DynamoDBService):
     def __init__(self, endpoint_url: Optional[str] = None):
@@ -13,20 +28,52 @@ class UserService(DynamoDBService):
         :param user_data: A dictionary containing the user data.
         :return: The item that was created.
         """
-        self.table.put_item(Item=user_data)
+        self.put_item(Item=user_data)
         return user_data
 
-    def get_user_by_email(self, email: str) -> Optional[dict]:
+    def get_user_by_email(self, email: str, use_cache: bool = True) -> Optional[dict]:
         """
         Retrieves a user from the DynamoDB table by their email.
         We will need a Global Secondary Index (GSI) on the 'email' attribute for this to be efficient.
+        Found users are cached (see `user_cache`); unknown emails are not.
         :param email: The email of the user to retrieve.
+        :param use_cache: False reads the table, e.g. to check a password that may have changed
+                          through another process.
         :return: The user item if found, otherwise None.
         """
-        response = self.table.query(
+        if use_cache:
+            cached = user_cache.get(email)
+            if cached is not None:
+                return dict(cached)
+        generation = user_cache.generation
+        response = self.query(
             IndexName='email-index',
             KeyConditionExpression='email = :email',
             ExpressionAttributeValues={':email': email}
         )
         items = response.get('Items', [])
-        return items[0] if items else None 
\ No newline at end of file
+        if not items:
+            return None
+        user_cache.set(email, items[0], generation=generation)
+        return dict(items[0])
+
+    def preload_cache(self, limit: int = 1000) -> int:
+        """
+        Loads up to `limit` users into the cache (startup warmup), scanning only the pages needed.
+        Returns the number of users loaded; none when the user cache is off.
+        """
+        if user_cache.ttl_seconds <= 0:
+            return 0
+        params = {}
+        loaded = 0
+        generation = user_cache.generation
+        while loaded < limit:
+            response = self.scan(Limit=limit - loaded, **params)
+            for item in response.get('Items', []):
+                if 'email' in item:
+                    user_cache.set(item['email'], item, generation=generation)
+                    loaded += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return loaded
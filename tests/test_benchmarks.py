@@ -0,0 +1,31 @@
+from benchmarks.run import compare, percentile, run
+
+
+def test_benchmark_run_reports_every_scenario():
+    results = run(["get_saree", "approve_procurement", "list_expenses"], concurrency=2, requests=6,
+                  dataset_size=3, warmup=1)
+    assert results["config"] == {"concurrency": 2, "requests": 6, "dataset": 3}
+    for result in results["scenarios"].values():
+        assert result["errors"] == 0
+        assert result["rps"] > 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+def test_regression_gate():
+    config = {"concurrency": 2, "requests": 10, "dataset": 5}
+    baseline = {"config": config, "scenarios": {"get_saree": {"p95_ms": 10.0, "rps": 100.0}}}
+
+    def results(p95_ms, rps, errors=0):
+        return {"config": config, "scenarios": {"get_saree": {
+            "p95_ms": p95_ms, "rps": rps, "errors": errors, "first_error": "500 boom" if errors else None}}}
+
+    assert compare(results(12.0, 90.0), baseline, threshold=0.25) == []
+    assert compare(results(13.0, 70.0), baseline, threshold=0.25) == [
+        "get_saree: p95 13.0ms vs baseline 10.0ms",
+        "get_saree: 70.0 req/s vs baseline 100.0 req/s",
+    ]
+    assert compare(results(1.0, 500.0, errors=1), baseline, threshold=0.25) == [
+        "get_saree: 1 failed requests (first: 500 boom)"]
+    # A baseline recorded with another configuration is not comparable.
+    assert compare(results(99.0, 1.0), {**baseline, "config": {**config, "requests": 20}}, threshold=0.25) == []
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0 and percentile([1.0, 2.0, 3.0, 4.0], 0.99) == 4.0
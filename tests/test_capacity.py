@@ -0,0 +1,65 @@
+from fastapi import status
+from src.request_context import RequestContext, set_request_context, reset_request_context
+from src.services.capacity import CapacityTracker, capacity_tracker
+from src.services.procurement_service import ProcurementService
+
+
+class FakeTable:
+    """Stands in for a boto3 Table and answers with a fixed ConsumedCapacity."""
+
+    def __init__(self):
+        self.calls = []
+
+    def scan(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"Items": [], "ConsumedCapacity": {"TableName": "procurement_records", "CapacityUnits": 12.5}}
+
+
+def test_capacity_tracker_aggregates_by_dimension():
+    tracker = CapacityTracker()
+    tracker.record("Scan", "sarees", {"CapacityUnits": 8.0}, route="GET /sarees/", user_id="u1")
+    tracker.record("PutItem", "sarees", {"CapacityUnits": 2.0}, route="POST /procurements/", user_id="u1")
+    tracker.record(
+        "Query", "users",
+        {"CapacityUnits": 0.5, "Table": {"CapacityUnits": 0.0}, "GlobalSecondaryIndexes": {"email-index": {"CapacityUnits": 0.5}}},
+        route="POST /token",
+    )
+
+    report = tracker.report()
+    assert report["totals"] == {"calls": 3, "rcu": 8.5, "wcu": 2.0}
+    assert report["by_route"][0]["key"] == "GET /sarees/"
+    assert report["by_table"][0] == {"key": "sarees", "calls": 2, "rcu": 8.0, "wcu": 2.0}
+    assert report["by_index"] == [{"key": "users/email-index", "calls": 1, "rcu": 0.5, "wcu": 0.0}]
+    assert {entry["key"] for entry in report["by_user"]} == {"u1", "(anonymous)"}
+
+
+def test_service_calls_request_and_record_consumed_capacity():
+    capacity_tracker.reset()
+    service = ProcurementService(endpoint_url="http://localhost:8000")
+    service.table = FakeTable()
+
+    context = RequestContext(method="GET", path="/procurements/pending")
+    context.user_id = "manager-1"
+    token = set_request_context(context)
+    try:
+        service.list_procurements()
+    finally:
+        reset_request_context(token)
+
+    assert service.table.calls == [{"ReturnConsumedCapacity": "INDEXES"}]
+    report = capacity_tracker.report()
+    assert report["by_operation"][0] == {"key": "Scan procurement_records", "calls": 1, "rcu": 12.5, "wcu": 0.0}
+    assert report["by_route"][0]["key"] == "GET /procurements/pending"
+    assert report["by_user"][0]["key"] == "manager-1"
+
+
+def test_capacity_report_is_admin_only(client, login):
+    manager_headers = login("capmanager@example.com", "manager")
+    admin_headers = login("capadmin@example.com", "admin")
+
+    response = client.get("/admin/capacity", headers=manager_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.get("/admin/capacity", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert {"totals", "by_route", "by_operation", "by_table", "by_index", "by_user"} <= set(response.json())
@@ -0,0 +1,133 @@
+import csv
+import io
+import os
+
+from fastapi import status
+
+from src.services.catalog_feed import CSV_COLUMNS, KEPT_VERSIONS, MANIFEST_NAME, CatalogFeed, get_catalog_feed
+from src.services.saree_service import SareeService
+
+
+def fetch(client, extension, **headers):
+    get_catalog_feed().flush()
+    return client.get(f"/catalog/feed.{extension}", headers=headers)
+
+
+def test_feed_follows_approvals_rejections_and_repricing(client, login):
+    staff_headers = login("feed-staff@example.com", "staff")
+    manager_headers = login("feed-manager@example.com", "manager")
+    procurements = [
+        client.post("/procurements/", headers=staff_headers, json={
+            "saree_name": name, "saree_description": "Pure silk, zari border", "procurement_cost_inr": 10000.0,
+            "markup_percentage": 20.0, "image_urls": [f"https://img.example.com/{n}.jpg"],
+        }).json()
+        for n, name in enumerate(["Mysore silk", "Kanjivaram"])
+    ]
+
+    # Pending sarees are not for sale.
+    empty = fetch(client, "json")
+    assert empty.status_code == status.HTTP_200_OK
+    assert empty.json()["items"] == []
+
+    for procurement in procurements:
+        client.post(f"/procurements/{procurement['id']}/approve", headers=manager_headers,
+                    json={"exchange_rate_override": 0.012})
+    response = fetch(client, "json")
+    feed = response.json()
+    assert feed["count"] == 2
+    item = next(item for item in feed["items"] if item["title"] == "Mysore silk")
+    saree_id = procurements[0]["saree_id"]
+    assert item == {
+        "id": saree_id, "title": "Mysore silk", "description": "Pure silk, zari border", "availability": "in stock",
+        "condition": "new", "price": "144.00 USD", "link": f"https://shop.example.com/sarees/{saree_id}",
+        "image_link": "https://img.example.com/0.jpg", "brand": "Couture",
+    }
+    etag = response.headers["ETag"]
+    assert fetch(client, "json", **{"If-None-Match": etag}).status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Repricing patches the entry.
+    SareeService().update_versioned(Key={"id": saree_id}, UpdateExpression="SET selling_price_usd = :price",
+                                    ExpressionAttributeValues={":price": 150.5})
+    response = fetch(client, "csv")
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert tuple(rows[0]) == CSV_COLUMNS
+    assert {row["title"]: row["price"] for row in rows} == {"Mysore silk": "150.50 USD", "Kanjivaram": "144.00 USD"}
+    assert fetch(client, "json", **{"If-None-Match": etag}).status_code == status.HTTP_200_OK
+
+    # Taking a saree off sale removes it.
+    SareeService().update_versioned(Key={"id": saree_id}, UpdateExpression="SET procurement_status = :status",
+                                    ExpressionAttributeValues={":status": "rejected"})
+    assert [item["title"] for item in fetch(client, "json").json()["items"]] == ["Kanjivaram"]
+
+
+def test_unchanged_feeds_are_not_republished_and_old_versions_are_removed():
+    feed = get_catalog_feed()
+    sarees = SareeService()
+    first = feed.version
+    sarees.put_item(Item={"id": "s0", "name": "Draft", "procurement_status": "pending"})
+    feed.flush()
+    assert feed.version == first
+
+    published = []
+    for n in range(1, 6):
+        sarees.put_item(Item={"id": f"s{n}", "name": f"Saree {n}", "procurement_status": "approved",
+                              "selling_price_usd": 100 + n})
+        feed.flush()
+        published.append(feed.version)
+    assert published == sorted(set(published)) and published[0] > first
+    assert feed.status()["entries"] == 5
+
+    files = sorted(name for name in os.listdir(feed.directory) if not name.startswith("."))
+    assert files == sorted([f"catalog-feed.{extension}" for extension in ("csv", "json")] + [MANIFEST_NAME]
+                           + [f"catalog-feed.{v}.{extension}" for v in published[-KEPT_VERSIONS:]
+                              for extension in ("csv", "json")])
+
+
+def test_a_version_removed_before_it_is_served_falls_back_to_the_newest(client, monkeypatch):
+    feed = get_catalog_feed()
+    sarees = SareeService()
+    sarees.put_item(Item={"id": "s1", "name": "Saree 1", "procurement_status": "approved", "selling_price_usd": 101})
+    feed.flush()
+    stale, _ = feed.current("json")
+
+    # Newer publications remove the version a request picked before it opened the file.
+    for n in range(2, 3 + KEPT_VERSIONS):
+        sarees.put_item(Item={"id": f"s{n}", "name": f"Saree {n}", "procurement_status": "approved",
+                              "selling_price_usd": 100 + n})
+        feed.flush()
+    assert not os.path.exists(stale)
+    picked = [(stale, '"stale"')]
+    current = feed.current
+    monkeypatch.setattr(feed, "current", lambda extension: picked.pop() if picked else current(extension))
+
+    response = client.get("/catalog/feed.json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["count"] == 2 + KEPT_VERSIONS
+    assert response.headers["etag"] == current("json")[1]
+
+
+def test_one_process_publishes_and_the_others_serve_its_files(monkeypatch):
+    writer = get_catalog_feed()
+    sarees = SareeService()
+    for n in range(5):
+        sarees.put_item(Item={"id": f"s{n}", "name": f"Saree {n}", "procurement_status": "approved",
+                              "selling_price_usd": 100 + n})
+    writer.flush()
+
+    # Another process sharing the directory does not publish, and serves the writer's files.
+    other = CatalogFeed(writer.directory, "https://shop.example.com/sarees/{id}", "Couture",
+                        load=lambda: sarees.scan_items(Limit=2))
+    assert writer.writer and not other.writer
+    assert other.rebuild() == 5
+    assert other.current("json") == writer.current("json")
+    assert other.status()["version"] == writer.version
+
+    # The writer's refresh scans every page of the catalog.
+    monkeypatch.setattr(writer, "_load", lambda: sarees.scan_items(Limit=2))
+    sarees.put_item(Item={"id": "s9", "name": "Saree 9", "procurement_status": "approved", "selling_price_usd": 99})
+    writer.flush()
+    writer.rebuild([])
+    writer._refresh()
+    assert writer.status()["entries"] == 6
+    assert other.status()["entries"] == 6
@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from src.models import Expense, ExpenseCategory, ProcurementRecord, ProcurementStatus, Saree, User, UserRole
+from src.services.codec import codec_for
+from src.services.dynamodb import date_key, to_dynamodb
+from src.services.saree_service import SareeService
+
+deserializer = TypeDeserializer()
+
+
+def test_models_round_trip_through_items_and_attribute_values():
+    instances = [
+        Saree(id=uuid.uuid4(), name="Mysore silk", procurement_cost_inr=12500.5, image_urls=["a.jpg"],
+              procurement_status=ProcurementStatus.approved, selling_price_usd=0.1),
+        ProcurementRecord(id=uuid.uuid4(), saree_id=uuid.uuid4(), procured_by_user_id=uuid.uuid4(), cost_inr=900,
+                          inr_to_usd_exchange_rate=0.012, procurement_date=datetime.now(timezone.utc)),
+        Expense(id=uuid.uuid4(), description="Courier", amount=42.1, category=ExpenseCategory.operational,
+                submitted_by_user_id=uuid.uuid4(), submission_date=datetime(2025, 3, 1, 10, 15, tzinfo=timezone.utc)),
+        User(id=uuid.uuid4(), email="staff@example.com", role=UserRole.manager, hashed_password="hash"),
+    ]
+    for instance in instances:
+        codec = codec_for(type(instance))
+        item = codec.to_item(instance)
+        # The same item the services stored with model_dump(mode='json') before, except that dates
+        # always carry microseconds so that they sort as strings.
+        expected = to_dynamodb(instance.model_dump(mode="json"))
+        expected.update({name: date_key(value) for name, value in instance.model_dump().items()
+                         if isinstance(value, datetime)})
+        assert item == expected
+        attributes = codec.to_attributes(item)
+        assert {name: deserializer.deserialize(value) for name, value in attributes.items()} == item
+        assert codec.from_item(item) == instance
+        assert codec.from_attributes(attributes) == instance
+
+    # Items written before a field existed get its default; attributes outside the model are ignored.
+    saree = codec_for(Saree).from_item({"id": str(uuid.uuid4()), "name": "Old", "procurement_cost_inr": 5,
+                                        "gsi_key": "x"})
+    assert saree.markup_percentage == 20.0 and saree.version == 1 and saree.procurement_cost_inr == 5.0
+    assert not hasattr(saree, "gsi_key")
+
+
+class MemoryClient:
+    """Stands in for the low-level client: keeps typed items and records the calls."""
+
+    def __init__(self):
+        self.items, self.calls = {}, []
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.calls.append(("PutItem", Item))
+        self.items[Item["id"]["S"]] = Item
+        return {}
+
+    def get_item(self, TableName, Key, **kwargs):
+        self.calls.append(("GetItem", Key))
+        item = self.items.get(Key["id"]["S"])
+        return {"Item": item} if item else {}
+
+
+def test_put_and_get_model_use_typed_attribute_values_on_the_low_level_client():
+    client = MemoryClient()
+    sarees = SareeService()
+    sarees._low_level_codec = True
+    sarees.dynamodb = SimpleNamespace(meta=SimpleNamespace(client=client))
+    saree = Saree(id=uuid.uuid4(), name="Kanchipuram", procurement_cost_inr=8000.0, markup_percentage=25)
+
+    item = sarees.put_model(saree)
+    assert item["procurement_cost_inr"] == to_dynamodb(8000.0)
+    operation, attributes = client.calls[0]
+    assert operation == "PutItem"
+    assert attributes["procurement_cost_inr"] == {"N": "8000.0"}
+    assert attributes["id"] == {"S": str(saree.id)}
+    assert attributes["description"] == {"NULL": True}
+
+    assert sarees.get_model(Saree, {"id": str(saree.id)}) == saree
+    assert client.calls[1] == ("GetItem", {"id": {"S": str(saree.id)}})
+    assert sarees.get_model(Saree, {"id": str(uuid.uuid4())}) is None
@@ -0,0 +1,73 @@
+import uuid
+
+from fastapi import status
+from src.services.expense_service import ExpenseService
+
+
+def test_expense_review_with_if_match(client, login):
+    staff_headers = login("occ-staff@example.com", "staff")
+    manager_headers = login("occ-manager@example.com", "manager")
+    expense = client.post("/expenses/", headers=staff_headers,
+                          json={"description": "Packaging", "amount": 30.0, "category": "operational"}).json()
+    assert expense["version"] == 1
+    url = f"/expenses/{expense['id']}/status"
+
+    approved = client.patch(url, params={"status_update": "approved"}, headers={**manager_headers, "If-Match": '"1"'})
+    assert approved.status_code == status.HTTP_200_OK
+    assert approved.headers["ETag"] == '"2"'
+    assert approved.json()["version"] == 2
+
+    # A second manager still looking at version 1 loses and gets the current expense back.
+    stale = client.patch(url, params={"status_update": "rejected"}, headers={**manager_headers, "If-Match": '"1"'})
+    assert stale.status_code == status.HTTP_409_CONFLICT
+    assert stale.headers["ETag"] == '"2"'
+    assert stale.json()["current"]["status"] == "approved"
+
+    # Without If-Match the update applies to any version (and still bumps it).
+    rejected = client.patch(url, params={"status_update": "rejected"}, headers=manager_headers)
+    assert rejected.status_code == status.HTTP_200_OK
+    assert rejected.headers["ETag"] == '"3"'
+
+    bad = client.patch(url, params={"status_update": "approved"}, headers={**manager_headers, "If-Match": "abc"})
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+    missing = client.patch(f"/expenses/{uuid.uuid4()}/status", params={"status_update": "approved"}, headers=manager_headers)
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    assert len(ExpenseService().list_expenses()) == 1  # no item was created for the unknown id
+
+
+def test_items_without_version_count_as_version_one(client, login):
+    manager = login("legacy-manager@example.com", "manager")
+    expense_id = str(uuid.uuid4())
+    ExpenseService().put_item(Item={
+        "id": expense_id, "submitted_by_user_id": str(uuid.uuid4()), "description": "Old", "amount": 5.0,
+        "currency": "USD", "category": "general", "status": "pending", "submission_date": "2024-01-01T00:00:00Z",
+    })
+    response = client.patch(f"/expenses/{expense_id}/status", params={"status_update": "approved"},
+                            headers={**manager, "If-Match": '"1"'})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["version"] == 2
+
+
+def test_concurrent_procurement_reviews_conflict(client, login):
+    staff_headers = login("race-staff@example.com", "staff")
+    first_manager = login("race-manager-1@example.com", "manager")
+    second_manager = login("race-manager-2@example.com", "manager")
+    procurement = client.post("/procurements/", headers=staff_headers,
+                              json={"saree_name": "Paithani", "procurement_cost_inr": 9000.0}).json()
+    etag = f'"{procurement["version"]}"'
+
+    approved = client.post(f"/procurements/{procurement['id']}/approve", headers={**first_manager, "If-Match": etag},
+                           json={"additional_costs_inr": 300.0})
+    assert approved.status_code == status.HTTP_200_OK
+    approved_again = client.post(f"/procurements/{procurement['id']}/approve", headers={**second_manager, "If-Match": etag},
+                                 json={"additional_costs_inr": 300.0})
+    assert approved_again.status_code == status.HTTP_409_CONFLICT
+    rejected = client.post(f"/procurements/{procurement['id']}/reject", params={"rejection_reason": "late"},
+                           headers={**second_manager, "If-Match": etag})
+    assert rejected.status_code == status.HTTP_409_CONFLICT
+    assert rejected.json()["current"]["status"] == "approved"
+
+    [saree] = client.get("/sarees/").json()
+    assert saree["procurement_status"] == "approved"
+    assert client.get(f"/sarees/{saree['id']}").headers["ETag"] == '"2"'
+    assert len(ExpenseService().list_expenses()) == 1
@@ -0,0 +1,111 @@
+import copy
+import threading
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from scripts import create_table
+from src.services.schema import TABLES
+
+
+class FakeDynamoDBClient:
+    """Just enough of the DynamoDB control plane: tables and new GSIs start out CREATING."""
+
+    def __init__(self, unreachable_calls: int = 0):
+        self.unreachable_calls = unreachable_calls
+        self.tables = {}
+        self.ttl = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, name):
+        with self._lock:
+            self.calls.append(name)
+
+    def list_tables(self, Limit):
+        self._record("ListTables")
+        if self.unreachable_calls:
+            self.unreachable_calls -= 1
+            raise EndpointConnectionError(endpoint_url="http://localhost:8000")
+        return {"TableNames": list(self.tables)[:Limit]}
+
+    def describe_table(self, TableName):
+        self._record("DescribeTable")
+        table = self.tables.get(TableName)
+        if table is None:
+            raise ClientError({"Error": {"Code": "ResourceNotFoundException"}}, "DescribeTable")
+        described = copy.deepcopy(table)
+        # Creation finishes between two polls.
+        table["TableStatus"] = "ACTIVE"
+        for gsi in table.get("GlobalSecondaryIndexes", []):
+            gsi["IndexStatus"] = "ACTIVE"
+        return {"Table": described}
+
+    def create_table(self, TableName, GlobalSecondaryIndexes=(), **params):
+        self._record("CreateTable")
+        gsis = [{**gsi, "IndexStatus": "CREATING"} for gsi in GlobalSecondaryIndexes]
+        self.tables[TableName] = {"TableName": TableName, "TableStatus": "CREATING", "GlobalSecondaryIndexes": gsis}
+
+    def update_table(self, TableName, GlobalSecondaryIndexUpdates, AttributeDefinitions=()):
+        self._record("UpdateTable")
+        assert len(GlobalSecondaryIndexUpdates) == 1
+        gsis = self.tables[TableName]["GlobalSecondaryIndexes"]
+        if "Delete" in GlobalSecondaryIndexUpdates[0]:
+            gsis[:] = [gsi for gsi in gsis if gsi["IndexName"] != GlobalSecondaryIndexUpdates[0]["Delete"]["IndexName"]]
+            return
+        created = GlobalSecondaryIndexUpdates[0]["Create"]
+        assert {a["AttributeName"] for a in AttributeDefinitions} == {k["AttributeName"] for k in created["KeySchema"]}
+        gsis.append({**created, "IndexStatus": "CREATING"})
+
+    def describe_time_to_live(self, TableName):
+        return {"TimeToLiveDescription": self.ttl.get(TableName, {"TimeToLiveStatus": "DISABLED"})}
+
+    def update_time_to_live(self, TableName, TimeToLiveSpecification):
+        self._record("UpdateTimeToLive")
+        self.ttl[TableName] = {"TimeToLiveStatus": "ENABLED", "AttributeName": TimeToLiveSpecification["AttributeName"]}
+
+
+def test_creates_every_table_once_the_endpoint_answers(monkeypatch):
+    monkeypatch.setattr(create_table, "POLL_SECONDS", 0)
+    client = FakeDynamoDBClient(unreachable_calls=3)
+    create_table.wait_for_endpoint(client, timeout_seconds=5)
+    results = create_table.provision(client, TABLES, workers=len(TABLES))
+
+    assert client.calls.count("ListTables") == 4
+    assert all(actions[0] == "created" for actions in results.values())
+    assert results["idempotency_keys"] == ["created", "enabled TTL on expires_at"]
+    assert client.calls.count("CreateTable") == len(TABLES)
+    assert all(table["TableStatus"] == "ACTIVE" for table in client.tables.values())
+
+
+def test_existing_tables_only_get_missing_indexes(monkeypatch):
+    monkeypatch.setattr(create_table, "POLL_SECONDS", 0)
+    client = FakeDynamoDBClient()
+    create_table.provision(client, TABLES, workers=len(TABLES))
+    # An older deployment: the expenses table without two of its GSIs.
+    client.tables["expenses"]["GlobalSecondaryIndexes"] = client.tables["expenses"]["GlobalSecondaryIndexes"][:1]
+    client.calls.clear()
+
+    results = create_table.provision(client, TABLES, workers=len(TABLES))
+
+    assert results["expenses"] == ["added index category-submission_date", "added index status-submission_date"]
+    assert all(actions == [] for name, actions in results.items() if name != "expenses")
+    assert "CreateTable" not in client.calls and "UpdateTimeToLive" not in client.calls
+    assert client.calls.count("UpdateTable") == 2
+
+
+def test_unused_indexes_are_reported_and_only_dropped_on_request(monkeypatch):
+    monkeypatch.setattr(create_table, "POLL_SECONDS", 0)
+    client = FakeDynamoDBClient()
+    create_table.provision(client, TABLES, workers=len(TABLES))
+    # Procurements used to be listed by a status-id GSI.
+    client.tables["procurement_records"]["GlobalSecondaryIndexes"].append(
+        {"IndexName": "status-id", "KeySchema": [], "IndexStatus": "ACTIVE"})
+
+    results = create_table.provision(client, TABLES, workers=len(TABLES))
+    assert results["procurement_records"] == ["unused index status-id left in place"]
+    assert "UpdateTable" not in client.calls
+
+    results = create_table.provision(client, TABLES, workers=len(TABLES), drop_unused=True)
+    assert results["procurement_records"] == ["removed index status-id"]
+    assert [gsi["IndexName"] for gsi in client.tables["procurement_records"]["GlobalSecondaryIndexes"]] == [
+        "status-procurement_date"]
@@ -1,34 +1,16 @@
-from fastapi.testclient import TestClient
-from fastapi import status
-from src.main import app
-
-# The conftest.py fixture now handles all mocking automatically.
-
-client = TestClient(app)
+import uuid
+from datetime import datetime, timezone
 
-def test_expense_workflow():
-    # 1. Create a staff user and a manager user
-    staff_email = "staff@example.com"
-    manager_email = "manager@example.com"
-    password = "password"
+from fastapi import status
 
-    # Register staff
-    client.post("/users/register", json={"email": staff_email, "password": password, "full_name": "Staff User", "role": "staff"})
-    
-    # Register manager
-    client.post("/users/register", json={"email": manager_email, "password": password, "full_name": "Manager User", "role": "manager"})
+from src.models import Expense, ExpenseCategory, ExpenseStatus
+from src.services.expense_service import ExpenseService
 
-    # Log in as staff
-    staff_login_res = client.post("/token", data={"username": staff_email, "password": password})
-    print("STAFF LOGIN RESPONSE:", staff_login_res.status_code, staff_login_res.json())
-    staff_token = staff_login_res.json()["access_token"]
-    staff_headers = {"Authorization": f"Bearer {staff_token}"}
 
-    # Log in as manager
-    manager_login_res = client.post("/token", data={"username": manager_email, "password": password})
-    print("MANAGER LOGIN RESPONSE:", manager_login_res.status_code, manager_login_res.json())
-    manager_token = manager_login_res.json()["access_token"]
-    manager_headers = {"Authorization": f"Bearer {manager_token}"}
+def test_expense_workflow(client, login):
+    # 1. Create and log in a staff user and a manager user
+    staff_headers = login("staff@example.com", "staff")
+    manager_headers = login("manager@example.com", "manager")
 
     # 2. Staff user submits an expense
     expense_data = {"description": "Team Lunch", "amount": 120.50, "currency": "USD"}
@@ -59,4 +41,87 @@ def test_expense_workflow():
     updated_expense = approve_res_manager.json()
     assert updated_expense["status"] == "approved"
     assert updated_expense["id"] == expense_id
-    assert updated_expense["reviewed_by_user_id"] is not None 
\ No newline at end of file
+    assert updated_expense["reviewed_by_user_id"] is not None 
+
+def test_expense_filters_and_my_expenses(client, login):
+    staff_headers = login("staff4@example.com", "staff")
+    other_headers = login("staff5@example.com", "staff")
+    manager_headers = login("manager4@example.com", "manager")
+
+    client.post("/expenses/", json={"description": "Flyers", "amount": 40.0, "category": "marketing"}, headers=staff_headers)
+    client.post("/expenses/", json={"description": "Courier", "amount": 15.0, "category": "operational"}, headers=other_headers)
+
+    # Staff see only their own expenses
+    mine = client.get("/expenses/mine", headers=staff_headers)
+    assert mine.status_code == status.HTTP_200_OK
+    assert [e["description"] for e in mine.json()] == ["Flyers"]
+
+    # Managers can filter by category and status
+    marketing = client.get("/expenses/", params={"category": "marketing", "status": "pending"}, headers=manager_headers)
+    assert marketing.status_code == status.HTTP_200_OK
+    assert [e["description"] for e in marketing.json()] == ["Flyers"]
+
+    approved = client.get("/expenses/", params={"status": "approved"}, headers=manager_headers)
+    assert approved.json() == []
+
+
+class RecordingTable:
+    """Stands in for a boto3 Table and records the query/scan arguments."""
+
+    def __init__(self):
+        self.calls = []
+
+    def query(self, **kwargs):
+        self.calls.append(("query", kwargs))
+        return {"Items": [], "LastEvaluatedKey": {"id": "e1", "status": "pending", "submission_date": "2025-01-01T00:00:00Z"}}
+
+    def scan(self, **kwargs):
+        self.calls.append(("scan", kwargs))
+        return {"Items": []}
+
+
+def test_query_expenses_uses_the_most_selective_index():
+    service = ExpenseService(endpoint_url="http://localhost:8000")
+    service.table = RecordingTable()
+
+    items, cursor = service.query_expenses(
+        status=ExpenseStatus.pending,
+        category=ExpenseCategory.marketing,
+        submitted_from=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        limit=10,
+    )
+    operation, params = service.table.calls[0]
+    assert operation == "query"
+    assert params["IndexName"] == "category-submission_date"
+    assert params["KeyConditionExpression"] == "#category = :category AND #submission_date >= :submitted_from"
+    assert params["FilterExpression"] == "#status = :status"
+    assert params["ExpressionAttributeValues"][":submitted_from"] == "2025-01-01T00:00:00.000000Z"
+    assert params["ScanIndexForward"] is False
+    assert cursor is not None
+
+    service.query_expenses(status=ExpenseStatus.pending, cursor=cursor)
+    operation, params = service.table.calls[1]
+    assert params["IndexName"] == "status-submission_date"
+    assert params["ExclusiveStartKey"]["id"] == "e1"
+
+
+def test_date_bounds_compare_to_the_microsecond():
+    service = ExpenseService()
+    ten = datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
+    moments = {"before": datetime(2025, 3, 1, 9, 59, 59, 500000, tzinfo=timezone.utc), "at": ten,
+               "after": ten.replace(microsecond=500000)}
+    submitted = {}
+    for label, moment in moments.items():
+        expense = Expense(id=uuid.uuid4(), description=f"Courier {label}", amount=10.0,
+                          submitted_by_user_id=uuid.uuid4(), submission_date=moment)
+        service.put_model(expense)
+        submitted[label] = str(expense.id)
+
+    def ids(**bounds):
+        items, _ = service.query_expenses(status=ExpenseStatus.pending, **bounds)
+        return [item["id"] for item in items]
+
+    # 10:00:00.5 is after 10:00:00, although "10:00:00.5Z" < "10:00:00Z" as strings.
+    assert ids(submitted_to=ten) == [submitted["at"], submitted["before"]]
+    assert ids(submitted_from=ten.replace(microsecond=250000)) == [submitted["after"]]
+    assert ids(submitted_from=ten, submitted_to=ten) == [submitted["at"]]
@@ -0,0 +1,47 @@
+import re
+
+from src.models import ExpenseCategory, ProcurementStatus, UserRole
+from src.services.dynamodb import DynamoDBService
+from scripts.generate_data import generate, load
+
+
+def scan_all(table_name):
+    service, items, params = DynamoDBService(table_name), [], {}
+    while True:
+        response = service.scan(**params)
+        items.extend(response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return items
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def test_generated_data_covers_every_role_status_and_category():
+    totals = generate(users=30, procurements=400, expenses=400, days=365, workers=4, seed=7)
+    assert totals["users"] == 30 and totals["procurement_records"] == 400 and totals["sarees"] == 400
+
+    users = scan_all("users")
+    assert {user["role"] for user in users} == {role.value for role in UserRole}
+    procurements = scan_all("procurement_records")
+    assert {p["status"] for p in procurements} == {status.value for status in ProcurementStatus}
+    expenses = scan_all("expenses")
+    assert len(expenses) == totals["expenses"] >= 400
+    assert {e["category"] for e in expenses} == {category.value for category in ExpenseCategory}
+    # Dates are written by the codec: fixed width, so they sort as strings in the date indexes.
+    assert all(re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{6}Z", e["submission_date"]) for e in expenses)
+
+    # Skewed: the busiest buyer submits far more than an even share.
+    per_buyer = {}
+    for procurement in procurements:
+        per_buyer[procurement["procured_by_user_id"]] = per_buyer.get(procurement["procured_by_user_id"], 0) + 1
+    assert max(per_buyer.values()) > 3 * len(procurements) / len(per_buyer)
+    # Every approval expense points at an approved procurement.
+    approved = {p["id"] for p in procurements if p["status"] == "approved"}
+    assert all(e["procurement_id"] in approved for e in expenses if e.get("procurement_id"))
+
+
+def test_dump_and_reload(tmp_path):
+    totals = generate(users=10, procurements=50, expenses=50, days=30, workers=2, seed=1, dump=str(tmp_path))
+    assert scan_all("sarees") == []
+
+    assert load(str(tmp_path), workers=4) == totals
+    assert len(scan_all("expenses")) == totals["expenses"]
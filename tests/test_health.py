@@ -0,0 +1,109 @@
+import threading
+import time
+
+from fastapi import status
+
+from src.dependencies import get_dependency_probe
+from src.main import app
+from src.services.health import DependencyProbe
+from src.services.schema import TABLES
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingTable:
+    """Stands in for a boto3 Table: counts calls and optionally blocks GetItem."""
+
+    table_status = "ACTIVE"
+
+    def __init__(self, block: threading.Event = None):
+        self.block = block
+        self.calls = {"DescribeTable": 0, "GetItem": 0}
+
+    def reload(self):
+        self.calls["DescribeTable"] += 1
+
+    def get_item(self, Key):
+        self.calls["GetItem"] += 1
+        if self.block is not None:
+            self.block.wait()
+        return {}
+
+
+class StubService:
+    def __init__(self, table):
+        self.table = table
+
+
+def make_probe(table, clock, **settings):
+    options = {"interval_seconds": 2.0, "timeout_seconds": 0.05, "max_age_seconds": 10.0,
+               "describe_interval_seconds": 60.0, **settings}
+    probe = DependencyProbe(["sarees"], clock=clock, **options)
+    probe._services["sarees"] = StubService(table)
+    return probe
+
+
+def test_live_and_ready_after_startup(client):
+    with client:  # runs the lifespan
+        assert client.get("/health/live").json() == {"status": "alive"}
+        response = client.get("/health/ready")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["cache-control"] == "no-store"
+        body = response.json()
+        assert body["status"] == "ready" and body["healthy"] and not body["stale"]
+        assert set(body["dependencies"]) == set(TABLES) - {"aggregates"}
+        assert all(result["ok"] and result["latency_ms"] >= 0 for result in body["dependencies"].values())
+
+
+def test_probes_are_cached_and_describe_table_is_rare():
+    clock, table = FakeClock(), CountingTable()
+    probe = make_probe(table, clock)
+    assert probe.check()["healthy"]
+    probe.check()
+    assert table.calls == {"DescribeTable": 1, "GetItem": 1}
+
+    clock.now += 2.0
+    assert probe.check()["healthy"]
+    assert table.calls == {"DescribeTable": 1, "GetItem": 2}
+
+
+def test_hung_dependency_fails_within_deadline_and_turns_stale():
+    clock, block = FakeClock(), threading.Event()
+    probe = make_probe(CountingTable(block), clock)
+    try:
+        started = time.perf_counter()
+        result = probe.check()
+        assert time.perf_counter() - started < 1.0
+        assert not result["healthy"]
+        assert "no answer within" in result["dependencies"]["sarees"]["error"]
+
+        # The hung call is not repeated; its dependency stays down.
+        clock.now += 2.0
+        assert probe.check()["dependencies"]["sarees"]["error"] == "previous probe still running"
+
+        # A refresh stuck elsewhere: callers get the cached result, and fail once it is stale.
+        with probe._refresh_lock:
+            clock.now += 11.0
+            assert probe.check()["stale"]
+    finally:
+        block.set()
+
+
+def test_ready_reports_unavailable_when_a_table_probe_fails(client):
+    class FailingTable(CountingTable):
+        def get_item(self, Key):
+            raise ConnectionError("Could not connect to the endpoint URL")
+
+    app.dependency_overrides[get_dependency_probe] = lambda: make_probe(FailingTable(), FakeClock())
+    with client:
+        response = client.get("/health/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    body = response.json()
+    assert body["status"] == "unavailable"
+    assert body["dependencies"]["sarees"]["error"] == "Could not connect to the endpoint URL"
@@ -0,0 +1,64 @@
+from fastapi.testclient import TestClient
+from fastapi import status
+from src.main import app
+from src.services.expense_service import ExpenseService
+from src.services.procurement_service import ProcurementService
+from src.services.saree_service import SareeService
+
+
+def test_retried_procurement_is_created_once(client, login):
+    headers = login("retry-staff@example.com", "staff")
+    body = {"saree_name": "Mysore Crepe", "procurement_cost_inr": 6000.0}
+
+    first = client.post("/procurements/", headers={**headers, "Idempotency-Key": "abc-1"}, json=body)
+    retry = client.post("/procurements/", headers={**headers, "Idempotency-Key": "abc-1"}, json=body)
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(ProcurementService().list_procurements()) == 1
+    assert len(SareeService().list_sarees()) == 1
+
+    # Same key with another body is rejected; without a key every POST creates a record.
+    changed = client.post("/procurements/", headers={**headers, "Idempotency-Key": "abc-1"},
+                          json={**body, "procurement_cost_inr": 7000.0})
+    assert changed.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    client.post("/procurements/", headers=headers, json=body)
+    client.post("/procurements/", headers=headers, json=body)
+    assert len(ProcurementService().list_procurements()) == 3
+
+
+def test_idempotency_keys_are_scoped_per_user_and_endpoint(client, login):
+    alice = login("alice@example.com", "staff")
+    bob = login("bob@example.com", "staff")
+    expense = {"description": "Taxi", "amount": 12.5, "category": "operational"}
+
+    for headers in (alice, alice, bob):
+        response = client.post("/expenses/", headers={**headers, "Idempotency-Key": "same"}, json=expense)
+        assert response.status_code == status.HTTP_201_CREATED
+    legacy = client.post("/procurements/legacy", headers={**alice, "Idempotency-Key": "same"},
+                         json={"saree_name": "Tussar", "procurement_cost_inr": 3000.0})
+    assert legacy.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in legacy.headers
+
+    expenses = ExpenseService().list_expenses()
+    assert len(expenses) == 2
+    assert len({e["submitted_by_user_id"] for e in expenses}) == 2
+
+
+def test_failed_request_releases_its_key(client, login, monkeypatch):
+    headers = login("flaky@example.com", "staff")
+    expense = {"description": "Courier", "amount": 8.0, "category": "operational"}
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ExpenseService, "create_expense", fail)
+        failing_client = TestClient(app, raise_server_exceptions=False)
+        response = failing_client.post("/expenses/", headers={**headers, "Idempotency-Key": "k"}, json=expense)
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    retry = client.post("/expenses/", headers={**headers, "Idempotency-Key": "k"}, json=expense)
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in retry.headers
@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from src.models import User, UserRole
+from src.services.ids import new_id, uuid7, id_timestamp
+from src.services.procurement_service import ProcurementService
+
+
+def test_uuid7_ids_sort_in_creation_order():
+    ids = [str(new_id()) for _ in range(1000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(uuid.UUID(value).version == 7 for value in ids)
+
+
+def test_uuid7_embeds_its_timestamp():
+    at = datetime(2025, 10, 20, 18, 30, 0, 123000, tzinfo=timezone.utc)
+    value = uuid7(at)
+    assert id_timestamp(value) == at
+    assert str(value) < str(uuid7(at + timedelta(milliseconds=1)))
+    # Legacy random ids are still valid UUIDs, they just carry no time
+    assert id_timestamp(uuid.uuid4()) is None
+
+
+class RecordingTable:
+    """Stands in for a boto3 Table and records the query arguments."""
+
+    def __init__(self):
+        self.calls = []
+
+    def query(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"Items": [{"id": str(new_id())}]}
+
+
+def test_pending_procurements_query_the_date_ordered_index():
+    service = ProcurementService(endpoint_url="http://localhost:8000")
+    service.table = RecordingTable()
+    manager = User(id=uuid.uuid4(), email="m@example.com", hashed_password="x", role=UserRole.manager)
+    since = datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+    assert len(service.get_pending_procurements(manager, since=since, limit=5)) == 1
+    params = service.table.calls[0]
+    assert params["IndexName"] == "status-procurement_date"
+    assert params["KeyConditionExpression"] == "#status = :status AND procurement_date >= :since_date"
+    assert params["ExpressionAttributeValues"][":since_date"] == "2025-10-01T00:00:00.000000Z"
+    assert params["ScanIndexForward"] is False
+    assert params["Limit"] == 5
+
+
+def test_pending_procurements_with_uuid4_ids_are_listed_by_date():
+    service = ProcurementService()
+    partner = User(id=uuid.uuid4(), email="p@example.com", hashed_password="x", role=UserRole.partner)
+    start = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    submitted = {}
+    for day in range(5):
+        procurement_id = str(uuid.uuid4())
+        submitted[procurement_id] = day
+        service.put_item(Item={"id": procurement_id, "saree_id": str(uuid.uuid4()), "status": "pending",
+                               "procurement_date": f"2025-10-0{day + 1}T00:00:00Z"})
+
+    listed = [item["id"] for item in service.get_pending_procurements(partner, since=start + timedelta(days=2))]
+    assert [submitted[procurement_id] for procurement_id in listed] == [4, 3, 2]
@@ -0,0 +1,145 @@
+import threading
+import time
+
+from fastapi import status
+from src.services.jobs import JobQueue, JOB_HANDLERS, get_job_queue
+from src.services.procurement_service import (
+    ProcurementService, apply_procurement_approval, apply_procurement_rejection,
+)
+from src.services.saree_service import SareeService
+from src.services.expense_service import ExpenseService
+
+
+def test_failing_jobs_are_retried_then_dead_lettered(monkeypatch):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload["n"])
+        if len(calls) < 2:
+            raise RuntimeError("transient")
+
+    def broken(payload):
+        raise RuntimeError("permanent")
+
+    monkeypatch.setitem(JOB_HANDLERS, "test.flaky", flaky)
+    monkeypatch.setitem(JOB_HANDLERS, "test.broken", broken)
+    queue = JobQueue(":memory:", workers=0, max_attempts=3, retry_base_seconds=0.0)
+
+    flaky_id = queue.enqueue("test.flaky", {"n": 1})
+    assert queue.enqueue("test.flaky", {"n": 1}, job_id=flaky_id) == flaky_id  # already known: no-op
+    queue.run_pending()
+    assert calls == [1, 1]
+    assert queue.get_job(flaky_id)["status"] == "done"
+
+    broken_id = queue.enqueue("test.broken", {})
+    queue.run_pending()
+    [dead] = queue.dead_jobs()
+    assert dead["id"] == broken_id and dead["attempts"] == 3
+    assert "permanent" in dead["last_error"]
+
+    metrics = queue.metrics()
+    assert metrics["depth"]["done"] == 1 and metrics["depth"]["dead"] == 1
+    assert (metrics["succeeded"], metrics["retried"], metrics["dead_lettered"]) == (1, 3, 1)
+
+    assert queue.retry(broken_id)
+    assert queue.get_job(broken_id)["status"] == "queued"
+
+
+def test_worker_pool_runs_jobs_in_background(monkeypatch):
+    done = threading.Event()
+    monkeypatch.setitem(JOB_HANDLERS, "test.signal", lambda payload: done.set())
+    queue = JobQueue(":memory:", workers=2, poll_seconds=0.05)
+    try:
+        queue.enqueue("test.signal", {})
+        assert done.wait(5)
+    finally:
+        queue.stop()
+    assert queue.metrics()["succeeded"] == 1
+
+
+def test_approval_side_effects_run_once_and_are_reported(client, login):
+    staff_headers = login("jobs-staff@example.com", "staff")
+    manager_headers = login("jobs-manager@example.com", "manager")
+    admin_headers = login("jobs-admin@example.com", "admin")
+
+    procurement = client.post("/procurements/", headers=staff_headers, json={
+        "saree_name": "Kanjivaram", "procurement_cost_inr": 8000.0,
+    }).json()
+    response = client.post(f"/procurements/{procurement['id']}/approve", headers=manager_headers,
+                           json={"additional_costs_inr": 500.0, "exchange_rate_override": 0.012})
+    assert response.status_code == status.HTTP_200_OK
+
+    [saree] = client.get("/sarees/").json()
+    assert saree["procurement_status"] == "approved"
+
+    # A redelivered job must not book the additional costs twice.
+    apply_procurement_approval({
+        "procurement_id": procurement["id"], "saree_id": saree["id"], "saree_name": saree["name"],
+        "final_price_usd": saree["selling_price_usd"], "additional_costs_usd": 6.0,
+        "manager_id": response.json()["reviewed_by_user_id"],
+    })
+    expenses = ExpenseService().list_expenses()
+    assert len(expenses) == 1
+    assert float(expenses[0]["amount"]) == 6.0
+
+    assert client.get("/admin/jobs", headers=manager_headers).status_code == status.HTTP_403_FORBIDDEN
+    metrics = client.get("/admin/jobs", headers=admin_headers).json()
+    assert metrics["depth"]["done"] == 1
+    assert metrics["lag_seconds"] == 0.0
+    assert client.post("/admin/jobs/unknown/retry", headers=admin_headers).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_out_of_order_review_jobs_keep_the_newest_review(client, login):
+    staff_headers = login("order-staff@example.com", "staff")
+    manager_headers = login("order-manager@example.com", "manager")
+    procurement = client.post("/procurements/", headers=staff_headers, json={
+        "saree_name": "Banarasi", "procurement_cost_inr": 9000.0,
+    }).json()
+    approved = client.post(f"/procurements/{procurement['id']}/approve", headers=manager_headers, json={}).json()
+
+    # A job carrying an older review of the procurement, run late by another worker, changes nothing.
+    apply_procurement_rejection({"procurement_id": procurement["id"], "saree_id": procurement["saree_id"],
+                                 "procurement_version": approved["version"] - 1})
+    [saree] = client.get("/sarees/").json()
+    assert saree["procurement_status"] == "approved"
+
+    # Only a pending procurement can be reviewed.
+    rejected = client.post(f"/procurements/{procurement['id']}/reject", params={"rejection_reason": "late"},
+                           headers=manager_headers)
+    assert rejected.status_code == status.HTTP_409_CONFLICT
+    assert rejected.json()["current"]["status"] == "approved"
+
+
+def test_review_jobs_held_before_the_commit_recover_after_a_crash(client, login, monkeypatch):
+    staff_headers = login("held-staff@example.com", "staff")
+    manager_headers = login("held-manager@example.com", "manager")
+    jobs = get_job_queue()
+    # Nothing releases held jobs, as if the process died around the write; they are due after the hold.
+    monkeypatch.setattr(jobs, "hold_seconds", 0.2)
+    monkeypatch.setattr(JobQueue, "release", lambda self, job_id: False)
+
+    committed = client.post("/procurements/", headers=staff_headers, json={
+        "saree_name": "Chanderi", "procurement_cost_inr": 4000.0,
+    }).json()
+    assert client.post(f"/procurements/{committed['id']}/approve", headers=manager_headers,
+                       json={}).status_code == status.HTTP_200_OK
+    lost = client.post("/procurements/", headers=staff_headers, json={
+        "saree_name": "Paithani", "procurement_cost_inr": 6000.0,
+    }).json()
+
+    def crash(self, **kwargs):
+        raise RuntimeError("process died before the write")
+
+    monkeypatch.setattr(ProcurementService, "update_versioned", crash)
+    try:
+        client.post(f"/procurements/{lost['id']}/approve", headers=manager_headers, json={})
+    except RuntimeError:
+        pass
+    time.sleep(0.3)
+    jobs.run_pending()
+
+    # The review that was written is applied; the one that was not leaves its saree pending.
+    sarees = SareeService()
+    assert sarees.get_saree_by_id(committed["saree_id"])["procurement_status"] == "approved"
+    assert sarees.get_saree_by_id(lost["saree_id"])["procurement_status"] == "pending"
+    assert jobs.metrics()["depth"]["done"] == 2
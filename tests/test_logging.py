@@ -0,0 +1,87 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.logs import ContextQueueHandler, ErrorSampler, LogPipeline, get_logger
+from src.services.saree_service import SareeService
+
+
+def test_records_are_json_with_request_fields_and_db_timings(client):
+    stream = io.StringIO()
+    pipeline = LogPipeline("INFO", queue_size=100, error_samples_per_minute=10, stream=stream)
+    pipeline.start()
+    try:
+        assert client.get("/sarees/").status_code == 200
+        sarees = SareeService()
+        sarees.put_item(Item={"id": "s1", "name": "Mysore silk"})
+        with pytest.raises(ClientError):
+            sarees.put_item(Item={"id": "s1"}, ConditionExpression="attribute_not_exists(id)")
+    finally:
+        pipeline.stop()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    access = next(record for record in records if record["logger"] == "couture.access")
+    assert access["route"] == "GET /sarees/"
+    assert access["status"] == 200
+    assert access["message"] == "GET /sarees/ 200"
+    assert len(access["request_id"]) == 32
+    assert access["db_calls"] >= 1 and access["db_ms"] >= 0
+    error = next(record for record in records if record["logger"] == "couture.dynamodb")
+    assert error["level"] == "ERROR"
+    assert error["message"].startswith("Error putting item")
+    assert error["table"] == "sarees"
+    assert error["error_code"] == "ConditionalCheckFailedException"
+
+
+def test_errors_are_sampled_per_message():
+    now = [0.0]
+    sampler = ErrorSampler(per_minute=3, clock=lambda: now[0])
+
+    def record(message, level=logging.ERROR):
+        return logging.LogRecord("couture.test", level, __file__, 1, message, ("x",), None)
+
+    assert [sampler.filter(record("Failed: %s")) for _ in range(5)] == [True, True, True, False, False]
+    assert sampler.filter(record("Other failure: %s"))
+    assert all(sampler.filter(record("Failed: %s", logging.INFO)) for _ in range(5))
+
+    now[0] = 61.0
+    resumed = record("Failed: %s")
+    assert sampler.filter(resumed)
+    assert resumed.suppressed == 2
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = ContextQueueHandler(queue.Queue(maxsize=2))
+    logger = get_logger("test.full")
+    logger.addHandler(handler)
+    try:
+        for n in range(5):
+            logger.warning("record %d", n)
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.queue.get_nowait().msg == "record 0"
+
+
+def test_dropped_records_are_reported():
+    stream = io.StringIO()
+    pipeline = LogPipeline("INFO", queue_size=1, error_samples_per_minute=0, stream=stream,
+                           drop_report_seconds=3600)
+    pipeline.handler.queue.put_nowait(logging.makeLogRecord({"msg": "blocking"}))  # full before the listener runs
+    for n in range(4):
+        pipeline.handler.handle(logging.makeLogRecord({"name": "couture.test", "levelno": logging.INFO, "msg": f"record {n}"}))
+    assert pipeline.status()["dropped"] == 4
+    assert pipeline.report_drops() == 4
+    assert pipeline.report_drops() == 0
+
+    pipeline.handler.handle(logging.makeLogRecord({"name": "couture.test", "levelno": logging.INFO, "msg": "one more"}))
+    pipeline.start()
+    pipeline.stop()
+    reports = [json.loads(line) for line in stream.getvalue().splitlines() if "dropped" in line]
+    assert [(report["level"], report["dropped_total"]) for report in reports] == [("WARNING", 4), ("WARNING", 5)]
+    assert reports[-1]["message"] == "1 log records were dropped because the log queue was full"
@@ -1,9 +1,4 @@
-from fastapi.testclient import TestClient
-from src.main import app
-
-client = TestClient(app)
-
-def test_read_root():
+def test_read_root(client):
     response = client.get("/")
     assert response.status_code == 200
-    assert response.json() == {"message": "Welcome to the Couture Bookkeeping API!"} 
\ No newline at end of file
+    assert response.json() == {"message": "Welcome to the Couture Bookkeeping API!"}
@@ -0,0 +1,148 @@
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+from src.services.backends.base import StorageDatabase
+from src.services.backends.memory import MemoryDatabase
+from src.services.saree_service import SareeService
+from src.services.expense_service import ExpenseService
+
+
+@pytest.fixture
+def database():
+    return MemoryDatabase()
+
+
+def test_update_expressions_and_conditions(database):
+    table = database.Table("sarees")
+    table.put_item(Item={"id": "s1", "name": "Kanjeevaram", "stock": 3, "tags": ["silk"]})
+
+    response = table.update_item(
+        Key={"id": "s1"},
+        UpdateExpression="SET stock = stock - :one, tags = list_append(tags, :tags), #n = if_not_exists(#n, :name) REMOVE missing",
+        ConditionExpression="stock > :zero AND attribute_exists(id)",
+        ExpressionAttributeNames={"#n": "name"},
+        ExpressionAttributeValues={":one": 1, ":zero": 0, ":tags": ["handwoven"], ":name": "ignored"},
+        ReturnValues="ALL_NEW",
+    )
+    assert response["Attributes"] == {"id": "s1", "name": "Kanjeevaram", "stock": Decimal(2), "tags": ["silk", "handwoven"]}
+
+    with pytest.raises(ClientError) as error:
+        table.put_item(Item={"id": "s1", "name": "Duplicate"}, ConditionExpression="attribute_not_exists(id)")
+    assert error.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+    # Like boto3, floats must be Decimals and placeholders must all be used
+    with pytest.raises(TypeError):
+        table.put_item(Item={"id": "s2", "price": 1.5})
+    with pytest.raises(ClientError) as error:
+        table.get_item(Key={"id": "s1"}, ProjectionExpression="id", ExpressionAttributeNames={"#unused": "x"})
+    assert error.value.response["Error"]["Code"] == "ValidationException"
+
+
+def test_gsi_query_paginates_in_sort_order(database):
+    table = database.Table("expenses")
+    for day in range(1, 6):
+        table.put_item(Item={
+            "id": f"e{day}", "status": "pending", "category": "general",
+            "submitted_by_user_id": "u1", "submission_date": f"2025-01-0{day}T00:00:00Z",
+        })
+    table.put_item(Item={"id": "e9", "status": "approved", "category": "general",
+                         "submitted_by_user_id": "u1", "submission_date": "2025-01-09T00:00:00Z"})
+
+    params = {
+        "IndexName": "status-submission_date",
+        "KeyConditionExpression": "#s = :s AND submission_date >= :from",
+        "ExpressionAttributeNames": {"#s": "status"},
+        "ExpressionAttributeValues": {":s": "pending", ":from": "2025-01-02"},
+        "ScanIndexForward": False,
+        "Limit": 3,
+    }
+    first = table.query(**params)
+    assert [item["id"] for item in first["Items"]] == ["e5", "e4", "e3"]
+    second = table.query(**params, ExclusiveStartKey=first["LastEvaluatedKey"])
+    assert [item["id"] for item in second["Items"]] == ["e2"]
+    assert "LastEvaluatedKey" not in second
+
+    scanned = table.scan(FilterExpression="begins_with(id, :e) AND NOT #s = :s",
+                         ExpressionAttributeNames={"#s": "status"}, ExpressionAttributeValues={":e": "e", ":s": "pending"})
+    assert [item["id"] for item in scanned["Items"]] == ["e9"]
+    assert scanned["ScannedCount"] == 6
+
+
+def test_pages_resume_in_order_around_writes(database):
+    table = database.Table("sarees")
+    for n in range(0, 20, 2):
+        table.put_item(Item={"id": f"s{n:02}"})
+    first = table.scan(Limit=4)
+    assert [item["id"] for item in first["Items"]] == ["s00", "s02", "s04", "s06"]
+    # Writes between two pages show up in the next one, after the start key only.
+    table.put_item(Item={"id": "s01"})
+    table.put_item(Item={"id": "s07"})
+    table.delete_item(Key={"id": "s08"})
+    second = table.scan(Limit=4, ExclusiveStartKey=first["LastEvaluatedKey"])
+    assert [item["id"] for item in second["Items"]] == ["s07", "s10", "s12", "s14"]
+
+
+def test_batch_write_validates_every_request_before_writing(database):
+    table = database.Table("sarees")
+    for invalid in ({"name": "no key"}, {"id": "s0", "name": "again"}):
+        with pytest.raises(ClientError) as error:
+            database.batch_write_item(RequestItems={"sarees": [
+                {"PutRequest": {"Item": {"id": "s0", "name": "first"}}},
+                {"PutRequest": {"Item": invalid}},
+            ]})
+        assert error.value.response["Error"]["Code"] == "ValidationException"
+    assert table.scan()["Count"] == 0
+
+
+def test_pages_stop_at_one_megabyte(database):
+    table = database.Table("sarees")
+    for n in range(10):
+        table.put_item(Item={"id": f"s{n}", "description": "x" * 300_000})
+
+    first = table.scan()
+    assert len(first["Items"]) == 3 and "LastEvaluatedKey" in first
+    # Filtered-out items count toward the megabyte as well.
+    filtered = table.scan(FilterExpression="id = :none", ExpressionAttributeValues={":none": "none"})
+    assert filtered["Count"] == 0 and filtered["ScannedCount"] == 3
+    pages, params = [], {}
+    while True:
+        page = table.scan(**params)
+        pages.append(len(page["Items"]))
+        if "LastEvaluatedKey" not in page:
+            break
+        params["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+    assert pages == [3, 3, 3, 1]
+
+
+def test_backends_must_implement_the_storage_primitives():
+    with pytest.raises(TypeError):
+        StorageDatabase()
+
+
+def test_service_batch_and_transact_writes():
+    sarees = SareeService()
+    # Floats from model_dump(mode='json') are stored as Decimals
+    sarees.batch_write([{"id": f"s{n}", "name": f"Saree {n}", "price": 10.5} for n in range(30)])
+    assert len(sarees.list_sarees()) == 30
+    assert sarees.get_saree_by_id("s7")["price"] == Decimal("10.5")
+    assert len(sarees.batch_get([{"id": "s1"}, {"id": "s2"}, {"id": "missing"}])) == 2
+
+    expenses = ExpenseService()
+    with pytest.raises(ClientError) as error:
+        sarees.transact_write([
+            {"Delete": {"TableName": "sarees", "Key": {"id": "s1"}}},
+            {"Put": {"TableName": "expenses", "Item": {"id": "x1"}}},
+            {"ConditionCheck": {"TableName": "sarees", "Key": {"id": "s2"}, "ConditionExpression": "attribute_not_exists(id)"}},
+        ])
+    assert error.value.response["Error"]["Code"] == "TransactionCanceledException"
+    # Nothing was written
+    assert sarees.get_saree_by_id("s1") is not None
+    assert "Item" not in expenses.get_item(Key={"id": "x1"})
+
+    sarees.transact_write([
+        {"Delete": {"TableName": "sarees", "Key": {"id": "s1"}}},
+        {"Put": {"TableName": "expenses", "Item": {"id": "x1", "amount": 2.5}}},
+    ])
+    assert sarees.get_saree_by_id("s1") is None
+    assert expenses.get_item(Key={"id": "x1"})["Item"]["amount"] == Decimal("2.5")
@@ -1,27 +1,17 @@
-from fastapi.testclient import TestClient
 from fastapi import status
-from src.main import app
 
-# The conftest.py fixture now handles all mocking automatically.
 
-client = TestClient(app)
-
-def test_create_procurement_unauthorized():
+def test_create_procurement_unauthorized(client):
     """An unauthenticated user should not be able to create a procurement."""
     response = client.post("/procurements/", json={"saree_name": "test"})
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
-def test_create_procurement_authorized():
+def test_create_procurement_authorized(client, login):
     """An authenticated user should be able to submit a procurement for approval."""
-    # 1. Register a user
-    client.post("/users/register", json={"email": "test@example.com", "password": "password", "role": "staff"})
-
-    # 2. Get a token
-    token_response = client.post("/token", data={"username": "test@example.com", "password": "password"})
-    token = token_response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    # 1. Register a user and log in
+    headers = login("test@example.com", "staff")
 
-    # 3. Submit the procurement
+    # 2. Submit the procurement
     procurement_data = {
         "saree_name": "A beautiful saree",
         "saree_description": "From the finest silk.",
@@ -30,16 +20,32 @@ def test_create_procurement_authorized():
     }
     proc_response = client.post("/procurements/", headers=headers, json=procurement_data)
 
-    # 4. Assert the submission was successful
+    # 3. Assert the submission was successful
     assert proc_response.status_code == status.HTTP_201_CREATED
     procurement_data = proc_response.json()
     assert procurement_data["cost_inr"] == 150.0
     assert procurement_data["status"] == "pending"  # New procurements are pending approval
 
-    # 5. Check that a saree was created in pending status
+    # 4. Check that a saree was created in pending status
     list_response = client.get("/sarees/")
     assert list_response.status_code == status.HTTP_200_OK
     sarees = list_response.json()
     assert len(sarees) == 1
     assert sarees[0]["name"] == "A beautiful saree"
-    assert sarees[0]["procurement_status"] == "pending" 
\ No newline at end of file
+    assert sarees[0]["procurement_status"] == "pending" 
+def test_approval_board_summary(client, login):
+    """The board view reads the denormalized saree name and only the fields it shows."""
+    staff_headers = login("board-staff@example.com", "staff")
+    headers = login("board-manager@example.com", "manager")
+    created = client.post("/procurements/", headers=staff_headers,
+                          json={"saree_name": "Kanjivaram", "procurement_cost_inr": 15000.0}).json()
+    assert created["saree_name"] == "Kanjivaram"
+
+    board = client.get("/procurements/pending", headers=headers, params={"fields": "summary"})
+    assert board.status_code == status.HTTP_200_OK
+    assert board.json() == {"pending_procurements": [{
+        "id": created["id"], "saree_id": created["saree_id"], "saree_name": "Kanjivaram", "cost_inr": 15000.0,
+        "procurement_date": created["procurement_date"], "status": "pending",
+    }]}
+    listed = client.get("/procurements/", headers=headers, params={"fields": "cost_inr"}).json()
+    assert listed == {"procurements": [{"id": created["id"], "cost_inr": 15000.0}]}
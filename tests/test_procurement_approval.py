@@ -1,29 +1,15 @@
-from fastapi.testclient import TestClient
 from fastapi import status
-from src.main import app
 
-client = TestClient(app)
 
-def test_procurement_approval_workflow():
+def test_procurement_approval_workflow(client, login):
     """Test the complete procurement approval workflow."""
-    # 1. Register users with different roles
-    client.post("/users/register", json={"email": "staff@example.com", "password": "password", "role": "staff"})
-    client.post("/users/register", json={"email": "manager@example.com", "password": "password", "role": "manager"})
-    client.post("/users/register", json={"email": "partner@example.com", "password": "password", "role": "partner"})
-    client.post("/users/register", json={"email": "admin@example.com", "password": "password", "role": "admin"})
-
-    # 2. Get tokens for each user
-    staff_token = client.post("/token", data={"username": "staff@example.com", "password": "password"}).json()["access_token"]
-    manager_token = client.post("/token", data={"username": "manager@example.com", "password": "password"}).json()["access_token"]
-    partner_token = client.post("/token", data={"username": "partner@example.com", "password": "password"}).json()["access_token"]
-    admin_token = client.post("/token", data={"username": "admin@example.com", "password": "password"}).json()["access_token"]
-
-    staff_headers = {"Authorization": f"Bearer {staff_token}"}
-    manager_headers = {"Authorization": f"Bearer {manager_token}"}
-    partner_headers = {"Authorization": f"Bearer {partner_token}"}
-    admin_headers = {"Authorization": f"Bearer {admin_token}"}
-
-    # 3. Staff submits a procurement
+    # 1. Register users with different roles and log them in
+    staff_headers = login("staff@example.com", "staff")
+    manager_headers = login("manager@example.com", "manager")
+    partner_headers = login("partner@example.com", "partner")
+    admin_headers = login("admin@example.com", "admin")
+
+    # 2. Staff submits a procurement
     procurement_data = {
         "saree_name": "Elegant Saree",
         "saree_description": "Beautiful handwoven saree",
@@ -37,30 +23,30 @@ def test_procurement_approval_workflow():
     procurement_id = procurement["id"]
     assert procurement["status"] == "pending"
 
-    # 4. Test that staff cannot access pending procurements endpoint (manager+ only)
+    # 3. Test that staff cannot access pending procurements endpoint (manager+ only)
     pending_response = client.get("/procurements/pending", headers=staff_headers)
     assert pending_response.status_code == status.HTTP_403_FORBIDDEN
 
-    # 5. Manager can see pending procurements
+    # 4. Manager can see pending procurements
     pending_response = client.get("/procurements/pending", headers=manager_headers)
     assert pending_response.status_code == status.HTTP_200_OK
     pending_procurements = pending_response.json()["pending_procurements"]
     assert len(pending_procurements) == 1
     assert pending_procurements[0]["id"] == procurement_id
 
-    # 6. Partner can also see pending procurements
+    # 5. Partner can also see pending procurements
     pending_response = client.get("/procurements/pending", headers=partner_headers)
     assert pending_response.status_code == status.HTTP_200_OK
     pending_procurements = pending_response.json()["pending_procurements"]
     assert len(pending_procurements) == 1
 
-    # 7. Admin can also see pending procurements
+    # 6. Admin can also see pending procurements
     pending_response = client.get("/procurements/pending", headers=admin_headers)
     assert pending_response.status_code == status.HTTP_200_OK
     pending_procurements = pending_response.json()["pending_procurements"]
     assert len(pending_procurements) == 1
 
-    # 8. Manager approves procurement with additional costs
+    # 7. Manager approves procurement with additional costs
     approval_data = {
         "additional_costs_inr": 500.0,  # Additional transportation costs
         "markup_override": 30.0,  # Override markup to 30%
@@ -75,7 +61,7 @@ def test_procurement_approval_workflow():
     assert approved_procurement["manager_additional_costs_inr"] == 500.0
     assert approved_procurement["manager_markup_override"] == 30.0
 
-    # 9. Check that saree is now approved and has selling price
+    # 8. Check that saree is now approved and has selling price
     sarees_response = client.get("/sarees/")
     assert sarees_response.status_code == status.HTTP_200_OK
     sarees = sarees_response.json()
@@ -85,26 +71,19 @@ def test_procurement_approval_workflow():
     assert saree["selling_price_usd"] is not None
     assert saree["selling_price_usd"] > 0
 
-    # 10. Check that no more pending procurements exist
+    # 9. Check that no more pending procurements exist
     pending_response = client.get("/procurements/pending", headers=manager_headers)
     assert pending_response.status_code == status.HTTP_200_OK
     assert len(pending_response.json()["pending_procurements"]) == 0
 
 
-def test_procurement_rejection_workflow():
+def test_procurement_rejection_workflow(client, login):
     """Test procurement rejection workflow."""
-    # 1. Register users
-    client.post("/users/register", json={"email": "staff2@example.com", "password": "password", "role": "staff"})
-    client.post("/users/register", json={"email": "manager2@example.com", "password": "password", "role": "manager"})
-
-    # 2. Get tokens
-    staff_token = client.post("/token", data={"username": "staff2@example.com", "password": "password"}).json()["access_token"]
-    manager_token = client.post("/token", data={"username": "manager2@example.com", "password": "password"}).json()["access_token"]
+    # 1. Register users and log them in
+    staff_headers = login("staff2@example.com", "staff")
+    manager_headers = login("manager2@example.com", "manager")
 
-    staff_headers = {"Authorization": f"Bearer {staff_token}"}
-    manager_headers = {"Authorization": f"Bearer {manager_token}"}
-
-    # 3. Staff submits a procurement
+    # 2. Staff submits a procurement
     procurement_data = {
         "saree_name": "Rejected Saree",
         "saree_description": "This will be rejected",
@@ -116,7 +95,7 @@ def test_procurement_rejection_workflow():
     procurement = proc_response.json()
     procurement_id = procurement["id"]
 
-    # 4. Manager rejects procurement
+    # 3. Manager rejects procurement
     reject_response = client.post(f"/procurements/{procurement_id}/reject", 
                                   headers=manager_headers, 
                                   params={"rejection_reason": "Cost too high"})
@@ -124,7 +103,7 @@ def test_procurement_rejection_workflow():
     rejected_procurement = reject_response.json()
     assert rejected_procurement["status"] == "rejected"
 
-    # 5. Check that saree is now rejected
+    # 4. Check that saree is now rejected
     sarees_response = client.get("/sarees/")
     assert sarees_response.status_code == status.HTTP_200_OK
     sarees = sarees_response.json()
@@ -135,24 +114,13 @@ def test_procurement_rejection_workflow():
     assert rejected_saree["selling_price_usd"] is None
 
 
-def test_role_based_access_control():
+def test_role_based_access_control(client, login):
     """Test that role-based access control works correctly."""
-    # Register users with different roles
-    client.post("/users/register", json={"email": "staff3@example.com", "password": "password", "role": "staff"})
-    client.post("/users/register", json={"email": "manager3@example.com", "password": "password", "role": "manager"})
-    client.post("/users/register", json={"email": "partner3@example.com", "password": "password", "role": "partner"})
-    client.post("/users/register", json={"email": "admin3@example.com", "password": "password", "role": "admin"})
-
-    # Get tokens
-    staff_token = client.post("/token", data={"username": "staff3@example.com", "password": "password"}).json()["access_token"]
-    manager_token = client.post("/token", data={"username": "manager3@example.com", "password": "password"}).json()["access_token"]
-    partner_token = client.post("/token", data={"username": "partner3@example.com", "password": "password"}).json()["access_token"]
-    admin_token = client.post("/token", data={"username": "admin3@example.com", "password": "password"}).json()["access_token"]
-
-    staff_headers = {"Authorization": f"Bearer {staff_token}"}
-    manager_headers = {"Authorization": f"Bearer {manager_token}"}
-    partner_headers = {"Authorization": f"Bearer {partner_token}"}
-    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    # Register users with different roles and log them in
+    staff_headers = login("staff3@example.com", "staff")
+    manager_headers = login("manager3@example.com", "manager")
+    partner_headers = login("partner3@example.com", "partner")
+    admin_headers = login("admin3@example.com", "admin")
 
     # Test pending procurements access
     # Staff should be denied
@@ -186,14 +154,10 @@ def test_role_based_access_control():
     assert response.status_code == status.HTTP_200_OK
 
 
-def test_legacy_procurement_endpoint():
+def test_legacy_procurement_endpoint(client, login):
     """Test that the legacy procurement endpoint still works for backward compatibility."""
-    # Register a user
-    client.post("/users/register", json={"email": "legacy@example.com", "password": "password", "role": "staff"})
-    
-    # Get token
-    token = client.post("/token", data={"username": "legacy@example.com", "password": "password"}).json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    # Register a user and log in
+    headers = login("legacy@example.com", "staff")
 
     # Use legacy endpoint
     procurement_data = {
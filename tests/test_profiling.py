@@ -0,0 +1,76 @@
+import pstats
+
+import pytest
+from fastapi import status
+from starlette.middleware import Middleware
+
+from src.config import get_settings
+from src.dependencies import get_profile_store
+from src.main import app
+from src.middleware import ProfilingMiddleware
+from src.services.profiling import ProfileStore
+
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    """Enables profiling with a temporary profile store for one test."""
+    store = ProfileStore(str(tmp_path), max_kept=2)
+    monkeypatch.setitem(get_settings(), "profiling_enabled", True)
+    app.dependency_overrides[get_profile_store] = lambda: store
+    app.user_middleware.append(Middleware(ProfilingMiddleware, store=store, sample_interval_seconds=0.0005))
+    app.middleware_stack = None
+    yield store
+    app.user_middleware.pop()
+    app.middleware_stack = None
+
+
+def test_deterministic_profile_of_one_request(client, login, profiling):
+    admin_headers = login("profiler@example.com", "admin")
+    staff_headers = login("profiled@example.com", "staff")
+    client.post("/procurements/", headers=staff_headers, json={"saree_name": "Mysore silk", "procurement_cost_inr": 9000.0})
+    token = client.post("/admin/profiles/token", headers=admin_headers, params={"mode": "deterministic"}).json()
+
+    response = client.get("/sarees/", headers={token["header"]: token["token"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["name"] == "Mysore silk"
+    profile_id = response.headers["X-Profile-Id"]
+    assert "X-Profile-Id" not in client.get("/sarees/").headers
+
+    [listed] = client.get("/admin/profiles", headers=admin_headers).json()["profiles"]
+    assert listed["id"] == profile_id and listed["route"] == "/sarees/" and listed["status"] == 200
+    summary = client.get(f"/admin/profiles/{profile_id}/summary", headers=admin_headers, params={"limit": 500}).json()
+    # The endpoint ran on the profiled worker thread, the response rendering on the profiled loop.
+    functions = [row["function"] for row in summary["top"]]
+    assert any(f.startswith("list_sarees (") and "saree_service.py" in f for f in functions)
+    assert any(f.startswith("render (") for f in functions)
+
+    download = client.get(f"/admin/profiles/{profile_id}", headers=admin_headers)
+    assert download.status_code == status.HTTP_200_OK and download.content
+    path = profiling.get(profile_id)[1]
+    assert path.endswith(".pstats")
+    pstats.Stats(path)  # a valid pstats file
+
+
+def test_sampling_profile_and_token_checks(client, login, profiling):
+    admin_headers = login("sampler@example.com", "admin")
+    token = client.post("/admin/profiles/token", headers=admin_headers).json()
+    assert token["mode"] == "sampling"
+
+    # A POST with a body is replayed into the isolated loop.
+    response = client.post("/users/register", headers={"X-Profile": token["token"]},
+                           json={"email": "sampled@example.com", "password": "password", "role": "staff"})
+    assert response.status_code == status.HTTP_200_OK
+    document = client.get(f"/admin/profiles/{response.headers['X-Profile-Id']}", headers=admin_headers).json()
+    assert document["$schema"].startswith("https://www.speedscope.app")
+    assert all(profile["type"] == "sampled" for profile in document["profiles"])
+
+    assert client.get("/sarees/", headers={"X-Profile": "forged"}).status_code == status.HTTP_403_FORBIDDEN
+    # A profiling token is not an access token.
+    assert client.get("/admin/profiles", headers={"Authorization": f"Bearer {token['token']}"}).status_code == 401
+    staff_headers = login("not-admin@example.com", "staff")
+    assert client.post("/admin/profiles/token", headers=staff_headers).status_code == status.HTTP_403_FORBIDDEN
+
+    # Only the newest profiles are kept.
+    for _ in range(3):
+        client.get("/sarees/", headers={"X-Profile": token["token"]})
+    assert len(profiling.list_profiles()) == 2
@@ -0,0 +1,75 @@
+from fastapi import status
+from src.services.read_model import get_read_model
+from src.services.dynamodb import DynamoDBService
+
+
+def test_reports_join_procurements_buyers_and_sarees(client, login):
+    staff_headers = login("buyer@example.com", "staff")
+    manager_headers = login("reports-manager@example.com", "manager")
+
+    procurement = client.post("/procurements/", headers=staff_headers, json={
+        "saree_name": "Banarasi Silk", "procurement_cost_inr": 10000.0, "markup_percentage": 50.0,
+    }).json()
+    client.post("/procurements/", headers=staff_headers, json={"saree_name": "Chanderi", "procurement_cost_inr": 4000.0})
+    client.post(f"/procurements/{procurement['id']}/approve", headers=manager_headers,
+                json={"additional_costs_inr": 1000.0, "exchange_rate_override": 0.012})
+    client.post("/expenses/", headers=staff_headers, json={"description": "Courier", "amount": 20.0, "category": "operational"})
+    assert get_read_model().flush(timeout=5)
+
+    # Staff cannot read reports
+    assert client.get("/reports/procurements", headers=staff_headers).status_code == status.HTTP_403_FORBIDDEN
+
+    approved = client.get("/reports/procurements", params={"status": "approved"}, headers=manager_headers)
+    assert approved.status_code == status.HTTP_200_OK
+    [row] = approved.json()
+    assert row["buyer_email"] == "buyer@example.com"
+    assert row["saree_name"] == "Banarasi Silk"
+    assert round(row["cost_usd"], 2) == 132.0  # (10000 + 1000) INR at 0.012
+    assert round(row["margin_usd"], 2) == 66.0  # 50% markup on the USD cost
+
+    [buyer] = client.get("/reports/procurements/by-buyer", headers=manager_headers).json()
+    assert (buyer["procurements"], buyer["approved"], buyer["total_cost_inr"]) == (2, 1, 15000.0)
+
+    # The approval's additional costs were booked as a procurement-related expense
+    summary = client.get("/reports/expenses/summary", headers=manager_headers).json()
+    assert {(row["category"], row["expenses"]) for row in summary} == {("operational", 1), ("procurement_related", 1)}
+
+    # Passwords never reach the read model
+    assert "hashed_password" not in get_read_model().query("SELECT item FROM users LIMIT 1")[0]["item"]
+
+
+def test_read_model_rebuilds_from_table_scans(client, login):
+    staff_headers = login("rebuild@example.com", "staff")
+    client.post("/procurements/", headers=staff_headers, json={"saree_name": "Kasavu", "procurement_cost_inr": 3000.0})
+    read_model = get_read_model()
+    read_model.reset()
+    assert read_model.status()["rows"]["procurements"] == 0
+
+    def scan(table_name):
+        return DynamoDBService(table_name).scan()["Items"]
+
+    counts = read_model.rebuild({table_name: scan(table_name) for table_name in ("users", "sarees", "procurement_records")})
+    assert counts == {"users": 1, "sarees": 1, "procurement_records": 1}
+    assert read_model.procurement_report()[0]["saree_name"] == "Kasavu"
+
+
+def test_a_failing_change_does_not_drop_the_rest_of_its_batch(monkeypatch):
+    read_model = get_read_model()
+    write = read_model._write
+
+    def failing_write(table_name, key, item):
+        if item is not None and item["id"] == "bad":
+            raise ValueError("cannot apply")
+        write(table_name, key, item)
+
+    monkeypatch.setattr(read_model, "_write", failing_write)
+    failed = read_model.status()["failed"]
+    for saree_id in ("good-1", "bad", "good-2"):
+        read_model.on_change("sarees", {"id": saree_id}, {"id": saree_id, "name": saree_id})
+    assert read_model.flush(timeout=5)
+
+    rows = read_model.query("SELECT id FROM sarees ORDER BY id")
+    assert [row["id"] for row in rows] == ["good-1", "good-2"]
+    status_report = read_model.status()
+    assert status_report["failed"] == failed + 1
+    assert status_report["recent_failures"][-1]["id"] == "bad"
@@ -0,0 +1,139 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from fastapi import status
+from src import dependencies
+from src.main import app
+from src.services.resilience import CircuitBreaker, TableGuard, TableUnavailableError, resilience_registry
+from src.services.saree_service import SareeService
+
+
+def throttling_error():
+    return ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "Rate exceeded"}}, "Scan"
+    )
+
+
+class ThrottlingTable:
+    """Stands in for a boto3 Table that throttles the first `failures` scans."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def scan(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise throttling_error()
+        return {"Items": [], "ConsumedCapacity": {"TableName": "sarees", "CapacityUnits": 1.0}}
+
+
+def make_guard(table_name="sarees", max_retries=3, failure_threshold=2):
+    return TableGuard(
+        table_name,
+        read_capacity_units=100.0,
+        write_capacity_units=100.0,
+        burst_seconds=1.0,
+        max_wait_seconds=0.5,
+        max_retries=max_retries,
+        retry_base_delay=0.01,
+        retry_max_delay=0.1,
+        failure_threshold=failure_threshold,
+        reset_seconds=30.0,
+        sleep=lambda seconds: None,
+    )
+
+
+@pytest.fixture
+def saree_service():
+    service = SareeService(endpoint_url="http://localhost:8000")
+    resilience_registry._guards["sarees"] = make_guard()
+    yield service
+    resilience_registry.reset("sarees")
+
+
+def test_throttled_calls_are_retried_with_backoff(saree_service):
+    saree_service.table = ThrottlingTable(failures=2)
+    assert saree_service.list_sarees() == []
+    assert saree_service.table.calls == 3
+    snapshot = resilience_registry.snapshot()["sarees"]
+    assert snapshot["retries"] == 2
+    assert snapshot["throttles"] == 2
+    assert snapshot["breaker"]["state"] == CircuitBreaker.CLOSED
+    assert snapshot["read_limiter"]["rate"] < 100.0  # adaptive limiter backed off
+
+
+def test_breaker_opens_and_fails_fast(saree_service):
+    saree_service.table = ThrottlingTable(failures=100)
+    for _ in range(2):
+        with pytest.raises(TableUnavailableError):
+            saree_service.list_sarees()
+    calls_before = saree_service.table.calls
+
+    with pytest.raises(TableUnavailableError) as excinfo:
+        saree_service.list_sarees()
+    assert saree_service.table.calls == calls_before  # no call reached DynamoDB
+    assert excinfo.value.reason == "circuit breaker open"
+    assert resilience_registry.snapshot()["sarees"]["breaker"]["state"] == CircuitBreaker.OPEN
+
+
+def test_saturated_table_returns_503_with_retry_after(client, saree_service):
+    saree_service.table = ThrottlingTable(failures=100)
+    app.dependency_overrides[dependencies.get_saree_service] = lambda: saree_service
+
+    response = client.get("/sarees/")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["table"] == "sarees"
+
+
+class FailingTable:
+    """Stands in for a boto3 Table whose scans raise the given errors in turn, then succeed."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def scan(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"Items": []}
+
+
+def test_server_errors_and_lost_connections_are_retried(saree_service):
+    saree_service.table = FailingTable(
+        ClientError({"Error": {"Code": "InternalServerError", "Message": "Internal error"}}, "Scan"),
+        EndpointConnectionError(endpoint_url="http://localhost:8000"),
+    )
+    assert saree_service.list_sarees() == []
+    assert saree_service.table.calls == 3
+    snapshot = resilience_registry.snapshot()["sarees"]
+    assert snapshot["transient_errors"] == 2 and snapshot["retries"] == 2 and snapshot["throttles"] == 0
+    assert snapshot["read_limiter"]["rate"] == 100.0
+
+    saree_service.table = FailingTable(*[EndpointConnectionError(endpoint_url="http://localhost:8000")] * 4)
+    with pytest.raises(TableUnavailableError) as excinfo:
+        saree_service.scan()
+    assert excinfo.value.reason == "DynamoDB unavailable"
+
+
+def test_a_failed_half_open_trial_does_not_keep_the_breaker_open():
+    now = [0.0]
+    guard = make_guard(failure_threshold=1)
+    guard.breaker._clock = lambda: now[0]
+
+    def throttled():
+        raise throttling_error()
+
+    with pytest.raises(TableUnavailableError):
+        guard.call("Scan", throttled)
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    def broken():
+        raise RuntimeError("not a DynamoDB error")
+
+    now[0] += guard.breaker.reset_seconds
+    with pytest.raises(RuntimeError):
+        guard.call("Scan", broken)  # the half-open trial
+    assert guard.call("Scan", lambda: {"Items": []}) == {"Items": []}
+    assert guard.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import status
+
+from src.services.saree_service import SareeService
+from src.services.sale_service import SaleService
+
+
+def create_saree(saree_id, name="Mysore silk"):
+    SareeService().put_item(Item={"id": saree_id, "name": name, "procurement_status": "approved",
+                                  "selling_price_usd": 180})
+    return saree_id
+
+
+def test_record_and_read_sales(client, login):
+    staff_headers = login("sales-staff@example.com", "staff")
+    manager_headers = login("sales-manager@example.com", "manager")
+    saree_id = create_saree("6f1c3a52-0d7e-4a53-9a52-3f7c8a1b2c01")
+
+    response = client.post("/sales/", headers=staff_headers, json={
+        "saree_id": saree_id, "sale_price_usd": 180.0, "discount_usd": 15.5, "channel": "whatsapp",
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    sale = response.json()
+    assert sale["net_amount_usd"] == 164.5
+    assert sale["recorded_by_user_id"] is not None
+    assert "day_shard" not in sale
+
+    assert client.get(f"/sales/{sale['id']}", headers=manager_headers).json() == sale
+    assert client.get("/sales/", headers=manager_headers).json() == [sale]
+    assert client.get("/sales/", params={"saree_id": saree_id}, headers=manager_headers).json() == [sale]
+    assert client.get("/sales/", headers=staff_headers).status_code == status.HTTP_403_FORBIDDEN
+
+    # An order recorded twice is stored once.
+    order = {"saree_id": saree_id, "sale_price_usd": 200.0, "order_reference": "WA-1001",
+             "sold_at": "2025-03-01T10:15:00Z"}
+    first = client.post("/sales/", headers=staff_headers, json=order).json()
+    assert client.post("/sales/", headers=staff_headers, json=order).json()["id"] == first["id"]
+
+    unknown = client.post("/sales/", headers=staff_headers, json={
+        "saree_id": "6f1c3a52-0d7e-4a53-9a52-3f7c8a1b2cff", "sale_price_usd": 10.0,
+    })
+    assert unknown.status_code == status.HTTP_400_BAD_REQUEST
+    too_much_discount = client.post("/sales/", headers=staff_headers, json={
+        "saree_id": saree_id, "sale_price_usd": 10.0, "discount_usd": 11.0,
+    })
+    assert too_much_discount.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+def test_bulk_import_is_sharded_ordered_and_repeatable(client, login):
+    manager_headers = login("sales-importer@example.com", "manager")
+    sarees = [create_saree(f"6f1c3a52-0d7e-4a53-9a52-3f7c8a1b2c1{n}", f"Saree {n}") for n in range(3)]
+    start = datetime(2025, 3, 1, 9, 0, tzinfo=timezone.utc)
+    export = {"sales": [
+        {"saree_id": sarees[n % 3], "sale_price_usd": 100.0 + n, "channel": "whatsapp",
+         "order_reference": f"WA-{n}", "sold_at": (start + timedelta(minutes=n)).isoformat()}
+        for n in range(60)
+    ]}
+
+    response = client.post("/sales/bulk", headers=manager_headers, json=export)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.json()) == 60
+    # Importing the same export again, even by someone else, adds and changes nothing.
+    other_manager_headers = login("sales-importer-2@example.com", "manager")
+    again = client.post("/sales/bulk", headers=other_manager_headers, json=export)
+    assert again.status_code == status.HTTP_201_CREATED
+    assert again.json() == response.json()
+
+    stored = SaleService().scan()["Items"]
+    assert len(stored) == 60
+    assert len({item["day_shard"] for item in stored}) == SaleService().shards
+
+    day = client.get("/sales/", params={"day": "2025-03-01", "limit": 500}, headers=manager_headers).json()
+    assert [sale["order_reference"] for sale in day] == [f"WA-{n}" for n in reversed(range(60))]
+    newest = client.get("/sales/", params={"day": "2025-03-01", "limit": 5}, headers=manager_headers).json()
+    assert newest == day[:5]
+    by_saree = client.get("/sales/", params={"saree_id": sarees[0]}, headers=manager_headers).json()
+    assert len(by_saree) == 20
+
+    rejected = client.post("/sales/bulk", headers=manager_headers, json={"sales": [
+        {"saree_id": sarees[0], "sale_price_usd": 90.0, "order_reference": "WA-90", "sold_at": start.isoformat()},
+        {"saree_id": "6f1c3a52-0d7e-4a53-9a52-3f7c8a1b2cff", "sale_price_usd": 90.0, "order_reference": "WA-91",
+         "sold_at": start.isoformat()},
+    ]})
+    assert rejected.status_code == status.HTTP_400_BAD_REQUEST
+    # Rows without an order reference and time could not be told apart on a re-import.
+    unreferenced = client.post("/sales/bulk", headers=manager_headers, json={"sales": [
+        {"saree_id": sarees[0], "sale_price_usd": 90.0},
+    ]})
+    assert unreferenced.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    assert len(SaleService().scan()["Items"]) == 60
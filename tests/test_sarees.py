@@ -1,31 +1,14 @@
-from fastapi.testclient import TestClient
-from src.main import app
-
-# The conftest.py fixture now handles all mocking automatically.
-
-client = TestClient(app)
-
-def test_list_sarees_empty():
+def test_list_sarees_empty(client):
     """Test that listing sarees returns an empty list when none have been created."""
     response = client.get("/sarees/")
     assert response.status_code == 200
     assert response.json() == []
 
-def test_list_and_get_sarees():
+def test_list_and_get_sarees(client, login):
     """
     Test listing all sarees and retrieving a specific one after creating it via procurement.
     """
-    user_email = "testsaree@example.com"
-    user_password = "password123"
-    client.post(
-        "/users/register",
-        json={"email": user_email, "full_name": "Test Saree", "password": user_password, "role": "staff"},
-    )
-    login_response = client.post(
-        "/token", data={"username": user_email, "password": user_password}
-    )
-    token = login_response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = login("testsaree@example.com", "staff")
 
     # Submit procurement (creates saree in pending status)
     proc_response = client.post(
@@ -62,4 +45,27 @@ def test_list_and_get_sarees():
 
     # Test getting a non-existent saree
     get_fail_response = client.get("/sarees/non-existent-id")
-    assert get_fail_response.status_code == 404 
\ No newline at end of file
+    assert get_fail_response.status_code == 404 
+def test_field_selection_on_list_and_detail(client, login):
+    """`fields` returns only the selected fields (plus id), or the predefined catalog summary."""
+    saree_id = client.post(
+        "/procurements/",
+        headers=login("fields@example.com", "staff"),
+        json={"saree_name": "Banarasi", "saree_description": "A long description " * 20, "procurement_cost_inr": 9000.0,
+              "image_urls": ["https://example.com/1.jpg"]},
+    ).json()["saree_id"]
+
+    sarees = client.get("/sarees/", params={"fields": "name, procurement_cost_inr"}).json()
+    assert sarees == [{"id": saree_id, "name": "Banarasi", "procurement_cost_inr": 9000.0}]
+    summary = client.get("/sarees/", params={"fields": "summary"}).json()
+    assert summary == [{"id": saree_id, "name": "Banarasi", "selling_price_usd": None, "procurement_status": "pending"}]
+    # The full listing is cached separately from the views.
+    assert client.get("/sarees/").json()[0]["description"].startswith("A long description")
+
+    detail = client.get(f"/sarees/{saree_id}", params={"fields": "image_urls"})
+    assert detail.json() == {"id": saree_id, "image_urls": ["https://example.com/1.jpg"]}
+    assert detail.headers["ETag"] == '"1"'
+
+    response = client.get("/sarees/", params={"fields": "name,secret"})
+    assert response.status_code == 400
+    assert "Unknown fields: secret" in response.json()["detail"]
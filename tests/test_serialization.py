@@ -0,0 +1,43 @@
+from decimal import Decimal
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from benchmarks.serialization import compare_paths, stored_expenses, stored_sarees
+from src.models import Expense, Saree
+from src.responses import serialize_items
+
+
+def validated(model, items):
+    adapter = TypeAdapter(List[model])
+    return adapter.dump_python(adapter.validate_python(items), mode="json")
+
+
+def test_fast_path_matches_validation_and_serialization():
+    sarees = stored_sarees(3)
+    # Items written before later fields existed get the model defaults.
+    sarees.append({"id": "0b7a5d4e-3c1f-4b8e-9a6d-2f1e0c9b8a7d", "name": "Old saree",
+                   "procurement_cost_inr": Decimal("900"), "markup_percentage": Decimal("15.5")})
+    assert serialize_items(Saree, sarees) == validated(Saree, sarees)
+    assert serialize_items(Saree, sarees)[-1]["image_urls"] == []
+    expenses = stored_expenses(3)
+    assert serialize_items(Expense, expenses) == validated(Expense, expenses)
+    assert "status_submitted" not in serialize_items(Expense, expenses)[0]
+    # Dates come out as validation writes them, whatever fraction and UTC suffix they were stored with.
+    expenses[0]["submission_date"] = "2025-03-01T10:15:00.000000Z"
+    expenses[1]["review_date"] = "2025-03-02T08:00:00.500000+00:00"
+    expenses[2]["review_date"] = "2025-03-02T08:00:00+00:00"
+    converted = serialize_items(Expense, expenses)
+    assert converted == validated(Expense, expenses)
+    assert [converted[0]["submission_date"], converted[1]["review_date"], converted[2]["review_date"]] == [
+        "2025-03-01T10:15:00Z", "2025-03-02T08:00:00.500000Z", "2025-03-02T08:00:00Z"]
+
+    # Items that do not fit the plan are validated, and fail like the default path.
+    broken = stored_expenses(1)[0]
+    del broken["submission_date"]
+    with pytest.raises(ValidationError):
+        serialize_items(Expense, [broken])
+
+    timings = compare_paths(Saree, stored_sarees(20), repeat=2)
+    assert timings["default_ms"] > 0 and timings["fast_ms"] > 0
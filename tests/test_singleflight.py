@@ -0,0 +1,113 @@
+import threading
+import time
+
+from src.services.saree_service import SareeService
+from src.services.singleflight import SingleFlight, read_coalescer
+
+
+def run_concurrently(count, function):
+    """Runs `function` on `count` threads released together; returns their results."""
+    start = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        start.wait()
+        results[index] = function()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow(method, calls, delay=0.2):
+    def wrapper(**kwargs):
+        calls.append(kwargs)
+        time.sleep(delay)
+        return method(**kwargs)
+    return wrapper
+
+
+def test_concurrent_catalog_reads_share_one_dynamodb_call(monkeypatch):
+    sarees = SareeService()
+    sarees.put_item(Item={"id": "s1", "name": "Mysore silk", "selling_price_usd": 180, "version": 1})
+    scans, gets = [], []
+    monkeypatch.setattr(sarees.table, "scan", slow(sarees.table.scan, scans))
+    monkeypatch.setattr(sarees.table, "get_item", slow(sarees.table.get_item, gets))
+
+    listings = run_concurrently(20, sarees.list_sarees)
+    details = run_concurrently(20, lambda: sarees.get_saree_by_id("s1"))
+
+    assert len(scans) == 1 and len(gets) == 1
+    assert all(listing == [{"id": "s1", "name": "Mysore silk", "selling_price_usd": 180, "version": 1}]
+               for listing in listings)
+    # Every caller gets its own copy.
+    assert len({id(detail) for detail in details}) == 20
+    details[0]["name"] = "changed"
+    assert details[1]["name"] == "Mysore silk"
+
+    # Strongly consistent reads are never shared.
+    run_concurrently(5, lambda: sarees.get_item(Key={"id": "s1"}, ConsistentRead=True))
+    assert len(gets) == 6
+
+    stats = read_coalescer.stats()
+    catalog = next(entry for entry in stats["by_operation"] if entry["key"] == "catalog sarees")
+    assert catalog == {"key": "catalog sarees", "calls": 20, "executions": 1, "coalesced": 19, "timeouts": 0,
+                       "coalescing_ratio": 0.95}
+    get_item = next(entry for entry in stats["by_operation"] if entry["key"] == "GetItem sarees")
+    assert (get_item["executions"], get_item["coalesced"]) == (1, 19)
+    assert stats["in_flight"] == 0
+
+
+def test_followers_share_errors_and_stop_waiting_after_the_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(1)
+        raise ValueError("backend down")
+
+    outcomes = []
+
+    def call():
+        try:
+            flight.do("key", failing, timeout=5)
+        except ValueError as error:
+            outcomes.append(str(error))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    while not flight.stats()["in_flight"]:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert outcomes == ["backend down"] * 3
+
+    # A follower that times out makes its own call.
+    stuck = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("slow", lambda: stuck.wait(1) or "late"))
+    leader.start()
+    while not flight.stats()["in_flight"]:
+        time.sleep(0.001)
+    assert flight.do("slow", lambda: "own", timeout=0.01) == "own"
+    stuck.set()
+    leader.join()
+    totals = flight.stats()["totals"]
+    assert totals["timeouts"] == 1
+    assert totals["calls"] == 5 and totals["executions"] == 3
+
+
+def test_read_coalescing_stats_are_admin_only(client, login):
+    manager_headers = login("sfmanager@example.com", "manager")
+    admin_headers = login("sfadmin@example.com", "admin")
+
+    assert client.get("/admin/read-coalescing", headers=manager_headers).status_code == 403
+    response = client.get("/admin/read-coalescing", headers=admin_headers)
+    assert response.status_code == 200
+    assert {"since", "in_flight", "totals", "by_operation"} <= set(response.json())
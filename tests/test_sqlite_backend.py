@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+from src.config import get_settings
+from src.services.backends import sqlite
+from src.services.backends.sqlite import SQLiteDatabase
+from src.services.user_service import UserService
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "couture.db"), pool_size=2)
+    yield database
+    database.close()
+
+
+def test_items_round_trip_and_persist(database, tmp_path):
+    table = database.Table("sarees")
+    table.put_item(Item={"id": "s1", "name": "Mysore Silk", "price": Decimal("149.99"),
+                         "tags": {"silk"}, "details": {"weave": ["zari", 2]}, "featured": True, "notes": None})
+    table.update_item(Key={"id": "s1"}, UpdateExpression="SET price = price + :p ADD tags :t",
+                      ExpressionAttributeValues={":p": Decimal("10"), ":t": {"handwoven"}})
+
+    reopened = SQLiteDatabase(database.path)
+    item = reopened.Table("sarees").get_item(Key={"id": "s1"})["Item"]
+    reopened.close()
+    assert item == {"id": "s1", "name": "Mysore Silk", "price": Decimal("159.99"), "tags": {"silk", "handwoven"},
+                    "details": {"weave": ["zari", Decimal(2)]}, "featured": True, "notes": None}
+
+
+def test_gsi_queries_use_sql_indexes(database):
+    table = database.Table("expenses")
+    for day in range(1, 6):
+        table.put_item(Item={"id": f"e{day}", "status": "pending", "category": "general",
+                             "submitted_by_user_id": "u1", "submission_date": f"2025-01-0{day}T00:00:00Z"})
+
+    params = {
+        "IndexName": "status-submission_date",
+        "KeyConditionExpression": "#s = :s AND submission_date BETWEEN :from AND :to",
+        "ExpressionAttributeNames": {"#s": "status"},
+        "ExpressionAttributeValues": {":s": "pending", ":from": "2025-01-02", ":to": "2025-01-05"},
+        "ScanIndexForward": False,
+        "Limit": 2,
+    }
+    first = table.query(**params)
+    second = table.query(**params, ExclusiveStartKey=first["LastEvaluatedKey"])
+    assert [item["id"] for item in first["Items"] + second["Items"]] == ["e4", "e3", "e2"]
+
+    with database.read() as connection:
+        plan = connection.execute(
+            'EXPLAIN QUERY PLAN SELECT "item" FROM "expenses" WHERE "status-submission_date#hash" = ? '
+            'ORDER BY "status-submission_date#range"', ("pending",)
+        ).fetchall()
+    assert any("expenses:status-submission_date" in row[-1] for row in plan)
+
+
+def test_transactions_roll_back_as_a_whole(database):
+    sarees, expenses = database.Table("sarees"), database.Table("expenses")
+    sarees.put_item(Item={"id": "s1"})
+    with pytest.raises(ClientError) as error:
+        database.transact_write_items(TransactItems=[
+            {"Put": {"TableName": "expenses", "Item": {"id": "x1"}}},
+            {"Delete": {"TableName": "sarees", "Key": {"id": "s1"}, "ConditionExpression": "attribute_not_exists(id)"}},
+        ])
+    assert error.value.response["Error"]["Code"] == "TransactionCanceledException"
+    assert "Item" not in expenses.get_item(Key={"id": "x1"})
+    assert sarees.item_count == 1
+
+
+def test_services_run_on_the_sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setitem(get_settings(), "storage_backend", "sqlite")
+    monkeypatch.setitem(get_settings(), "sqlite_path", str(tmp_path / "service.db"))
+    sqlite.get_sqlite_database.cache_clear()
+    try:
+        users = UserService()
+        users.create_user({"id": "u1", "email": "owner@example.com", "role": "admin"})
+        assert users.get_user_by_email("owner@example.com")["id"] == "u1"
+        assert users.get_user_by_email("nobody@example.com") is None
+    finally:
+        sqlite.get_sqlite_database().close()
+        sqlite.get_sqlite_database.cache_clear()
@@ -0,0 +1,57 @@
+from fastapi import status
+from src.config import get_settings
+from src.security import hash_password
+from src.lifespan import startup_state
+from src.services.capacity import capacity_tracker
+from src.services.catalog_feed import get_catalog_feed
+from src.services.saree_service import SareeService
+from src.services.user_service import UserService, user_cache
+
+
+def calls(operation_key):
+    return sum(row["calls"] for row in capacity_tracker.report(limit=100)["by_operation"] if row["key"] == operation_key)
+
+
+def test_ready_only_after_lifespan_warmup(client, monkeypatch):
+    monkeypatch.setitem(get_settings(), "cache_preload_enabled", True)
+    monkeypatch.setattr(user_cache, "ttl_seconds", 60.0)
+    UserService().create_user({"id": "u1", "email": "warm@example.com", "role": "staff"})
+    startup_state.reset()
+    assert client.get("/health/ready").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    with client:  # runs the lifespan
+        response = client.get("/health/ready")
+        assert response.status_code == status.HTTP_200_OK
+        startup = response.json()["startup"]
+        assert list(startup["phases"]) == ["storage", "background", "caches", "openapi"]
+        assert all(phase["ok"] for phase in startup["phases"].values())
+        assert startup["phases"]["caches"]["result"] == {"users": 1, "sarees": 0}
+        assert user_cache.get("warm@example.com")["id"] == "u1"
+        # The catalog feed is built from a scan on its writer thread.
+        assert get_catalog_feed().flush(timeout=5)
+        assert client.get("/catalog/feed.json").status_code == status.HTTP_200_OK
+
+
+def test_user_and_catalog_caches_are_invalidated_by_writes(client, monkeypatch):
+    monkeypatch.setattr(user_cache, "ttl_seconds", 60.0)
+    users, sarees = UserService(), SareeService()
+    users.create_user({"id": "u2", "email": "cached@example.com", "role": "staff",
+                       "hashed_password": hash_password("password")})
+    assert users.get_user_by_email("cached@example.com")["role"] == "staff"
+    assert users.get_user_by_email("cached@example.com")["role"] == "staff"
+    assert calls("Query users") == 1
+
+    users.update_item(Key={"id": "u2"}, UpdateExpression="SET #r = :r",
+                      ExpressionAttributeNames={"#r": "role"}, ExpressionAttributeValues={":r": "manager"})
+    assert users.get_user_by_email("cached@example.com")["role"] == "manager"
+    assert calls("Query users") == 2
+    # Password checks always read the table.
+    response = client.post("/token", data={"username": "cached@example.com", "password": "password"})
+    assert response.status_code == status.HTTP_200_OK
+    assert calls("Query users") == 3
+
+    assert sarees.list_sarees() == [] and sarees.list_sarees() == []
+    assert calls("Scan sarees") == 1
+    sarees.put_item(Item={"id": "s1", "name": "Kasavu"})
+    assert [saree["id"] for saree in sarees.list_sarees()] == ["s1"]
+    assert calls("Scan sarees") == 2
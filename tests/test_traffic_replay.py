@@ -0,0 +1,94 @@
+import glob
+import threading
+
+import pytest
+from starlette.middleware import Middleware
+
+from src.main import app
+from src.middleware import TrafficCaptureMiddleware
+from src.services.traffic import TrafficRecorder, sanitize_body
+from scripts.replay_traffic import ReplayAuth, read_traces, replay, schedule
+
+
+@pytest.fixture
+def capture(tmp_path):
+    """Installs the capture middleware (inside the request context middleware) for one test."""
+    recorder = TrafficRecorder(str(tmp_path / "traffic.log"), max_bytes=1500, backups=20)
+    app.user_middleware.append(Middleware(TrafficCaptureMiddleware, recorder=recorder))
+    app.middleware_stack = None
+    yield recorder
+    app.user_middleware.pop()
+    app.middleware_stack = None
+    recorder.close()
+
+
+def test_captured_traffic_is_sanitized_and_replays(capture, client):
+    client.post("/users/register", json={"email": "priya@example.com", "password": "s3cret!", "role": "staff"})
+    token = client.post("/token", data={"username": "priya@example.com", "password": "s3cret!"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for n in range(5):
+        client.post("/expenses/", headers=headers,
+                    json={"description": "Taxi to Priya's weaver", "amount": 12.5 + n, "category": "operational"})
+    client.get("/expenses/mine", headers=headers, params={"status": "pending", "limit": 10})
+
+    assert capture.flush(timeout=5)
+    logs = glob.glob(capture.path + "*")
+    assert any(path.endswith(".gz") for path in logs)  # rotated and compressed
+    traces = read_traces(logs)
+    assert [trace["route"] for trace in traces] == ["/users/register", "/token"] + ["/expenses/"] * 5 + ["/expenses/mine"]
+    captured = str(traces)
+    assert "priya" not in captured.lower() and "s3cret" not in captured and "Taxi" not in captured
+
+    expense = traces[2]
+    assert expense["role"] == "staff" and expense["status"] == 201 and expense["format"] == "json"
+    assert expense["body"] == {"description": "x" * 22, "amount": 12.5, "category": "operational"}
+    assert traces[-1]["query"] == {"status": "pending", "limit": "10"}
+    assert traces[1]["format"] is None and set(traces[1]["body"]) == {"bytes"} and traces[1]["role"] is None
+
+    auth = ReplayAuth(client, {"staff": "priya@example.com"}, "s3cret!")
+    result = replay(client, traces, speed=100.0, auth=auth, max_gap=0.01, concurrency=4)
+    assert result["requests"] == len(traces)
+    assert result["error_rate"] == 0.0
+    assert result["statuses"] == {"200": 3, "201": 5}  # a fresh user was registered
+
+
+def test_sensitive_fields_are_masked_whatever_they_look_like():
+    form = b"username=a%40b.com&password=20241999"
+    assert sanitize_body("application/x-www-form-urlencoded", form) == (
+        "form", {"username": "x" * 7, "password": "x" * 8})
+    assert sanitize_body("application/x-www-form-urlencoded", form, route="/token") == (None, {"bytes": len(form)})
+    body = b'{"email": "9876543210", "password": 9876543210, "full_name": "2024-01-01", "amount": 12.5}'
+    assert sanitize_body("application/json", body) == (
+        "json", {"email": "x" * 10, "password": "x" * 10, "full_name": "x" * 10, "amount": 12.5})
+
+
+def test_schedule_compresses_idle_gaps_and_scales_by_speed():
+    traces = [{"ts": 0.0}, {"ts": 1.0}, {"ts": 3601.0}, {"ts": 3603.0}]
+    assert [offset for offset, _ in schedule(traces, speed=2.0, max_gap=10.0)] == [0.0, 0.5, 5.5, 6.5]
+
+
+def test_recording_queues_traces_and_drops_them_when_the_writer_falls_behind(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "traffic.log"), max_bytes=10_000, backups=1, queue_size=2)
+    writing = threading.Event()
+    release = threading.Event()
+    emit = recorder._handler.emit
+
+    def slow_emit(record):
+        writing.set()
+        release.wait(5)
+        emit(record)
+
+    recorder._handler.emit = slow_emit
+    try:
+        recorder.record({"ts": 0, "n": 0})
+        assert writing.wait(5)  # the writer thread holds the first trace
+        for n in range(1, 4):
+            recorder.record({"ts": n, "n": n})  # returns at once, even with the writer stuck
+        assert recorder.dropped == 1
+        assert not recorder.flush(timeout=0.05)
+        release.set()
+        assert recorder.flush(timeout=5)
+    finally:
+        release.set()
+        recorder.close()
+    assert [trace["n"] for trace in read_traces([recorder.path])] == [0, 1, 2]